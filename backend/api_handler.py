@@ -5,9 +5,20 @@ import requests # type: ignore
 import httpx # Add httpx import
 import json
 import re
+import time
+import uuid
+import contextlib
 import certifi # For SSL certificate bundle
 from typing import Dict, Optional, Tuple, Generator
 
+from backend.services.generation_scheduler import SCHEDULER
+from backend.utils.cancellation import StreamCancel
+from backend.utils.metrics import REGISTRY, Trace
+
+# While queued for a backend slot, stream_generate yields a "queued" event this
+# often, so a client disconnect closes the generator and frees its place in line
+QUEUE_KEEPALIVE_SECONDS = 1.0
+
 
 # Generation types that LogitShaper should treat as a regeneration of the
 # *current* turn rather than a new turn. Hard Regenerate (chat-bubble action
@@ -22,6 +33,17 @@ REGENERATION_GEN_TYPES: Tuple[str, ...] = (
 )
 
 
+def _build_tag_trie(tags) -> Dict:
+    """Build a character trie for ``tags``; complete tags are marked with a None key."""
+    root: Dict = {}
+    for tag in tags:
+        node = root
+        for char in tag:
+            node = node.setdefault(char, {})
+        node[None] = tag
+    return root
+
+
 class ThinkingTagFilter:
     """Streaming state machine that strips thinking/reasoning tags from model output.
 
@@ -30,7 +52,13 @@ class ThinkingTagFilter:
       - Gemma4: <|channel>thought...<channel|>
 
     Two states: NORMAL and INSIDE_THINKING.
-    Buffers partial tag prefixes to avoid false positives on characters like '<'.
+    Each token is scanned once by index against a precompiled tag trie. Only a
+    possible partial tag at the end of a token (at most MAX_TAG_LEN - 1 chars)
+    is held back, so the cost per token doesn't depend on how much text has
+    streamed before it.
+
+    With ``capture_reasoning=True`` the text inside the tags is collected
+    instead of discarded; drain it with ``take_reasoning()``.
     """
 
     OPEN_TAGS = ['<think>', '<thinking>', '<|channel>thought']
@@ -38,98 +66,99 @@ class ThinkingTagFilter:
     ALL_TAGS = OPEN_TAGS + CLOSE_TAGS
     MAX_TAG_LEN = max(len(t) for t in ALL_TAGS)  # 16 for '<|channel>thought'
 
+    _OPEN_TRIE = _build_tag_trie(OPEN_TAGS)
+    _CLOSE_TRIE = _build_tag_trie(CLOSE_TAGS)
+
     _STRIP_RE = re.compile(
         r'<think(?:ing)?>[\s\S]*?</think(?:ing)?>|<\|channel>thought[\s\S]*?<channel\|>',
         re.DOTALL,
     )
 
-    def __init__(self):
+    def __init__(self, capture_reasoning: bool = False):
         self._state = 'NORMAL'  # 'NORMAL' or 'INSIDE_THINKING'
-        self._buffer = ''
+        self._buffer = ''  # Unresolved partial tag carried over from the previous token
+        self.capture_reasoning = capture_reasoning
+        self._reasoning_parts = []
+
+    @staticmethod
+    def _match_tag(trie: Dict, text: str, start: int) -> int:
+        """Match a tag from ``trie`` at ``text[start]``.
 
-    def _is_prefix_of_any_tag(self, text: str, tags: list) -> bool:
-        """Check if text is a prefix of any tag in the list."""
-        for tag in tags:
-            if tag.startswith(text):
-                return True
-        return False
+        Returns the end index of a complete tag, -1 if ``text`` ends inside a
+        tag prefix (more input needed), or 0 if no tag starts here.
+        """
+        node = trie
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                return 0
+            if None in node:
+                return i + 1
+        return -1
 
     def process(self, token: str) -> str:
         """Feed a token in, get filtered text out. May return empty string."""
-        self._buffer += token
-        output = ''
-
-        while self._buffer:
-            if self._state == 'NORMAL':
-                # Look for potential open tag start
-                tag_pos = self._buffer.find('<')
-                if tag_pos == -1:
-                    # No '<' at all — emit everything
-                    output += self._buffer
-                    self._buffer = ''
-                else:
-                    # Emit everything before the '<'
-                    output += self._buffer[:tag_pos]
-                    self._buffer = self._buffer[tag_pos:]
-
-                    # Check if buffer matches a complete open tag
-                    matched_tag = None
-                    for tag in self.OPEN_TAGS:
-                        if self._buffer.startswith(tag):
-                            matched_tag = tag
-                            break
-
-                    if matched_tag:
-                        # Transition to INSIDE_THINKING, consume the tag
-                        self._buffer = self._buffer[len(matched_tag):]
-                        self._state = 'INSIDE_THINKING'
-                    elif self._is_prefix_of_any_tag(self._buffer, self.OPEN_TAGS):
-                        # Could be a partial open tag — wait for more tokens
-                        break
-                    else:
-                        # Not a tag prefix — emit the '<' and continue
-                        output += self._buffer[0]
-                        self._buffer = self._buffer[1:]
-
-            else:  # INSIDE_THINKING
-                # Look for potential close tag
-                tag_pos = self._buffer.find('<')
-                if tag_pos == -1:
-                    # No '<' — swallow everything
-                    self._buffer = ''
-                else:
-                    # Discard everything before the '<'
-                    self._buffer = self._buffer[tag_pos:]
-
-                    # Check if buffer matches a complete close tag
-                    matched_tag = None
-                    for tag in self.CLOSE_TAGS:
-                        if self._buffer.startswith(tag):
-                            matched_tag = tag
-                            break
-
-                    if matched_tag:
-                        # Transition back to NORMAL, consume the close tag
-                        self._buffer = self._buffer[len(matched_tag):]
-                        self._state = 'NORMAL'
-                    elif self._is_prefix_of_any_tag(self._buffer, self.CLOSE_TAGS):
-                        # Could be a partial close tag — wait for more tokens
-                        break
-                    else:
-                        # Not a close tag prefix — discard the '<' and continue swallowing
-                        self._buffer = self._buffer[1:]
+        text = self._buffer + token if self._buffer else token
+        self._buffer = ''
+        inside = self._state == 'INSIDE_THINKING'
+        visible = []
+        reasoning = self._reasoning_parts if self.capture_reasoning else None
+
+        pos = 0
+        end = len(text)
+        while pos < end:
+            tag_pos = text.find('<', pos)
+            if tag_pos == -1:
+                tag_pos = end
+            if tag_pos > pos:
+                if not inside:
+                    visible.append(text[pos:tag_pos])
+                elif reasoning is not None:
+                    reasoning.append(text[pos:tag_pos])
+            if tag_pos == end:
+                break
+
+            tag_end = self._match_tag(self._CLOSE_TRIE if inside else self._OPEN_TRIE, text, tag_pos)
+            if tag_end > 0:
+                # Complete tag: switch state and consume it
+                inside = not inside
+                pos = tag_end
+            elif tag_end < 0:
+                # Could be a partial tag — wait for more tokens
+                self._buffer = text[tag_pos:]
+                break
+            else:
+                # Not a tag — the '<' is ordinary text
+                if not inside:
+                    visible.append('<')
+                elif reasoning is not None:
+                    reasoning.append('<')
+                pos = tag_pos + 1
 
-        return output
+        self._state = 'INSIDE_THINKING' if inside else 'NORMAL'
+        return ''.join(visible)
+
+    @property
+    def pending(self) -> str:
+        return self._buffer
+
+    def take_reasoning(self) -> str:
+        """Return and clear the reasoning text captured since the last call."""
+        if not self._reasoning_parts:
+            return ''
+        reasoning = ''.join(self._reasoning_parts)
+        self._reasoning_parts = []
+        return reasoning
 
     def flush(self) -> str:
         """End-of-stream cleanup. Emit remaining buffer if NORMAL, discard if INSIDE_THINKING."""
+        result = self._buffer
+        self._buffer = ''
         if self._state == 'NORMAL':
-            result = self._buffer
-            self._buffer = ''
             return result
-        else:
-            self._buffer = ''
-            return ''
+        if self.capture_reasoning and result:
+            self._reasoning_parts.append(result)
+        return ''
 
     @staticmethod
     def strip_thinking_tags(text: str) -> str:
@@ -138,9 +167,12 @@ class ThinkingTagFilter:
 
 
 class ApiHandler:
-    def __init__(self, logger):
+    def __init__(self, logger, content_filter_manager=None):
         self.logger = logger
         self._compression_service = None
+        self._prompt_assembly_cache = None
+        # ContentFilterManager (or a LazyHandler for one); None disables server-side filtering
+        self._content_filter_manager = content_filter_manager
 
     @property
     def compression_service(self):
@@ -150,8 +182,72 @@ class ApiHandler:
             self._compression_service = CompressionService(self.logger)
         return self._compression_service
 
-    def _apply_thinking_filter(self, chunk: bytes, thinking_filter: ThinkingTagFilter) -> Optional[bytes]:
-        """Apply thinking tag filter to a streaming SSE chunk.
+    @property
+    def prompt_assembly_cache(self):
+        """Lazy-init per-session prompt assembly cache, shared across requests."""
+        if self._prompt_assembly_cache is None:
+            from backend.services.prompt_assembly_service import PromptAssemblyCache
+            self._prompt_assembly_cache = PromptAssemblyCache()
+        return self._prompt_assembly_cache
+
+    def _load_generation_context(self, **kwargs):
+        """Load the generation pre-flight context in one DB session (see generation_context_loader)."""
+        from backend.services.generation_context_loader import GenerationContext, load_generation_context
+        if not kwargs.get('chat_session_uuid') and not kwargs.get('character_uuid'):
+            return GenerationContext()
+        try:
+            from backend.database import SessionLocal
+            with SessionLocal() as db:
+                context = load_generation_context(db, **kwargs)
+        except Exception as load_err:
+            self.logger.log_warning(f"Generation pre-flight load failed, using payload: {load_err}")
+            return GenerationContext()
+        for error in context.errors:
+            self.logger.log_warning(f"Generation pre-flight: {error}")
+        self.logger.log_step(
+            f"Generation pre-flight loaded in {context.load_ms:.1f}ms ({context.query_count} queries)"
+        )
+        return context
+
+    def _record_lore_activations(self, context, matched_entries, character_uuid: str, message_number: int) -> None:
+        """Activate newly matched lore entries (sticky/cooldown/delay) for the session."""
+        to_activate = [
+            entry for entry in matched_entries
+            if entry.get('id') and entry.get('id') not in context.cooldown_lore_ids
+        ]
+        if not to_activate:
+            return
+        try:
+            from backend.database import SessionLocal
+            from backend.services.lore_activation_tracker import LoreActivationTracker
+            with SessionLocal() as db:
+                activation_tracker = LoreActivationTracker(db, context.chat_session_uuid)
+                for entry in to_activate:
+                    extensions = entry.get('extensions', {})
+                    activation_tracker.activate(
+                        lore_entry_id=entry['id'],
+                        character_uuid=character_uuid,
+                        message_number=message_number,
+                        sticky=extensions.get('sticky', 2),
+                        cooldown=extensions.get('cooldown', 0),
+                        delay=extensions.get('delay', 0)
+                    )
+        except Exception as tracker_error:
+            self.logger.log_warning(f"Could not record lore activations: {tracker_error}")
+
+    def _create_content_filter(self):
+        """Create a streaming content filter from the active filter packages, if any."""
+        if self._content_filter_manager is None:
+            return None
+        try:
+            from backend.utils.lazy_loading import resolve_lazy
+            return resolve_lazy(self._content_filter_manager).get_stream_filter()
+        except Exception as filter_err:
+            self.logger.log_warning(f"Content filter unavailable, streaming unfiltered: {filter_err}")
+            return None
+
+    def _apply_thinking_filter(self, chunk: bytes, thinking_filter: ThinkingTagFilter, content_filter=None) -> Optional[bytes]:
+        """Apply thinking tag filter (and content filter, if given) to a streaming SSE chunk.
 
         Returns filtered chunk bytes, or None if the chunk should be swallowed entirely.
         """
@@ -210,8 +306,17 @@ class ApiHandler:
                 output_lines.append(line)
                 continue
 
-            # Apply the thinking filter
+            # Apply the thinking filter, then content substitutions to what remains visible
             filtered = thinking_filter.process(text)
+            if content_filter is not None and filtered:
+                filtered = content_filter.process(filtered)
+
+            # Pass-through mode: reasoning goes out as its own SSE event ahead of the content
+            if thinking_filter.capture_reasoning:
+                reasoning = thinking_filter.take_reasoning()
+                if reasoning:
+                    output_lines.append(f"data: {json.dumps({'reasoning_content': reasoning})}")
+                    output_lines.append('')
 
             if not filtered:
                 # Content was swallowed (inside thinking tags) — skip this data line
@@ -460,8 +565,10 @@ class ApiHandler:
     #
     #    return text
 
-    async def generate_with_config(self, api_config: Dict, generation_params: Dict) -> Dict:
-        """Generate a response from the API without streaming."""
+    async def generate_with_config(
+        self, api_config: Dict, generation_params: Dict, priority: Optional[str] = None,
+    ) -> Dict:
+        """Generate a response from the API without streaming (holds a scheduler slot for the call)."""
         try:
             from backend.api_provider_adapters import get_provider_adapter
             
@@ -521,8 +628,9 @@ class ApiHandler:
             # --- End payload construction ---
             self.logger.log_step(f"Making non-streaming request to {endpoint}")
 
-            async with httpx.AsyncClient(verify=certifi.where()) as client:
-                response = await client.post(endpoint, headers=headers, json=data, timeout=30)
+            async with SCHEDULER.slot_async(api_config, priority):
+                async with httpx.AsyncClient(verify=certifi.where()) as client:
+                    response = await client.post(endpoint, headers=headers, json=data, timeout=30)
 
             if response.status_code != 200:
                 raise ValueError(f"API returned error {response.status_code}: {response.text}")
@@ -547,6 +655,9 @@ class ApiHandler:
 
             # Strip thinking tags from non-streaming responses
             content = ThinkingTagFilter.strip_thinking_tags(content)
+            content_filter = self._create_content_filter()
+            if content_filter is not None:
+                content = content_filter.process(content) + content_filter.flush()
 
             return {
                 'content': content,
@@ -559,8 +670,20 @@ class ApiHandler:
             self.logger.log_error(traceback.format_exc())
             return {'error': str(e)}
 
-    def stream_generate(self, request_data: Dict) -> Generator[bytes, None, None]:
-        """Stream generate tokens from the API."""
+    def stream_generate(
+        self, request_data: Dict, cancel: Optional[StreamCancel] = None,
+    ) -> Generator[bytes, None, None]:
+        """Stream generate tokens from the API.
+
+        ``cancel`` is fired by the endpoint on client disconnect: a queued
+        request leaves the scheduler queue, a running one closes the upstream
+        stream and asks the provider to abort.
+        """
+        preflight_start = time.perf_counter()
+        # Stage timeline for /api/metrics/traces; stages never span a yield
+        trace = Trace("generation")
+        outcome = "cancelled"  # stays so if the client disconnects mid-stream
+        ticket = None  # backend slot from the generation scheduler
         try:
             self.logger.log_step("Backend: Entered api_handler.stream_generate")
             from backend.api_provider_adapters import get_provider_adapter
@@ -576,6 +699,7 @@ class ApiHandler:
             templateId = api_config.get('templateId')  # Use templateId, not template
             template_format = api_config.get('template_format')  # Get template format information
             original_generation_settings = api_config.get('generation_settings', {})
+            trace.attrs.update(provider=provider, generation_type=generation_params.get('generation_type'))
  
             # Prepare generation settings for the adapter
             current_generation_settings = original_generation_settings.copy()
@@ -649,31 +773,26 @@ class ApiHandler:
             chat_history = generation_params.get('chat_history', [])
             current_message = generation_params.get('current_message', '')
 
-            # ── Phase 3: Load chat history from SQLite ────────────────────────
+            # ── Pre-flight: one DB round-trip for everything generation reads ──
             # When backend_assembly is enabled and the frontend omits chat_history
-            # (normal generation), load messages directly from the database.
+            # (normal generation), messages are loaded from the database.
             # If the frontend sends chat_history (continuation, regen, etc.),
             # use the payload version as-is.
             backend_assembly = generation_params.get('backend_assembly', False)
-            if backend_assembly and not chat_history:
-                chat_session_uuid_for_history = generation_params.get('chat_session_uuid')
-                if chat_session_uuid_for_history:
-                    try:
-                        from backend.database import SessionLocal
-                        from backend.services.chat_service import get_chat_messages_for_generation
-                        db_hist = SessionLocal()
-                        try:
-                            chat_history = get_chat_messages_for_generation(
-                                db_hist, chat_session_uuid_for_history
-                            )
-                            self.logger.log_step(
-                                f"Phase 3: Loaded {len(chat_history)} messages from DB "
-                                f"(session {chat_session_uuid_for_history[:8]}…)"
-                            )
-                        finally:
-                            db_hist.close()
-                    except Exception as hist_err:
-                        self.logger.log_warning(f"Phase 3: DB history load failed, using payload: {hist_err}")
+            chat_session_uuid = generation_params.get('chat_session_uuid')
+            character_uuid = ((character_data or {}).get('data') or {}).get('character_uuid')
+            with trace.stage("preflight_db"):
+                generation_context = self._load_generation_context(
+                    chat_session_uuid=chat_session_uuid,
+                    character_uuid=character_uuid,
+                    load_history=bool(backend_assembly and not chat_history),
+                )
+            if generation_context.chat_history is not None:
+                chat_history = generation_context.history_list()
+                self.logger.log_step(
+                    f"Phase 3: Loaded {len(chat_history)} messages from DB "
+                    f"(session {chat_session_uuid[:8]}…)"
+                )
 
             # Extract current message from chat_history if not provided explicitly
             # The last message in chat_history should be the user's current message
@@ -693,131 +812,49 @@ class ApiHandler:
             active_sticky_entries = []
             token_budget = 0
 
-            if character_data and character_data.get('data') and character_data.get('data', {}).get('character_uuid'):
+            if character_uuid:
                 try:
                     from backend.lore_handler import LoreHandler
 
                     lore_handler = LoreHandler(self.logger)
-                    character_uuid = character_data.get('data', {}).get('character_uuid')
+                    lore_entries = generation_context.lore_entry_list()
 
-                    if character_uuid:
-                        self.logger.log_step(f"Loading lore for character UUID: {character_uuid}")
+                    if lore_entries:
+                        self.logger.log_step(f"Loaded {len(lore_entries)} lore entries from database")
 
-                        try:
-                            from backend.database import SessionLocal
-                            from backend.sql_models import Character as CharacterModel, LoreBook as LoreBookModel, LoreEntry as LoreEntryModel
-                            import json
+                        active_lore_ids = generation_context.active_lore_ids
+                        if active_lore_ids:
+                            active_sticky_entries = [e for e in lore_entries if e.get('id') in active_lore_ids]
+                            self.logger.log_step(f"Found {len(active_sticky_entries)} active sticky lore entries")
 
-                            db = SessionLocal()
-                            try:
-                                character_db = db.query(CharacterModel).filter(
-                                    CharacterModel.character_uuid == character_uuid
-                                ).first()
-
-                                if character_db and character_db.lore_books:
-                                    lore_book = character_db.lore_books[0]
-                                    lore_entries = []
-
-                                    for db_entry in lore_book.entries:
-                                        if db_entry.enabled:
-                                            extensions = {}
-                                            if db_entry.extensions_json:
-                                                try:
-                                                    extensions = json.loads(db_entry.extensions_json) if isinstance(db_entry.extensions_json, str) else db_entry.extensions_json
-                                                except:
-                                                    extensions = {}
-
-                                            entry_dict = {
-                                                'id': db_entry.id,
-                                                'content': db_entry.content,
-                                                'keys': json.loads(db_entry.keys_json) if db_entry.keys_json else [],
-                                                'secondary_keys': json.loads(db_entry.secondary_keys_json) if db_entry.secondary_keys_json else [],
-                                                'enabled': db_entry.enabled,
-                                                'position': db_entry.position,
-                                                'insertion_order': db_entry.insertion_order,
-                                                'case_sensitive': extensions.get('case_sensitive', False),
-                                                'use_regex': False,
-                                                'name': db_entry.comment or '',
-                                                'has_image': bool(db_entry.image_uuid),
-                                                'image_uuid': db_entry.image_uuid or '',
-                                                'priority': extensions.get('priority', 100),
-                                                'constant': extensions.get('constant', False),
-                                                'selective': db_entry.selective,
-                                                'extensions': {
-                                                    'match_whole_words': extensions.get('match_whole_words', True),
-                                                    'sticky': extensions.get('sticky', 2),
-                                                    'cooldown': extensions.get('cooldown', 0),
-                                                    'delay': extensions.get('delay', 0),
-                                                    'scan_depth': extensions.get('scan_depth', None),
-                                                }
-                                            }
-                                            lore_entries.append(entry_dict)
-
-                                    if lore_entries:
-                                        self.logger.log_step(f"Loaded {len(lore_entries)} lore entries from database")
-
-                                        chat_session_uuid = generation_params.get('chat_session_uuid')
-                                        activation_tracker = None
-
-                                        if chat_session_uuid:
-                                            try:
-                                                from backend.services.lore_activation_tracker import LoreActivationTracker
-                                                activation_tracker = LoreActivationTracker(db, chat_session_uuid)
-
-                                                active_lore_ids = activation_tracker.get_active_lore_entry_ids()
-                                                if active_lore_ids:
-                                                    active_sticky_entries = [e for e in lore_entries if e.get('id') in active_lore_ids]
-                                                    self.logger.log_step(f"Found {len(active_sticky_entries)} active sticky lore entries")
-                                            except Exception as tracker_error:
-                                                self.logger.log_warning(f"Could not initialize lore activation tracker: {tracker_error}")
-
-                                        character_book_data = character_data.get('data', {}).get('character_book', {})
-                                        scan_depth = character_book_data.get('scan_depth', 3)
-
-                                        matched_entries = lore_handler.match_lore_entries(
-                                            lore_entries=lore_entries,
-                                            chat_messages=chat_history,
-                                            scan_depth=scan_depth
-                                        )
-
-                                        if matched_entries and activation_tracker:
-                                            message_number = len(chat_history)
-                                            for entry in matched_entries:
-                                                entry_id = entry.get('id')
-                                                if entry_id and not activation_tracker.is_in_cooldown(entry_id):
-                                                    sticky = entry.get('extensions', {}).get('sticky', 2)
-                                                    cooldown = entry.get('extensions', {}).get('cooldown', 0)
-                                                    delay = entry.get('extensions', {}).get('delay', 0)
-                                                    activation_tracker.activate(
-                                                        lore_entry_id=entry_id,
-                                                        character_uuid=character_uuid,
-                                                        message_number=message_number,
-                                                        sticky=sticky,
-                                                        cooldown=cooldown,
-                                                        delay=delay
-                                                    )
-
-                                        token_budget = character_book_data.get('token_budget', 0)
-
-                                        # Note lore info in context window
-                                        if (matched_entries or active_sticky_entries) and context_window is not None and isinstance(context_window, dict):
-                                            total_active = len(set([e.get('id') for e in matched_entries + active_sticky_entries if e.get('id')]))
-                                            context_window['lore_info'] = {
-                                                'matched_count': len(matched_entries),
-                                                'sticky_count': len(active_sticky_entries),
-                                                'total_count': total_active,
-                                                'entry_keys': [entry.get('keys', [''])[0] for entry in matched_entries if entry.get('keys')]
-                                            }
-                                    else:
-                                        self.logger.log_step("No enabled lore entries found for character")
-                                else:
-                                    self.logger.log_step("Character not found in database or has no lore book")
-                            finally:
-                                db.close()
-                        except Exception as db_error:
-                            self.logger.log_error(f"Error loading lore from database: {str(db_error)}")
+                        character_book_data = character_data.get('data', {}).get('character_book', {})
+                        scan_depth = character_book_data.get('scan_depth', 3)
+
+                        with trace.stage("lore_match"):
+                            matched_entries = lore_handler.match_lore_entries(
+                                lore_entries=lore_entries,
+                                chat_messages=chat_history,
+                                scan_depth=scan_depth
+                            )
+
+                        if matched_entries and chat_session_uuid:
+                            self._record_lore_activations(
+                                generation_context, matched_entries, character_uuid, len(chat_history),
+                            )
+
+                        token_budget = character_book_data.get('token_budget', 0)
+
+                        # Note lore info in context window
+                        if (matched_entries or active_sticky_entries) and context_window is not None and isinstance(context_window, dict):
+                            total_active = len(set([e.get('id') for e in matched_entries + active_sticky_entries if e.get('id')]))
+                            context_window['lore_info'] = {
+                                'matched_count': len(matched_entries),
+                                'sticky_count': len(active_sticky_entries),
+                                'total_count': total_active,
+                                'entry_keys': [entry.get('keys', [''])[0] for entry in matched_entries if entry.get('keys')]
+                            }
                     else:
-                        self.logger.log_step("No character UUID provided, skipping lore matching")
+                        self.logger.log_step("No enabled lore entries found for character")
                 except Exception as e:
                     self.logger.log_error(f"Error processing lore: {str(e)}")
 
@@ -829,28 +866,16 @@ class ApiHandler:
             # (backend_assembly was already read near line 635 for Phase 3 DB loading)
 
             if backend_assembly:
-                from backend.services.prompt_assembly_service import PromptAssemblyService
+                from backend.services.prompt_assembly_service import (
+                    PROMPT_LAYOUT_CLASSIC,
+                    PROMPT_LAYOUT_PREFIX_STABLE,
+                    PromptAssemblyService,
+                )
 
-                assembler = PromptAssemblyService(self.logger)
+                assembler = PromptAssemblyService(self.logger, cache=self.prompt_assembly_cache)
 
-                # Load session notes from DB if available
-                db_session_notes = None  # None = not loaded; '' = intentionally cleared
-                chat_session_uuid = generation_params.get('chat_session_uuid')
-                if chat_session_uuid:
-                    try:
-                        from backend.database import SessionLocal
-                        from backend.sql_models import ChatSession
-                        db_sn = SessionLocal()
-                        try:
-                            session_row = db_sn.query(ChatSession).filter(
-                                ChatSession.chat_session_uuid == chat_session_uuid
-                            ).first()
-                            if session_row:
-                                db_session_notes = session_row.session_notes or ''
-                        finally:
-                            db_sn.close()
-                    except Exception as sn_err:
-                        self.logger.log_warning(f"Could not load session notes: {sn_err}")
+                # Session notes come from the pre-flight context
+                db_session_notes = generation_context.session_notes  # None = not loaded; '' = intentionally cleared
 
                 # DB value takes precedence when successfully loaded (even if empty).
                 # Only fall back to payload when DB lookup was skipped or failed.
@@ -860,43 +885,61 @@ class ApiHandler:
                 message_count = len(chat_history)
 
                 # Backend compression (Phase 2) — replaces Phase 1 extract_block bridge
-                compression_result = self.compression_service.compress_if_needed(
-                    chat_history=chat_history,
-                    compression_level=generation_params.get('compression_level', 'none'),
-                    message_count=message_count,
-                    api_config=api_config,
-                    character_name=(character_data or {}).get('data', {}).get('name', 'Character'),
-                    user_name=user_name,
-                    chat_session_uuid=chat_session_uuid,
-                )
+                with trace.stage("compression"):
+                    compression_result = self.compression_service.compress_if_needed(
+                        chat_history=chat_history,
+                        compression_level=generation_params.get('compression_level', 'none'),
+                        message_count=message_count,
+                        api_config=api_config,
+                        character_name=(character_data or {}).get('data', {}).get('name', 'Character'),
+                        user_name=user_name,
+                        chat_session_uuid=chat_session_uuid,
+                        priority=generation_params.get('priority'),
+                    )
 
                 user_persona = generation_params.get('user_persona', '')
 
                 # Template format from api_config (frontend sends active template fields)
                 template_format = api_config.get('template_format')
 
-                assembly_result = assembler.assemble(
-                    chat_history=compression_result.messages_for_formatting,
-                    character_data=character_data,
-                    template_format=template_format,
-                    user_name=user_name,
-                    user_persona=user_persona,
-                    compression_level=generation_params.get('compression_level', 'none'),
-                    message_count=message_count,
-                    compressed_context=compression_result.compressed_context,
-                    session_notes=session_notes_final,
-                    system_instruction=system_instruction,
-                    continuation_text=generation_params.get('continuation_text', ''),
-                    matched_lore=matched_entries,
-                    active_sticky_lore=active_sticky_entries,
-                    token_budget=token_budget,
-                    is_kobold=is_kobold,
-                )
+                with trace.stage("assembly"):
+                    assembly_result = assembler.assemble(
+                        chat_history=compression_result.messages_for_formatting,
+                        character_data=character_data,
+                        template_format=template_format,
+                        user_name=user_name,
+                        user_persona=user_persona,
+                        compression_level=generation_params.get('compression_level', 'none'),
+                        message_count=message_count,
+                        compressed_context=compression_result.compressed_context,
+                        session_notes=session_notes_final,
+                        system_instruction=system_instruction,
+                        continuation_text=generation_params.get('continuation_text', ''),
+                        matched_lore=matched_entries,
+                        active_sticky_lore=active_sticky_entries,
+                        token_budget=token_budget,
+                        is_kobold=is_kobold,
+                        chat_session_uuid=chat_session_uuid,
+                        prompt_layout=(
+                            PROMPT_LAYOUT_PREFIX_STABLE
+                            if current_generation_settings.get('prefix_stable_prompt')
+                            else PROMPT_LAYOUT_CLASSIC
+                        ),
+                    )
 
                 prompt = assembly_result.prompt
                 memory = assembly_result.memory
                 stop_sequence = assembly_result.stop_sequences
 
+                prefix_reuse = assembly_result.debug_info.get('prefix_reuse')
+                if prefix_reuse:
+                    trace.attrs['prefix_reuse_ratio'] = prefix_reuse['ratio']
+                    self.logger.log_step(
+                        f"Prompt prefix reuse ({assembly_result.debug_info['prompt_layout']}): "
+                        f"{prefix_reuse['reused_chars']}/{prefix_reuse['total_chars']} chars "
+                        f"({prefix_reuse['ratio']:.0%})"
+                    )
+
                 self.logger.log_step(
                     f"Backend assembly complete: prompt={len(prompt)} chars, "
                     f"memory={len(memory)} chars, stops={stop_sequence}"
@@ -991,7 +1034,7 @@ class ApiHandler:
                         if template_format:
                             # Template-aware path: use PromptAssemblyService helpers
                             from backend.services.prompt_assembly_service import (
-                                PromptAssemblyService, replace_variables
+                                PromptAssemblyService, render_format
                             )
                             _asm = PromptAssemblyService(self.logger)
 
@@ -1014,7 +1057,7 @@ class ApiHandler:
                             # Post-history wrapped in template user format
                             if post_history:
                                 user_fmt = template_format.get('userFormat', '{{content}}')
-                                wrapped_post = replace_variables(user_fmt, {
+                                wrapped_post = render_format(user_fmt, {
                                     'content': post_history,
                                     'char': char_name,
                                     'user': user_name,
@@ -1162,8 +1205,10 @@ class ApiHandler:
             logit_shaper_enabled = current_generation_settings.get('logit_shaper', False)
             if is_kobold and chat_session_uuid and logit_shaper_enabled:
                 try:
+                    from backend.database import SessionLocal
                     from backend.logit_shaper import get_or_create_shaper
-                    logit_shaper = get_or_create_shaper(chat_session_uuid)
+                    # Restores from the session's snapshot (or its messages) after a restart
+                    logit_shaper = get_or_create_shaper(chat_session_uuid, session_factory=SessionLocal)
                     shaper_bans = logit_shaper.get_banned_tokens()
                     if shaper_bans:
                         existing_bans = current_generation_settings.get('banned_tokens', [])
@@ -1174,15 +1219,44 @@ class ApiHandler:
                     self.logger.log_warning(f"LogitShaper pre-gen error: {shaper_err}")
             # ── End LogitShaper pre-gen ───────────────────────────────────
 
+            # ── Scheduler: wait for a slot on this backend ───────────────
+            ticket = SCHEDULER.submit(api_config, generation_params.get('priority'))
+            with cancel.on_cancel(ticket.cancel) if cancel is not None else contextlib.nullcontext():
+                while not ticket.wait(QUEUE_KEEPALIVE_SECONDS):
+                    if cancel is not None and cancel.cancelled:
+                        self.logger.log_step("Generation cancelled while queued")
+                        return
+                    queued_event = {'delta_type': 'processing', 'queued': True,
+                                    'queue_wait_ms': round(ticket.wait_seconds * 1000)}
+                    yield f"data: {json.dumps(queued_event)}\n\n".encode('utf-8')
+            if not ticket.claim():
+                # Cancelled in the same instant the slot was granted; it has been handed on
+                self.logger.log_step("Generation cancelled while queued")
+                return
+            trace.attrs.update(priority=ticket.priority, queue_wait_ms=round(ticket.wait_seconds * 1000, 1))
+            if ticket.wait_seconds >= QUEUE_KEEPALIVE_SECONDS:
+                self.logger.log_step(
+                    f"Scheduler: waited {ticket.wait_seconds:.1f}s for {ticket.queue.label} ({ticket.priority})"
+                )
+
+            # A per-request genkey lets a cancel abort exactly this KoboldCPP generation
+            if is_kobold and not current_generation_settings.get('genkey'):
+                current_generation_settings['genkey'] = f"CS{uuid.uuid4().hex[:12]}"
+
             # Use our adapter system to handle the stream generation
             self.logger.log_step(f"Attempting to call adapter.stream_generate for {provider}...")
+            preflight_ms = (time.perf_counter() - preflight_start) * 1000
+            trace.mark("preflight")
+            upstream_start = time.perf_counter()
+            first_token_ms = None
             adapter_generator = adapter.stream_generate(
                 url,
                 api_key,
                 prompt,
                 memory,
                 stop_sequence,
-                current_generation_settings # Use the potentially modified settings
+                current_generation_settings, # Use the potentially modified settings
+                cancel=cancel,
             )
             self.logger.log_step(f"Adapter call returned generator: {type(adapter_generator)}")
 
@@ -1190,10 +1264,16 @@ class ApiHandler:
             self.logger.log_step("Iterating over adapter generator in api_handler...")
             chunk_count = 0
             has_yielded_content = False
-            thinking_filter = ThinkingTagFilter()
+            # stream_reasoning: forward <think> content as 'reasoning_content' events instead of dropping it
+            thinking_filter = ThinkingTagFilter(
+                capture_reasoning=bool(current_generation_settings.get('stream_reasoning', False))
+            )
+            content_filter = self._create_content_filter()
             response_text_parts = []  # LogitShaper: accumulate full response text
 
             for chunk in adapter_generator:
+                if cancel is not None and cancel.cancelled:
+                    break
                 chunk_count += 1
 
                 # For OpenRouter, handle empty chunks and role-only chunks specially
@@ -1206,7 +1286,7 @@ class ApiHandler:
                         has_yielded_content = True
                 else:
                     # Apply thinking tag filter to content chunks
-                    filtered_chunk = self._apply_thinking_filter(chunk, thinking_filter)
+                    filtered_chunk = self._apply_thinking_filter(chunk, thinking_filter, content_filter)
                     if filtered_chunk is not None:
                         if chunk_count % 50 == 0:  # Log every 50 chunks
                             self.logger.log_step(f"Yielding chunk {chunk_count} from adapter generator...")
@@ -1227,15 +1307,34 @@ class ApiHandler:
                                                 pass
                             except Exception:
                                 pass  # Never interfere with streaming
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - upstream_start) * 1000
+                            trace.mark("first_token")
                         yield filtered_chunk
                         has_yielded_content = True
 
-            # Flush any remaining buffered content from the thinking filter
+            if cancel is not None and cancel.cancelled:
+                self.logger.log_step(f"Generation cancelled ({cancel.reason}) after {chunk_count} chunks")
+                trace.attrs['chunks'] = chunk_count
+                return
+
+            # Flush any remaining buffered content from the thinking and content filters
             flush_text = thinking_filter.flush()
+            flush_reasoning = thinking_filter.take_reasoning()
+            if flush_reasoning:
+                yield f"data: {json.dumps({'reasoning_content': flush_reasoning})}\n\n".encode('utf-8')
+            if content_filter is not None:
+                flush_text = content_filter.process(flush_text) + content_filter.flush()
             if flush_text:
                 yield f"data: {json.dumps({'content': flush_text})}\n\n".encode('utf-8')
 
             self.logger.log_step(f"Finished iterating adapter generator. Total chunks yielded: {chunk_count}")
+            self.logger.log_step(
+                f"Generation timing: preflight={preflight_ms:.1f}ms "
+                f"(db={generation_context.load_ms:.1f}ms, {generation_context.query_count} queries), "
+                f"upstream first token="
+                + (f"{first_token_ms:.1f}ms" if first_token_ms is not None else "n/a")
+            )
 
             # ── LogitShaper: analyze completed response ──────────────────
             if logit_shaper is not None and response_text_parts:
@@ -1244,6 +1343,9 @@ class ApiHandler:
                     gen_type = generation_params.get('generation_type', 'generate')
                     is_regen = gen_type in REGENERATION_GEN_TYPES
                     logit_shaper.analyze_output(full_response, is_regeneration=is_regen)
+                    from backend.database import SessionLocal
+                    from backend.logit_shaper import persist_shaper
+                    persist_shaper(chat_session_uuid, SessionLocal)
                     active_bans = logit_shaper.get_banned_tokens()
                     self.logger.log_step(
                         f"LogitShaper: analyzed {len(full_response)} chars (type={gen_type}), "
@@ -1254,15 +1356,19 @@ class ApiHandler:
                     self.logger.log_warning(f"LogitShaper post-gen error: {shaper_err}")
             # ── End LogitShaper post-gen ──────────────────────────────────
 
+            trace.attrs['chunks'] = chunk_count
+            outcome = "ok"
             # No explicit return needed here as yielding handles the generator response
             
         except ValueError as ve:
             error_msg = str(ve)
+            outcome = "error"
             self.logger.log_error(error_msg)
             yield f"data: {json.dumps({'error': {'type': 'ValueError', 'message': error_msg}})}\n\n".encode('utf-8')
         except requests.exceptions.RequestException as e:
             # Special handling for connection errors
             error_msg = f"Connection error: {str(e)}"
+            outcome = "error"
             self.logger.log_error(error_msg)
             
             # Add provider info to help frontend identify API that failed
@@ -1277,6 +1383,17 @@ class ApiHandler:
 
         except Exception as e:
             error_msg = f"Stream generation failed: {str(e)}"
+            outcome = "error"
             self.logger.log_error(error_msg)
             self.logger.log_error(traceback.format_exc())
             yield f"data: {json.dumps({'error': {'type': 'ServerError', 'message': error_msg}})}\n\n".encode('utf-8')
+        finally:
+            if ticket is not None:
+                ticket.release()
+            if cancel is not None and cancel.cancelled:
+                trace.attrs['cancel_reason'] = cancel.reason
+                REGISTRY.observe(
+                    "cardshark_generation_cancel_seconds", time.perf_counter() - cancel.cancelled_at,
+                    provider=trace.attrs.get('provider') or 'unknown', reason=cancel.reason,
+                )
+            trace.finish(outcome)
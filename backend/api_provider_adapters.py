@@ -1,12 +1,23 @@
 # backend/api_provider_adapters.py
 # Adapter system for different API providers
 
+import contextlib
 import requests
 import json
 import re
 from typing import Dict, List, Optional, Generator, Any, Tuple, Protocol
 import traceback
 
+from backend.services.model_catalog_cache import (
+    LOCAL_TTL_SECONDS,
+    MODEL_CATALOGS,
+    CatalogFetch,
+    CatalogFetchError,
+    ModelCatalogCache,
+    catalog_key,
+)
+from backend.utils.cancellation import StreamCancel, close_upstream
+
 class ApiProviderAdapter:
     """Base class for API provider adapters
     
@@ -17,6 +28,9 @@ class ApiProviderAdapter:
     required methods to handle provider-specific behavior.
     """
     
+    # Model catalog cache used by list_models; None means the shared MODEL_CATALOGS
+    catalog_cache: Optional[ModelCatalogCache] = None
+
     def __init__(self, logger):
         """Initialize the adapter with a logger instance.
         
@@ -90,6 +104,96 @@ class ApiProviderAdapter:
                             generation_settings: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare the request data for the provider's API"""
         raise NotImplementedError
+
+    def _cached_model_list(self,
+                           key: Tuple[str, ...],
+                           url: str,
+                           headers: Dict[str, str],
+                           parse_models,
+                           refresh: bool = False,
+                           ttl_seconds: Optional[float] = None,
+                           timeout: float = 10,
+                           connect_error: Optional[str] = None) -> Dict[str, Any]:
+        """Model list through the catalog cache, revalidated with ETag / Last-Modified
+        
+        Args:
+            key: Catalog cache key (see catalog_key)
+            url: Models endpoint
+            headers: Request headers (authorization included)
+            parse_models: Turns the decoded JSON body into the formatted model list;
+                raises CatalogFetchError for an unexpected format
+            refresh: Skip the TTL and ask the provider now
+            connect_error: Error message to report when the server is unreachable
+            
+        Returns:
+            {"success": True, "models": [...], "cached", "stale", "fetched_at"} or
+            {"success": False, "error": ...} when there is nothing cached to fall back on
+        """
+        def fetch(previous) -> CatalogFetch:
+            request_headers = dict(headers)
+            if previous is not None:
+                if previous.etag:
+                    request_headers['If-None-Match'] = previous.etag
+                if previous.last_modified:
+                    request_headers['If-Modified-Since'] = previous.last_modified
+            self.logger.log_step(f"Fetching {key[0]} models from: {url}")
+            try:
+                response = requests.get(url, headers=request_headers, timeout=timeout)
+            except requests.exceptions.ConnectionError:
+                if connect_error:
+                    raise CatalogFetchError(connect_error)
+                raise
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status_code == 304 and previous is not None:
+                return CatalogFetch(None, etag, last_modified)
+            if response.status_code != 200:
+                raise CatalogFetchError(self._handle_error(response), response.status_code)
+            return CatalogFetch(parse_models(response.json()), etag, last_modified)
+
+        cache = self.catalog_cache or MODEL_CATALOGS
+        try:
+            result = cache.get(key, fetch, ttl_seconds=ttl_seconds, refresh=refresh)
+        except CatalogFetchError as e:
+            self.logger.log_error(f"Failed to fetch {key[0]} models: {e}")
+            return {"success": False, "error": str(e)}
+        if result.stale and result.error:
+            self.logger.log_warning(f"Serving cached {key[0]} models; refresh failed: {result.error}")
+        return {"success": True, **result.to_dict()}
+
+    def abort(self, base_url: str, api_key: Optional[str], genkey: Optional[str] = None) -> bool:
+        """Ask the provider to stop the generation in progress
+        
+        Hosted APIs stop when the connection closes, so the default does nothing.
+        
+        Returns:
+            True if the provider confirmed the abort
+        """
+        return False
+
+    @contextlib.contextmanager
+    def _cancel_scope(self, cancel: Optional[StreamCancel], base_url: str,
+                      api_key: Optional[str], generation_settings: Dict[str, Any]):
+        """On cancel inside the block: abort upstream and close the tracked responses
+        
+        Yields a callable that registers the upstream response once it exists
+        (the abort also covers a request still waiting for headers).
+        """
+        responses: List[requests.Response] = []
+        if cancel is None:
+            yield responses.append
+            return
+
+        def stop():
+            try:
+                aborted = self.abort(base_url, api_key, generation_settings.get('genkey'))
+                self.logger.log_step(f"Generation cancelled ({cancel.reason}); upstream abort confirmed: {aborted}")
+            finally:
+                for response in responses:
+                    close_upstream(response)
+
+        with cancel.on_cancel(stop):
+            yield responses.append
         
     def parse_streaming_response(self, line: bytes) -> Optional[Dict[str, Any]]:
         """Parse a streaming response line from the provider's API"""
@@ -101,7 +205,8 @@ class ApiProviderAdapter:
                        prompt: str,
                        memory: Optional[str],
                        stop_sequence: List[str],
-                       generation_settings: Dict[str, Any]) -> Generator[bytes, None, None]:
+                       generation_settings: Dict[str, Any],
+                       cancel: Optional[StreamCancel] = None) -> Generator[bytes, None, None]:
         """Generate a streaming response from the provider's API"""
         try:
             self.logger.log_step("Adapter: Entered base stream_generate method") # <<< ADDED LOG
@@ -154,7 +259,9 @@ class ApiProviderAdapter:
             # Make the streaming request
             self.logger.log_step(f"Attempting to POST stream request to: {url}") # Log before request
             # Add a specific timeout (e.g., 60 seconds)
-            with requests.post(url, headers=headers, json=data, stream=True, timeout=60) as response:
+            with self._cancel_scope(cancel, base_url, api_key, generation_settings) as track_upstream, \
+                    requests.post(url, headers=headers, json=data, stream=True, timeout=60) as response:
+                track_upstream(response)
                 self.logger.log_step(f"POST stream request returned status: {response.status_code}") # Log after request returns
                 if response.status_code != 200:
                     error_msg = self._handle_error(response)
@@ -184,9 +291,12 @@ class ApiProviderAdapter:
                         continue
                 
                 # Send completion message
-                yield b"data: [DONE]\n\n"
+                if cancel is None or not cancel.cancelled:
+                    yield b"data: [DONE]\n\n"
                 
         except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                return  # the closed upstream connection is expected
             error_msg = f"Stream generation failed: {str(e)}"
             self.logger.log_error(error_msg)
             self.logger.log_error(traceback.format_exc())
@@ -326,6 +436,25 @@ class KoboldCppAdapter(ApiProviderAdapter):
         self.logger.log_step(f"KoboldCPP native payload prepared with {len(data)} parameters")
         
         return data
+
+    def abort(self, base_url: str, api_key: Optional[str], genkey: Optional[str] = None) -> bool:
+        """Stop the running generation via /api/extra/abort
+        
+        KoboldCPP keeps generating to max_length after the client disconnects.
+        With a genkey only that generation is aborted (multiuser mode).
+        """
+        if not base_url.startswith(('http://', 'https://')):
+            base_url = f'http://{base_url}'
+        for suffix in ('/api/extra/generate/stream', '/api/generate'):
+            if base_url.rstrip('/').endswith(suffix):
+                base_url = base_url.rstrip('/')[:-len(suffix)]
+        response = requests.post(
+            base_url.rstrip('/') + '/api/extra/abort',
+            headers=self.prepare_headers(api_key),
+            json={'genkey': genkey} if genkey else {},
+            timeout=5,
+        )
+        return response.status_code == 200 and bool(response.json().get('success'))
         
     def parse_streaming_response(self, line: bytes) -> Optional[Dict[str, Any]]:
         """Parse a streaming response line from KoboldCPP
@@ -426,7 +555,8 @@ class KoboldCppAdapter(ApiProviderAdapter):
                        prompt: str,
                        memory: Optional[str],
                        stop_sequence: List[str],
-                       generation_settings: Dict[str, Any]) -> Generator[bytes, None, None]:
+                       generation_settings: Dict[str, Any],
+                       cancel: Optional[StreamCancel] = None) -> Generator[bytes, None, None]:
         """Generate a streaming response from KoboldCPP API with fallback support
         
         This implementation tries the streaming endpoint first, and falls back to
@@ -446,7 +576,9 @@ class KoboldCppAdapter(ApiProviderAdapter):
             # Make the streaming request
             self.logger.log_step(f"KoboldCPP: Attempting POST to streaming endpoint: {url}")
             try:
-                with requests.post(url, headers=headers, json=data, stream=True, timeout=60) as response:
+                with self._cancel_scope(cancel, base_url, api_key, generation_settings) as track_upstream, \
+                        requests.post(url, headers=headers, json=data, stream=True, timeout=60) as response:
+                    track_upstream(response)
                     if response.status_code == 404:
                         # Streaming endpoint not found, try the standard endpoint
                         self.logger.log_step("KoboldCPP: Streaming endpoint returned 404, trying standard endpoint")
@@ -498,10 +630,13 @@ class KoboldCppAdapter(ApiProviderAdapter):
                         except Exception as e:
                             self.logger.log_error(f"Error processing line: {e}")
                             continue
-                      # Send completion message
-                    yield b"data: [DONE]\n\n"
+                    # Send completion message
+                    if cancel is None or not cancel.cancelled:
+                        yield b"data: [DONE]\n\n"
                     
             except requests.exceptions.RequestException as e:
+                if cancel is not None and cancel.cancelled:
+                    return  # the closed upstream connection is expected
                 self.logger.log_error(f"KoboldCPP request failed: {str(e)}")
                 error_msg = f"Failed to connect to KoboldCPP: {str(e)}"
                 # Add connection failure indicator to help frontend update API status
@@ -613,46 +748,41 @@ class OllamaAdapter(ApiProviderAdapter):
             self.logger.log_error(f"Error parsing Ollama response: {e}")
             return None
 
-    def list_models(self, base_url: str) -> Dict[str, Any]:
-        """Fetch available models from Ollama's /api/tags endpoint"""
+    def list_models(self, base_url: str, refresh: bool = False) -> Dict[str, Any]:
+        """Fetch available models from Ollama's /api/tags endpoint (cached briefly)"""
         try:
             if not base_url.startswith(('http://', 'https://')):
                 base_url = f'http://{base_url}'
 
             url = base_url.rstrip('/') + '/api/tags'
-            self.logger.log_step(f"Fetching Ollama models from: {url}")
 
-            response = requests.get(url, timeout=5)
+            def parse_models(data: Any) -> List[Dict[str, Any]]:
+                if not isinstance(data, dict):
+                    raise CatalogFetchError("Invalid response format")
+                formatted_models = []
+                for model in data.get('models', []):
+                    name = model.get('name', '')
+                    if not name:
+                        continue
+                    size_bytes = model.get('size', 0)
+                    size_gb = round(size_bytes / (1024 ** 3), 2) if size_bytes else None
 
-            if response.status_code != 200:
-                error_msg = self._handle_error(response)
-                self.logger.log_error(f"Failed to fetch Ollama models: {error_msg}")
-                return {"success": False, "error": error_msg}
-
-            data = response.json()
-            models_list = data.get('models', [])
-
-            formatted_models = []
-            for model in models_list:
-                name = model.get('name', '')
-                if not name:
-                    continue
-                size_bytes = model.get('size', 0)
-                size_gb = round(size_bytes / (1024 ** 3), 2) if size_bytes else None
-
-                model_info: Dict[str, Any] = {
-                    "id": name,
-                    "name": name,
-                }
-                if size_gb:
-                    model_info["size_gb"] = size_gb
+                    model_info: Dict[str, Any] = {
+                        "id": name,
+                        "name": name,
+                    }
+                    if size_gb:
+                        model_info["size_gb"] = size_gb
 
-                formatted_models.append(model_info)
+                    formatted_models.append(model_info)
+                return formatted_models
 
-            return {"success": True, "models": formatted_models}
+            return self._cached_model_list(
+                catalog_key("Ollama", base_url), url, self.prepare_headers(None), parse_models,
+                refresh=refresh, ttl_seconds=LOCAL_TTL_SECONDS, timeout=5,
+                connect_error="Cannot connect to Ollama. Is it running?",
+            )
 
-        except requests.exceptions.ConnectionError:
-            return {"success": False, "error": "Cannot connect to Ollama. Is it running?"}
         except Exception as e:
             error_msg = f"Error fetching Ollama models: {str(e)}"
             self.logger.log_error(error_msg)
@@ -1045,12 +1175,13 @@ class OpenRouterAdapter(ApiProviderAdapter):
             self.logger.log_error(f"Error parsing OpenRouter response: {e}")
             return None
         
-    def list_models(self, base_url: str, api_key: Optional[str]) -> Dict[str, Any]:
+    def list_models(self, base_url: str, api_key: Optional[str], refresh: bool = False) -> Dict[str, Any]:
         """Fetch available models from OpenRouter
         
         Args:
             base_url: Base URL for OpenRouter API
             api_key: API key for authentication
+            refresh: Bypass the catalog cache TTL
             
         Returns:
             Dictionary containing available models or error information
@@ -1070,48 +1201,34 @@ class OpenRouterAdapter(ApiProviderAdapter):
                 url = f"{base_url.split('/api/v1')[0]}/api/v1/models"
             else:
                 url = f"{base_url}/api/v1/models"
-                
-            self.logger.log_step(f"Fetching OpenRouter models from: {url}")
-            
-            # Prepare headers
-            headers = self.prepare_headers(api_key)
-            
-            # Make request
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                error_msg = self._handle_error(response)
-                self.logger.log_error(f"Failed to fetch models: {error_msg}")
-                return {"success": False, "error": error_msg}
-                
-            # Parse response
-            models_data = response.json()
-            if not isinstance(models_data, dict) or 'data' not in models_data:
-                self.logger.log_error("Invalid models response format")
-                return {"success": False, "error": "Invalid response format"}
-                
-            # Format models for the frontend
-            formatted_models = []
-            for model in models_data.get('data', []):
-                model_id = model.get('id')
-                if not model_id:
-                    continue
+
+            def parse_models(models_data: Any) -> List[Dict[str, Any]]:
+                if not isinstance(models_data, dict) or 'data' not in models_data:
+                    raise CatalogFetchError("Invalid response format")
                     
-                formatted_models.append({
-                    "id": model_id,
-                    "name": model.get('name', model_id),
-                    "description": model.get('description', ''),
-                    "context_length": model.get('context_length'),
-                    "pricing": {
-                        "prompt": model.get('pricing', {}).get('prompt'),
-                        "completion": model.get('pricing', {}).get('completion')
-                    }
-                })
+                # Format models for the frontend
+                formatted_models = []
+                for model in models_data.get('data', []):
+                    model_id = model.get('id')
+                    if not model_id:
+                        continue
+                        
+                    formatted_models.append({
+                        "id": model_id,
+                        "name": model.get('name', model_id),
+                        "description": model.get('description', ''),
+                        "context_length": model.get('context_length'),
+                        "pricing": {
+                            "prompt": model.get('pricing', {}).get('prompt'),
+                            "completion": model.get('pricing', {}).get('completion')
+                        }
+                    })
+                return formatted_models
                 
-            return {
-                "success": True,
-                "models": formatted_models
-            }
+            return self._cached_model_list(
+                catalog_key("OpenRouter", url, api_key), url, self.prepare_headers(api_key), parse_models,
+                refresh=refresh,
+            )
             
         except Exception as e:
             error_msg = f"Error fetching models: {str(e)}"
@@ -1298,7 +1415,8 @@ class FeatherlessAdapter(ApiProviderAdapter):
             self.logger.log_error(f"Error parsing Featherless response: {e}")
             return None
             
-    def list_models(self, base_url: str, api_key: Optional[str], available_on_current_plan: Optional[bool] = None) -> Dict[str, Any]:
+    def list_models(self, base_url: str, api_key: Optional[str], available_on_current_plan: Optional[bool] = None,
+                    refresh: bool = False) -> Dict[str, Any]:
         """Fetch available models from Featherless
         
         Args:
@@ -1308,6 +1426,7 @@ class FeatherlessAdapter(ApiProviderAdapter):
                                       None: Return all models
                                       True: Return only models available on current plan
                                       False: Return only models not available on current plan
+            refresh: Bypass the catalog cache TTL
             
         Returns:
             Dictionary containing available models or error information
@@ -1331,65 +1450,48 @@ class FeatherlessAdapter(ApiProviderAdapter):
                 # Convert boolean to integer (0 for False, 1 for True) as per API docs
                 param_value = 1 if available_on_current_plan else 0
                 url = f"{url}?available_on_current_plan={param_value}"
-            
-            self.logger.log_step(f"Fetching Featherless models from: {url}")
-            
-            # Prepare headers
-            headers = self.prepare_headers(api_key)
-            
-            # Make request
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                error_msg = self._handle_error(response)
-                self.logger.log_error(f"Failed to fetch models: {error_msg}")
-                return {"success": False, "error": error_msg}
-                
-            # Parse response
-            models_data = response.json()
-            if not isinstance(models_data, dict) or 'data' not in models_data:
-                # Try standard OpenAI format which might just be a list under 'data'
-                data = models_data.get('data', [])
+
+            def parse_models(models_data: Any) -> List[Dict[str, Any]]:
+                # Standard OpenAI format: the list is under 'data'
+                data = models_data.get('data', []) if isinstance(models_data, dict) else None
                 if not isinstance(data, list):
-                    self.logger.log_error("Invalid models response format")
-                    return {"success": False, "error": "Invalid response format"}
-            else:
-                data = models_data.get('data', [])
-                
-            # Format models for the frontend
-            formatted_models = []
-            for model in data:
-                model_id = model.get('id')
-                if not model_id:
-                    continue
+                    raise CatalogFetchError("Invalid response format")
                     
-                # Build model info with all relevant properties from the API docs
-                model_info = {
-                    "id": model_id,
-                    "name": model.get('name', model_id),
-                    "model_class": model.get('model_class', ''),
-                    "context_length": model.get('context_length'),
-                    "max_tokens": model.get('max_completion_tokens'),
-                }
-                
-                # Only include these fields if they exist
-                if 'description' in model:
-                    model_info["description"] = model.get('description', '')
+                # Format models for the frontend
+                formatted_models = []
+                for model in data:
+                    model_id = model.get('id')
+                    if not model_id:
+                        continue
+                        
+                    # Build model info with all relevant properties from the API docs
+                    model_info = {
+                        "id": model_id,
+                        "name": model.get('name', model_id),
+                        "model_class": model.get('model_class', ''),
+                        "context_length": model.get('context_length'),
+                        "max_tokens": model.get('max_completion_tokens'),
+                    }
                     
-                # Include gating info if present
-                if 'is_gated' in model:
-                    model_info["is_gated"] = model.get('is_gated', False)
+                    # Only include these fields if they exist
+                    if 'description' in model:
+                        model_info["description"] = model.get('description', '')
+                        
+                    # Include gating info if present
+                    if 'is_gated' in model:
+                        model_info["is_gated"] = model.get('is_gated', False)
+                        
+                    # Include plan availability if present (only returned for authenticated requests)
+                    if 'available_on_current_plan' in model:
+                        model_info["available_on_current_plan"] = model.get('available_on_current_plan')
                     
-                # Include plan availability if present (only returned for authenticated requests)
-                if 'available_on_current_plan' in model:
-                    model_info["available_on_current_plan"] = model.get('available_on_current_plan')
-                
-                formatted_models.append(model_info)
+                    formatted_models.append(model_info)
+                return formatted_models
                 
-            return {
-                "success": True,
-                "models": formatted_models
-            }
+            return self._cached_model_list(
+                catalog_key("Featherless", url, api_key), url, self.prepare_headers(api_key), parse_models,
+                refresh=refresh,
+            )
             
         except Exception as e:
             error_msg = f"Error fetching models: {str(e)}"
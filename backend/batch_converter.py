@@ -9,169 +9,375 @@ JPG images into character card PNGs with embedded metadata.
 
 Works with both development mode and PyInstaller executable mode.
 
+Directories are converted in parallel (one worker per core by default) and
+recorded in a manifest inside the backup directory, so rerunning after an
+interruption only converts what is new, changed or previously failed.
+
 Usage:
-    python -m backend.batch_converter -b /path/to/backup/directory [-q]
+    python -m backend.batch_converter -b /path/to/backup/directory [-q] [-w WORKERS]
     
     OR when using as executable:
     
-    CardShark.exe -batch -b /path/to/backup/directory [-q]
+    CardShark.exe -batch -b /path/to/backup/directory [-q] [-w WORKERS]
 """
 
 import argparse
 import sys
 import os
 import json
+import time
+import hashlib
 import traceback
-import base64
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from pathlib import Path
-from PIL import Image, PngImagePlugin
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from PIL import Image
 import io
 
 # Import other CardShark components - these are already in the backend package
 from backend.log_manager import LogManager
 from backend.png_metadata_handler import PngMetadataHandler
 from backend.character_validator import CharacterValidator
+from backend.utils.atomic_files import atomic_open, atomic_write_bytes
 
-# Initialize components
-logger = LogManager(console_verbosity=1)  # INFO level for cleaner console output
-png_handler = PngMetadataHandler(logger)
-validator = CharacterValidator(logger)
+# Components are created on first use rather than at import: every spawned
+# pool worker imports this module, and a LogManager there would open (and
+# clean up) log files of its own. Workers get console-only logging from
+# _init_worker instead.
+logger: Optional[LogManager] = None
+png_handler: Optional[PngMetadataHandler] = None
+validator: Optional[CharacterValidator] = None
 
-def process_subdirectories(backup_dir: Path, quiet_mode: bool):
-    """Process all subdirectories within the backup_dir."""
-    logger.log_step(f"Starting batch processing in: {backup_dir}")
-    
-    # Count statistics
-    total_dirs = 0
-    successful = 0
-    skipped = 0
-    failed = 0
-    
-    for char_dir in backup_dir.iterdir():
-        if char_dir.is_dir():
-            total_dirs += 1
+# Progress manifest kept in the backup directory: one JSON line per finished
+# directory, last line wins. Reruns skip directories whose sources are unchanged.
+MANIFEST_NAME = ".cardshark_batch_manifest.jsonl"
+MANIFEST_VERSION = 1
+PROGRESS_INTERVAL_SECONDS = 1.0
+# Directories handed to the pool ahead of the results, per worker
+IN_FLIGHT_PER_WORKER = 4
+
+STATUS_SUCCESS = "success"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_UNCHANGED = "unchanged"
+
+
+def load_manifest(backup_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Latest manifest entry per directory name (empty if there is no manifest yet)."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    path = backup_dir / MANIFEST_NAME
+    if not path.is_file():
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
             try:
-                result = process_character_directory(char_dir, quiet_mode)
-                if result == "success":
-                    successful += 1
-                elif result == "skipped":
-                    skipped += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                failed += 1
-                if not quiet_mode:
-                    print(f"Error processing {char_dir.name}: {e}")
-                logger.log_error(f"Error processing {char_dir.name}: {e}")
-                logger.log_error(traceback.format_exc())
-    
-    # Show summary
-    summary = f"Processing complete: {successful} successful, {skipped} skipped, {failed} failed out of {total_dirs} directories"
-    logger.log_step(summary)
-    if not quiet_mode:
-        print("\n" + summary)
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if isinstance(entry, dict) and entry.get("version") == MANIFEST_VERSION and "dir" in entry:
+                entries[entry["dir"]] = entry
+    return entries
 
-def process_character_directory(char_dir: Path, quiet_mode: bool) -> str:
+
+def _components(log_to_file: bool = True) -> LogManager:
+    """Create the logger, metadata handler and validator if not done yet; returns the logger."""
+    global logger, png_handler, validator
+    if logger is None:
+        logger = LogManager(console_verbosity=1, log_to_file=log_to_file)  # INFO level for cleaner console output
+    if png_handler is None:
+        png_handler = PngMetadataHandler(logger)
+    if validator is None:
+        validator = CharacterValidator(logger)
+    return logger
+
+
+def _init_worker() -> None:
+    """Pool initializer: console-only components for this worker process."""
+    global logger, png_handler, validator
+    logger = png_handler = validator = None
+    _components(log_to_file=False)
+
+
+def _manifest_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "version": MANIFEST_VERSION,
+        "dir": result["dir"],
+        "status": result["status"],
+        "source_hash": result.get("source_hash"),
+        "source_files": result.get("source_files"),
+        "output": result.get("output"),
+        "error": result.get("error"),
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _compact_manifest(backup_dir: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    """Rewrite the manifest with one line per directory (atomic replace)."""
+    with atomic_open(backup_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        for entry in entries.values():
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _source_signature(paths: List[Path]) -> List[List[Any]]:
+    signature = []
+    for path in paths:
+        stat = path.stat()
+        signature.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def convert_character_directory(char_dir: Path, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Process a single character directory.
-    
-    Returns:
-        str: "success", "skipped", or "failed"
+    Convert one character directory into ``<name>/<name>.png``.
+
+    Runs in pool workers, so it doesn't log or print: messages come back in
+    the result as (level, text) pairs for the parent to report. With the
+    directory's ``previous`` manifest entry, unchanged sources (same file
+    stats, or same content hash) are reported as "unchanged" without encoding.
     """
     char_name = char_dir.name
-    
+    result: Dict[str, Any] = {"dir": char_name, "status": STATUS_FAILED, "messages": []}
+    messages = result["messages"]
+
     # Check for required files - both JSON metadata and an image are needed
+    png_path = char_dir / f"{char_name}.png"
     json_files = list(char_dir.glob("*.json"))
     image_files = list(char_dir.glob("*.jpg")) + list(char_dir.glob("*.jpeg")) + list(char_dir.glob("*.png"))
-    
+    # Our own output from an earlier run is never a source
+    image_files = [f for f in image_files if f.name != png_path.name]
+
     if not json_files or not image_files:
-        if not quiet_mode:
-            print(f"Skipping {char_name}: Missing JSON or image file")
-        logger.log_warning(f"Skipping {char_name}: Missing JSON or image file")
-        return "skipped"
-    
+        messages.append(("warning", f"Skipping {char_name}: Missing JSON or image file"))
+        result["status"] = STATUS_SKIPPED
+        return result
+
     # Prioritize files if multiple exist
     json_path = next((f for f in json_files if f.name.startswith(f"v2Import_{char_name}")), json_files[0])
     image_path = next((f for f in image_files if f.name == "image1.jpg"), image_files[0])
-    
-    # Output PNG path
-    png_path = char_dir / f"{char_name}.png"
-    
+    result["output"] = png_path.name
+
     try:
-        # Load and validate metadata
-        with open(json_path, "r", encoding="utf-8") as f:
-            metadata = json.load(f)
-        
+        signature = _source_signature([json_path, image_path])
+        result["source_files"] = signature
+        previous_ok = bool(previous) and previous.get("status") == STATUS_SUCCESS and png_path.exists()
+        if previous_ok and previous.get("source_files") == signature:
+            result.update(status=STATUS_UNCHANGED, source_hash=previous.get("source_hash"))
+            return result
+
+        # Each source is read once; the bytes feed both the hash and the decoders
+        json_bytes = json_path.read_bytes()
+        image_bytes = image_path.read_bytes()
+        digest = hashlib.sha256()
+        for name, data in ((json_path.name, json_bytes), (image_path.name, image_bytes)):
+            digest.update(f"{name}\0{len(data)}\0".encode("utf-8"))
+            digest.update(data)
+        result["source_hash"] = digest.hexdigest()
+        if previous_ok and previous.get("source_hash") == result["source_hash"]:
+            result["status"] = STATUS_UNCHANGED
+            return result
+
+        _components()
         # Use CharacterValidator to ensure proper structure
-        validated_metadata = validator.normalize(metadata)
-        
+        validated_metadata = validator.normalize(json.loads(json_bytes))
+
         # Verify character name matches directory
         if validated_metadata.get("data", {}).get("name", "") != char_name:
-            logger.log_warning(f"Character name mismatch in {char_dir}: "
-                              f"Directory: {char_name}, Metadata: {validated_metadata.get('data', {}).get('name', '(none)')}")
-        
-        # Load and convert image
-        with Image.open(image_path) as img:
-            # Convert image to PNG format in memory
+            messages.append(("warning", f"Character name mismatch in {char_dir}: "
+                                        f"Directory: {char_name}, Metadata: {validated_metadata.get('data', {}).get('name', '(none)')}"))
+
+        # Decode once and encode once, with the metadata chunk written in the same pass
+        with Image.open(io.BytesIO(image_bytes)) as img:
             if img.format != "PNG":
-                if not quiet_mode:
-                    print(f"Converting {image_path.name} to PNG format")
+                messages.append(("step", f"Converting {image_path.name} to PNG format"))
                 img = img.convert("RGBA")
-            
-            # Create a BytesIO object for the PNG
-            img_buffer = io.BytesIO()
-            img.save(img_buffer, format="PNG")
-            img_bytes = img_buffer.getvalue()
-            
-            # Write metadata to PNG
+            png_bytes = png_handler.encode_card_image(img, validated_metadata)
+
+        # Write next to the output and move into place, so an interrupted run never leaves half a PNG.
+        # No fsync: the sources stay on disk, so a lost write is redone by the next run.
+        atomic_write_bytes(png_path, png_bytes, fsync=False)
+
+        messages.append(("step", f"Processed {char_name} successfully: {png_path}"))
+        result["status"] = STATUS_SUCCESS
+        return result
+
+    except Exception as e:
+        messages.append(("error", f"Error processing {char_name}: {e}"))
+        result["error"] = str(e)
+        result["traceback"] = traceback.format_exc()
+        return result
+
+
+def _report(result: Dict[str, Any], quiet_mode: bool, echo_levels=("step", "warning", "error")) -> None:
+    """Log a worker result's messages in the parent; print the ``echo_levels`` ones unless quiet."""
+    log_manager = _components()
+    log = {"step": log_manager.log_step, "warning": log_manager.log_warning, "error": log_manager.log_error}
+    for level, text in result.get("messages", ()):
+        log[level](text)
+        if not quiet_mode and level in echo_levels:
+            print(text)
+    if result.get("traceback"):
+        log_manager.log_error(result["traceback"])
+
+
+def process_character_directory(char_dir: Path, quiet_mode: bool) -> str:
+    """
+    Process a single character directory.
+    
+    Returns:
+        str: "success", "skipped", or "failed"
+    """
+    result = convert_character_directory(char_dir)
+    _report(result, quiet_mode)
+    return result["status"]
+
+
+class BatchProgress:
+    """Running totals for a batch, printed/logged at most every PROGRESS_INTERVAL_SECONDS."""
+
+    def __init__(self, total: int, quiet_mode: bool, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.total = total
+        self.quiet_mode = quiet_mode
+        self.callback = callback
+        self.counts = {STATUS_SUCCESS: 0, STATUS_SKIPPED: 0, STATUS_FAILED: 0, STATUS_UNCHANGED: 0}
+        self.started = time.perf_counter()
+        self._last_emit = 0.0
+
+    @property
+    def done(self) -> int:
+        return sum(self.counts.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        return {
+            "done": self.done,
+            "total": self.total,
+            **self.counts,
+            "elapsed_seconds": round(elapsed, 2),
+            "dirs_per_second": round(rate, 1),
+            "eta_seconds": round((self.total - self.done) / rate, 1) if rate > 0 else None,
+        }
+
+    def update(self, status: str) -> None:
+        self.counts[status] += 1
+        now = time.perf_counter()
+        if now - self._last_emit >= PROGRESS_INTERVAL_SECONDS or self.done == self.total:
+            self._last_emit = now
+            self.emit()
+
+    def emit(self) -> None:
+        snap = self.snapshot()
+        line = (f"[{snap['done']}/{snap['total']}] {snap['success']} converted, {snap['unchanged']} unchanged, "
+                f"{snap['skipped']} skipped, {snap['failed']} failed - {snap['dirs_per_second']} dirs/s")
+        if snap["eta_seconds"] is not None and snap["done"] < snap["total"]:
+            line += f", ETA {snap['eta_seconds']:.0f}s"
+        _components().log_step(line)
+        if not self.quiet_mode:
+            print(line)
+        if self.callback:
+            self.callback(snap)
+
+
+def _default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def _pool(workers: int):
+    # A frozen build would re-run the whole app entry point in every spawned
+    # child; threads scale there too since Pillow releases the GIL while
+    # decoding and encoding
+    if getattr(sys, 'frozen', False):
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def _run_jobs(jobs: List[Tuple[Path, Optional[Dict[str, Any]]]], workers: int) -> Iterator[Tuple[Path, Any]]:
+    """Yield (char_dir, result or exception) as directories finish, keeping a bounded window in flight."""
+    if workers <= 1:
+        for char_dir, previous in jobs:
             try:
-                # Write metadata to PNG
-                updated_png_bytes = png_handler.write_metadata(img_bytes, validated_metadata)
-                
-                # Save final PNG
-                with open(png_path, "wb") as f:
-                    f.write(updated_png_bytes)
-                
-                if not quiet_mode:
-                    print(f"Processed {char_name} successfully: {png_path}")
-                logger.log_step(f"Processed {char_name} successfully: {png_path}")
-                return "success"
-                
-            except Exception as png_error:
-                logger.log_error(f"PNG metadata error: {png_error}")
-                logger.log_error(traceback.format_exc())
-                
-                # Alternative approach using PngInfo directly
+                yield char_dir, convert_character_directory(char_dir, previous)
+            except Exception as e:
+                yield char_dir, e
+        return
+
+    with _pool(workers) as pool:
+        pending: Dict[Future, Path] = {}
+        queue = iter(jobs)
+        while True:
+            for char_dir, previous in queue:
+                pending[pool.submit(convert_character_directory, char_dir, previous)] = char_dir
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                char_dir = pending.pop(future)
                 try:
-                    logger.log_step("Attempting alternative approach for PNG metadata")
-
-                    # Convert metadata to base64
-                    json_str = json.dumps(validated_metadata)
-                    base64_str = base64.b64encode(json_str.encode('utf-8')).decode('utf-8')
-                    
-                    # Create PNG info object
-                    png_info = PngImagePlugin.PngInfo()
-                    png_info.add_text('chara', base64_str)
-                    
-                    # Save directly with metadata
-                    img.save(png_path, "PNG", pnginfo=png_info)
-                    
-                    if not quiet_mode:
-                        print(f"Processed {char_name} using alternative method: {png_path}")
-                    logger.log_step(f"Processed {char_name} using alternative method: {png_path}")
-                    return "success"
-                    
-                except Exception as alt_error:
-                    logger.log_error(f"Alternative method also failed: {alt_error}")
-                    logger.log_error(traceback.format_exc())
-                    return "failed"
-    
-    except Exception as e:
-        if not quiet_mode:
-            print(f"Error processing {char_name}: {e}")
-        logger.log_error(f"Error processing {char_name}: {e}")
-        logger.log_error(traceback.format_exc())
-        return "failed"
+                    yield char_dir, future.result()
+                except Exception as e:
+                    yield char_dir, e
+
+
+def process_subdirectories(
+    backup_dir: Path,
+    quiet_mode: bool,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Process all subdirectories within the backup_dir across ``workers``
+    processes (default: one per core). Finished directories are appended to
+    the manifest as they complete, so an interrupted run resumes where it
+    stopped. Returns the final progress snapshot.
+    """
+    log_manager = _components()
+    log_manager.log_step(f"Starting batch processing in: {backup_dir}")
+
+    manifest = load_manifest(backup_dir)
+    char_dirs = [d for d in backup_dir.iterdir() if d.is_dir()]
+    jobs = [(char_dir, manifest.get(char_dir.name)) for char_dir in char_dirs]
+    workers = min(workers or _default_workers(), max(1, len(jobs)))
+    if manifest:
+        log_manager.log_step(f"Resuming from manifest with {len(manifest)} entries")
+    log_manager.log_step(f"Converting {len(jobs)} directories with {workers} worker(s)")
+
+    tracker = BatchProgress(len(jobs), quiet_mode, progress)
+    manifest_path = backup_dir / MANIFEST_NAME
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file:
+        for char_dir, result in _run_jobs(jobs, workers):
+            if isinstance(result, Exception):
+                if not quiet_mode:
+                    print(f"Error processing {char_dir.name}: {result}")
+                log_manager.log_error(f"Error processing {char_dir.name}: {result}")
+                log_manager.log_error("".join(traceback.format_exception(result)))
+                result = {"dir": char_dir.name, "status": STATUS_FAILED, "error": str(result)}
+            else:
+                # Per-directory chatter goes to the log; the console gets failures and progress
+                _report(result, quiet_mode, echo_levels=("error",))
+
+            if result["status"] != STATUS_UNCHANGED:
+                entry = _manifest_entry(result)
+                manifest[entry["dir"]] = entry
+                manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                manifest_file.flush()
+            tracker.update(result["status"])
+
+    _compact_manifest(backup_dir, manifest)
+
+    # Show summary
+    counts = tracker.counts
+    summary = (f"Processing complete: {counts[STATUS_SUCCESS]} successful, {counts[STATUS_SKIPPED]} skipped, "
+               f"{counts[STATUS_FAILED]} failed out of {len(jobs)} directories")
+    if counts[STATUS_UNCHANGED]:
+        summary += f" ({counts[STATUS_UNCHANGED]} unchanged since the last run)"
+    log_manager.log_step(summary)
+    if not quiet_mode:
+        print("\n" + summary)
+    return tracker.snapshot()
+
 
 def main():
     """Main entry point for the script."""
@@ -185,6 +391,8 @@ def main():
     parser.add_argument("-batch", "--batch", action="store_true", help="Run in batch processing mode")
     parser.add_argument("-b", "--backup-dir", type=str, help="Path to backup directory")
     parser.add_argument("-q", "--quiet", action="store_true", help="Run in quiet mode (minimal output)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Parallel workers (default: one per CPU core)")
     
     # Parse only known args to avoid conflicts when called from main.py
     args, unknown = parser.parse_known_args()
@@ -220,19 +428,19 @@ def main():
     
     try:
         if backup_directory.exists() and backup_directory.is_dir():
-            process_subdirectories(backup_directory, quiet_mode)
+            process_subdirectories(backup_directory, quiet_mode, workers=args.workers)
         else:
             error_msg = f"Error: Backup directory not found: {backup_directory}"
             print(error_msg)
-            logger.log_error(error_msg)
+            _components().log_error(error_msg)
             if not quiet_mode and is_exe:
                 input("Press Enter to exit...")
             sys.exit(1)
     except Exception as e:
         error_msg = f"An unexpected error occurred: {e}"
         print(error_msg)
-        logger.log_error(error_msg)
-        logger.log_error(traceback.format_exc())
+        _components().log_error(error_msg)
+        _components().log_error(traceback.format_exc())
         if not quiet_mode and is_exe:
             input("Press Enter to exit...")
         sys.exit(1)
@@ -241,5 +449,9 @@ def main():
     if not quiet_mode and is_exe:
         input("\nProcessing complete. Press Enter to exit...")
 
+def run_batch_processing():
+    """Entry point for ``CardShark --batch`` (backend/main.py)."""
+    main()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,206 @@
+# backend/content_filter_engine.py
+# Description: Compiles active content-filter rules into a single character trie
+# and applies substitutions to streamed text incrementally.
+#
+# Matching follows the client-side rules in contentProcessing.ts: literal
+# substring matches ("exact" is case-sensitive, "case-insensitive" is not),
+# plus "word-boundary" for whole-word matches. Overlapping matches resolve
+# leftmost-longest. "regex" rules are not compiled here.
+
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Strategies that substitute text after generation (api-ban is handled by the provider)
+REPLACE_STRATEGIES = ('client-replace', 'auto')
+LITERAL_MODES = ('exact', 'case-insensitive', 'word-boundary')
+
+
+def _fold(char: str) -> str:
+    """Lowercase a single character, keeping one-to-one length (e.g. 'İ' stays as-is)."""
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class _CompiledRule:
+    __slots__ = ('original', 'substitutions', 'case_sensitive', 'whole_word')
+
+    def __init__(self, original: str, substitutions: Sequence[str], mode: str):
+        self.original = original
+        self.substitutions = tuple(substitutions) or ('',)
+        self.case_sensitive = mode == 'exact'
+        self.whole_word = mode == 'word-boundary'
+
+    def replacement_for(self, matched: str) -> str:
+        replacement = random.choice(self.substitutions)
+        if self.case_sensitive or not replacement:
+            return replacement
+        # Keep sentence-initial / shouted casing of the matched text
+        if len(matched) > 1 and matched.isupper():
+            return replacement.upper()
+        if matched[0].isupper():
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+
+
+class _Node:
+    __slots__ = ('children', 'rules')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.rules: Tuple[_CompiledRule, ...] = ()
+
+
+class ContentFilterEngine:
+    """
+    Immutable, compiled form of a set of substitution rules.
+
+    All literal rules share one trie keyed on case-folded characters, so the
+    work per input character is bounded by the longest pattern rather than the
+    number of rules. Build a new engine to change the rules; streams that are
+    already running keep the engine they started with.
+    """
+
+    def __init__(self, rules: Sequence[Dict]):
+        self._root = _Node()
+        self.rule_count = 0
+        self.skipped_rules = 0
+        self.max_pattern_length = 0
+
+        for rule in rules:
+            original = rule.get('original')
+            mode = rule.get('mode', 'case-insensitive')
+            if not rule.get('enabled', True) or rule.get('strategy', 'auto') not in REPLACE_STRATEGIES:
+                continue
+            if not original or not rule.get('substitutions') or mode not in LITERAL_MODES:
+                self.skipped_rules += 1
+                continue
+            self._insert(_CompiledRule(original, rule['substitutions'], mode))
+
+    @classmethod
+    def from_rules(cls, rules: Sequence[Dict]) -> 'ContentFilterEngine':
+        return cls(rules)
+
+    def _insert(self, rule: _CompiledRule) -> None:
+        node = self._root
+        for char in rule.original:
+            node = node.children.setdefault(_fold(char), _Node())
+        # First rule for a given pattern wins, like sequential client-side application
+        node.rules = node.rules + (rule,)
+        self.rule_count += 1
+        self.max_pattern_length = max(self.max_pattern_length, len(rule.original))
+
+    @property
+    def is_empty(self) -> bool:
+        return self.rule_count == 0
+
+    def stream(self) -> 'StreamingContentFilter':
+        """Create a per-stream filter bound to this engine."""
+        return StreamingContentFilter(self)
+
+    def apply(self, text: str) -> str:
+        """One-shot filter for complete (non-streamed) text."""
+        if self.is_empty or not text:
+            return text
+        stream = self.stream()
+        return stream.process(text) + stream.flush()
+
+    def _scan(self, buffer: str, prev: str, final: bool) -> Tuple[str, int, str]:
+        """
+        Filter ``buffer`` from the left.
+
+        Returns (output, consumed, prev). Stops early, leaving
+        ``buffer[consumed:]`` pending, when a match could still be extended
+        by text that hasn't arrived yet.
+        """
+        root_children = self._root.children
+        out: List[str] = []
+        i = 0
+        n = len(buffer)
+        while i < n:
+            char = buffer[i]
+            node = root_children.get(_fold(char))
+            if node is None:
+                out.append(char)
+                prev = char
+                i += 1
+                continue
+
+            best_rule: Optional[_CompiledRule] = None
+            best_end = 0
+            undecided = False
+            j = i
+            while True:
+                end = j + 1
+                for rule in node.rules:
+                    if rule.case_sensitive and buffer[i:end] != rule.original:
+                        continue
+                    if rule.whole_word:
+                        if prev and _is_word_char(prev):
+                            continue
+                        if end < n:
+                            if _is_word_char(buffer[end]):
+                                continue
+                        elif not final:
+                            undecided = True
+                            continue
+                    best_rule, best_end = rule, end
+                    break
+                if end >= n:
+                    if node.children and not final:
+                        undecided = True
+                    break
+                node = node.children.get(_fold(buffer[end]))
+                if node is None:
+                    break
+                j = end
+
+            if undecided:
+                # Wait for more text before deciding on the match starting here
+                break
+            if best_rule is not None:
+                out.append(best_rule.replacement_for(buffer[i:best_end]))
+                prev = buffer[best_end - 1]
+                i = best_end
+            else:
+                out.append(char)
+                prev = char
+                i += 1
+        return ''.join(out), i, prev
+
+
+class StreamingContentFilter:
+    """
+    Incremental filter for one generation stream.
+
+    Holds back only the tail of the text that could still become a match, so
+    the look-behind buffer never grows beyond the longest pattern (+1 character
+    for whole-word rules).
+    """
+
+    def __init__(self, engine: ContentFilterEngine):
+        self._engine = engine
+        self._buffer = ''
+        self._prev = ''
+
+    def process(self, token: str) -> str:
+        """Feed a token in, get filtered text out. May return empty string."""
+        if not token:
+            return ''
+        self._buffer += token
+        output, consumed, self._prev = self._engine._scan(self._buffer, self._prev, final=False)
+        self._buffer = self._buffer[consumed:]
+        return output
+
+    def flush(self) -> str:
+        """End-of-stream: resolve and emit anything still held back."""
+        output, _, self._prev = self._engine._scan(self._buffer, self._prev, final=True)
+        self._buffer = ''
+        return output
+
+    @property
+    def pending(self) -> str:
+        return self._buffer
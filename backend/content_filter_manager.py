@@ -6,7 +6,9 @@ import os
 import traceback
 import glob
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from backend.content_filter_engine import ContentFilterEngine, StreamingContentFilter
 
 class ContentFilterManager:
     def __init__(self, logger):
@@ -16,6 +18,7 @@ class ContentFilterManager:
         self.available_packages = {}  # Dict of package_id -> package_info
         self.active_package_ids = []  # List of active package IDs
         self.rules = []  # Combined rules from all active packages
+        self.engine = ContentFilterEngine([])  # Compiled form of self.rules, swapped on rebuild
         
         # Create filters directory if it doesn't exist
         if not self.filters_dir.exists():
@@ -113,8 +116,19 @@ class ContentFilterManager:
         for rule in self.rules:
             if 'enabled' not in rule:
                 rule['enabled'] = True
+
+        # Compile first, then swap: in-flight streams keep the engine they started with
+        self.engine = ContentFilterEngine.from_rules(self.rules)
                 
-        self.logger.log_step(f"Combined {len(self.rules)} rules from active filter packages")
+        self.logger.log_step(
+            f"Combined {len(self.rules)} rules from active filter packages "
+            f"({self.engine.rule_count} compiled for streaming, {self.engine.skipped_rules} skipped)"
+        )
+
+    def get_stream_filter(self) -> Optional[StreamingContentFilter]:
+        """Create a streaming filter for one generation, or None if no rules apply."""
+        engine = self.engine
+        return None if engine.is_empty else engine.stream()
 
     def get_available_packages(self) -> List[Dict[str, Any]]:
         """Get information about all available filter packages."""
@@ -1,9 +1,11 @@
 import logging
 import os
+import threading
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Depends
 
 # Configure logging (this is a basic example, you might have a more advanced setup)
 # It's good practice to get a logger specific to the current module
@@ -29,6 +31,55 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# ---------------------------------------------------------------------------
+# Write generation counter
+# ---------------------------------------------------------------------------
+# Incremented whenever the database is written, so caches of derived data
+# (e.g. serialized list responses) can tell whether they are still current.
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLAC")
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_db_generation() -> int:
+    """Return the current database write generation."""
+    return _generation
+
+
+def bump_db_generation() -> int:
+    """Mark everything derived from the database as stale."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+def track_db_generation(target_engine, session_factory) -> None:
+    """
+    Bump the write generation for writes made through ``target_engine``.
+
+    The counter is bumped as each write statement executes and again after
+    the session commits. The second bump invalidates anything cached from a
+    read that raced the commit.
+    """
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in _WRITE_VERBS:
+            bump_db_generation()
+
+    @event.listens_for(session_factory, "after_begin")
+    def _on_begin(session, transaction, connection):
+        session.info["db_generation_at_begin"] = _generation
+
+    @event.listens_for(session_factory, "after_commit")
+    def _on_commit(session):
+        if session.info.pop("db_generation_at_begin", _generation) != _generation:
+            bump_db_generation()
+
+
+track_db_generation(engine, SessionLocal)
+
 def get_db():
     """
     Dependency to get a database session.
@@ -40,6 +91,27 @@ def get_db():
     finally:
         db.close()
 
+class AsyncDBSession:
+    """
+    Awaitable access to a request's Session for ``async def`` endpoints.
+
+    ``await adb.run(fn, *args)`` calls ``fn(session, *args)`` on the dedicated
+    database threads, so blocking SQLite work never runs on the event loop and
+    doesn't compete with other requests for Starlette's default threadpool.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        from backend.utils.thread_offload import run_in_db_thread
+        return await run_in_db_thread(fn, self.session, *args, **kwargs)
+
+
+async def get_async_db(db=Depends(get_db)) -> AsyncDBSession:
+    """Dependency for async endpoints; wraps the request's get_db session."""
+    return AsyncDBSession(db)
+
 def init_db():
     """
     Initializes the database and creates tables if they don't exist.
@@ -15,6 +15,7 @@ Adding a migration:
 2. Append a Migration entry to MIGRATIONS with the next version number
 3. CURRENT_SCHEMA_VERSION updates automatically
 """
+import json
 import logging
 import os
 from dataclasses import dataclass
@@ -53,6 +54,71 @@ def _migrate_add_is_default_column(engine: Engine) -> None:
             logger.debug("Migration: is_default column already exists (idempotent skip)")
 
 
+def _decode_legacy_json(value):
+    """Legacy JSON columns hold JSON text that may itself encode a JSON string."""
+    while isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, ValueError):
+            return None
+    return value
+
+
+def _migrate_normalize_world_progress(engine: Engine) -> None:
+    """
+    Add world_user_progress.version and move per-NPC relationships and per-room
+    states out of their JSON blobs into world_npc_relationships / world_room_states.
+    """
+    from backend.sql_models import WorldNpcRelationship, WorldRoomState
+
+    with engine.connect() as conn:
+        result = conn.execute(text("PRAGMA table_info(world_user_progress)"))
+        columns = [row[1] for row in result.fetchall()]
+
+        if not columns:
+            logger.debug("Migration: world_user_progress table absent, skipping (create_all will handle)")
+            return
+
+        if "version" not in columns:
+            conn.execute(text(
+                "ALTER TABLE world_user_progress ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            ))
+            logger.info("Migration: added version column to world_user_progress")
+
+        WorldNpcRelationship.__table__.create(conn, checkfirst=True)
+        WorldRoomState.__table__.create(conn, checkfirst=True)
+
+        rows = conn.execute(text(
+            "SELECT id, world_uuid, user_uuid, npc_relationships_json, room_states_json "
+            "FROM world_user_progress "
+            "WHERE npc_relationships_json IS NOT NULL OR room_states_json IS NOT NULL"
+        )).fetchall()
+
+        moved = 0
+        for row_id, world_uuid, user_uuid, relationships_raw, rooms_raw in rows:
+            for table, key_column, raw in (
+                ("world_npc_relationships", "npc_uuid", relationships_raw),
+                ("world_room_states", "room_uuid", rooms_raw),
+            ):
+                entities = _decode_legacy_json(raw)
+                if not isinstance(entities, dict):
+                    continue
+                for key, data in entities.items():
+                    conn.execute(text(
+                        f"INSERT OR IGNORE INTO {table} (world_uuid, user_uuid, {key_column}, data_json) "
+                        "VALUES (:world_uuid, :user_uuid, :key, :data)"
+                    ), {"world_uuid": world_uuid, "user_uuid": user_uuid, "key": key, "data": json.dumps(data)})
+                    moved += 1
+            conn.execute(text(
+                "UPDATE world_user_progress SET npc_relationships_json = NULL, room_states_json = NULL "
+                "WHERE id = :id"
+            ), {"id": row_id})
+
+        conn.commit()
+        if rows:
+            logger.info(f"Migration: moved {moved} NPC relationship/room state entries out of {len(rows)} progress rows")
+
+
 # ---------------------------------------------------------------------------
 # Migration registry
 # ---------------------------------------------------------------------------
@@ -69,6 +135,7 @@ class Migration:
 # Every fn receives a SQLAlchemy Engine and must be idempotent.
 MIGRATIONS: list[Migration] = [
     Migration("2.7.1", "Add is_default column to character_images", _migrate_add_is_default_column),
+    Migration("2.7.2", "Normalize world progress NPC relationships and room states", _migrate_normalize_world_progress),
 ]
 
 # Derived from the registry so the two can never drift apart.
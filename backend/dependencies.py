@@ -10,6 +10,7 @@ from .database import get_db
 from .log_manager import LogManager
 from .settings_manager import SettingsManager
 from .png_metadata_handler import PngMetadataHandler
+from .utils.lazy_loading import resolve_lazy
 
 # Service dependencies
 from .services.character_service import CharacterService
@@ -31,6 +32,8 @@ from .handlers.world_card_chat_handler import WorldCardChatHandler
 from .world_asset_handler import WorldAssetHandler
 from .services.world_card_service import WorldCardService
 from .services.world_progress_service import WorldUserProgressService
+from .services.world_graph_service import WorldGraphCache
+from .services.world_bundle_service import WorldBundleService
 from .services.user_profile_service import UserProfileService
 
 # Core dependency providers
@@ -109,21 +112,21 @@ def get_database_chat_endpoint_adapters(request: Request, db: Session = Depends(
 # Handler dependency providers
 def get_template_handler(request: Request) -> TemplateHandler:
     """Get TemplateHandler instance from app state."""
-    template_handler = cast(TemplateHandler, request.app.state.template_handler)
+    template_handler = cast(TemplateHandler, resolve_lazy(request.app.state.template_handler))
     if template_handler is None:
         raise HTTPException(status_code=500, detail="Template handler not initialized")
     return template_handler
 
 def get_background_handler(request: Request) -> BackgroundHandler:
     """Get BackgroundHandler instance from app state."""
-    background_handler = cast(BackgroundHandler, request.app.state.background_handler)
+    background_handler = cast(BackgroundHandler, resolve_lazy(request.app.state.background_handler))
     if background_handler is None:
         raise HTTPException(status_code=500, detail="Background handler not initialized")
     return background_handler
 
 def get_content_filter_manager(request: Request) -> ContentFilterManager:
     """Get ContentFilterManager instance from app state."""
-    content_filter_manager = cast(ContentFilterManager, request.app.state.content_filter_manager)
+    content_filter_manager = cast(ContentFilterManager, resolve_lazy(request.app.state.content_filter_manager))
     if content_filter_manager is None:
         raise HTTPException(status_code=500, detail="Content filter manager not initialized")
     return content_filter_manager
@@ -258,10 +261,24 @@ def get_world_progress_service_dependency(request: Request) -> WorldUserProgress
     logger = get_logger(request)
     return WorldUserProgressService(
         db_session_generator=get_db,
-        logger=logger
+        logger=logger,
+        write_behind=getattr(request.app.state, "world_progress_write_behind", None)
     )
 
 
+def get_world_graph_cache_dependency(request: Request) -> Optional[WorldGraphCache]:
+    """Get the shared WorldGraphCache from app state (None before startup)."""
+    return getattr(request.app.state, "world_graph_cache", None)
+
+
+def get_world_bundle_service_dependency(request: Request) -> WorldBundleService:
+    """Get the shared WorldBundleService from app state."""
+    world_bundle_service = getattr(request.app.state, "world_bundle_service", None)
+    if world_bundle_service is None:
+        raise HTTPException(status_code=500, detail="World bundle service not initialized")
+    return world_bundle_service
+
+
 def get_user_profile_service_dependency(request: Request) -> UserProfileService:
     """Get UserProfileService instance from app state."""
     user_profile_service = cast(UserProfileService, request.app.state.user_profile_service)
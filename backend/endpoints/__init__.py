@@ -3,6 +3,11 @@ Router registry for all API endpoint modules.
 
 Centralizes router imports so main.py can register them in a loop
 instead of maintaining 22+ individual import/include_router lines.
+
+Routers needed by the landing views are imported eagerly (ALL_ROUTERS).
+World play/authoring, lore, layered-character and KoboldCPP management
+routers are listed in DEFERRED_ROUTERS by unique path prefix and imported on
+the first request under that prefix (see backend.utils.lazy_loading.DeferredRouterMiddleware).
 """
 
 # --- Endpoints with setup functions ---
@@ -17,37 +22,21 @@ from .character_image_endpoints import router as character_image_router
 from .chat_endpoints import router as chat_session_router
 from .content_filter_endpoints import router as content_filter_router
 from .gallery_endpoints import router as gallery_router
-from .lore_endpoints import router as lore_router
 from .npc_room_assignment_endpoints import router as npc_room_assignment_router
 from .room_endpoints import router as room_router
-from .room_card_serve_endpoints import router as room_card_serve_router
 from .settings_endpoints import router as settings_router
 from .template_endpoints import router as template_router
 from .user_endpoints import router as user_router
-from .world_asset_endpoints import router as world_asset_router
-
-# --- Endpoints already in this directory ---
-from .adventure_log_endpoints import router as adventure_log_router
-from .room_card_endpoints import router as room_card_crud_router
-from .world_card_endpoints_v2 import router as world_card_crud_router
-from .world_progress_endpoints import router as world_progress_router
 
 ALL_ROUTERS = [
     health_router,
     chat_session_router,
-    room_card_serve_router,
-    room_card_crud_router,
-    world_card_crud_router,
-    world_progress_router,
-    adventure_log_router,
     character_router,
     user_router,
     settings_router,
     template_router,
-    lore_router,
     room_router,
     npc_room_assignment_router,
-    world_asset_router,
     gallery_router,
     character_image_router,
     background_router,
@@ -55,3 +44,57 @@ ALL_ROUTERS = [
     file_upload_router,
     content_filter_router,
 ]
+
+
+# --- Deferred endpoints (imported on first request under their prefix) ---
+# Loaders use plain imports so PyInstaller still bundles the modules.
+
+def _load_room_card_serve_router():
+    from .room_card_serve_endpoints import router
+    return router
+
+def _load_room_card_crud_router():
+    from .room_card_endpoints import router
+    return router
+
+def _load_world_card_crud_router():
+    from .world_card_endpoints_v2 import router
+    return router
+
+def _load_world_progress_router():
+    from .world_progress_endpoints import router
+    return router
+
+def _load_adventure_log_router():
+    from .adventure_log_endpoints import router
+    return router
+
+def _load_lore_router():
+    from .lore_endpoints import router
+    return router
+
+def _load_world_asset_router():
+    from .world_asset_endpoints import router
+    return router
+
+def _load_layered_character_router():
+    # Pulls in Pillow compositing and the layer caches
+    from .layered_character_endpoints import router
+    return router
+
+def _load_koboldcpp_router():
+    # Pulls in the KoboldCPP manager, psutil and subprocess handling
+    from backend.koboldcpp_handler import router
+    return router
+
+DEFERRED_ROUTERS = {
+    "/api/worlds": _load_room_card_serve_router,
+    "/api/room-cards": _load_room_card_crud_router,
+    "/api/world-cards-v2": _load_world_card_crud_router,
+    "/api/world": _load_world_progress_router,
+    "/api/context": _load_adventure_log_router,
+    "/api/lore": _load_lore_router,
+    "/api/world-assets": _load_world_asset_router,
+    "/api/koboldcpp": _load_koboldcpp_router,
+    "/api/layered-characters": _load_layered_character_router,
+}
@@ -8,6 +8,7 @@ from pathlib import Path
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Body, UploadFile, File, Form, Query, Request
 from fastapi.responses import JSONResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import re
@@ -20,6 +21,8 @@ from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
 from backend.services.character_service import CharacterService
 from backend.services.character_indexing_service import CharacterIndexingService
+from backend.database import get_db_generation
+from backend.utils.json_responses import SerializedResponseCache
 
 # Use sql_models.py instead of models.py to avoid conflicts with models package
 from backend.sql_models import Character as CharacterDBModel
@@ -58,6 +61,9 @@ def get_character_indexing_service(
     """Get the character indexing service for database-first directory syncing"""
     return CharacterIndexingService(char_service, settings_manager, logger)
 
+# Serialized gallery listings, reused until the next database write
+_character_list_cache = SerializedResponseCache()
+
 
 router = APIRouter(
     prefix="/api",
@@ -237,6 +243,7 @@ def to_api_model(db_char: CharacterDBModel, logger: LogManager) -> CharacterAPIB
 
 @router.get("/characters", response_model=CharacterListResponse, responses=STANDARD_RESPONSES, summary="List characters from database with directory sync")
 async def list_characters(
+    request: Request,
     directory: Optional[str] = Query(None, description="Get characters from a specific directory instead of DB"),
     skip: int = Query(0, ge=0),
     limit: int = Query(0, ge=0, description="0 means no limit (return all)"),
@@ -271,7 +278,6 @@ async def list_characters(
                 )# Try database-first approach for better performance
             files = []
             try:                # First attempt: Get characters from database that are in this directory
-                from fastapi.concurrency import run_in_threadpool
                 from backend.utils.path_utils import normalize_path
                 
                 # Use configurable limit or None for no limit
@@ -394,6 +400,16 @@ async def list_characters(
             )    # If no directory is provided, use the new database-first approach with directory sync
     logger.info(f"GET /api/characters - using database-first with directory sync (skip: {skip}, limit: {limit})")
     try:
+        # Read the generation first: if the sync (or anyone else) writes meanwhile, the result isn't cached
+        generation = get_db_generation()
+        # An unchanged DB generation plus unchanged directories means the full sync
+        # would find nothing to do, so serve the cached payload without running it
+        fingerprint = await run_in_threadpool(indexing_service.directory_fingerprint)
+        cache_key = ("characters", skip, limit, fingerprint)
+        cached = _character_list_cache.get(cache_key)
+        if cached is not None:
+            return cached.to_response(request)
+
         # Use the new indexing service to get characters with directory sync
         all_characters = await indexing_service.get_characters_with_directory_sync()
         
@@ -412,7 +428,8 @@ async def list_characters(
                 continue
         
         # When no directory is provided, return a ListResponse of CharacterAPIBase
-        return CharacterListResponse(characters=characters_api_list, total=total_characters)
+        response = CharacterListResponse(characters=characters_api_list, total=total_characters)
+        return _character_list_cache.put(cache_key, generation, response).to_response(request)
 
     except Exception as e:
         logger.error(f"Error fetching or processing characters: {e}")
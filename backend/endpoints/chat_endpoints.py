@@ -13,10 +13,11 @@ from backend.services import chat_service
 from backend.services.character_service import CharacterService # Import CharacterService
 from backend.services.reliable_chat_manager_db import DatabaseReliableChatManager
 from backend.services.database_chat_endpoint_adapters import DatabaseChatEndpointAdapters
-from backend.database import get_db
+from backend.database import AsyncDBSession, get_async_db, get_db
 from backend.dependencies import get_character_service_dependency, get_logger, get_database_chat_endpoint_adapters, get_database_chat_manager # Import dependencies
 from backend.log_manager import LogManager
 from backend.utils.jsonl_chat_utils import export_multiple_chats_to_jsonl, import_jsonl_to_chat
+from backend.utils.json_responses import FastJSONResponse
 import logging
 
 # Import standardized response models and error handling
@@ -117,67 +118,82 @@ def create_new_chat_endpoint(
     except Exception as e:
         raise handle_generic_error(e, "creating new chat session")
 
+def _build_session_response(db: Session, chat_session: sql_models.ChatSession) -> pydantic_models.ChatSessionReadV2:
+    """Load a session's messages and build the ChatSessionReadV2 response model."""
+    db_messages = chat_service.get_chat_messages(db=db, chat_session_uuid=chat_session.chat_session_uuid)
+
+    # Convert database messages to Pydantic models
+    message_responses = [
+        pydantic_models.ChatMessageRead(
+            id=msg.message_id,
+            message_id=msg.message_id,
+            chat_session_uuid=msg.chat_session_uuid,
+            role=msg.role,
+            content=msg.content,
+            status=msg.status,
+            reasoning_content=msg.reasoning_content,
+            metadata_json=msg.metadata_json,
+            timestamp=msg.timestamp,
+            created_at=msg.created_at,
+            updated_at=msg.updated_at
+        )
+        for msg in db_messages
+    ]
+
+    return pydantic_models.ChatSessionReadV2(
+        chat_session_uuid=chat_session.chat_session_uuid,
+        character_uuid=chat_session.character_uuid,
+        user_uuid=chat_session.user_uuid,
+        start_time=chat_session.start_time,
+        last_message_time=chat_session.last_message_time,
+        message_count=chat_session.message_count,
+        title=chat_session.title,
+        export_format_version=chat_session.export_format_version,
+        is_archived=chat_session.is_archived,
+        messages=message_responses
+    )
+
+def _load_latest_chat(db: Session, character_uuid: str):
+    # Get the latest session from database
+    latest_session = chat_service.get_latest_chat_session_for_character(db=db, character_uuid=character_uuid)
+    if not latest_session:
+        # As per user clarification, robustly tolerate this. Frontend might call create-new-chat.
+        # Returning None (which FastAPI converts to 200 OK with null body) or explicit 404.
+        # For now, let's return None, which will be an empty 200 if no session.
+        return None
+    return _build_session_response(db, latest_session)
+
 @router.post("/load-latest-chat", response_model=DataResponse[Optional[pydantic_models.ChatSessionReadV2]])
-def load_latest_chat_endpoint(
+async def load_latest_chat_endpoint(
     payload: pydantic_models.CharacterUUIDPayload, # Use the new Pydantic model for the request body
-    db: Session = Depends(get_db),
+    adb: AsyncDBSession = Depends(get_async_db),
     character_service: CharacterService = Depends(get_character_service_dependency),
     logger: LogManager = Depends(get_logger)
 ):
     """Load the latest chat session for a character using database storage."""
     try:
-        # Get the latest session from database
-        latest_session = chat_service.get_latest_chat_session_for_character(db=db, character_uuid=payload.character_uuid)
-        if not latest_session:
-            # As per user clarification, robustly tolerate this. Frontend might call create-new-chat.
-            # Returning None (which FastAPI converts to 200 OK with null body) or explicit 404.
-            # For now, let's return None, which will be an empty 200 if no session.
+        session_response = await adb.run(_load_latest_chat, payload.character_uuid)
+        if session_response is None:
             return create_data_response(None)
-        
-        # Load the actual messages from the database
-        db_messages = chat_service.get_chat_messages(db=db, chat_session_uuid=latest_session.chat_session_uuid)
-        
-        # Convert database messages to Pydantic models
-        message_responses = [
-            pydantic_models.ChatMessageRead(
-                id=msg.message_id,
-                message_id=msg.message_id,
-                chat_session_uuid=msg.chat_session_uuid,
-                role=msg.role,
-                content=msg.content,
-                status=msg.status,
-                reasoning_content=msg.reasoning_content,
-                metadata_json=msg.metadata_json,
-                timestamp=msg.timestamp,
-                created_at=msg.created_at,
-                updated_at=msg.updated_at
-            )
-            for msg in db_messages
-        ]
-        
-        # Create the session response with messages
-        session_response = pydantic_models.ChatSessionReadV2(
-            chat_session_uuid=latest_session.chat_session_uuid,
-            character_uuid=latest_session.character_uuid,
-            user_uuid=latest_session.user_uuid,
-            start_time=latest_session.start_time,
-            last_message_time=latest_session.last_message_time,
-            message_count=latest_session.message_count,
-            title=latest_session.title,
-            export_format_version=latest_session.export_format_version,
-            is_archived=latest_session.is_archived,
-            messages=message_responses
-        )
-        
-        return create_data_response(session_response)
+        return FastJSONResponse(create_data_response(session_response))
     
     except Exception as e:
         raise handle_generic_error(e, "loading latest chat")
 
+def _load_chat(db: Session, character_uuid: str, chat_session_uuid: str):
+    # Get the specific session from database
+    session = chat_service.get_chat_session(db=db, chat_session_uuid=chat_session_uuid)
+    if not session:
+        return None
+        
+    if session.character_uuid != character_uuid:
+         raise ValidationException("Chat session does not belong to the specified character")
+    return _build_session_response(db, session)
+
 @router.post("/load-chat", response_model=DataResponse[Optional[pydantic_models.ChatSessionReadV2]])
-def load_chat_endpoint(
+async def load_chat_endpoint(
     payload: dict, # Expected: {character_uuid: str, chat_session_uuid: str}
-    db: Session = Depends(get_db),
+    adb: AsyncDBSession = Depends(get_async_db),
     character_service: CharacterService = Depends(get_character_service_dependency),
     logger: LogManager = Depends(get_logger)
 ):
@@ -189,50 +205,10 @@ def load_chat_endpoint(
         if not character_uuid or not chat_session_uuid:
              raise ValidationException("character_uuid and chat_session_uuid are required")
 
-        # Get the specific session from database
-        session = chat_service.get_chat_session(db=db, chat_session_uuid=chat_session_uuid)
-        if not session:
+        session_response = await adb.run(_load_chat, character_uuid, chat_session_uuid)
+        if session_response is None:
             return create_data_response(None)
-            
-        if session.character_uuid != character_uuid:
-             raise ValidationException("Chat session does not belong to the specified character")
-        
-        # Load the actual messages from the database
-        db_messages = chat_service.get_chat_messages(db=db, chat_session_uuid=session.chat_session_uuid)
-        
-        # Convert database messages to Pydantic models
-        message_responses = [
-            pydantic_models.ChatMessageRead(
-                id=msg.message_id,
-                message_id=msg.message_id,
-                chat_session_uuid=msg.chat_session_uuid,
-                role=msg.role,
-                content=msg.content,
-                status=msg.status,
-                reasoning_content=msg.reasoning_content,
-                metadata_json=msg.metadata_json,
-                timestamp=msg.timestamp,
-                created_at=msg.created_at,
-                updated_at=msg.updated_at
-            )
-            for msg in db_messages
-        ]
-        
-        # Create the session response with messages
-        session_response = pydantic_models.ChatSessionReadV2(
-            chat_session_uuid=session.chat_session_uuid,
-            character_uuid=session.character_uuid,
-            user_uuid=session.user_uuid,
-            start_time=session.start_time,
-            last_message_time=session.last_message_time,
-            message_count=session.message_count,
-            title=session.title,
-            export_format_version=session.export_format_version,
-            is_archived=session.is_archived,
-            messages=message_responses
-        )
-        
-        return create_data_response(session_response)
+        return FastJSONResponse(create_data_response(session_response))
     
     except (NotFoundException, ValidationException):
         raise
@@ -320,90 +296,59 @@ def save_chat_endpoint(
     except Exception as e:
         raise handle_generic_error(e, "saving chat")
 
+def _append_chat_message(db: Session, payload: pydantic_models.ChatMessageAppend, logger: LogManager):
+    # 1. Get the existing chat session from DB
+    db_chat_session = chat_service.get_chat_session(db, chat_session_uuid=payload.chat_session_uuid)
+    if not db_chat_session:
+        raise NotFoundException(f"ChatSession not found: {payload.chat_session_uuid}")
+
+    # 2. Extract message fields from the dict format
+    message_data = payload.message
+    role = message_data.get('role', 'user')
+    content = message_data.get('content', '') or message_data.get('text', '')
+    status = message_data.get('status', 'complete')
+    reasoning_content = message_data.get('reasoning_content')
+    metadata_json = message_data.get('metadata')
+
+    # 3. Create the new message in database
+    chat_service.create_chat_message(
+        db=db,
+        chat_session_uuid=payload.chat_session_uuid,
+        role=role,
+        content=content,
+        status=status,
+        reasoning_content=reasoning_content,
+        metadata_json=metadata_json
+    )
+
+    # 3.5. Decrement lore activation timers (sticky/cooldown) after each message
+    try:
+        from backend.services.lore_activation_tracker import LoreActivationTracker
+        activation_tracker = LoreActivationTracker(db, payload.chat_session_uuid)
+        decrement_result = activation_tracker.decrement_all()
+        logger.log_step(f"Decremented lore activations: {decrement_result}")
+    except Exception as tracker_error:
+        logger.log_warning(f"Error decrementing lore activations: {tracker_error}")
+        # Continue even if lore tracking fails
+
+    # 4. Update ChatSession DB record (message_count, last_message_time)
+    # The create_chat_message function already updates the session metadata
+    # But let's refresh to get the latest data
+    db.refresh(db_chat_session)
+
+    # 5. Convert to ChatSessionReadV2 format with the new message
+    return _build_session_response(db, db_chat_session)
+
 @router.post("/append-chat-message", response_model=DataResponse[pydantic_models.ChatSessionReadV2])
-def append_chat_message_endpoint(
+async def append_chat_message_endpoint(
     payload: pydantic_models.ChatMessageAppend,
-    db: Session = Depends(get_db),
+    adb: AsyncDBSession = Depends(get_async_db),
     character_service: CharacterService = Depends(get_character_service_dependency),
     logger: LogManager = Depends(get_logger)
 ):
     """Append a new message to chat session using database storage."""
     try:
-        # 1. Get the existing chat session from DB
-        db_chat_session = chat_service.get_chat_session(db, chat_session_uuid=payload.chat_session_uuid)
-        if not db_chat_session:
-            raise NotFoundException(f"ChatSession not found: {payload.chat_session_uuid}")
-
-        # 2. Extract message fields from the dict format
-        message_data = payload.message
-        role = message_data.get('role', 'user')
-        content = message_data.get('content', '') or message_data.get('text', '')
-        status = message_data.get('status', 'complete')
-        reasoning_content = message_data.get('reasoning_content')
-        metadata_json = message_data.get('metadata')
-
-        # 3. Create the new message in database
-        db_message = chat_service.create_chat_message(
-            db=db,
-            chat_session_uuid=payload.chat_session_uuid,
-            role=role,
-            content=content,
-            status=status,
-            reasoning_content=reasoning_content,
-            metadata_json=metadata_json
-        )
-
-        # 3.5. Decrement lore activation timers (sticky/cooldown) after each message
-        try:
-            from backend.services.lore_activation_tracker import LoreActivationTracker
-            activation_tracker = LoreActivationTracker(db, payload.chat_session_uuid)
-            decrement_result = activation_tracker.decrement_all()
-            logger.log_step(f"Decremented lore activations: {decrement_result}")
-        except Exception as tracker_error:
-            logger.log_warning(f"Error decrementing lore activations: {tracker_error}")
-            # Continue even if lore tracking fails
-
-        # 4. Update ChatSession DB record (message_count, last_message_time)
-        # The create_chat_message function already updates the session metadata
-        # But let's refresh to get the latest data
-        db.refresh(db_chat_session)
-        updated_session = db_chat_session
-
-        # 5. Convert to ChatSessionReadV2 format with the new message
-        db_messages = chat_service.get_chat_messages(db=db, chat_session_uuid=payload.chat_session_uuid)
-        
-        # Convert database messages to Pydantic models
-        message_responses = [
-            pydantic_models.ChatMessageRead(
-                id=msg.message_id,
-                message_id=msg.message_id,
-                chat_session_uuid=msg.chat_session_uuid,
-                role=msg.role,
-                content=msg.content,
-                status=msg.status,
-                reasoning_content=msg.reasoning_content,
-                metadata_json=msg.metadata_json,
-                timestamp=msg.timestamp,
-                created_at=msg.created_at,
-                updated_at=msg.updated_at
-            )
-            for msg in db_messages
-        ]
-        
-        # Create the session response with messages
-        session_response = pydantic_models.ChatSessionReadV2(
-            chat_session_uuid=updated_session.chat_session_uuid,
-            character_uuid=updated_session.character_uuid,
-            user_uuid=updated_session.user_uuid,
-            start_time=updated_session.start_time,
-            last_message_time=updated_session.last_message_time,
-            message_count=updated_session.message_count,
-            title=updated_session.title,
-            export_format_version=updated_session.export_format_version,
-            is_archived=updated_session.is_archived,
-            messages=message_responses
-        )
-
+        session_response = await adb.run(_append_chat_message, payload, logger)
         return create_data_response(session_response)
     
     except (NotFoundException, ValidationException):
@@ -885,7 +830,7 @@ def reliable_load_chat_endpoint(
             messages=message_responses
         )
 
-        return create_data_response(session_response)
+        return FastJSONResponse(create_data_response(session_response))
 
     except (NotFoundException, ValidationException):
         raise
@@ -1236,10 +1181,10 @@ def export_chats_bulk_endpoint(
             character_uuid=character_uuid
         )
 
-        return create_data_response({
+        return FastJSONResponse(create_data_response({
             "content": content,
             "filename": filename
-        })
+        }))
 
     except ValidationException:
         raise
@@ -4,6 +4,7 @@ import json
 import traceback
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 # Import handler types for type hinting
@@ -152,13 +153,12 @@ async def update_incomplete_sentences_setting(
         
         logger.log_step(f"Updating remove_incomplete_sentences setting: {payload.enabled}")
         
-        # Update the setting in the main settings
+        # Update the setting and wait for it to reach disk, so a failed write is reported
         success = settings_manager.update_settings({"remove_incomplete_sentences": payload.enabled})
+        if success:
+            success = await run_in_threadpool(settings_manager.flush)
         if not success:
             raise ValidationException("Failed to update incomplete sentences setting")
-            
-        # Save settings to persist the change
-        settings_manager.save_settings()
         
         return create_data_response({
             "message": "Incomplete sentences setting updated successfully",
@@ -2,7 +2,7 @@
 @file generation_endpoints.py
 @description Endpoints for LLM text generation including chat responses, greetings,
              impersonation, room content generation, and NPC thin frame generation.
-@dependencies fastapi, api_handler
+@dependencies fastapi, api_handler, utils/thread_offload, utils/cancellation
 @consumers main.py
 """
 import asyncio
@@ -10,10 +10,13 @@ import json
 import re
 import traceback
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse
 
 from backend.log_manager import LogManager
 from backend.api_handler import ApiHandler
+from backend.services.generation_scheduler import PRIORITY_BACKGROUND
+from backend.utils.cancellation import CANCEL_TIMEOUT, CancellableStreamingResponse, StreamCancel
+from backend.utils.thread_offload import iterate_in_thread
 
 # Thin frame generation timeout (30 seconds)
 THIN_FRAME_TIMEOUT_SECONDS = 30
@@ -45,8 +48,10 @@ async def generate(request: Request):
         request_data = await request.json()
 
         # Use the ApiHandler to stream the response
-        return StreamingResponse(
-            _api_handler.stream_generate(request_data),
+        cancel = StreamCancel()
+        return CancellableStreamingResponse(
+            iterate_in_thread(_api_handler.stream_generate(request_data, cancel=cancel)),
+            cancel=cancel,
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -131,8 +136,10 @@ async def generate_greeting(request: Request):
             f"prompt={len(result.prompt)} chars, memory={len(result.memory)} chars"
         )
 
-        return StreamingResponse(
-            _api_handler.stream_generate(stream_request_data),
+        cancel = StreamCancel()
+        return CancellableStreamingResponse(
+            iterate_in_thread(_api_handler.stream_generate(stream_request_data, cancel=cancel)),
+            cancel=cancel,
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -225,8 +232,10 @@ async def generate_impersonate(request: Request):
             f"prompt={len(result.prompt)} chars, memory={len(result.memory)} chars"
         )
 
-        return StreamingResponse(
-            _api_handler.stream_generate(stream_request_data),
+        cancel = StreamCancel()
+        return CancellableStreamingResponse(
+            iterate_in_thread(_api_handler.stream_generate(stream_request_data, cancel=cancel)),
+            cancel=cancel,
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -294,8 +303,10 @@ async def generate_room_content(request: Request):
             f"prompt={len(result.prompt)} chars, memory={len(result.memory)} chars"
         )
 
-        return StreamingResponse(
-            _api_handler.stream_generate(stream_request_data),
+        cancel = StreamCancel()
+        return CancellableStreamingResponse(
+            iterate_in_thread(_api_handler.stream_generate(stream_request_data, cancel=cancel)),
+            cancel=cancel,
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -447,6 +458,8 @@ async def generate_thin_frame(request: Request):
                 "_pre_assembled": True,
                 "quiet": True,
                 "max_tokens": 300,
+                # Frames are prefetched for NPCs; chat replies go first
+                "priority": PRIORITY_BACKGROUND,
             }
         }
 
@@ -457,9 +470,10 @@ async def generate_thin_frame(request: Request):
 
         # Collect the streamed response with timeout
         collected_response = []
+        cancel = StreamCancel()
         try:
             async def collect_stream():
-                async for chunk in _api_handler.stream_generate(stream_request_data):
+                async for chunk in iterate_in_thread(_api_handler.stream_generate(stream_request_data, cancel=cancel)):
                     if isinstance(chunk, bytes):
                         chunk = chunk.decode('utf-8')
                     # Handle SSE format
@@ -468,8 +482,18 @@ async def generate_thin_frame(request: Request):
                     if chunk.strip() and chunk.strip() != '[DONE]':
                         collected_response.append(chunk)
 
+            async def cancel_on_timeout():
+                # Stop the upstream generation at the deadline; wait_for alone only
+                # gives up once the worker thread returns its next chunk
+                await asyncio.sleep(THIN_FRAME_TIMEOUT_SECONDS)
+                await asyncio.to_thread(cancel.cancel, CANCEL_TIMEOUT)
+
             # Run with timeout
-            await asyncio.wait_for(collect_stream(), timeout=THIN_FRAME_TIMEOUT_SECONDS)
+            watchdog = asyncio.create_task(cancel_on_timeout())
+            try:
+                await asyncio.wait_for(collect_stream(), timeout=THIN_FRAME_TIMEOUT_SECONDS)
+            finally:
+                watchdog.cancel()
 
         except asyncio.TimeoutError:
             _logger.log_warning(f"Thin frame generation timed out after {THIN_FRAME_TIMEOUT_SECONDS}s, using fallback")
@@ -1,17 +1,18 @@
 """
 @file health_endpoints.py
-@description Health check, LLM status monitoring, and debug utility endpoints.
+@description Health check, LLM status monitoring, metrics, and debug utility endpoints.
 @dependencies fastapi, httpx
 @consumers main.py
 """
 import time
 import traceback
-from fastapi import APIRouter, Request, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from backend.log_manager import LogManager
 from backend.settings_manager import SettingsManager
-from backend.png_debug_handler import PngDebugHandler
+from backend.services.generation_scheduler import SCHEDULER
+from backend.utils.metrics import REGISTRY, TRACES
 from backend.response_models import (
     HealthCheckResponse,
     STANDARD_RESPONSES
@@ -30,16 +31,24 @@ _settings_manager: SettingsManager = None
 _version: str = "0.1.0"
 
 
-_debug_handler: PngDebugHandler = None
+_debug_handler = None  # PngDebugHandler, constructed on first /debug-png call
 
 
 def setup_health_router(logger: LogManager, settings_manager: SettingsManager, version: str):
     """Initialize the health router with required dependencies."""
-    global _logger, _settings_manager, _version, _debug_handler
+    global _logger, _settings_manager, _version
     _logger = logger
     _settings_manager = settings_manager
     _version = version
-    _debug_handler = PngDebugHandler(logger)
+
+
+def _get_debug_handler():
+    """Import and build the PNG debug handler on first use (rarely used tool)."""
+    global _debug_handler
+    if _debug_handler is None:
+        from backend.png_debug_handler import PngDebugHandler
+        _debug_handler = PngDebugHandler(_logger)
+    return _debug_handler
 
 
 @router.get("/health", response_model=HealthCheckResponse)
@@ -59,10 +68,49 @@ async def health_check(request: Request):
         status="healthy",
         version=_version,
         latency_ms=latency_ms,
-        llm=None  # Don't return LLM status here - use /api/llm-status instead
+        llm=None,  # Don't return LLM status here - use /api/llm-status instead
+        startup=_get_startup_snapshot(request)
     )
 
 
+@router.get("/health/ready")
+async def readiness_check(request: Request):
+    """Readiness probe for the background startup warm-up.
+
+    The server accepts requests as soon as the database is initialised; library
+    synchronization continues in the background. Returns 503 with per-phase
+    progress until the warm-up finishes, then 200.
+    """
+    snapshot = _get_startup_snapshot(request)
+    if snapshot is None:
+        # No warm-up registered (e.g. embedded app in tests) - nothing to wait for
+        return {"ready": True, "state": "complete", "phases": []}
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+
+def _get_startup_snapshot(request: Request):
+    warmup = getattr(request.app.state, "startup_warmup", None)
+    return warmup.snapshot() if warmup is not None else None
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency histograms (spans, generation stages, HTTP) in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/traces")
+async def get_generation_traces(limit: int = Query(20, ge=1, le=100)):
+    """Stage timelines of the most recent generations, newest first (debug view)."""
+    return {"enabled": REGISTRY.enabled, "traces": TRACES.recent(limit)}
+
+
+@router.get("/metrics/scheduler")
+async def get_scheduler_status():
+    """Per-backend generation queues: slot limit, active requests, queued by priority."""
+    return {"backends": SCHEDULER.snapshot()}
+
+
 @router.get("/llm-status")
 async def get_llm_status(request: Request):
     """Get live LLM provider status including actual loaded model.
@@ -147,7 +195,7 @@ async def get_llm_status(request: Request):
 async def debug_png(file: UploadFile = File(...)):
     """Debug a PNG file to extract all chunks and metadata."""
     try:
-        result = await _debug_handler.debug_png(file)
+        result = await _get_debug_handler().debug_png(file)
         return JSONResponse(content=result)
     except Exception as e:
         _logger.log_error(f"Error debugging PNG: {str(e)}")
@@ -0,0 +1,118 @@
+"""
+backend/endpoints/layered_character_endpoints.py
+Preview and thumbnail endpoints for layered characters (the Characters/
+directory maintained by character_creator.py).
+
+Compositing goes through the shared LayerCompositor, so repeated previews
+of a stack that only changed at the top are cheap.
+"""
+import io
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+from backend.error_handlers import NotFoundException, ValidationException
+from backend.response_models import STANDARD_RESPONSES
+from backend.services.layer_compositor import LayerCompositor, find_base_image, layered_characters_dir
+
+# PNG encoding of a 2k composite dominates the response time at higher levels
+PNG_COMPRESS_LEVEL = 1
+MAX_PREVIEW_SIZE = 4096
+
+
+class CompositeRequest(BaseModel):
+    """Active layers, bottom to top, as "<category>/<file>.png" under the character."""
+    layers: List[str] = Field(default_factory=list)
+    max_width: Optional[int] = Field(default=None, ge=1, le=MAX_PREVIEW_SIZE)
+    max_height: Optional[int] = Field(default=None, ge=1, le=MAX_PREVIEW_SIZE)
+
+
+router = APIRouter(
+    prefix="/api/layered-characters",
+    tags=["layered-characters"],
+    responses=STANDARD_RESPONSES
+)
+
+_compositor: Optional[LayerCompositor] = None
+_compositor_lock = threading.Lock()
+
+
+def get_layer_compositor(request: Request) -> LayerCompositor:
+    """Process-wide compositor, created on first use."""
+    global _compositor
+    if _compositor is None:
+        with _compositor_lock:
+            if _compositor is None:
+                _compositor = LayerCompositor(logger=getattr(request.app.state, "logger", None))
+    return _compositor
+
+
+def get_layered_characters_dir() -> Path:
+    return layered_characters_dir()
+
+
+def _resolve(root: Path, *parts: str) -> Path:
+    """Join ``parts`` under ``root``, refusing anything that escapes it."""
+    path = root.joinpath(*parts).resolve()
+    if not path.is_relative_to(root.resolve()):
+        raise ValidationException(f"Invalid path: {'/'.join(parts)}")
+    return path
+
+
+def _character_dir(root: Path, character: str) -> Path:
+    character_dir = _resolve(root, character)
+    if not character_dir.is_dir():
+        raise NotFoundException(f"Layered character '{character}' not found",
+                                resource_type="layered_character", resource_id=character)
+    return character_dir
+
+
+def _png_response(image) -> Response:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return Response(content=buffer.getvalue(), media_type="image/png")
+
+
+# Plain (sync) handlers: FastAPI runs them in the threadpool, off the event loop
+
+@router.post("/{character}/composite")
+def composite_layered_character(
+    character: str,
+    body: CompositeRequest,
+    root: Path = Depends(get_layered_characters_dir),
+    compositor: LayerCompositor = Depends(get_layer_compositor),
+):
+    """Composite the base image and ``layers``; scaled to fit max_width/max_height when given."""
+    character_dir = _character_dir(root, character)
+    base_path = find_base_image(character_dir)
+    if base_path is None:
+        raise NotFoundException(f"Layered character '{character}' has no base image")
+    layer_paths = [_resolve(character_dir, layer) for layer in body.layers]
+
+    if body.max_width or body.max_height:
+        bounds = (body.max_width or MAX_PREVIEW_SIZE, body.max_height or MAX_PREVIEW_SIZE)
+        image = compositor.preview(base_path, layer_paths, bounds)
+    else:
+        image = compositor.compose(base_path, layer_paths)
+    return _png_response(image)
+
+
+@router.get("/{character}/thumbnail/{category}/{filename}")
+def layered_character_thumbnail(
+    character: str,
+    category: str,
+    filename: str,
+    size: int = Query(80, ge=16, le=512),
+    root: Path = Depends(get_layered_characters_dir),
+    compositor: LayerCompositor = Depends(get_layer_compositor),
+):
+    """Thumbnail of one layer file (served from the persisted thumbnail cache)."""
+    path = _resolve(_character_dir(root, character), category, filename)
+    if not path.is_file():
+        raise NotFoundException(f"Layer '{category}/{filename}' not found",
+                                resource_type="layer", resource_id=f"{category}/{filename}")
+    return _png_response(compositor.thumbnail(path, (size, size)))
@@ -7,7 +7,7 @@ Separate from database-backed room endpoints in room_endpoints.py.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse
 from pydantic import ValidationError
@@ -16,6 +16,7 @@ from backend.models.room_card import (
     RoomCard, RoomCardSummary, CreateRoomRequest, UpdateRoomRequest
 )
 from backend.handlers.room_card_handler import RoomCardHandler
+from backend.services.world_graph_service import WorldGraphCache
 from backend.services.character_service import CharacterService
 from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
@@ -24,7 +25,8 @@ from backend.dependencies import (
     get_logger_dependency,
     get_character_service_dependency,
     get_png_handler_dependency,
-    get_settings_manager_dependency
+    get_settings_manager_dependency,
+    get_world_graph_cache_dependency
 )
 from backend.response_models import (
     DataResponse,
@@ -45,10 +47,11 @@ def get_room_card_handler(
     character_service: CharacterService = Depends(get_character_service_dependency),
     png_handler: PngMetadataHandler = Depends(get_png_handler_dependency),
     settings_manager: SettingsManager = Depends(get_settings_manager_dependency),
-    logger: LogManager = Depends(get_logger_dependency)
+    logger: LogManager = Depends(get_logger_dependency),
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency)
 ) -> RoomCardHandler:
     """Dependency injection for RoomCardHandler"""
-    return RoomCardHandler(character_service, png_handler, settings_manager, logger)
+    return RoomCardHandler(character_service, png_handler, settings_manager, logger, graph_cache=graph_cache)
 
 
 @router.post(
@@ -8,7 +8,8 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 import requests
 
 # Import handler types for type hinting
@@ -16,6 +17,7 @@ from backend.log_manager import LogManager
 from backend.settings_manager import SettingsManager
 # Import adapters needed for test_connection
 from backend.api_provider_adapters import get_provider_adapter
+from backend.services.model_catalog_cache import page_model_list
 
 # Import standardized response models and error handling
 from backend.response_models import (
@@ -59,11 +61,22 @@ class TestConnectionPayload(BaseModel):
     templateId: Optional[str] = None
     useOpenAICompat: Optional[bool] = None
 
-class FeatherlessModelsPayload(BaseModel):
+class ModelListQuery(BaseModel):
+    """Server-side search and paging for the model pickers (all models when limit is unset)."""
+    search: Optional[str] = None
+    offset: int = Field(default=0, ge=0)
+    limit: Optional[int] = Field(default=None, ge=1, le=1000)
+    refresh: bool = False  # skip the catalog cache TTL
+
+class OpenRouterModelsPayload(ModelListQuery):
+    url: str = "https://openrouter.ai/api/v1"
+    apiKey: Optional[str] = None
+
+class FeatherlessModelsPayload(ModelListQuery):
     url: str
     apiKey: Optional[str] = None
 
-class OllamaModelsPayload(BaseModel):
+class OllamaModelsPayload(ModelListQuery):
     url: str
 
 # --- Settings Endpoints ---
@@ -443,6 +456,43 @@ async def validate_directory(
             "message": f"Error validating directory: {str(e)}"
         })
 
+def _model_list_response(provider: str, models_response: Any, payload: ModelListQuery, logger: LogManager):
+    """DataResponse with one filtered page of an adapter's list_models result."""
+    if models_response and isinstance(models_response, dict):
+        if models_response.get("success") is True and "models" in models_response:
+            page = page_model_list(models_response, payload.search, payload.offset, payload.limit)
+            page.pop("success", None)
+            logger.log_step(f"Returning {len(page['models'])} of {page['total']} {provider} models"
+                            f"{' (cached)' if page.get('cached') else ''}")
+            return create_data_response(page)
+        elif models_response.get("success") is False and "error" in models_response:
+            logger.log_warning(f"Error reported by {provider} adapter list_models: {models_response['error']}")
+            return create_error_response(models_response['error'], "400")
+
+    # Fallback for truly unexpected response structure from adapter
+    logger.log_warning(f"Unexpected response format from {provider} adapter: {models_response}")
+    return create_error_response(f"Unexpected response format from {provider} adapter", "500")
+
+@router.post("/openrouter/models", response_model=DataResponse, responses=STANDARD_RESPONSES)
+async def get_openrouter_models_proxy(
+    payload: OpenRouterModelsPayload,
+    logger: LogManager = Depends(get_logger_dependency)
+):
+    """Proxy to fetch available models from OpenRouter."""
+    try:
+        if not payload.apiKey:
+            return create_error_response("OpenRouter API key is required", "400")
+        logger.log_step(f"Proxying OpenRouter models request for URL: {payload.url}")
+        adapter = get_provider_adapter("OpenRouter", logger)
+        models_response = await run_in_threadpool(
+            adapter.list_models, payload.url, payload.apiKey, refresh=payload.refresh
+        )
+        return _model_list_response("OpenRouter", models_response, payload, logger)
+    except Exception as e:
+        logger.log_error(f"Error proxying OpenRouter models request: {str(e)}")
+        logger.log_error(traceback.format_exc())
+        raise handle_generic_error(e, "Failed to fetch models")
+
 @router.post("/featherless/models", response_model=DataResponse, responses=STANDARD_RESPONSES)
 async def get_featherless_models_proxy(
     payload: FeatherlessModelsPayload,
@@ -452,23 +502,10 @@ async def get_featherless_models_proxy(
     try:
         logger.log_step(f"Proxying Featherless models request for URL: {payload.url}")
         adapter = get_provider_adapter("Featherless", logger)
-        
-        models_response = adapter.list_models(payload.url, payload.apiKey)
-        
-        # Check the structure returned by adapter.list_models
-        if models_response and isinstance(models_response, dict):
-            if models_response.get("success") is True and "models" in models_response:
-                logger.log_step("Successfully fetched models from Featherless adapter.")
-                return create_data_response({
-                    "models": models_response["models"]
-                })
-            elif models_response.get("success") is False and "error" in models_response:
-                logger.log_warning(f"Error reported by Featherless adapter list_models: {models_response['error']}")
-                return create_error_response(models_response['error'], "400")
-        
-        # Fallback for truly unexpected response structure from adapter
-        logger.log_warning(f"Unexpected response format from Featherless adapter: {models_response}")
-        return create_error_response("Unexpected response format from Featherless adapter", "500")
+        models_response = await run_in_threadpool(
+            adapter.list_models, payload.url, payload.apiKey, refresh=payload.refresh
+        )
+        return _model_list_response("Featherless", models_response, payload, logger)
     except Exception as e:
         logger.log_error(f"Error proxying Featherless models request: {str(e)}")
         logger.log_error(traceback.format_exc())
@@ -483,21 +520,8 @@ async def get_ollama_models_proxy(
     try:
         logger.log_step(f"Proxying Ollama models request for URL: {payload.url}")
         adapter = get_provider_adapter("Ollama", logger)
-
-        models_response = adapter.list_models(payload.url)
-
-        if models_response and isinstance(models_response, dict):
-            if models_response.get("success") is True and "models" in models_response:
-                logger.log_step(f"Successfully fetched {len(models_response['models'])} models from Ollama.")
-                return create_data_response({
-                    "models": models_response["models"]
-                })
-            elif models_response.get("success") is False and "error" in models_response:
-                logger.log_warning(f"Error from Ollama adapter: {models_response['error']}")
-                return create_error_response(models_response['error'], "400")
-
-        logger.log_warning(f"Unexpected response format from Ollama adapter: {models_response}")
-        return create_error_response("Unexpected response format from Ollama adapter", "500")
+        models_response = await run_in_threadpool(adapter.list_models, payload.url, refresh=payload.refresh)
+        return _model_list_response("Ollama", models_response, payload, logger)
     except Exception as e:
         logger.log_error(f"Error proxying Ollama models request: {str(e)}")
         logger.log_error(traceback.format_exc())
@@ -7,9 +7,9 @@ Replaces the old world_state.json system.
 """
 
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from typing import List, Optional, TYPE_CHECKING
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import ValidationError
 
 from backend.models.world_card import (
@@ -18,8 +18,10 @@ from backend.models.world_card import (
 )
 from backend.models.world_state import GridSize
 from backend.services.world_card_service import WorldCardService
+from backend.services.world_graph_service import WorldGraph, WorldGraphCache
+from backend.services.world_bundle_service import NDJSON_MEDIA_TYPE, WorldBundleService
+from backend.services.world_progress_service import WorldUserProgressService
 from backend.handlers.room_card_handler import RoomCardHandler
-from backend.services.world_export_service import WorldExportService
 from backend.services.character_service import CharacterService
 from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
@@ -28,8 +30,16 @@ from backend.dependencies import (
     get_logger_dependency,
     get_character_service_dependency,
     get_png_handler_dependency,
-    get_settings_manager_dependency
+    get_settings_manager_dependency,
+    get_world_bundle_service_dependency,
+    get_world_graph_cache_dependency,
+    get_world_progress_service_dependency
 )
+# World export/import is rarely used; the service is imported on first use
+if TYPE_CHECKING:
+    from backend.services.world_export_service import WorldExportService
+
+from backend.utils.thread_offload import run_in_db_thread
 from backend.response_models import (
     DataResponse,
     ListResponse,
@@ -49,20 +59,26 @@ def get_world_card_handler(
     character_service: CharacterService = Depends(get_character_service_dependency),
     png_handler: PngMetadataHandler = Depends(get_png_handler_dependency),
     settings_manager: SettingsManager = Depends(get_settings_manager_dependency),
-    logger: LogManager = Depends(get_logger_dependency)
+    logger: LogManager = Depends(get_logger_dependency),
+    progress_service: WorldUserProgressService = Depends(get_world_progress_service_dependency),
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency)
 ) -> WorldCardService:
     """Dependency injection for WorldCardService"""
-    return WorldCardService(character_service, png_handler, settings_manager, logger)
+    return WorldCardService(
+        character_service, png_handler, settings_manager, logger,
+        progress_service=progress_service, graph_cache=graph_cache
+    )
 
 
 def get_room_card_handler(
     character_service: CharacterService = Depends(get_character_service_dependency),
     png_handler: PngMetadataHandler = Depends(get_png_handler_dependency),
     settings_manager: SettingsManager = Depends(get_settings_manager_dependency),
-    logger: LogManager = Depends(get_logger_dependency)
+    logger: LogManager = Depends(get_logger_dependency),
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency)
 ) -> RoomCardHandler:
     """Dependency injection for RoomCardHandler"""
-    return RoomCardHandler(character_service, png_handler, settings_manager, logger)
+    return RoomCardHandler(character_service, png_handler, settings_manager, logger, graph_cache=graph_cache)
 
 
 def get_export_handler(
@@ -71,8 +87,9 @@ def get_export_handler(
     character_service: CharacterService = Depends(get_character_service_dependency),
     png_handler: PngMetadataHandler = Depends(get_png_handler_dependency),
     logger: LogManager = Depends(get_logger_dependency)
-) -> WorldExportService:
+) -> "WorldExportService":
     """Dependency injection for WorldExportService"""
+    from backend.services.world_export_service import WorldExportService
     return WorldExportService(world_handler, room_handler, character_service, png_handler, logger)
 
 
@@ -253,6 +270,107 @@ async def update_world_card(
         raise HTTPException(status_code=500, detail=f"Failed to update world: {str(e)}")
 
 
+@router.get(
+    "/{world_uuid}/bundle",
+    summary="Get everything needed to enter a world",
+    description=(
+        "Streams NDJSON: the world card, every placed room (nearest focus_room first), "
+        "NPC summaries, then an end marker. Supports If-None-Match with the bundle version."
+    )
+)
+async def get_world_bundle(
+    world_uuid: str,
+    request: Request,
+    focus_room: Optional[str] = None,
+    service: WorldBundleService = Depends(get_world_bundle_service_dependency),
+    logger: LogManager = Depends(get_logger_dependency)
+):
+    """Stream the world bundle for world play"""
+    try:
+        bundle = await run_in_db_thread(service.get_bundle, world_uuid)
+    except Exception as e:
+        logger.log_error(f"Error building world bundle {world_uuid}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load world bundle: {str(e)}")
+    if bundle is None:
+        raise HTTPException(status_code=404, detail=f"World card {world_uuid} not found")
+
+    headers = {"ETag": bundle.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == bundle.etag:
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(bundle.iter_lines(focus_room), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+async def _require_world_graph(world_uuid: str, graph_cache: Optional[WorldGraphCache]) -> WorldGraph:
+    """Resolve a world's graph (on the DB thread) or raise the matching HTTP error."""
+    if graph_cache is None:
+        raise HTTPException(status_code=500, detail="World graph cache not initialized")
+    graph = await run_in_db_thread(graph_cache.get_graph, world_uuid)
+    if graph is None:
+        raise HTTPException(status_code=404, detail=f"World card {world_uuid} not found")
+    return graph
+
+
+@router.get(
+    "/{world_uuid}/graph",
+    response_model=DataResponse,
+    summary="Get the world room graph",
+    description="Returns room placements, neighbours, exits and NPC rosters from the cached world graph"
+)
+async def get_world_graph(
+    world_uuid: str,
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency),
+):
+    """Get the cached room graph for a world"""
+    graph = await _require_world_graph(world_uuid, graph_cache)
+    return create_data_response({"graph": graph.to_dict()})
+
+
+@router.get(
+    "/{world_uuid}/graph/rooms/{room_uuid}",
+    response_model=DataResponse,
+    summary="Get a room node from the world graph",
+    description="Returns a room's position, neighbours, exits and NPC roster without reading any PNG"
+)
+async def get_world_graph_room(
+    world_uuid: str,
+    room_uuid: str,
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency),
+):
+    """Get one room node and the rooms reachable from it"""
+    graph = await _require_world_graph(world_uuid, graph_cache)
+    node = graph.room(room_uuid)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Room {room_uuid} is not placed in world {world_uuid}")
+    return create_data_response({
+        "room": node.to_dict(),
+        "reachable": list(graph.neighbours(room_uuid))
+    })
+
+
+@router.get(
+    "/{world_uuid}/graph/path",
+    response_model=DataResponse,
+    summary="Find a path between two rooms",
+    description="Shortest path (BFS over grid neighbours and exits) between two rooms of a world"
+)
+async def get_world_graph_path(
+    world_uuid: str,
+    from_room: str,
+    to_room: str,
+    graph_cache: Optional[WorldGraphCache] = Depends(get_world_graph_cache_dependency),
+):
+    """Get the shortest room path between two rooms"""
+    graph = await _require_world_graph(world_uuid, graph_cache)
+    for room_uuid in (from_room, to_room):
+        if graph.room(room_uuid) is None:
+            raise HTTPException(status_code=404, detail=f"Room {room_uuid} is not placed in world {world_uuid}")
+    path = graph.find_path(from_room, to_room)
+    return create_data_response({
+        "path": path or [],
+        "reachable": path is not None
+    })
+
+
 @router.get(
     "/{world_uuid}/delete-preview",
     response_model=DataResponse,
@@ -421,7 +539,7 @@ async def get_world_card_image(
 )
 async def export_world_card(
     world_uuid: str,
-    handler: WorldExportService = Depends(get_export_handler),
+    handler=Depends(get_export_handler),  # WorldExportService
     logger: LogManager = Depends(get_logger_dependency)
 ):
     """Export world and all dependencies as ZIP archive"""
@@ -455,7 +573,7 @@ async def export_world_card(
 )
 async def import_world_card(
     file: UploadFile = File(..., description="World archive (.cardshark.zip)"),
-    handler: WorldExportService = Depends(get_export_handler),
+    handler=Depends(get_export_handler),  # WorldExportService
     logger: LogManager = Depends(get_logger_dependency)
 ):
     """Import world and all dependencies from ZIP archive"""
@@ -7,13 +7,16 @@ Progress is keyed by (world_uuid, user_uuid) composite key.
 """
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
 
 from backend.models.world_progress import (
     WorldUserProgress,
+    WorldUserProgressPatch,
     WorldUserProgressUpdate,
     WorldUserProgressSummary
 )
-from backend.services.world_progress_service import WorldUserProgressService
+from backend.services.world_progress_service import WorldUserProgressService, ProgressVersionConflict
+from backend.utils.json_patch import JsonPatchError
 from backend.services.user_profile_service import UserProfileService
 from backend.log_manager import LogManager
 from backend.dependencies import (
@@ -98,6 +101,42 @@ async def save_world_progress(
         raise HTTPException(status_code=500, detail=f"Failed to save progress: {str(e)}")
 
 
+@router.patch(
+    "/{world_uuid}/progress/{user_uuid}",
+    response_model=DataResponse,
+    summary="Patch world progress for a user",
+    description=(
+        "Applies RFC 6902 JSON Patch operations to a world+user's progress, writing only the "
+        "fields and NPC/room entries they touch. Pass base_version for optimistic concurrency "
+        "(409 if progress has changed since)."
+    )
+)
+async def patch_world_progress(
+    world_uuid: str,
+    user_uuid: str,
+    patch: WorldUserProgressPatch,
+    service: WorldUserProgressService = Depends(get_world_progress_service_dependency),
+    logger: LogManager = Depends(get_logger_dependency)
+):
+    """Apply a JSON Patch to progress for a world+user combination."""
+    try:
+        logger.log_step(
+            f"Patching progress for world={world_uuid}, user={user_uuid} ({len(patch.operations)} ops)"
+        )
+
+        result = service.patch_progress(world_uuid, user_uuid, patch)
+
+        return create_data_response(result.model_dump())
+
+    except ProgressVersionConflict as e:
+        raise HTTPException(status_code=409, detail={"message": e.message, "current_version": e.current_version})
+    except (JsonPatchError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid progress patch: {str(e)}")
+    except Exception as e:
+        logger.log_error(f"Error patching world progress: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to patch progress: {str(e)}")
+
+
 @router.get(
     "/{world_uuid}/progress-summary",
     response_model=ListResponse,
@@ -8,7 +8,7 @@ This handler manages CRUD operations for room card PNG files.
 
 import json
 import uuid as uuid_module
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -22,6 +22,9 @@ from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
 from backend.log_manager import LogManager
 
+if TYPE_CHECKING:
+    from backend.services.world_graph_service import WorldGraphCache
+
 
 class RoomCardHandler:
     """
@@ -34,12 +37,15 @@ class RoomCardHandler:
         character_service: CharacterService,
         png_handler: PngMetadataHandler,
         settings_manager: SettingsManager,
-        logger: LogManager
+        logger: LogManager,
+        graph_cache: Optional["WorldGraphCache"] = None
     ):
         self.character_service = character_service
         self.png_handler = png_handler
         self.settings_manager = settings_manager
         self.logger = logger
+        # Shared world graph / decoded room card cache; invalidated on saves
+        self.graph_cache = graph_cache
 
     def _get_rooms_directory(self) -> Path:
         """Get the rooms directory, creating it if needed."""
@@ -214,6 +220,12 @@ class RoomCardHandler:
         Returns:
             RoomCard model or None if not found
         """
+        if self.graph_cache is not None:
+            return self.graph_cache.get_room_card(room_uuid, lambda: self._read_room_card(room_uuid))
+        return self._read_room_card(room_uuid)
+
+    def _read_room_card(self, room_uuid: str) -> Optional[RoomCard]:
+        """Decode a room card from its PNG."""
         with self.character_service._get_session_context() as db:
             character = self.character_service.get_character_by_uuid(room_uuid, db)
 
@@ -308,6 +320,8 @@ class RoomCardHandler:
             sync_fn=self.character_service.sync_character_file
         )
         self.logger.log_step(f"Updated room card: {png_path}")
+        if self.graph_cache is not None:
+            self.graph_cache.invalidate_room(room_uuid)
 
         # Return updated summary
         return RoomCardSummary(
@@ -350,6 +364,8 @@ class RoomCardHandler:
 
         # Delete via character service (handles both DB and PNG file)
         success = self.character_service.delete_character(room_uuid, delete_png_file=True)
+        if self.graph_cache is not None:
+            self.graph_cache.invalidate_room(room_uuid)
 
         if success:
             self.logger.log_step(f"Deleted room card: {room_uuid}")
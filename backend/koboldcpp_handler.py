@@ -2,6 +2,7 @@
 KoboldCPP Handler - FastAPI router for KoboldCPP integration
 """
 from fastapi import APIRouter, Request, HTTPException, Body, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse, JSONResponse
 from typing import Dict, Any, List, Optional, AsyncGenerator
 import asyncio
@@ -469,6 +470,9 @@ async def set_models_directory(directory: str = Body(..., embed=True)):
     """Set the models directory in settings"""
     from backend.main import settings_manager
     success = settings_manager.update_settings({"models_directory": directory})
+    if success:
+        # Writes are debounced; wait for this one so a failed save is reported
+        success = await run_in_threadpool(settings_manager.flush)
     if not success:
         raise HTTPException(status_code=400, detail="Failed to save models directory setting")
     return {"success": True, "directory": directory}
@@ -519,6 +523,16 @@ async def disconnect_koboldcpp():
 # --- External Model Listing Endpoints ---
 import traceback
 from backend.api_provider_adapters import OpenRouterAdapter # Assuming FeatherlessAdapter might not exist yet
+from backend.services.model_catalog_cache import page_model_list
+
+def _model_page(data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Optional server-side search/offset/limit from the request body, applied to a list_models result."""
+    try:
+        offset = max(0, int(data.get('offset') or 0))
+        limit = int(data['limit']) if data.get('limit') is not None else None
+    except (TypeError, ValueError):
+        offset, limit = 0, None
+    return page_model_list(result, data.get('search'), offset, limit)
 
 @router.post("/openrouter/models", tags=["external_models"])
 async def get_openrouter_models(request: Request):
@@ -537,7 +551,7 @@ async def get_openrouter_models(request: Request):
             )
 
         adapter = OpenRouterAdapter(logger)
-        result = adapter.list_models(url, api_key) # Pass URL and key
+        result = await run_in_threadpool(adapter.list_models, url, api_key, refresh=bool(data.get('refresh')))
 
         if not result.get('success', False):
              logger.error(f"Failed to fetch OpenRouter models: {result.get('error', 'Unknown error')}")
@@ -547,7 +561,7 @@ async def get_openrouter_models(request: Request):
              )
 
         logger.info(f"Successfully fetched {len(result.get('models', []))} OpenRouter models")
-        return JSONResponse(content=result)
+        return JSONResponse(content=_model_page(data, result))
     except Exception as e:
         logger.error(f"Error fetching OpenRouter models: {str(e)}")
         logger.error(traceback.format_exc())
@@ -573,7 +587,7 @@ async def get_featherless_models(request: Request):
         api_key = data.get('apiKey') # May not be needed for Featherless list
 
         adapter = FeatherlessAdapter(logger)
-        result = adapter.list_models(url, api_key) # Pass URL and key (if needed)
+        result = await run_in_threadpool(adapter.list_models, url, api_key, refresh=bool(data.get('refresh')))
 
         if not result.get('success', False):
             logger.error(f"Failed to fetch Featherless models: {result.get('error', 'Unknown error')}")
@@ -583,7 +597,7 @@ async def get_featherless_models(request: Request):
             )
 
         logger.info(f"Successfully fetched {len(result.get('models', []))} Featherless models")
-        return JSONResponse(content=result)
+        return JSONResponse(content=_model_page(data, result))
     except HTTPException as http_exc:
          raise http_exc # Re-raise specific HTTP exceptions (like 501 Not Implemented)
     except Exception as e:
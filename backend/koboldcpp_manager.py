@@ -10,6 +10,8 @@ import zipfile
 import shutil
 import time
 import json
+import hashlib
+import urllib3
 try:
     import psutil
 except ImportError as e:
@@ -29,7 +31,7 @@ except ImportError as e:
             return subprocess.Popen(*args, **kwargs)
     psutil = MockPsutil()
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Callable
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Callable
 import threading
 import multiprocessing
 import logging
@@ -37,12 +39,60 @@ import platform
 import re
 import traceback
 
+from backend.utils.atomic_files import atomic_write_text, replace_with_retry
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("KoboldCPP Manager")
 
+# Download tuning: reads grow or shrink between these sizes to take about
+# DOWNLOAD_READ_SECONDS each, so fast links don't pay per-4KB overhead and
+# slow links still report steady progress
+DOWNLOAD_CHUNK_MIN = 64 * 1024
+DOWNLOAD_CHUNK_MAX = 4 * 1024 * 1024
+DOWNLOAD_READ_SECONDS = 0.05
+DOWNLOAD_PROGRESS_INTERVAL = 0.25  # seconds between progress callbacks
+DOWNLOAD_ATTEMPTS = 5  # per download, resuming from the .part file each time
+DOWNLOAD_RETRY_DELAY = 1.0  # seconds, doubled after every failed attempt
+
+
+class DownloadError(Exception):
+    """Download failure with an error_code for the API response."""
+
+    def __init__(self, message: str, error_code: str = 'download_failed'):
+        super().__init__(message)
+        self.error_code = error_code
+
+
+def _iter_adaptive(response) -> Iterator[bytes]:
+    """Body of a streamed response in reads sized to the observed throughput."""
+    chunk_size = DOWNLOAD_CHUNK_MIN
+    while True:
+        start = time.perf_counter()
+        chunk = response.raw.read(chunk_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+        elapsed = time.perf_counter() - start
+        if elapsed < DOWNLOAD_READ_SECONDS / 2:
+            chunk_size = min(chunk_size * 2, DOWNLOAD_CHUNK_MAX)
+        elif elapsed > DOWNLOAD_READ_SECONDS * 2:
+            chunk_size = max(chunk_size // 2, DOWNLOAD_CHUNK_MIN)
+
+
+def _content_total(response, offset: int) -> Optional[int]:
+    """Full asset size from Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get('Content-Range', '')
+    match = re.match(r'bytes \d+-\d+/(\d+)', content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get('Content-Length')
+    return offset + int(length) if length and length.isdigit() else None
+
 class KoboldCPPManager:
     """Manager for KoboldCPP integration"""
+
+    RELEASE_API_URL = "https://api.github.com/repos/LostRuins/koboldcpp/releases/latest"
     
     def __init__(self):
         self.base_dir = self._get_base_dir()
@@ -81,10 +131,7 @@ class KoboldCPPManager:
     def _get_latest_release_info(self) -> Dict[str, Any]:
         """Get information about the latest release from GitHub"""
         try:
-            response = requests.get(
-                "https://api.github.com/repos/LostRuins/koboldcpp/releases/latest", 
-                timeout=10
-            )
+            response = requests.get(self.RELEASE_API_URL, timeout=10)
             response.raise_for_status()
             release_info = response.json()
             self.latest_version = release_info['tag_name'].lstrip('v')
@@ -253,7 +300,7 @@ class KoboldCPPManager:
         """Get platform-specific download URL"""
         # Check GitHub API for latest release
         try:
-            response = requests.get("https://api.github.com/repos/LostRuins/koboldcpp/releases/latest", timeout=10)
+            response = requests.get(self.RELEASE_API_URL, timeout=10)
             response.raise_for_status()
             latest_release = response.json()
             latest_version = latest_release['tag_name']
@@ -333,16 +380,34 @@ class KoboldCPPManager:
         
         return False
     
-    def download(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    def _get_expected_sha256(self, url: str) -> Optional[str]:
+        """SHA-256 GitHub publishes for the release asset at ``url`` (asset "digest"), if any"""
+        for asset in (self.latest_release_info or {}).get('assets', []):
+            if asset.get('browser_download_url') == url:
+                digest = asset.get('digest') or ''
+                if digest.startswith('sha256:'):
+                    return digest[len('sha256:'):].lower()
+        return None
+
+    def download(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 expected_sha256: Optional[str] = None) -> Dict[str, Any]:
         """
         Download and install KoboldCPP
         
-        Callback function receives progress updates as:
+        The binary is downloaded to <target>.part and resumed with an HTTP
+        Range request after a dropped connection (also across calls), checked
+        against the release asset's SHA-256 and then moved into place, so an
+        interrupted download never leaves a broken executable behind.
+        
+        Callback function receives progress updates (at most every
+        DOWNLOAD_PROGRESS_INTERVAL seconds) as:
         {
-            'status': 'downloading'|'completed'|'error',
+            'status': 'downloading'|'verifying'|'completed'|'error',
             'bytes_downloaded': int,
             'total_bytes': int,
-            'percent': float
+            'percent': float,
+            'bytes_per_second': float,
+            'resumed_from': int
         }
         """
         try:
@@ -355,25 +420,6 @@ class KoboldCPPManager:
                     'error_code': 'running'
                 }
             
-            # Delete any existing directory or file that would conflict
-            if os.path.exists(self.koboldcpp_dir):
-                try:
-                    # Attempt to delete any existing files in the directory
-                    for item in os.listdir(self.koboldcpp_dir):
-                        item_path = os.path.join(self.koboldcpp_dir, item)
-                        if os.path.isfile(item_path) or os.path.islink(item_path):
-                            os.unlink(item_path)
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-                    logger.info("Cleared existing KoboldCPP directory")
-                except Exception as e:
-                    logger.error(f"Error clearing KoboldCPP directory: {e}")
-                    return {
-                        'status': 'error', 
-                        'error': f"Could not clear existing KoboldCPP directory. Please ensure KoboldCPP is not running and try again. Error: {str(e)}",
-                        'error_code': 'access_denied'
-                    }
-            
             # Create the directory
             os.makedirs(self.koboldcpp_dir, exist_ok=True)
             
@@ -384,48 +430,56 @@ class KoboldCPPManager:
                 target_filename = 'koboldcpp'
                 
             target_path = os.path.join(self.koboldcpp_dir, target_filename)
+            part_path = target_path + '.part'
             
-            # Download the executable directly
             logger.info(f"Downloading KoboldCPP from {self.download_url}")
-            
             try:
-                response = requests.get(self.download_url, stream=True, timeout=30)
-                response.raise_for_status()
-            except requests.exceptions.RequestException as e:
+                digest, size = self._download_to_part(self.download_url, part_path, callback)
+            except DownloadError as e:
                 logger.error(f"Error downloading KoboldCPP: {e}")
-                return {'status': 'error', 'error': f"Download failed: {str(e)}"}
-            
-            total_length = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            # Save the executable directly to the target path
-            with open(target_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=4096):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        percent = 100 * downloaded / total_length if total_length > 0 else 0
-                        
-                        # Call the callback with progress info
-                        if callback:
-                            callback({
-                                'status': 'downloading',
-                                'bytes_downloaded': downloaded,
-                                'total_bytes': total_length,
-                                'percent': percent
-                            })
-                        
-                        logger.debug(f"Downloaded {downloaded} of {total_length} bytes ({percent:.2f}%)")
+                return {'status': 'error', 'error': f"Download failed: {str(e)}", 'error_code': e.error_code}
+            
+            # Verify against the checksum published with the release
+            expected_sha256 = (expected_sha256 or self._get_expected_sha256(self.download_url) or '').lower()
+            if callback:
+                callback({
+                    'status': 'verifying',
+                    'bytes_downloaded': size,
+                    'total_bytes': size,
+                    'percent': 100
+                })
+            if expected_sha256 and digest != expected_sha256:
+                logger.error(f"KoboldCPP checksum mismatch: expected {expected_sha256}, got {digest}")
+                self._discard_part(part_path)
+                return {
+                    'status': 'error',
+                    'error': 'Downloaded file does not match the published SHA-256 checksum. Please try again.',
+                    'error_code': 'checksum_mismatch'
+                }
+            if not expected_sha256:
+                logger.warning("No published SHA-256 for this KoboldCPP asset; skipping checksum verification")
             
             # Set permissions on Unix-like systems
             if platform.system() != 'Windows':
                 try:
-                    os.chmod(target_path, 0o755)  # rwxr-xr-x
-                    logger.info(f"Set executable permissions on {target_path}")
+                    os.chmod(part_path, 0o755)  # rwxr-xr-x
+                    logger.info(f"Set executable permissions on {part_path}")
                 except Exception as e:
                     logger.error(f"Failed to set executable permissions: {e}")
                     return {'status': 'error', 'error': f"Failed to set executable permissions: {str(e)}"}
             
+            # Move into place atomically: the old binary stays usable until this point
+            try:
+                replace_with_retry(part_path, target_path)
+            except OSError as e:
+                logger.error(f"Could not replace {target_path}: {e}")
+                return {
+                    'status': 'error',
+                    'error': f"Could not replace the existing KoboldCPP executable. Please ensure KoboldCPP is not running and try again. Error: {str(e)}",
+                    'error_code': 'access_denied'
+                }
+            self._discard_part(part_path)
+            
             # Update executable path
             self.exe_path = target_path
             
@@ -440,7 +494,9 @@ class KoboldCPPManager:
                 
             return {
                 'status': 'completed',
-                'exe_path': self.exe_path
+                'exe_path': self.exe_path,
+                'sha256': digest,
+                'verified': bool(expected_sha256)
             }
             
         except Exception as e:
@@ -448,6 +504,119 @@ class KoboldCPPManager:
             if callback:
                 callback({'status': 'error', 'error': str(e)})
             return {'status': 'error', 'error': str(e)}
+
+    def _download_to_part(self, url: str, part_path: str,
+                          callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[str, int]:
+        """
+        Download ``url`` into ``part_path``, resuming what is already there.
+        Returns (sha256 hex digest, size). Raises DownloadError.
+        
+        A sidecar <part>.json records the URL and ETag/Last-Modified, so a
+        leftover .part from another release is never resumed; If-Range makes
+        the server send the whole file if the asset changed since.
+        """
+        state_path = part_path + '.json'
+        state: Dict[str, Any] = {}
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if state.get('url') != url or not os.path.isfile(part_path):
+            self._discard_part(part_path)
+            state = {'url': url}
+
+        # Hash what is already on disk, so the digest covers the whole file
+        hasher = hashlib.sha256()
+        offset = 0
+        if os.path.isfile(part_path):
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(DOWNLOAD_CHUNK_MAX), b''):
+                    hasher.update(block)
+                    offset += len(block)
+        resumed_from = offset
+        total = state.get('total')
+        session_start = time.perf_counter()
+        last_progress = 0.0
+
+        def report(force: bool = False):
+            nonlocal last_progress
+            now = time.perf_counter()
+            if not callback or (not force and now - last_progress < DOWNLOAD_PROGRESS_INTERVAL):
+                return
+            last_progress = now
+            elapsed = now - session_start
+            callback({
+                'status': 'downloading',
+                'bytes_downloaded': offset,
+                'total_bytes': total or 0,
+                'percent': 100 * offset / total if total else 0,
+                'bytes_per_second': (offset - resumed_from) / elapsed if elapsed > 0 else 0.0,
+                'resumed_from': resumed_from
+            })
+
+        retry_delay = DOWNLOAD_RETRY_DELAY
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            headers = {}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                validator = state.get('etag') or state.get('last_modified')
+                if validator:
+                    headers['If-Range'] = validator
+                logger.info(f"Resuming KoboldCPP download at {offset} bytes")
+            try:
+                with requests.get(url, stream=True, timeout=30, headers=headers) as response:
+                    if response.status_code == 416 and offset:
+                        if offset == total:
+                            return hasher.hexdigest(), offset  # already complete
+                        logger.info("Partial KoboldCPP download doesn't match the server; restarting")
+                        self._discard_part(part_path)
+                        state = {'url': url}
+                        hasher = hashlib.sha256()
+                        offset = resumed_from = 0
+                        continue
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        raise DownloadError(str(e))
+                    if offset and response.status_code != 206:
+                        # Range ignored or the asset changed: start over
+                        logger.info("Server sent the whole file; restarting the download")
+                        hasher = hashlib.sha256()
+                        offset = resumed_from = 0
+                    total = _content_total(response, offset)
+                    state.update(total=total, etag=response.headers.get('ETag'),
+                                 last_modified=response.headers.get('Last-Modified'))
+                    atomic_write_text(state_path, json.dumps(state))
+
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in _iter_adaptive(response):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            offset += len(chunk)
+                            report()
+                if total is not None and offset < total:
+                    raise DownloadError(f"Connection closed after {offset} of {total} bytes", 'incomplete')
+                report(force=True)
+                return hasher.hexdigest(), offset
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError, urllib3.exceptions.HTTPError, DownloadError) as e:
+                if isinstance(e, DownloadError) and e.error_code != 'incomplete':
+                    raise
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    raise DownloadError(f"{e} (gave up after {attempt} attempts; the partial download is kept for the next try)")
+                logger.warning(f"KoboldCPP download interrupted at {offset} bytes ({e}); retrying in {retry_delay:.0f}s")
+                time.sleep(retry_delay)
+                retry_delay *= 2
+        raise DownloadError("Download failed")  # not reached
+
+    @staticmethod
+    def _discard_part(part_path: str) -> None:
+        for path in (part_path, part_path + '.json'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
     
     def launch(self, model: Optional[str] = None, additional_params: Optional[List[str]] = None) -> Dict[str, Any]:
         """Launch KoboldCPP with optional model and additional parameters"""
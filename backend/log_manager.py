@@ -12,8 +12,8 @@ class LogManager:
     WARNING = 2
     ERROR = 3
     
-    def __init__(self, console_verbosity=1):  # Default to INFO level
-        """Initialize logging system."""
+    def __init__(self, console_verbosity=1, log_to_file=True):  # Default to INFO level
+        """Initialize logging system. With log_to_file=False messages only go to the console."""
         # Get base directory for logs based on environment
         self.base_dir = self._get_base_dir()
         self.logs_dir = self.base_dir / 'logs'
@@ -21,6 +21,10 @@ class LogManager:
         # Set console verbosity level (0=DEBUG, 1=INFO, 2=WARNING, 3=ERROR)
         self.console_verbosity = console_verbosity
         
+        if not log_to_file:
+            self.log_filename = None
+            return
+        
         # Create logs directory if needed
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         
@@ -81,9 +85,10 @@ class LogManager:
                     log_message += f"Data: {str(data)}\n"
             
             # Write to file (always, regardless of verbosity)
-            with open(self.log_filename, 'a', encoding='utf-8') as f:
-                f.write(log_message)
-                f.write("\n")  # Extra newline for readability
+            if self.log_filename is not None:
+                with open(self.log_filename, 'a', encoding='utf-8') as f:
+                    f.write(log_message)
+                    f.write("\n")  # Extra newline for readability
                 
             # Only print to console if level meets threshold
             if level >= self.console_verbosity:
@@ -114,8 +119,9 @@ class LogManager:
             error_message += f"{separator}\n"
             
             # Write to file
-            with open(self.log_filename, 'a', encoding='utf-8') as f:
-                f.write(error_message)
+            if self.log_filename is not None:
+                with open(self.log_filename, 'a', encoding='utf-8') as f:
+                    f.write(error_message)
             
             # Print to console
             print(error_message)
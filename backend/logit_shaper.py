@@ -4,10 +4,16 @@
 #
 # Rule: 3/3/3 — 3 repetitions across 3 turns triggers a 3-turn ban.
 
+import json
+import logging
 import re
+import threading
 import time
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
 
 # ── Word extraction ──────────────────────────────────────────────────────────
 
@@ -66,6 +72,39 @@ def _extract_words(text: str) -> Dict[str, int]:
     return counts
 
 
+_SENTENCE_END_CHARS = frozenset(".!?")
+
+
+def _find_proper_nouns(text: str) -> FrozenSet[str]:
+    """Return lowercase words that appear capitalized mid-sentence in ``text``.
+
+    A word counts as mid-sentence when it follows whitespace on the same line
+    and the text before that whitespace doesn't end a sentence (. ! ?).
+    Computed once per turn so ban detection never rescans turn text.
+    """
+    found: Set[str] = set()
+    for match in _WORD_RE.finditer(text):
+        raw = match.group()
+        start = match.start()
+        if not raw[0].isupper() or start == 0 or not text[start - 1].isspace():
+            continue
+        # Walk back over the whitespace run; a newline means a new line/turn
+        pos = start - 1
+        while pos >= 0 and text[pos].isspace() and text[pos] != "\n":
+            pos -= 1
+        if pos < 0 or text[pos] == "\n" or text[pos] in _SENTENCE_END_CHARS:
+            continue
+        word = raw.strip("'").lower()
+        if word:
+            found.add(word)
+    return frozenset(found)
+
+
+def _is_protected_word(word: str) -> bool:
+    """Text-independent protection checks: short words, whitelist, contractions."""
+    return len(word) <= _MIN_WORD_LENGTH - 1 or word in _PROTECTED_WORDS or "'" in word
+
+
 def _is_protected(word: str, text: str) -> bool:
     """Check if a word should be protected from banning.
 
@@ -75,32 +114,7 @@ def _is_protected(word: str, text: str) -> bool:
     - Contractions containing apostrophes
     - Non-sentence-start capitalized words (proper nouns like character names)
     """
-    if len(word) <= _MIN_WORD_LENGTH - 1:
-        return True
-
-    # Permanent whitelist — structural words without clean synonyms
-    if word in _PROTECTED_WORDS:
-        return True
-
-    # Contractions (don't, won't, can't, etc.) — always protected
-    if "'" in word:
-        return True
-
-    # Check if the word appears capitalized mid-sentence (proper noun heuristic).
-    # A "sentence start" is after . ! ? or start-of-string, followed by optional whitespace.
-    # If the word ONLY appears at sentence starts, it's not a proper noun — not protected.
-    # If it appears capitalized NOT at a sentence start, it's likely a proper noun — protected.
-    pattern = re.compile(
-        r'(?<![.!?\n])\s+(' + re.escape(word) + r')\b',
-        re.IGNORECASE
-    )
-    for m in pattern.finditer(text):
-        matched = m.group(1)
-        if matched[0].isupper():
-            # Found capitalized mid-sentence — likely a proper noun
-            return True
-
-    return False
+    return _is_protected_word(word) or word in _find_proper_nouns(text)
 
 
 # ── Data structures ──────────────────────────────────────────────────────────
@@ -110,7 +124,7 @@ class TurnRecord:
     """Snapshot of a single {{char}} turn."""
     turn_number: int
     words: Dict[str, int]  # word -> count within this turn
-    raw_text: str
+    proper_nouns: FrozenSet[str] = frozenset()  # words capitalized mid-sentence
 
 
 @dataclass
@@ -128,6 +142,10 @@ class LogitShaper:
 
     Maintains a rolling window of recent {{char}} turns, detects words that
     repeat across the window, and produces a banned_tokens list for KoboldCPP.
+
+    Window statistics are kept incrementally: ``_word_turns`` counts how many
+    buffered turns contain each word and ``_proper_noun_turns`` how many mark
+    it as a proper noun. Ban detection only looks at words whose counts changed.
     """
 
     def __init__(self) -> None:
@@ -135,6 +153,8 @@ class LogitShaper:
         self.active_bans: List[BanEntry] = []
         self.current_turn_number: int = 0
         self.last_access: float = time.time()
+        self._word_turns: Counter = Counter()
+        self._proper_noun_turns: Counter = Counter()
 
     def analyze_output(self, text: str, is_regeneration: bool = False) -> None:
         """Process a completed {{char}} response.
@@ -146,34 +166,35 @@ class LogitShaper:
         """
         self.last_access = time.time()
         words = _extract_words(text)
+        proper_nouns = _find_proper_nouns(text)
 
         if is_regeneration:
             # Replace the most recent turn record (if any) without advancing
             if self.turn_buffer:
+                self._remove_from_window(self.turn_buffer[-1])
                 self.turn_buffer[-1] = TurnRecord(
                     turn_number=self.current_turn_number,
                     words=words,
-                    raw_text=text,
+                    proper_nouns=proper_nouns,
                 )
+                self._add_to_window(self.turn_buffer[-1])
             else:
                 # No previous turn — treat as new
                 self.current_turn_number += 1
-                self.turn_buffer.append(TurnRecord(
+                self._append_turn(TurnRecord(
                     turn_number=self.current_turn_number,
                     words=words,
-                    raw_text=text,
+                    proper_nouns=proper_nouns,
                 ))
         else:
             # New turn: advance counter, append record, trim window
             self.current_turn_number += 1
-            self.turn_buffer.append(TurnRecord(
+            record = TurnRecord(
                 turn_number=self.current_turn_number,
                 words=words,
-                raw_text=text,
-            ))
-            # Keep only the most recent WINDOW_SIZE turns
-            if len(self.turn_buffer) > WINDOW_SIZE:
-                self.turn_buffer = self.turn_buffer[-WINDOW_SIZE:]
+                proper_nouns=proper_nouns,
+            )
+            evicted = self._append_turn(record)
 
             # Decay and detect only on new turns — regens don't advance the
             # counter so running decay there would be redundant at best and
@@ -181,13 +202,44 @@ class LogitShaper:
             # active turn removes the ban before a regen can benefit from it).
             self._decay_bans()
             if len(self.turn_buffer) >= WINDOW_SIZE:
-                self._detect_new_bans()
+                # Counts only grow for the new turn's words; evicted proper
+                # nouns may have just lost their protection.
+                candidates = set(record.words)
+                for old in evicted:
+                    candidates.update(old.proper_nouns)
+                self._detect_new_bans(candidates)
 
     def get_banned_tokens(self) -> List[str]:
         """Return the current list of banned words for KoboldCPP."""
         self.last_access = time.time()
         return [ban.word for ban in self.active_bans]
 
+    def _append_turn(self, record: TurnRecord) -> List[TurnRecord]:
+        """Append a turn, keep only the most recent WINDOW_SIZE, return evicted turns."""
+        self.turn_buffer.append(record)
+        self._add_to_window(record)
+        evicted: List[TurnRecord] = []
+        while len(self.turn_buffer) > WINDOW_SIZE:
+            old = self.turn_buffer.pop(0)
+            self._remove_from_window(old)
+            evicted.append(old)
+        return evicted
+
+    def _add_to_window(self, record: TurnRecord) -> None:
+        self._word_turns.update(record.words.keys())
+        self._proper_noun_turns.update(record.proper_nouns)
+
+    def _remove_from_window(self, record: TurnRecord) -> None:
+        self._word_turns.subtract(record.words.keys())
+        self._proper_noun_turns.subtract(record.proper_nouns)
+        # Drop zero entries so the counters stay proportional to the window
+        for word in record.words:
+            if self._word_turns[word] <= 0:
+                del self._word_turns[word]
+        for word in record.proper_nouns:
+            if self._proper_noun_turns[word] <= 0:
+                del self._proper_noun_turns[word]
+
     def _decay_bans(self) -> None:
         """Remove bans whose TTL has expired."""
         still_active: List[BanEntry] = []
@@ -197,57 +249,192 @@ class LogitShaper:
                 still_active.append(ban)
         self.active_bans = still_active
 
-    def _detect_new_bans(self) -> None:
-        """Scan the rolling window for words that cross the repetition threshold."""
-        # Aggregate word occurrences across the window (count turns, not total freq)
-        word_turn_count: Dict[str, int] = {}
-        # Sentinel "." prevents the first word from falsely appearing mid-sentence
-        # (negative lookbehind at start-of-string would otherwise vacuously succeed)
-        combined_text = "."
-        for record in self.turn_buffer:
-            combined_text += "\n" + record.raw_text
-            for word in record.words:
-                word_turn_count[word] = word_turn_count.get(word, 0) + 1
+    def _detect_new_bans(self, candidates: Optional[Iterable[str]] = None) -> None:
+        """Ban candidate words that cross the repetition threshold in the window.
+
+        ``candidates`` defaults to every word in the window.
+        """
+        if candidates is None:
+            candidates = list(self._word_turns)
 
         # Already-banned words (by lowercase key)
         already_banned = {ban.word for ban in self.active_bans}
 
-        for word, turn_count in word_turn_count.items():
-            if turn_count >= REPETITION_THRESHOLD and word not in already_banned:
-                if not _is_protected(word, combined_text):
-                    self.active_bans.append(BanEntry(
-                        word=word,
-                        activated_at_turn=self.current_turn_number,
-                        ttl=BAN_TTL,
-                    ))
+        for word in candidates:
+            if self._word_turns.get(word, 0) < REPETITION_THRESHOLD or word in already_banned:
+                continue
+            if _is_protected_word(word) or self._proper_noun_turns.get(word, 0) > 0:
+                continue
+            self.active_bans.append(BanEntry(
+                word=word,
+                activated_at_turn=self.current_turn_number,
+                ttl=BAN_TTL,
+            ))
+            already_banned.add(word)
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def to_state(self) -> Dict:
+        """Serialize to a JSON-safe dict (see ``from_state``)."""
+        return {
+            "version": STATE_VERSION,
+            "current_turn_number": self.current_turn_number,
+            "turns": [
+                {
+                    "turn_number": record.turn_number,
+                    "words": record.words,
+                    "proper_nouns": sorted(record.proper_nouns),
+                }
+                for record in self.turn_buffer
+            ],
+            "bans": [
+                {"word": ban.word, "activated_at_turn": ban.activated_at_turn, "ttl": ban.ttl}
+                for ban in self.active_bans
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "LogitShaper":
+        """Restore a shaper saved by ``to_state``. Raises ValueError on unknown versions."""
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported LogitShaper state version: {state.get('version')}")
+        shaper = cls()
+        shaper.current_turn_number = int(state.get("current_turn_number", 0))
+        for turn in state.get("turns", [])[-WINDOW_SIZE:]:
+            shaper._append_turn(TurnRecord(
+                turn_number=int(turn["turn_number"]),
+                words={str(w): int(c) for w, c in turn.get("words", {}).items()},
+                proper_nouns=frozenset(turn.get("proper_nouns", [])),
+            ))
+        shaper.active_bans = [
+            BanEntry(word=ban["word"], activated_at_turn=int(ban["activated_at_turn"]), ttl=int(ban["ttl"]))
+            for ban in state.get("bans", [])
+        ]
+        return shaper
+
+    @classmethod
+    def rebuild_from_responses(cls, responses: Iterable[str]) -> "LogitShaper":
+        """Replay past {{char}} responses (oldest first) to rebuild window and bans."""
+        shaper = cls()
+        for text in responses:
+            shaper.analyze_output(text)
+        return shaper
+
+
+# ── SQLite snapshots ─────────────────────────────────────────────────────────
+
+STATE_VERSION = 1
+
+# Enough past turns to rebuild every ban that could still be active
+REBUILD_TURNS = WINDOW_SIZE + BAN_TTL
+
+
+def load_shaper_state(db, session_uuid: str) -> Optional[LogitShaper]:
+    """Load a session's shaper from its snapshot, else rebuild it from stored messages.
+
+    Returns None if the session has no snapshot and no assistant messages.
+    """
+    from backend import sql_models
+
+    row = db.get(sql_models.LogitShaperState, session_uuid)
+    if row is not None:
+        try:
+            return LogitShaper.from_state(json.loads(row.state_json))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"LogitShaper: discarding unreadable snapshot for {session_uuid}: {e}")
+
+    recent = (
+        db.query(sql_models.ChatMessage.content)
+        .filter(
+            sql_models.ChatMessage.chat_session_uuid == session_uuid,
+            sql_models.ChatMessage.role == "assistant",
+            sql_models.ChatMessage.status == "complete",
+        )
+        .order_by(sql_models.ChatMessage.sequence_number.desc(), sql_models.ChatMessage.timestamp.desc())
+        .limit(REBUILD_TURNS)
+        .all()
+    )
+    if not recent:
+        return None
+    return LogitShaper.rebuild_from_responses(content for (content,) in reversed(recent))
+
+
+def save_shaper_state(db, session_uuid: str, shaper: LogitShaper) -> None:
+    """Upsert a session's shaper snapshot and commit."""
+    from backend import sql_models
+
+    state_json = json.dumps(shaper.to_state(), separators=(",", ":"))
+    row = db.get(sql_models.LogitShaperState, session_uuid)
+    if row is None:
+        db.add(sql_models.LogitShaperState(chat_session_uuid=session_uuid, state_json=state_json))
+    else:
+        row.state_json = state_json
+    db.commit()
 
 
 # ── Per-session registry ─────────────────────────────────────────────────────
 
 _shaper_registry: Dict[str, LogitShaper] = {}
+_registry_lock = threading.Lock()
 
 
-def get_or_create_shaper(session_uuid: str) -> LogitShaper:
+def get_or_create_shaper(session_uuid: str, session_factory: Optional[Callable] = None) -> LogitShaper:
     """Get or lazily create a LogitShaper for a chat session.
 
-    Also triggers stale cleanup on every call.
+    With ``session_factory``, a shaper missing from memory (restart, stale
+    cleanup) is restored from its SQLite snapshot or rebuilt from the
+    session's stored messages. Also triggers stale cleanup on every call.
     """
     cleanup_stale_shapers()
 
-    if session_uuid not in _shaper_registry:
-        _shaper_registry[session_uuid] = LogitShaper()
+    with _registry_lock:
+        shaper = _shaper_registry.get(session_uuid)
+    if shaper is None:
+        if session_factory is not None:
+            try:
+                db = session_factory()
+                try:
+                    shaper = load_shaper_state(db, session_uuid)
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.warning(f"LogitShaper: could not restore state for {session_uuid}: {e}")
+        with _registry_lock:
+            # Another request may have restored it meanwhile; keep the first one
+            shaper = _shaper_registry.setdefault(session_uuid, shaper or LogitShaper())
 
-    shaper = _shaper_registry[session_uuid]
     shaper.last_access = time.time()
     return shaper
 
 
+def persist_shaper(session_uuid: str, session_factory: Callable) -> bool:
+    """Snapshot a registered shaper to SQLite. Returns False on failure."""
+    with _registry_lock:
+        shaper = _shaper_registry.get(session_uuid)
+    if shaper is None:
+        return False
+    try:
+        db = session_factory()
+        try:
+            save_shaper_state(db, session_uuid, shaper)
+        finally:
+            db.close()
+        return True
+    except Exception as e:
+        logger.warning(f"LogitShaper: could not persist state for {session_uuid}: {e}")
+        return False
+
+
 def cleanup_stale_shapers(max_age: int = 3600) -> None:
-    """Remove shapers that haven't been accessed for max_age seconds."""
+    """Remove shapers that haven't been accessed for max_age seconds.
+
+    Persisted shapers are restored from SQLite on next use.
+    """
     now = time.time()
-    stale_keys = [
-        key for key, shaper in _shaper_registry.items()
-        if (now - shaper.last_access) > max_age
-    ]
-    for key in stale_keys:
-        del _shaper_registry[key]
+    with _registry_lock:
+        stale_keys = [
+            key for key, shaper in _shaper_registry.items()
+            if (now - shaper.last_access) > max_age
+        ]
+        for key in stale_keys:
+            del _shaper_registry[key]
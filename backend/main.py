@@ -34,10 +34,14 @@ except ImportError as e:
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
 # Custom StaticFiles implementation to handle cross-drive paths
 from backend.utils.cross_drive_static_files import CrossDriveStaticFiles
+from backend.utils.lazy_loading import LazyHandler, DeferredRouterMiddleware
+from backend.utils.json_responses import GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
+from backend.utils.metrics import RequestTimingMiddleware
 
 # Internal modules/handlers
 from backend.log_manager import LogManager
@@ -75,8 +79,7 @@ from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 # API endpoint registry
-from backend.endpoints import ALL_ROUTERS, setup_generation_router, setup_health_router, setup_file_upload_router
-from backend.koboldcpp_handler import router as koboldcpp_router
+from backend.endpoints import ALL_ROUTERS, DEFERRED_ROUTERS, setup_generation_router, setup_health_router, setup_file_upload_router
 from backend.dependencies import get_character_service_dependency
 
 # Import user directory utilities functions
@@ -86,6 +89,9 @@ from backend.utils.user_dirs import get_users_dir # type: ignore
 from backend.handlers.world_card_chat_handler import WorldCardChatHandler
 from backend.world_asset_handler import WorldAssetHandler
 from backend.services.world_card_service import WorldCardService
+from backend.services.world_progress_service import WorldUserProgressService, WorldProgressWriteBehind
+from backend.services.world_graph_service import WorldGraphCache
+from backend.services.world_bundle_service import WorldBundleService
 
 # Global configuration
 VERSION = "0.1.0"
@@ -100,12 +106,14 @@ from backend.handlers.character_image_handler import CharacterImageHandler
 from backend.services.user_profile_service import UserProfileService # Import UserProfileService
 from backend.services.image_storage_service import ImageStorageService # Import ImageStorageService
 from backend.services.character_lore_service import CharacterLoreService # Import CharacterLoreService
+from backend.services.startup_warmup_service import StartupWarmupService
 
 # Initialize core handlers first (needed for lifespan)
 logger = LogManager(console_verbosity=1)  # INFO level - reduces terminal spam
 settings_manager = SettingsManager(logger)
 settings_manager._load_settings()
-content_filter_manager = ContentFilterManager(logger)
+# Loads every filter package JSON, so it is built on first use
+content_filter_manager = LazyHandler(lambda: ContentFilterManager(logger))
 validator = CharacterValidator(logger)
 png_handler = PngMetadataHandler(logger)
 
@@ -155,13 +163,45 @@ def _deploy_bundled_defaults(settings_manager, logger):
         logger.log_step(f"Deployed {deployed} bundled default asset(s).")
 
 
+def _register_warmup_phases(warmup: StartupWarmupService, app: FastAPI, db_session_generator) -> None:
+    """Queue the slow library synchronization work to run after the server is up."""
+
+    def deploy_defaults(report):
+        # Deploy bundled default assets (before sync so they get picked up)
+        _deploy_bundled_defaults(settings_manager, logger)
+
+    def sync_characters(report):
+        # sync_characters logs and swallows its own errors; a None result means it failed
+        stats = app.state.character_sync_service.sync_characters(progress_callback=report)
+        if stats is None:
+            raise RuntimeError("Character directory synchronization failed (see log for details)")
+        logger.log_info("Initial character directory synchronization complete.")
+
+    def sync_character_images(report):
+        # Sync secondary character images from disk → DB
+        image_handler = CharacterImageHandler(logger)
+        with SessionLocal() as db:
+            image_handler.sync_from_disk(db)
+
+    def sync_user_profiles(report):
+        app.state.user_profile_service.sync_users_directory()
+        logger.log_info("User profiles directory synchronization complete.")
+
+    warmup.add_phase("deploy_defaults", deploy_defaults)
+    warmup.add_phase("character_sync", sync_characters, critical=True)
+    warmup.add_phase("character_image_sync", sync_character_images)
+    # User profiles are not critical for app startup
+    warmup.add_phase("user_profile_sync", sync_user_profiles)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup — critical phase: only what endpoints need to serve the existing DB.
+    # Library synchronization runs afterwards on a background thread (see
+    # StartupWarmupService) and reports progress on /api/health/ready.
     try:
         init_db()
         logger.log_info("Database tables initialised")        
-        # Synchronize character directories
         # Initialize CharacterLoreService (extracted from CharacterService)
         lore_service = CharacterLoreService(logger=logger)
         app.state.lore_service = lore_service
@@ -182,63 +222,63 @@ async def lifespan(app: FastAPI):
         
         # Initialize World Handlers
         app.state.world_asset_handler = WorldAssetHandler(logger)
+        # Runtime world progress is cached and written behind (never to the world PNG)
+        app.state.world_progress_write_behind = WorldProgressWriteBehind(
+            WorldUserProgressService(db_session_generator=db_session_generator, logger=logger)
+        )
+        # Room graphs and decoded room cards for active worlds
+        app.state.world_graph_cache = WorldGraphCache(db_session_generator=db_session_generator, logger=logger)
+        # Batched "enter world" payloads (world card, rooms, NPC summaries)
+        app.state.world_bundle_service = WorldBundleService(
+            db_session_generator=db_session_generator, png_handler=png_handler, logger=logger
+        )
         app.state.world_card_handler = WorldCardService(
             character_service=app.state.character_service,
             png_handler=png_handler,
             settings_manager=settings_manager,
-            logger=logger
-        )
-        
-        # Deploy bundled default assets (before sync so they get picked up)
-        try:
-            _deploy_bundled_defaults(settings_manager, logger)
-        except Exception as e:
-            logger.log_warning(f"Bundled asset deployment failed: {e}")
-
-        # Synchronize character directories using the initialized service
-        try:
-            # Initialize and run the new CharacterSyncService
-            character_sync_service = CharacterSyncService(
-                db_session_generator=db_session_generator,
-                png_handler=png_handler,
-                settings_manager=settings_manager,
-                logger=logger
-            )
-            app.state.character_sync_service = character_sync_service
-            character_sync_service.sync_characters()
-        except Exception as sync_exc:
-            logger.log_error(f"Character sync failed: {sync_exc}")
-            raise
-        logger.log_info("Initial character directory synchronization complete.")
-
-        # Sync secondary character images from disk → DB
-        try:
-            image_handler = CharacterImageHandler(logger)
-            with SessionLocal() as db:
-                image_handler.sync_from_disk(db)
-        except Exception as img_sync_exc:
-            logger.log_error(f"Character image sync failed: {img_sync_exc}")
-
-        # Initialize and run user profile synchronization
-        try:
-            user_profile_service = UserProfileService(
+            logger=logger,
+            progress_service=WorldUserProgressService(
                 db_session_generator=db_session_generator,
                 logger=logger,
-                png_handler=png_handler
-            )
-            app.state.user_profile_service = user_profile_service
-            user_profile_service.sync_users_directory()
-            logger.log_info("User profiles directory synchronization complete.")
-        except Exception as user_sync_exc:
-            logger.log_error(f"User profile sync failed: {user_sync_exc}")
-            # Don't raise - user profiles are not critical for app startup
+                write_behind=app.state.world_progress_write_behind
+            ),
+            graph_cache=app.state.world_graph_cache
+        )
+
+        app.state.character_sync_service = CharacterSyncService(
+            db_session_generator=db_session_generator,
+            png_handler=png_handler,
+            settings_manager=settings_manager,
+            logger=logger
+        )
+        # Keep the sync service's cached directory in step with settings changes
+        sync_service = app.state.character_sync_service
+        settings_manager.subscribe(
+            lambda snapshot, changed: setattr(sync_service, "characters_dir", sync_service._get_characters_dir()),
+            keys=("character_directory",),
+        )
+        app.state.user_profile_service = UserProfileService(
+            db_session_generator=db_session_generator,
+            logger=logger,
+            png_handler=png_handler
+        )
     except Exception as exc:
-        logger.log_error(f"DB init or character sync failed: {exc}\n{traceback.format_exc()}")
+        logger.log_error(f"DB init failed: {exc}\n{traceback.format_exc()}")
         raise
+
+    # Background phase: endpoints serve stale-but-valid DB data until this finishes
+    warmup = StartupWarmupService(logger)
+    _register_warmup_phases(warmup, app, db_session_generator)
+    app.state.startup_warmup = warmup
+    warmup.start()
+    logger.log_info("Server ready; library synchronization continues in the background.")
     
     yield  # App is running
     
     # Shutdown (optional cleanup)
+    warmup.cancel(timeout=5.0)
+    settings_manager.flush()
+    app.state.world_progress_write_behind.flush()
     logger.log_info("Application shutting down")
 
 # Initialize FastAPI app with comprehensive metadata
@@ -343,9 +383,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses for LAN/remote clients; SSE and images are excluded by Starlette
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+# Server-Timing header and per-endpoint latency histograms (served on /api/metrics)
+app.add_middleware(RequestTimingMiddleware)
+
 # ---------- Initialize Remaining Handlers ----------
 
-api_handler = ApiHandler(logger)
+api_handler = ApiHandler(logger, content_filter_manager=content_filter_manager)
 
 # Setup generation router with dependencies
 setup_generation_router(logger, api_handler)
@@ -353,9 +399,14 @@ setup_generation_router(logger, api_handler)
 # Setup file upload router with dependencies
 setup_file_upload_router(logger)
 
-template_handler = TemplateHandler(logger)
-background_handler = BackgroundHandler(logger)
-background_handler.initialize_default_backgrounds() # Initialize default backgrounds
+def _create_background_handler() -> BackgroundHandler:
+    handler = BackgroundHandler(logger)
+    handler.initialize_default_backgrounds() # Initialize default backgrounds
+    return handler
+
+# Template loading and default background setup happen on first use, not at import
+template_handler = LazyHandler(lambda: TemplateHandler(logger))
+background_handler = LazyHandler(_create_background_handler)
 lore_handler = LoreHandler(logger, default_position=0) # Create LoreHandler for dependency injection
 
 # Store handlers on app.state for access in dependencies
@@ -382,7 +433,8 @@ app.state.world_card_chat_handler = world_card_chat_handler
 # ---------- Register all endpoint routers ----------
 for router in ALL_ROUTERS:
     app.include_router(router)
-app.include_router(koboldcpp_router)
+# Rarely used routers are imported on the first request under their prefix
+app.add_middleware(DeferredRouterMiddleware, fastapi_app=app, routers=DEFERRED_ROUTERS)
 
 # ---------- Serve frontend if running in production mode ----------
 
@@ -526,11 +578,12 @@ app.mount("/uploads", CrossDriveStaticFiles(directory=uploads_dir), name="upload
 def main():
     """Main entry point for the application."""
     
-    parser = argparse.ArgumentParser(description="CardShark Character Card Editor")
+    parser = argparse.ArgumentParser(description="CardShark Character Card Editor", allow_abbrev=False)
     parser.add_argument("-host", "--host", default="0.0.0.0", help="Host to run the server on") # Changed default from "127.0.0.1"
     parser.add_argument("-port", "--port", type=int, default=9696, help="Port to run the server on")
-    parser.add_argument("--batch", action="store_true", help="Run in batch processing mode (no GUI)")
-    args = parser.parse_args()
+    parser.add_argument("-batch", "--batch", action="store_true", help="Run in batch processing mode (no GUI)")
+    # Batch mode options (-b, -q, -w) are parsed by the batch converter
+    args, _ = parser.parse_known_args()
     
     if args.batch:
         from backend.batch_converter import run_batch_processing
@@ -157,6 +157,11 @@ class UpdateWorldRequest(BaseModel):
     player_inventory: Optional[Dict[str, Any]] = Field(None, description="Player inventory")
     ally_inventory: Optional[Dict[str, Any]] = Field(None, description="Ally inventory")
     room_states: Optional[Dict[str, Any]] = Field(None, description="Per-room runtime state")
+    current_room_uuid: Optional[str] = Field(None, description="Room the player is in (requires user_uuid)")
+    user_uuid: Optional[str] = Field(
+        None,
+        description="Player whose progress receives the runtime fields; without it they are written into the card"
+    )
 
     class Config:
         extra = "forbid"
@@ -10,8 +10,8 @@ must accept the frontend's shape (camelCase fields, full item objects in
 equipped slots). We use model_config extra="allow" to be permissive with
 new item fields added on the frontend (e.g. weaponProperties, consumableSubtype).
 """
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -166,6 +166,7 @@ class WorldUserProgress(BaseModel):
     room_states: Optional[Dict[str, RoomInstanceState]] = None
 
     # Metadata
+    version: int = 0  # Incremented on every write; pass as base_version when patching
     last_played_at: Optional[str] = None
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
@@ -200,3 +201,33 @@ class WorldUserProgressSummary(BaseModel):
     player_gold: int = 0
     current_room_uuid: Optional[str] = None
     last_played_at: Optional[str] = None
+
+
+class JsonPatchOperation(BaseModel):
+    """A single RFC 6902 operation. Paths are JSON Pointers into the progress document."""
+    model_config = ConfigDict(populate_by_name=True)
+
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Operation in wire form (only the members that were supplied)."""
+        return self.model_dump(by_alias=True, exclude_unset=True)
+
+
+class WorldUserProgressPatch(BaseModel):
+    """
+    JSON Patch request for world user progress.
+    Paths address the WorldUserProgress shape, e.g.
+    /npc_relationships/<npc_uuid>/affinity or /room_states/<room_uuid>.
+    """
+    operations: List[JsonPatchOperation]
+    base_version: Optional[int] = None  # Rejected with 409 if progress has moved on
+
+
+class WorldUserProgressPatchResult(BaseModel):
+    """Result of a patch: the new version and the entities that were written."""
+    version: int
+    changed: List[str] = Field(default_factory=list)
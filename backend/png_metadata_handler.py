@@ -5,6 +5,8 @@ import base64
 import json
 from pathlib import Path
 
+from backend.utils.metrics import timed
+
 class PngMetadataHandler:
     """Handles reading and writing character card metadata in PNG files."""
     
@@ -115,6 +117,7 @@ class PngMetadataHandler:
         """Alias for read_metadata to match service expectations."""
         return self.read_metadata(file_data)
 
+    @timed("png.read_metadata")
     def read_metadata(self, file_data: Union[str, bytes, BinaryIO]) -> Dict:
         """Read character metadata from a PNG file, prioritizing EXIF."""
         try:
@@ -292,6 +295,7 @@ class PngMetadataHandler:
             except Exception as e:
                 self.logger.log_warning(f"Failed to sync after writing {path}: {e}")
 
+    @timed("png.write_metadata")
     def write_metadata(self, image_data: bytes, metadata: Dict) -> bytes:
         """Write character metadata to a PNG file with improved error handling and metadata preservation."""
         try:
@@ -348,4 +352,25 @@ class PngMetadataHandler:
         except Exception as e:
             self.logger.log_error(f"Failed to write metadata: {str(e)}")
             self.logger.log_error(f"Error type: {type(e).__name__}")
-            raise
\ No newline at end of file
+            raise
+
+    @timed("png.encode_card_image")
+    def encode_card_image(self, img: Image.Image, metadata: Dict) -> bytes:
+        """
+        Encode an already decoded image as a card PNG with the 'chara' chunk in
+        the same pass. Unlike write_metadata this never re-decodes PNG bytes, so
+        converters that start from a JPG encode the image once.
+        """
+        base64_str = base64.b64encode(json.dumps(metadata).encode('utf-8')).decode('utf-8')
+        png_info = PngImagePlugin.PngInfo()
+        png_info.add_text('chara', base64_str)
+
+        if img.mode not in ("1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"):
+            img = img.convert("RGBA")
+        icc = img.info.get('icc_profile')
+        if isinstance(icc, str):
+            icc = icc.encode('latin-1')
+
+        output = BytesIO()
+        img.save(output, format="PNG", pnginfo=png_info, icc_profile=icc)
+        return output.getvalue()
@@ -78,6 +78,7 @@ class HealthCheckResponse(BaseResponse):
     database_status: Optional[str] = None
     latency_ms: Optional[float] = None
     llm: Optional[LLMStatus] = None
+    startup: Optional[Dict[str, Any]] = None  # Background warm-up progress
 
 # API test connection response
 class ConnectionTestResponse(BaseResponse):
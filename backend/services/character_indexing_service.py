@@ -1,12 +1,14 @@
 # backend/services/character_indexing_service.py
 import asyncio
 import datetime
+import hashlib
 import os
 from pathlib import Path
 from typing import List, Dict, Set
 from asyncio import to_thread
 
 from backend.errors import CardSharkError
+from backend.utils.metrics import timed
 
 from backend.sql_models import Character as CharacterModel
 from backend.utils.path_utils import normalize_path, paths_are_equal, is_pyinstaller_bundle
@@ -22,6 +24,34 @@ class CharacterIndexingService:
         self.logger = logger
         self.deduplication_service = CharacterDeduplicationService(logger, character_service.db_session_generator)
     
+    def directory_fingerprint(self) -> str:
+        """
+        Cheap summary of the character directories: name, size and mtime of every PNG.
+
+        One ``os.scandir`` per directory and no DB access, so list endpoints can
+        tell whether a full ``get_characters_with_directory_sync`` is needed.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for dir_path in self.character_service._get_character_dirs():
+            digest.update(dir_path.encode("utf-8", "surrogatepass") + b"\0")
+            try:
+                with os.scandir(dir_path) as entries:
+                    stamps = []
+                    for entry in entries:
+                        if not entry.name.lower().endswith(".png"):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        stamps.append(f"{entry.name}\0{stat.st_size}\0{stat.st_mtime_ns}")
+            except OSError:
+                continue
+            for stamp in sorted(stamps):
+                digest.update(stamp.encode("utf-8", "surrogatepass") + b"\n")
+        return digest.hexdigest()
+
+    @timed("indexing.directory_sync")
     async def get_characters_with_directory_sync(self) -> List[CharacterModel]:
         """
         Get characters from database first, then patch with any changes from directories.
@@ -83,6 +113,7 @@ class CharacterIndexingService:
                 self.logger.log_error(f"Fallback also failed: {fallback_error}")
                 return []
     
+    @timed("indexing.scan_directories")
     def _scan_directories_for_changes(self, character_dirs: List[str], db_char_map: Dict) -> Dict:
         """
         Scan character directories and compare with database to find changes.
@@ -211,6 +242,7 @@ class CharacterIndexingService:
         except Exception as session_error:
              self.logger.log_error(f"Session error during cleanup: {session_error}")
     
+    @timed("indexing.sync_file")
     async def _sync_single_file(self, file_path: str, is_new: bool = False):
         """Sync a single character file to the database"""
         try:
@@ -272,6 +304,7 @@ class CharacterIndexingService:
             # Add any other fields the frontend needs
         }
     
+    @timed("indexing.full_sync")
     async def perform_full_sync(self):
         """
         Perform a full synchronization of all character directories.
@@ -1,15 +1,19 @@
+import json
 import os
-import time
-import datetime
 import uuid
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from sqlalchemy.orm import Session
 from backend import sql_models
 from backend.log_manager import LogManager
 from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
 
+# How many files to process between progress callbacks during a sync
+PROGRESS_REPORT_INTERVAL = 50
+# How many inserts/updates to apply per transaction during a sync
+SYNC_CHUNK_SIZE = 500
+
 class CharacterSyncService:
     """
     Service to synchronize character files (PNGs) with the database.
@@ -33,17 +37,25 @@ class CharacterSyncService:
         from backend.utils.db_utils import get_session_context
         return get_session_context(self.db_session_generator, self.logger)
 
-    def sync_characters(self):
+    def sync_characters(self, progress_callback: Optional[Callable[[int, int], None]] = None):
         """
         Main synchronization method.
         Scans the characters directory and updates the database.
+
+        Args:
+            progress_callback: Optional ``callback(done, total)`` invoked while files are
+                processed, used by the startup warm-up to report progress.
+
+        Returns:
+            The stats dict (total/processed/new/updated/errors), or None on failure.
         """
         self.logger.log_step("Starting character synchronization...")
         
         try:
+            files = self._scan_png_files()
             with self._get_session_context() as db:
-                stats = self._sync_files_to_db(db)
-                self._sync_db_to_files(db)
+                stats = self._sync_files_to_db(db, progress_callback, files=files)
+                self._sync_db_to_files(db, scanned_paths={db_path for db_path, _, _ in files})
                 
             # Print clean summary to console
             print("\n" + "="*50)
@@ -57,13 +69,77 @@ class CharacterSyncService:
             print("="*50 + "\n")
             
             self.logger.log_step("Character synchronization complete.")
+            return stats
         except Exception as e:
             self.logger.log_error(f"Error during character synchronization: {e}")
             # We don't raise here to prevent app startup failure, but we log it.
+            return None
+
+    def _scan_png_files(self) -> List[Tuple[str, str, int]]:
+        """
+        List every card PNG as ``(db_path, file_path, mtime)`` (plain strings).
+
+        Uses ``os.scandir`` so the mtime comes from the directory listing and the
+        stored path is built from the already-normalized directory instead of
+        resolving each file individually (symlinked files are still resolved).
+        """
+        from backend.utils.path_utils import get_application_base_path, join_normalized_path, normalize_path
+
+        # Top-level characters + worlds/, rooms/ and npcs/ subdirs
+        scan_dirs = [self.characters_dir]
+        scan_dirs.extend(self.characters_dir / subdir for subdir in ("worlds", "rooms", "npcs"))
+        # Also scan the defaults/ directory for bundled demo/test characters
+        scan_dirs.append(get_application_base_path() / "defaults")
+
+        files: Dict[str, Tuple[str, str, int]] = {}
+        for directory in scan_dirs:
+            if not directory.is_dir():
+                continue
+            normalized_dir = normalize_path(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.name.lower().endswith(".png"):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        mtime = int(entry.stat().st_mtime)
+                        if entry.is_symlink():
+                            db_path = normalize_path(entry.path)
+                        else:
+                            db_path = join_normalized_path(normalized_dir, entry.name)
+                    except OSError as e:
+                        self.logger.log_warning(f"Could not stat {entry.path}: {e}")
+                        continue
+                    files.setdefault(db_path, (db_path, entry.path, mtime))
+        return list(files.values())
+
+    def _load_path_index(self, db: Session) -> Dict[str, Tuple[str, Optional[int]]]:
+        """Load ``png_file_path -> (character_uuid, file_last_modified)`` in one narrow query."""
+        rows = db.query(
+            sql_models.Character.png_file_path,
+            sql_models.Character.character_uuid,
+            sql_models.Character.file_last_modified,
+        ).all()
+        return {path: (char_uuid, mtime) for path, char_uuid, mtime in rows if path}
+
+    def _load_known_uuids(self, db: Session) -> Set[str]:
+        """Every ``character_uuid`` in the table, including rows without a PNG path."""
+        return {char_uuid for (char_uuid,) in db.query(sql_models.Character.character_uuid).all()}
 
-    def _sync_files_to_db(self, db: Session):
+    def _sync_files_to_db(
+        self,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        files: Optional[List[Tuple[str, str, int]]] = None,
+    ):
         """
         Scan files and update/insert into DB.
+
+        The DB state is preloaded into a path index and diffed against the
+        directory listing; only new or modified files have their PNG metadata
+        read. Inserts and updates are applied in bulk, committed every
+        ``SYNC_CHUNK_SIZE`` changes.
         """
         stats = {'total': 0, 'processed': 0, 'new': 0, 'updated': 0, 'errors': 0}
         
@@ -71,91 +147,118 @@ class CharacterSyncService:
             self.logger.log_warning(f"Characters directory not found: {self.characters_dir}")
             return stats
 
-        # Get all PNG files (top-level characters + worlds/ and rooms/ subdirs)
-        png_files = list(self.characters_dir.glob("*.png"))
-        for subdir in ("worlds", "rooms", "npcs"):
-            sub_path = self.characters_dir / subdir
-            if sub_path.exists():
-                png_files.extend(sub_path.glob("*.png"))
+        if files is None:
+            files = self._scan_png_files()
 
-        # Also scan the defaults/ directory for bundled demo/test characters
-        from backend.utils.path_utils import get_application_base_path
-        defaults_dir = get_application_base_path() / "defaults"
-        if defaults_dir.exists():
-            png_files.extend(defaults_dir.glob("*.png"))
+        stats['total'] = len(files)
+        self.logger.log_step(f"Found {len(files)} character/world/room files.", level=0)
 
-        stats['total'] = len(png_files)
-        self.logger.log_step(f"Found {len(png_files)} character/world/room files.", level=0)
+        path_index = self._load_path_index(db)
+        known_uuids = self._load_known_uuids(db)
+        inserts: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
 
-        for file_path in png_files:
+        for index, (db_path, file_path, file_mtime) in enumerate(files):
+            if progress_callback and index % PROGRESS_REPORT_INTERVAL == 0:
+                progress_callback(index, stats['total'])
             try:
-                action = self._process_character_file(db, file_path)
+                existing = path_index.get(db_path)
+                if existing is None:
+                    self.logger.log_info(f"New character detected: {db_path}")
+                    row = self._build_new_character_row(Path(file_path), db_path, file_mtime)
+                    if row is not None:
+                        # Handle potential UUID conflict (rare but possible if file copied)
+                        if row["character_uuid"] in known_uuids:
+                            row["character_uuid"] = str(uuid.uuid4())
+                            self.logger.log_warning(f"Duplicate UUID found for {db_path}, generated new one.")
+                        known_uuids.add(row["character_uuid"])
+                        inserts.append(row)
+                        stats['new'] += 1
+                elif existing[1] is None or file_mtime > existing[1]:
+                    self.logger.log_info(f"Character modified: {db_path}")
+                    row = self._build_updated_character_row(Path(file_path), existing[0], file_mtime)
+                    if row is not None:
+                        updates.append(row)
+                        stats['updated'] += 1
+                # else: file is unchanged, do nothing
                 stats['processed'] += 1
-                if action == 'new':
-                    stats['new'] += 1
-                elif action == 'updated':
-                    stats['updated'] += 1
             except Exception as e:
                 stats['errors'] += 1
                 self.logger.log_error(f"Failed to process file {file_path}: {e}")
-        
+
+            if len(inserts) + len(updates) >= SYNC_CHUNK_SIZE:
+                stats['errors'] += self._apply_changes(db, inserts, updates)
+                inserts, updates = [], []
+
+        stats['errors'] += self._apply_changes(db, inserts, updates)
+
+        if progress_callback:
+            progress_callback(stats['total'], stats['total'])
         return stats
 
-    def _process_character_file(self, db: Session, file_path: Path):
+    def _apply_changes(self, db: Session, inserts: List[Dict[str, Any]], updates: List[Dict[str, Any]]) -> int:
         """
-        Process a single character file: Insert or Update.
-        Returns 'new', 'updated', or 'unchanged'
+        Write one chunk of inserts/updates in a single transaction.
+
+        If the bulk write fails (e.g. a constraint violation from a concurrent
+        write), falls back to row-by-row commits so one bad card cannot drop the
+        whole chunk. Returns the number of rows that could not be written.
         """
-        # Get absolute path for DB storage to ensure compatibility with API endpoints
-        from backend.utils.path_utils import normalize_path
-        relative_path = normalize_path(str(file_path.resolve())) # Temporarily reuse variable name to minimize diff, but it holds absolute path now
-        
-        # Get file modification time
-        file_mtime = int(file_path.stat().st_mtime)
-
-        # Check if exists in DB
-        db_char = db.query(sql_models.Character).filter(
-            sql_models.Character.png_file_path == relative_path
-        ).first()
-
-        if not db_char:
-            self.logger.log_info(f"New character detected: {relative_path}")
-            self._import_character_from_png(db, file_path, relative_path, file_mtime)
-            return 'new'
-        elif db_char.file_last_modified is None or file_mtime > db_char.file_last_modified:
-            self.logger.log_info(f"Character modified: {relative_path}")
-            self._update_character_from_png(db, db_char, file_path, file_mtime)
-            return 'updated'
-        else:
-            # File is unchanged, do nothing
-            return 'unchanged'
-
-    def _import_character_from_png(self, db: Session, file_path: Path, relative_path: str, mtime: int):
-        """Read PNG metadata and insert into DB."""
+        if not inserts and not updates:
+            return 0
+        try:
+            if inserts:
+                db.bulk_insert_mappings(sql_models.Character, inserts)
+            if updates:
+                db.bulk_update_mappings(sql_models.Character, updates)
+            db.commit()
+            return 0
+        except Exception as e:
+            db.rollback()
+            self.logger.log_warning(f"Bulk character sync write failed ({e}); retrying row by row")
+
+        failed = 0
+        for method, rows in ((db.bulk_insert_mappings, inserts), (db.bulk_update_mappings, updates)):
+            for row in rows:
+                try:
+                    method(sql_models.Character, [row])
+                    db.commit()
+                except Exception as row_exc:
+                    db.rollback()
+                    failed += 1
+                    self.logger.log_error(f"Failed to sync {row.get('png_file_path') or row['character_uuid']}: {row_exc}")
+        return failed
+
+    @staticmethod
+    def _as_json_str(value):
+        """Convert a value to a JSON string if it's not already a string."""
+        if value is None:
+            return None
+        return value if isinstance(value, str) else json.dumps(value)
+
+    @staticmethod
+    def _parse_extensions(data_section: Dict[str, Any]) -> Dict[str, Any]:
+        extensions = data_section.get("extensions", {})
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except (ValueError, TypeError):
+                extensions = {}
+        return extensions
+
+    def _build_new_character_row(self, file_path: Path, db_path: str, mtime: int) -> Optional[Dict[str, Any]]:
+        """Read PNG metadata and build the insert mapping for a new Character."""
         metadata = self.png_handler.read_character_data(file_path)
         if not metadata:
             self.logger.log_warning(f"Could not read metadata from {file_path}")
-            return
+            return None
 
         # Extract data from metadata, handling both V1 and V2 SillyTavern formats
         # V2 has a nested 'data' object, V1 has properties at the top level
         data_section = metadata.get("data", metadata)
-        
-        # Helper to convert a value to a JSON string if it's not already a string.
-        def as_json_str(value):
-            import json
-            if value is None:
-                return None
-            return value if isinstance(value, str) else json.dumps(value)
 
         # Auto-assign gallery folder based on card type if not already set
-        extensions = data_section.get("extensions", {})
-        if isinstance(extensions, str):
-            import json as _json
-            try:
-                extensions = _json.loads(extensions)
-            except (ValueError, TypeError):
-                extensions = {}
+        extensions = self._parse_extensions(data_section)
         if not extensions.get("cardshark_folder"):
             if extensions.get("world_data"):
                 extensions["cardshark_folder"] = "Worlds"
@@ -170,17 +273,19 @@ class CharacterSyncService:
         char_uuid = data_section.get("character_uuid")
         if not char_uuid:
             char_uuid = str(uuid.uuid4())
-            self.logger.log_info(f"Generated new UUID {char_uuid} for {relative_path}")
+            self.logger.log_info(f"Generated new UUID {char_uuid} for {db_path}")
             # Write UUID back to PNG so it persists across DB resets
             try:
                 metadata.setdefault("data", data_section)["character_uuid"] = char_uuid
                 self.png_handler.write_metadata_to_png(str(file_path.resolve()), metadata)
-                self.logger.log_info(f"Wrote UUID {char_uuid} back to PNG: {relative_path}")
+                # Record the post-write mtime so the next sync doesn't see it as modified
+                mtime = int(file_path.stat().st_mtime)
+                self.logger.log_info(f"Wrote UUID {char_uuid} back to PNG: {db_path}")
             except Exception as write_err:
-                self.logger.log_warning(f"Could not write UUID back to PNG {relative_path}: {write_err}")
+                self.logger.log_warning(f"Could not write UUID back to PNG {db_path}: {write_err}")
 
-        # Create new Character record
-        char_data = {
+        as_json_str = self._as_json_str
+        return {
             "character_uuid": char_uuid,
             "name": data_section.get("name", file_path.stem),
             "description": data_section.get("description"),
@@ -189,7 +294,7 @@ class CharacterSyncService:
             "first_mes": data_section.get("first_mes"),
             "mes_example": data_section.get("mes_example"),
             "creator_comment": metadata.get("creatorcomment") or data_section.get("creator_comment"),
-            "png_file_path": relative_path,
+            "png_file_path": db_path,
             "tags": as_json_str(data_section.get("tags", [])),
             "spec_version": metadata.get("spec_version", "2.0"),
             "extensions_json": as_json_str(extensions),
@@ -200,45 +305,20 @@ class CharacterSyncService:
             "creator": data_section.get("creator"),
             "character_version": data_section.get("character_version"),
             "combat_stats_json": as_json_str(data_section.get("combat_stats")),
-            "file_last_modified": mtime
+            "file_last_modified": mtime,
+            "is_incomplete": False,
         }
 
-        # Handle potential UUID conflict (rare but possible if file copied)
-        existing_uuid = db.query(sql_models.Character).filter(
-            sql_models.Character.character_uuid == char_data["character_uuid"]
-        ).first()
-        
-        if existing_uuid:
-             # If UUID exists but path is different, generate new UUID
-             char_data["character_uuid"] = str(uuid.uuid4())
-             self.logger.log_warning(f"Duplicate UUID found for {relative_path}, generated new one.")
-
-        new_char = sql_models.Character(**char_data)
-        db.add(new_char)
-        db.commit()
-
-    def _update_character_from_png(self, db: Session, db_char: sql_models.Character, file_path: Path, mtime: int):
-        """Read PNG metadata and update DB record."""
+    def _build_updated_character_row(self, file_path: Path, char_uuid: str, mtime: int) -> Optional[Dict[str, Any]]:
+        """Read PNG metadata and build the update mapping for an existing Character."""
         metadata = self.png_handler.read_character_data(file_path)
         if not metadata:
-            return
+            return None
 
         data_section = metadata.get("data", metadata)
-        
-        def as_json_str(value):
-            import json
-            if value is None:
-                return None
-            return value if isinstance(value, str) else json.dumps(value)
 
         # Auto-assign gallery folder for worlds/rooms if not already set
-        extensions = data_section.get("extensions", {})
-        if isinstance(extensions, str):
-            import json as _json
-            try:
-                extensions = _json.loads(extensions)
-            except (ValueError, TypeError):
-                extensions = {}
+        extensions = self._parse_extensions(data_section)
         if not extensions.get("cardshark_folder"):
             if extensions.get("world_data"):
                 extensions["cardshark_folder"] = "Worlds"
@@ -247,52 +327,50 @@ class CharacterSyncService:
             elif file_path.parent.name == "npcs":
                 extensions["cardshark_folder"] = "NPCs"
 
-        # Update fields
-        db_char.name = data_section.get("name", db_char.name)
-        db_char.description = data_section.get("description")
-        db_char.personality = data_section.get("personality")
-        db_char.scenario = data_section.get("scenario")
-        db_char.first_mes = data_section.get("first_mes")
-        db_char.mes_example = data_section.get("mes_example")
-        db_char.creator_comment = metadata.get("creatorcomment") or data_section.get("creator_comment")
-        db_char.tags = as_json_str(data_section.get("tags", []))
-        db_char.spec_version = metadata.get("spec_version", db_char.spec_version)
-        db_char.extensions_json = as_json_str(extensions)
-        db_char.alternate_greetings_json = as_json_str(data_section.get("alternate_greetings", []))
-        db_char.creator_notes = data_section.get("creator_notes")
-        db_char.system_prompt = data_section.get("system_prompt")
-        db_char.post_history_instructions = data_section.get("post_history_instructions")
-        db_char.creator = data_section.get("creator")
-        db_char.character_version = data_section.get("character_version")
-        db_char.combat_stats_json = as_json_str(data_section.get("combat_stats"))
-        db_char.file_last_modified = mtime
-        
-        db.commit()
+        as_json_str = self._as_json_str
+        row = {
+            "character_uuid": char_uuid,
+            "description": data_section.get("description"),
+            "personality": data_section.get("personality"),
+            "scenario": data_section.get("scenario"),
+            "first_mes": data_section.get("first_mes"),
+            "mes_example": data_section.get("mes_example"),
+            "creator_comment": metadata.get("creatorcomment") or data_section.get("creator_comment"),
+            "tags": as_json_str(data_section.get("tags", [])),
+            "extensions_json": as_json_str(extensions),
+            "alternate_greetings_json": as_json_str(data_section.get("alternate_greetings", [])),
+            "creator_notes": data_section.get("creator_notes"),
+            "system_prompt": data_section.get("system_prompt"),
+            "post_history_instructions": data_section.get("post_history_instructions"),
+            "creator": data_section.get("creator"),
+            "character_version": data_section.get("character_version"),
+            "combat_stats_json": as_json_str(data_section.get("combat_stats")),
+            "file_last_modified": mtime,
+        }
+        # Name and spec version keep their stored values when the card omits them
+        if "name" in data_section:
+            row["name"] = data_section["name"]
+        if "spec_version" in metadata:
+            row["spec_version"] = metadata["spec_version"]
+        return row
 
-    def _sync_db_to_files(self, db: Session):
+    def _sync_db_to_files(self, db: Session, scanned_paths: Optional[Set[str]] = None):
         """
         Check for deleted files and update DB accordingly.
+
+        Only the stored paths are loaded. Paths found by the directory scan are
+        known to exist; anything else is checked on disk.
         """
-        # Get all characters with a file path
-        all_chars = db.query(sql_models.Character).all()
-        
-        for char in all_chars:
-            if not char.png_file_path:
+        scanned_paths = scanned_paths or set()
+        stored_paths = db.query(sql_models.Character.png_file_path).all()
+
+        for (png_file_path,) in stored_paths:
+            if not png_file_path or png_file_path in scanned_paths:
                 continue
                 
             # png_file_path is stored as absolute path, use it directly
-            full_path = Path(char.png_file_path)
-            if not full_path.exists():
-                self.logger.log_warning(f"Character file missing: {char.png_file_path}. Marking as archived/missing.")
+            if not os.path.exists(png_file_path):
+                self.logger.log_warning(f"Character file missing: {png_file_path}. Marking as archived/missing.")
                 # For now, we might just log it, or we could add an 'is_missing' flag to the model.
                 # Per plan: "Mark as archived/missing (or delete if no chat history)."
-                # Let's check for chat history
-                
-                # chat_count = db.query(sql_models.ChatSession).filter(sql_models.ChatSession.character_uuid == char.character_uuid).count()
-                # if chat_count == 0:
-                #     db.delete(char)
-                #     db.commit()
-                # else:
-                #     # Keep it but maybe rename? Or just leave it.
-                #     pass
-                pass # Implementing "Do nothing" for safety right now, just log.
+                # Implementing "Do nothing" for safety right now, just log.
@@ -15,6 +15,9 @@ import traceback
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
+from backend.services.generation_scheduler import SCHEDULER
+from backend.utils.metrics import timed
+
 
 # Match frontend constants (compressionService.ts:19-21)
 COMPRESSION_THRESHOLD = 20           # don't compress below this many messages
@@ -66,6 +69,7 @@ class CompressionService:
         self.logger = logger
         self._cache: Dict[str, _CacheEntry] = {}
 
+    @timed("compression.compress_if_needed")
     def compress_if_needed(
         self,
         *,
@@ -76,6 +80,7 @@ class CompressionService:
         character_name: str,
         user_name: str,
         chat_session_uuid: Optional[str] = None,
+        priority: Optional[str] = None,
     ) -> CompressionResult:
         """
         Check if compression is needed and return a CompressionResult.
@@ -84,6 +89,9 @@ class CompressionService:
         - compressed_context: the summary text (empty if no compression)
         - messages_for_formatting: the messages the assembler should format
           (recent window if compressed, full history if not)
+
+        ``priority`` is the scheduler class of the generation waiting on this
+        summary (compression runs inline, ahead of the reply).
         """
         # No compression: return full history
         if compression_level == 'none' or message_count <= COMPRESSION_THRESHOLD:
@@ -123,7 +131,7 @@ class CompressionService:
 
         try:
             summary = self._generate_summary(
-                old_messages, api_config, character_name, user_name,
+                old_messages, api_config, character_name, user_name, priority,
             )
             if summary:
                 self._cache[cache_key] = _CacheEntry(
@@ -197,6 +205,7 @@ class CompressionService:
         api_config: Dict[str, Any],
         character_name: str,
         user_name: str,
+        priority: Optional[str] = None,
     ) -> Optional[str]:
         """
         Call the configured LLM to generate a compression summary.
@@ -250,9 +259,10 @@ class CompressionService:
 
         self.logger.log_step(f"Compression: calling {provider} at {endpoint}")
 
-        response = requests.post(
-            endpoint, headers=headers, json=data, timeout=120,
-        )
+        with SCHEDULER.slot(api_config, priority):
+            response = requests.post(
+                endpoint, headers=headers, json=data, timeout=120,
+            )
 
         if response.status_code != 200:
             self.logger.log_error(
@@ -0,0 +1,193 @@
+"""
+@file generation_context_loader.py
+@description Loads everything generation needs from the database before the first
+             token is requested: chat history, the session row, the character's
+             enabled lore entries and the session's lore activations. One Session,
+             a fixed number of queries (no per-entry lazy loads), and one immutable
+             GenerationContext that every later stage of stream_generate shares.
+@dependencies sql_models, chat_service
+@consumers api_handler.py
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import sql_models
+from backend.services.chat_service import get_chat_messages_for_generation
+
+
+@dataclass(frozen=True)
+class GenerationContext:
+    """Read-only snapshot of the database state for one generation request."""
+    chat_session_uuid: Optional[str] = None
+    character_uuid: Optional[str] = None
+    # None = not loaded (not requested, or no such session)
+    chat_history: Optional[Tuple[Mapping[str, Any], ...]] = None
+    session_found: bool = False
+    session_notes: Optional[str] = None  # None = not loaded; '' = intentionally cleared
+    lore_entries: Tuple[Mapping[str, Any], ...] = ()
+    active_lore_ids: FrozenSet[int] = frozenset()
+    cooldown_lore_ids: FrozenSet[int] = frozenset()
+    # Instrumentation
+    query_count: int = 0
+    load_ms: float = 0.0
+    errors: Tuple[str, ...] = field(default_factory=tuple)
+
+    def history_list(self):
+        """Mutable copy of the history in the {role, content} dict shape callers expect."""
+        return [dict(msg) for msg in self.chat_history or ()]
+
+    def lore_entry_list(self):
+        """Mutable copies of the lore entries (matching may annotate them)."""
+        return [_thaw(entry) for entry in self.lore_entries]
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _json_value(value: Any, default: Any) -> Any:
+    """JSON columns may hold decoded data or a JSON-encoded string."""
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, ValueError):
+            return default
+    return value
+
+
+def lore_entry_to_dict(db_entry: sql_models.LoreEntry) -> Dict[str, Any]:
+    """Convert a LoreEntry row to the dict shape LoreHandler.match_lore_entries expects."""
+    extensions = _json_value(db_entry.extensions_json, {})
+    if not isinstance(extensions, dict):
+        extensions = {}
+    return {
+        'id': db_entry.id,
+        'content': db_entry.content,
+        'keys': _json_value(db_entry.keys_json, []),
+        'secondary_keys': _json_value(db_entry.secondary_keys_json, []),
+        'enabled': db_entry.enabled,
+        'position': db_entry.position,
+        'insertion_order': db_entry.insertion_order,
+        'case_sensitive': extensions.get('case_sensitive', False),
+        'use_regex': False,
+        'name': db_entry.comment or '',
+        'has_image': bool(db_entry.image_uuid),
+        'image_uuid': db_entry.image_uuid or '',
+        'priority': extensions.get('priority', 100),
+        'constant': extensions.get('constant', False),
+        'selective': db_entry.selective,
+        'extensions': {
+            'match_whole_words': extensions.get('match_whole_words', True),
+            'sticky': extensions.get('sticky', 2),
+            'cooldown': extensions.get('cooldown', 0),
+            'delay': extensions.get('delay', 0),
+            'scan_depth': extensions.get('scan_depth', None),
+        }
+    }
+
+
+def load_generation_context(
+    db: Session,
+    *,
+    chat_session_uuid: Optional[str] = None,
+    character_uuid: Optional[str] = None,
+    load_history: bool = False,
+) -> GenerationContext:
+    """
+    Load the pre-flight state for a generation in one Session.
+
+    Queries (each at most once): session row, history messages, the
+    character's first lore book's enabled entries, and the session's lore
+    activations. A failing stage is recorded in ``errors`` and leaves its
+    fields at their defaults; the other stages still load.
+    """
+    start = time.perf_counter()
+    queries = 0
+    errors = []
+    values: Dict[str, Any] = {}
+
+    if chat_session_uuid:
+        try:
+            queries += 1
+            notes_row = db.execute(
+                select(sql_models.ChatSession.session_notes)
+                .where(sql_models.ChatSession.chat_session_uuid == chat_session_uuid)
+            ).first()
+            if notes_row is not None:
+                values['session_found'] = True
+                values['session_notes'] = notes_row[0] or ''
+                if load_history:
+                    queries += 1
+                    values['chat_history'] = tuple(
+                        _freeze(msg) for msg in get_chat_messages_for_generation(db, chat_session_uuid)
+                    )
+        except Exception as e:
+            errors.append(f"session: {e}")
+
+    if character_uuid:
+        try:
+            queries += 1
+            first_book = (
+                select(sql_models.LoreBook.id)
+                .where(sql_models.LoreBook.character_uuid == character_uuid)
+                .order_by(sql_models.LoreBook.id)
+                .limit(1)
+                .scalar_subquery()
+            )
+            rows = db.execute(
+                select(sql_models.LoreEntry)
+                .where(sql_models.LoreEntry.lore_book_id == first_book,
+                       sql_models.LoreEntry.enabled.is_(True))
+                .order_by(sql_models.LoreEntry.id)
+            ).scalars().all()
+            values['lore_entries'] = tuple(_freeze(lore_entry_to_dict(row)) for row in rows)
+        except Exception as e:
+            errors.append(f"lore: {e}")
+
+    if chat_session_uuid and values.get('lore_entries'):
+        try:
+            queries += 1
+            activations = db.execute(
+                select(sql_models.LoreActivation.lore_entry_id,
+                       sql_models.LoreActivation.sticky_remaining,
+                       sql_models.LoreActivation.cooldown_remaining)
+                .where(sql_models.LoreActivation.chat_session_uuid == chat_session_uuid)
+            ).all()
+            values['active_lore_ids'] = frozenset(
+                entry_id for entry_id, sticky, _ in activations if (sticky or 0) > 0
+            )
+            values['cooldown_lore_ids'] = frozenset(
+                entry_id for entry_id, sticky, cooldown in activations
+                if (sticky or 0) == 0 and (cooldown or 0) > 0
+            )
+        except Exception as e:
+            errors.append(f"activations: {e}")
+
+    return GenerationContext(
+        chat_session_uuid=chat_session_uuid,
+        character_uuid=character_uuid,
+        query_count=queries,
+        load_ms=(time.perf_counter() - start) * 1000,
+        errors=tuple(errors),
+        **values,
+    )
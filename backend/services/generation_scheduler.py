@@ -0,0 +1,258 @@
+"""
+backend/services/generation_scheduler.py
+Coordinates LLM calls that share a backend.
+
+Chat generations, inline compression, room summaries, thin frames and
+greetings can all target the same local KoboldCPP instance, which works
+through one request at a time. Every caller takes a slot from the scheduler
+before contacting the provider. Slots are per backend (provider + URL),
+capped per provider, and handed out interactive-first, FIFO within a class,
+so background work never sits in front of the user's reply. A queued
+request can be cancelled (client disconnect) without ever reaching the
+backend. Queue depth and active slots are exported as gauges on
+/api/metrics, wait time as a histogram.
+"""
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import anyio
+import anyio.to_thread
+
+from backend.utils.metrics import REGISTRY
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+_PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 1}
+
+# Concurrent requests per backend. Local servers run one generation at a time
+# (KoboldCPP queues anything extra itself, in arrival order); hosted APIs take several.
+PROVIDER_CONCURRENCY = {'KoboldCPP': 1, 'Ollama': 1}
+DEFAULT_CONCURRENCY = 4
+
+# How often a queued caller re-checks for cancellation
+QUEUE_POLL_SECONDS = 0.25
+
+
+class GenerationCancelled(Exception):
+    """The caller gave up while its request was still queued."""
+
+
+def backend_key(api_config: Dict[str, Any]) -> Tuple[str, str]:
+    """(provider, normalized URL): requests with the same key share a queue."""
+    provider = api_config.get('provider') or 'KoboldCPP'
+    url = (api_config.get('url') or '').strip().rstrip('/').lower()
+    return provider, url
+
+
+def normalize_priority(priority: Optional[str]) -> str:
+    return priority if priority in _PRIORITY_RANK else PRIORITY_INTERACTIVE
+
+
+class Ticket:
+    """One caller's place in a backend queue; holds the slot once granted."""
+
+    def __init__(self, queue: "_BackendQueue", priority: str):
+        self.queue = queue
+        self.priority = priority
+        self.enqueued_at = time.perf_counter()
+        self.granted_at: Optional[float] = None
+        self.done = False
+        self.cancelled = False
+        self.claimed = False
+        self._granted = threading.Event()
+
+    @property
+    def granted(self) -> bool:
+        return self._granted.is_set()
+
+    @property
+    def wait_seconds(self) -> float:
+        end = self.granted_at if self.granted_at is not None else time.perf_counter()
+        return end - self.enqueued_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the slot is granted; False on timeout."""
+        return self._granted.wait(timeout)
+
+    def release(self) -> None:
+        """Give the slot back, or leave the queue if not granted yet. Idempotent."""
+        self.queue.finish(self)
+
+    def cancel(self) -> None:
+        """
+        Mark the ticket cancelled and give up its place or slot, so a grant
+        racing this call is never used. After ``claim()`` the holder owns the
+        slot and releases it itself.
+        """
+        self.queue.finish(self, cancelled=True)
+
+    def claim(self) -> bool:
+        """
+        Confirm a granted slot before contacting the backend. False (with the
+        slot handed back) if the ticket was cancelled or released meanwhile.
+        """
+        return self.queue.claim(self)
+
+
+class _BackendQueue:
+    def __init__(self, key: Tuple[str, str], limit: int):
+        self.key = key
+        self.limit = limit
+        self._heap: List[Tuple[int, int, Ticket]] = []
+        self._active = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def label(self) -> str:
+        provider, url = self.key
+        return f"{provider} {url}" if url else provider
+
+    def submit(self, priority: str) -> Ticket:
+        ticket = Ticket(self, priority)
+        with self._lock:
+            heapq.heappush(self._heap, (_PRIORITY_RANK[priority], next(self._seq), ticket))
+            self._dispatch()
+        return ticket
+
+    def finish(self, ticket: Ticket, cancelled: bool = False) -> None:
+        with self._lock:
+            if cancelled:
+                ticket.cancelled = True
+                if ticket.claimed:
+                    return
+            if ticket.done:
+                return
+            ticket.done = True
+            if ticket.granted:
+                self._active -= 1
+                self._dispatch()
+            # A cancelled waiter stays in the heap and is skipped when it surfaces
+
+    def claim(self, ticket: Ticket) -> bool:
+        with self._lock:
+            if not ticket.cancelled and not ticket.done and ticket.granted:
+                ticket.claimed = True
+                return True
+        # Cancelled as the grant landed: make sure the slot goes to the next waiter
+        self.finish(ticket)
+        return False
+
+    def _dispatch(self) -> None:
+        while self._heap and self._active < self.limit:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.done:
+                continue
+            self._active += 1
+            ticket.granted_at = time.perf_counter()
+            ticket._granted.set()
+            REGISTRY.observe(
+                "cardshark_generation_queue_wait_seconds", ticket.wait_seconds,
+                backend=self.label, priority=ticket.priority,
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = [ticket for _, _, ticket in self._heap if not ticket.done]
+            active = self._active
+        queued = {priority: 0 for priority in _PRIORITY_RANK}
+        for ticket in waiting:
+            queued[ticket.priority] += 1
+        return {
+            'backend': self.label,
+            'limit': self.limit,
+            'active': active,
+            'queued': queued,
+            'oldest_wait_ms': round(max((t.wait_seconds for t in waiting), default=0.0) * 1000, 1),
+        }
+
+
+class GenerationScheduler:
+    """
+    Per-backend slot queues in front of the provider adapters.
+
+        with SCHEDULER.slot(api_config, PRIORITY_BACKGROUND):
+            requests.post(...)
+
+    Streaming generators use ``submit()`` and poll ``Ticket.wait()`` so they
+    can yield (and notice a client disconnect) while queued; a disconnect
+    calls ``Ticket.cancel()`` and the generator checks ``Ticket.claim()``
+    once granted, so a slot granted as the client left is handed straight on.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_CONCURRENCY):
+        self.limits = dict(PROVIDER_CONCURRENCY if limits is None else limits)
+        self.default_limit = default_limit
+        self._queues: Dict[Tuple[str, str], _BackendQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, api_config: Dict[str, Any]) -> _BackendQueue:
+        key = backend_key(api_config)
+        queue = self._queues.get(key)
+        if queue is None:
+            with self._lock:
+                queue = self._queues.get(key)
+                if queue is None:
+                    limit = self.limits.get(key[0], self.default_limit)
+                    queue = self._queues[key] = _BackendQueue(key, max(1, limit))
+        return queue
+
+    def submit(self, api_config: Dict[str, Any], priority: Optional[str] = None) -> Ticket:
+        """Join the backend's queue; the ticket may already be granted."""
+        return self._queue(api_config).submit(normalize_priority(priority))
+
+    @contextmanager
+    def slot(
+        self,
+        api_config: Dict[str, Any],
+        priority: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[Ticket]:
+        """Hold a slot for the block (blocking wait; ``cancel`` abandons the wait)."""
+        ticket = self.submit(api_config, priority)
+        try:
+            while not ticket.wait(QUEUE_POLL_SECONDS if cancel is not None else None):
+                if cancel.is_set():
+                    raise GenerationCancelled(f"Cancelled while queued for {ticket.queue.label}")
+            if cancel is not None and cancel.is_set():
+                # Granted in the same instant the caller gave up; the finally hands the slot on
+                raise GenerationCancelled(f"Cancelled while queued for {ticket.queue.label}")
+            yield ticket
+        finally:
+            ticket.release()
+
+    @asynccontextmanager
+    async def slot_async(self, api_config: Dict[str, Any], priority: Optional[str] = None) -> AsyncIterator[Ticket]:
+        """Async ``slot()``: task cancellation while queued leaves the queue."""
+        ticket = self.submit(api_config, priority)
+        try:
+            while not ticket.granted:
+                await anyio.to_thread.run_sync(ticket.wait, QUEUE_POLL_SECONDS)
+            yield ticket
+        finally:
+            ticket.release()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            queues = list(self._queues.values())
+        return [queue.snapshot() for queue in queues]
+
+    def _queue_depth(self) -> Iterable[Tuple[Dict[str, str], float]]:
+        for entry in self.snapshot():
+            for priority, count in entry['queued'].items():
+                yield {'backend': entry['backend'], 'priority': priority}, count
+
+    def _active_slots(self) -> Iterable[Tuple[Dict[str, str], float]]:
+        for entry in self.snapshot():
+            yield {'backend': entry['backend']}, entry['active']
+
+
+SCHEDULER = GenerationScheduler()
+
+REGISTRY.describe("cardshark_generation_queue_wait_seconds", "Time LLM requests waited for a backend slot")
+REGISTRY.gauge("cardshark_generation_queue_depth", "LLM requests waiting for a backend slot", SCHEDULER._queue_depth)
+REGISTRY.gauge("cardshark_generation_active", "LLM requests holding a backend slot", SCHEDULER._active_slots)
@@ -0,0 +1,359 @@
+"""
+backend/services/layer_compositor.py
+Headless layer compositing for layered characters (character_creator.py).
+
+A layered character is a base PNG plus an ordered stack of overlay PNGs.
+The compositor keeps decoded layers (already RGBA and scaled to the base
+size) in a byte-bounded LRU, so a layer toggle never goes back to disk for
+the layers that didn't change. Composites of stack prefixes are memoized
+too: changing the top layer costs one alpha_composite, changing a layer in
+the middle recomposes from the nearest stored prefix below it. Every file
+is keyed by (path, mtime, size), so editing a PNG on disk invalidates it
+without any explicit call.
+
+Thumbnails for the layer picker are kept in memory and persisted as small
+PNGs under the thumbnail directory, keyed the same way, so reopening a
+category doesn't decode full-size layers again.
+
+Returned images are shared with the cache; treat them as read-only.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from backend.utils.atomic_files import atomic_write_bytes
+from backend.utils.path_utils import get_application_base_path
+
+LAYERED_CHARACTERS_DIRNAME = "Characters"
+
+
+def _env_mebibytes(name: str) -> Optional[int]:
+    try:
+        return int(os.environ[name]) * 1024 * 1024
+    except (KeyError, ValueError):
+        return None
+
+
+# Cache budgets follow the art: each compose grows them to hold the whole
+# stack at the base canvas size (width * height * 4 per layer, plus one per
+# stored prefix), between a floor for small art and a ceiling that fits a
+# 36-layer 2048x2048 stack. CARDSHARK_LAYER_CACHE_MB /
+# CARDSHARK_LAYER_PREFIX_CACHE_MB pin a fixed budget instead.
+LAYER_CACHE_BYTES_OVERRIDE = _env_mebibytes("CARDSHARK_LAYER_CACHE_MB")
+PREFIX_CACHE_BYTES_OVERRIDE = _env_mebibytes("CARDSHARK_LAYER_PREFIX_CACHE_MB")
+LAYER_CACHE_FLOOR_BYTES = 96 * 1024 * 1024
+LAYER_CACHE_CEILING_BYTES = 576 * 1024 * 1024
+PREFIX_CACHE_FLOOR_BYTES = 32 * 1024 * 1024
+PREFIX_CACHE_CEILING_BYTES = 160 * 1024 * 1024
+# Besides the last two, every Nth prefix of a composed stack is kept
+DEFAULT_CHECKPOINT_EVERY = 4
+DEFAULT_THUMBNAIL_SIZE = (80, 80)
+MAX_MEMORY_THUMBNAILS = 1024
+
+FileKey = Tuple[str, int, int]
+
+
+def default_thumbnail_dir() -> Path:
+    return get_application_base_path() / "cache" / "layer_thumbnails"
+
+
+def layered_characters_dir() -> Path:
+    return get_application_base_path() / LAYERED_CHARACTERS_DIRNAME
+
+
+def find_base_image(character_dir: os.PathLike) -> Optional[Path]:
+    """First PNG (by name) in the character's Base category, if any."""
+    base_dir = Path(character_dir) / "Base"
+    if not base_dir.is_dir():
+        return None
+    pngs = sorted(p for p in base_dir.iterdir() if p.suffix.lower() == ".png" and p.is_file())
+    return pngs[0] if pngs else None
+
+
+def file_key(path: os.PathLike) -> FileKey:
+    """(absolute path, mtime_ns, size); raises OSError if the file is gone."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def fit_size(size: Tuple[int, int], bounds: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with ``size``'s aspect ratio inside ``bounds`` (never upscaled)."""
+    width, height = size
+    scale = min(bounds[0] / width, bounds[1] / height, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _image_bytes(image: Optional[Image.Image]) -> int:
+    if image is None:
+        return 1
+    return image.width * image.height * len(image.getbands())
+
+
+class _ImageLRU:
+    """OrderedDict LRU bounded by decoded image bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Optional[Image.Image]]" = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        image = self._entries[key]
+        self._entries.move_to_end(key)
+        return image
+
+    def put(self, key: Hashable, image: Optional[Image.Image]) -> None:
+        if key in self._entries:
+            self.bytes -= _image_bytes(self._entries.pop(key))
+        cost = _image_bytes(image)
+        if cost > self.max_bytes:
+            return
+        self._entries[key] = image
+        self.bytes += cost
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= _image_bytes(evicted)
+
+    def discard_where(self, predicate) -> None:
+        for key in [k for k in self._entries if predicate(k)]:
+            self.bytes -= _image_bytes(self._entries.pop(key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+
+class LayerCompositor:
+    """
+    Composites a base image and an ordered list of layer files.
+
+        compositor = LayerCompositor()
+        image = compositor.compose("Characters/Aria/Base/body.png", active_layers)
+        preview = compositor.preview(base, active_layers, (350, 350))
+
+    Cache budgets passed in (or set through the environment) are fixed;
+    otherwise they are sized from the stacks composed so far.
+
+    Safe to share between threads; one compose runs at a time.
+    """
+
+    def __init__(
+        self,
+        thumbnail_dir: Optional[os.PathLike] = None,
+        layer_cache_bytes: Optional[int] = None,
+        prefix_cache_bytes: Optional[int] = None,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        logger=None,
+    ):
+        self.thumbnail_dir = Path(thumbnail_dir) if thumbnail_dir is not None else default_thumbnail_dir()
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.logger = logger
+        if layer_cache_bytes is None:
+            layer_cache_bytes = LAYER_CACHE_BYTES_OVERRIDE
+        if prefix_cache_bytes is None:
+            prefix_cache_bytes = PREFIX_CACHE_BYTES_OVERRIDE
+        self._auto_layer_budget = layer_cache_bytes is None
+        self._auto_prefix_budget = prefix_cache_bytes is None
+        self._layers = _ImageLRU(LAYER_CACHE_FLOOR_BYTES if layer_cache_bytes is None else layer_cache_bytes)
+        self._prefixes = _ImageLRU(PREFIX_CACHE_FLOOR_BYTES if prefix_cache_bytes is None else prefix_cache_bytes)
+        self._thumbnails: "OrderedDict[Tuple[FileKey, Tuple[int, int]], Image.Image]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {
+            "layer_hits": 0, "layer_misses": 0,
+            "prefix_hits": 0, "composites": 0,
+            "thumbnail_hits": 0, "thumbnail_disk_hits": 0, "thumbnail_misses": 0,
+        }
+
+    # ---- compositing ----
+
+    def compose(self, base_path: os.PathLike, layer_paths: Sequence[os.PathLike]) -> Image.Image:
+        """
+        RGBA composite of ``layer_paths`` over the base, bottom to top. Layers
+        are scaled to the base size; missing or unreadable layers are skipped.
+        Raises OSError if the base can't be read.
+        """
+        with self._lock:
+            base_key = file_key(base_path)
+            keys: List[FileKey] = [base_key]
+            for path in layer_paths:
+                try:
+                    keys.append(file_key(path))
+                except OSError as e:
+                    self._warn(f"Skipping missing layer {path}: {e}")
+
+            # Longest stack prefix already composited
+            depth = len(keys)
+            while depth > 1 and tuple(keys[:depth]) not in self._prefixes:
+                depth -= 1
+            if depth > 1:
+                self._stats["prefix_hits"] += 1
+                composite = self._prefixes.get(tuple(keys[:depth]))
+            else:
+                composite = self._decoded(base_key, None)
+                if composite is None:
+                    raise OSError(f"Cannot read base image {base_path}")
+            self._fit_budgets(composite.size, len(keys))
+
+            for index in range(depth, len(keys)):
+                layer = self._decoded(keys[index], composite.size)
+                if layer is not None:
+                    composite = Image.alpha_composite(composite, layer)
+                    self._stats["composites"] += 1
+                prefix_length = index + 1
+                if (prefix_length >= len(keys) - 1
+                        or (prefix_length - 1) % self.checkpoint_every == 0):
+                    self._prefixes.put(tuple(keys[:prefix_length]), composite)
+            return composite
+
+    def preview(
+        self,
+        base_path: os.PathLike,
+        layer_paths: Sequence[os.PathLike],
+        bounds: Tuple[int, int],
+    ) -> Image.Image:
+        """The composite scaled down to fit ``bounds``."""
+        composite = self.compose(base_path, layer_paths)
+        size = fit_size(composite.size, bounds)
+        if size == composite.size:
+            return composite
+        # An integer box reduce first is several times cheaper than LANCZOS over
+        # the full 2k image and indistinguishable at preview size
+        factor = int(min(composite.width / size[0], composite.height / size[1]))
+        if factor > 1:
+            composite = composite.reduce(factor)
+        return composite.resize(size, Image.LANCZOS)
+
+    def _fit_budgets(self, size: Tuple[int, int], stack_length: int) -> None:
+        """Grow automatic budgets to hold a ``stack_length`` stack at ``size``; never shrinks."""
+        frame_bytes = size[0] * size[1] * 4
+        if self._auto_layer_budget:
+            wanted = min(LAYER_CACHE_CEILING_BYTES, frame_bytes * stack_length)
+            self._layers.max_bytes = max(self._layers.max_bytes, wanted)
+        if self._auto_prefix_budget:
+            stored_prefixes = stack_length // self.checkpoint_every + 2
+            wanted = min(PREFIX_CACHE_CEILING_BYTES, frame_bytes * stored_prefixes)
+            self._prefixes.max_bytes = max(self._prefixes.max_bytes, wanted)
+
+    def _decoded(self, key: FileKey, size: Optional[Tuple[int, int]]) -> Optional[Image.Image]:
+        """Decoded RGBA layer scaled to ``size`` (native size when None); None if unreadable."""
+        cache_key = (key, size)
+        if cache_key in self._layers:
+            self._stats["layer_hits"] += 1
+            return self._layers.get(cache_key)
+        self._stats["layer_misses"] += 1
+        try:
+            with Image.open(key[0]) as source:
+                image = source.convert("RGBA")
+            if size is not None and image.size != size:
+                image = image.resize(size)
+        except (OSError, ValueError) as e:
+            self._warn(f"Error decoding layer {key[0]}: {e}")
+            image = None
+        # Unreadable files are remembered too, until their mtime changes
+        self._layers.put(cache_key, image)
+        return image
+
+    # ---- thumbnails ----
+
+    def thumbnail(self, path: os.PathLike, size: Tuple[int, int] = DEFAULT_THUMBNAIL_SIZE) -> Image.Image:
+        """
+        Thumbnail of a layer file, from memory, the persisted cache, or by
+        decoding the file (and persisting the result). Raises OSError if the
+        file can't be read.
+        """
+        key = file_key(path)
+        memory_key = (key, tuple(size))
+        with self._lock:
+            image = self._thumbnails.get(memory_key)
+            if image is not None:
+                self._thumbnails.move_to_end(memory_key)
+                self._stats["thumbnail_hits"] += 1
+                return image
+
+        cached_path = self._thumbnail_path(key, size)
+        image = None
+        if cached_path.exists():
+            try:
+                with Image.open(cached_path) as cached:
+                    cached.load()
+                    image = cached.copy()
+                disk_hit = True
+            except OSError:
+                image = None
+        if image is None:
+            disk_hit = False
+            with Image.open(key[0]) as source:
+                source.thumbnail(size)
+                image = source.copy()
+            self._persist_thumbnail(image, cached_path)
+
+        with self._lock:
+            self._stats["thumbnail_disk_hits" if disk_hit else "thumbnail_misses"] += 1
+            self._thumbnails[memory_key] = image
+            while len(self._thumbnails) > MAX_MEMORY_THUMBNAILS:
+                self._thumbnails.popitem(last=False)
+        return image
+
+    def _thumbnail_path(self, key: FileKey, size: Tuple[int, int]) -> Path:
+        digest = hashlib.sha1(f"{key[0]}|{key[1]}|{key[2]}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+        return self.thumbnail_dir / digest[:2] / f"{digest}.png"
+
+    def _persist_thumbnail(self, image: Image.Image, cached_path: Path) -> None:
+        # Best effort; a read-only cache directory just means decoding again next time
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        try:
+            atomic_write_bytes(cached_path, buffer.getvalue(), fsync=False)
+        except OSError as e:
+            self._warn(f"Could not persist thumbnail {cached_path}: {e}")
+
+    # ---- maintenance ----
+
+    def invalidate(self, paths: Optional[Iterable[os.PathLike]] = None) -> None:
+        """
+        Drop cached entries for ``paths`` (everything when None). Only needed
+        when a file is replaced without changing its mtime or size.
+        """
+        with self._lock:
+            if paths is None:
+                self._layers.clear()
+                self._prefixes.clear()
+                self._thumbnails.clear()
+                return
+            targets = {os.path.abspath(p) for p in paths}
+            self._layers.discard_where(lambda k: k[0][0] in targets)
+            self._prefixes.discard_where(lambda k: any(key[0] in targets for key in k))
+            for key in [k for k in self._thumbnails if k[0][0] in targets]:
+                del self._thumbnails[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "layers_cached": len(self._layers),
+                "layer_cache_bytes": self._layers.bytes,
+                "layer_cache_budget": self._layers.max_bytes,
+                "prefixes_cached": len(self._prefixes),
+                "prefix_cache_bytes": self._prefixes.bytes,
+                "prefix_cache_budget": self._prefixes.max_bytes,
+                "thumbnails_cached": len(self._thumbnails),
+            }
+
+    def _warn(self, message: str) -> None:
+        if self.logger is not None:
+            self.logger.log_warning(message)
+        else:
+            logging.getLogger(__name__).warning(message)
@@ -0,0 +1,365 @@
+"""
+backend/services/model_catalog_cache.py
+Cache for provider model catalogs (OpenRouter, Featherless, Ollama).
+
+Catalogs are large and change rarely, but the model picker asks for them
+every time it opens. Entries are keyed by (provider, base URL, API key hash,
+query), so different accounts never share a list and keys are never stored.
+
+    # in the adapters' list_models
+    result = MODEL_CATALOGS.get(catalog_key("OpenRouter", url, api_key), fetch)
+    # in the routes: one filtered page of the list_models result
+    page = page_model_list(adapter.list_models(url, api_key), search="llama", limit=50)
+
+- Fresh entries (younger than the TTL) are returned without contacting the
+  provider.
+- Stale entries (up to ``max_stale_seconds`` old) are returned immediately
+  while one background thread refreshes them (stale-while-revalidate);
+  older ones wait for the provider.
+- Refreshes send If-None-Match / If-Modified-Since when the provider gave
+  an ETag or Last-Modified, so an unchanged catalog costs a 304.
+- If the provider is down, the last good catalog keeps being served, marked
+  stale and carrying the error; failed refreshes back off for
+  ``FAILURE_BACKOFF_SECONDS``.
+
+Entries are persisted as JSON under the cache directory, so the picker is
+instant after a restart too.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.utils.atomic_files import atomic_write_text
+from backend.utils.metrics import REGISTRY
+from backend.utils.path_utils import get_application_base_path
+
+DEFAULT_TTL_SECONDS = 15 * 60
+# Local providers (Ollama) change whenever a model is pulled
+LOCAL_TTL_SECONDS = 30
+# How long a catalog is still served when the provider can't be reached
+DEFAULT_MAX_STALE_SECONDS = 7 * 24 * 3600
+FAILURE_BACKOFF_SECONDS = 30
+
+CatalogKey = Tuple[str, ...]
+
+REGISTRY.describe(
+    "cardshark_model_catalog_fetch_seconds",
+    "Provider model catalog requests by provider and outcome (fetched, not_modified, error)",
+)
+
+
+def api_key_hash(api_key: Optional[str]) -> str:
+    """Short, non-reversible fingerprint of an API key ("" when there is none)."""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def catalog_key(provider: str, base_url: str, api_key: Optional[str] = None, *extra: Any) -> CatalogKey:
+    return (provider, base_url.rstrip("/").lower(), api_key_hash(api_key), *(str(e) for e in extra))
+
+
+class CatalogFetchError(Exception):
+    """Raised by fetch callbacks when the provider request fails."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class CatalogFetch:
+    """
+    Outcome of one provider request. ``models`` is None when the provider
+    answered 304 Not Modified.
+    """
+    models: Optional[List[Dict[str, Any]]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class CatalogEntry:
+    models: List[Dict[str, Any]]
+    fetched_at: float  # last time the provider confirmed the catalog
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    failed_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class CatalogResult:
+    models: List[Dict[str, Any]]
+    fetched_at: float
+    cached: bool = False
+    stale: bool = False
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "models": self.models,
+            "cached": self.cached,
+            "stale": self.stale,
+            "fetched_at": self.fetched_at,
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+def filter_models(
+    models: Sequence[Dict[str, Any]],
+    search: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Case-insensitive search over id, name and description (every word must
+    match), then an ``offset``/``limit`` page. Returns (page, total matches).
+    """
+    terms = (search or "").lower().split()
+    if terms:
+        matches = []
+        for model in models:
+            text = " ".join(str(model.get(k) or "") for k in ("id", "name", "description")).lower()
+            if all(term in text for term in terms):
+                matches.append(model)
+    else:
+        matches = list(models)
+    offset = max(0, offset)
+    end = None if limit is None else offset + max(0, limit)
+    return matches[offset:end], len(matches)
+
+
+def page_model_list(
+    result: Dict[str, Any],
+    search: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """A successful list_models result with ``models`` narrowed to one filtered page."""
+    models, total = filter_models(result.get("models") or [], search, offset, limit)
+    return {**result, "models": models, "total": total, "offset": offset, "limit": limit}
+
+
+class _Flight:
+    """One provider request in progress; concurrent callers wait on ``done``."""
+
+    __slots__ = ("done", "entry", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: Optional[CatalogEntry] = None
+        self.error: Optional[str] = None
+
+
+_STAT_FOR_OUTCOME = {"fetched": "fetches", "not_modified": "not_modified", "error": "errors"}
+
+
+def default_cache_dir() -> Path:
+    return get_application_base_path() / "cache" / "model_catalogs"
+
+
+class ModelCatalogCache:
+    """Thread-safe catalog cache shared by the provider adapters."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[os.PathLike] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS,
+        clock: Callable[[], float] = time.time,
+        logger=None,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.clock = clock
+        self.logger = logger
+        self._entries: Dict[CatalogKey, CatalogEntry] = {}
+        self._inflight: Dict[CatalogKey, _Flight] = {}
+        self._refreshers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "not_modified": 0, "errors": 0}
+
+    def get(
+        self,
+        key: CatalogKey,
+        fetch: Callable[[Optional[CatalogEntry]], CatalogFetch],
+        ttl_seconds: Optional[float] = None,
+        refresh: bool = False,
+    ) -> CatalogResult:
+        """
+        Catalog for ``key``. ``fetch(previous_entry)`` performs the provider
+        request (conditional when the entry has validators) and raises on
+        failure; the error only propagates, as CatalogFetchError, when there
+        is no cached catalog to fall back on. ``refresh`` skips the TTL and
+        waits for the provider.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._load_persisted(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            if entry is not None and not refresh:
+                age = now - entry.fetched_at
+                if age < ttl:
+                    self._stats["hits"] += 1
+                    return self._result(entry, cached=True)
+                if age < self.max_stale_seconds:
+                    self._stats["stale_hits"] += 1
+                    backing_off = entry.failed_at is not None and now - entry.failed_at < FAILURE_BACKOFF_SECONDS
+                    if key not in self._inflight and not backing_off:
+                        self._start_refresh(key, fetch)
+                    return self._result(entry, cached=True, stale=True)
+            self._stats["misses"] += 1
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _Flight()
+
+        if owner:
+            self._run(key, fetch, flight)
+        else:
+            # Someone is already fetching this catalog; share the result
+            flight.done.wait()
+        if flight.entry is None:
+            raise CatalogFetchError(flight.error or "Model catalog request failed")
+        if flight.error is not None:
+            return self._result(flight.entry, cached=True, stale=True)
+        return self._result(flight.entry, cached=False)
+
+    # ---- refreshing ----
+
+    def _start_refresh(self, key: CatalogKey, fetch) -> None:
+        # Called with the lock held
+        flight = self._inflight[key] = _Flight()
+        thread = threading.Thread(target=self._run, args=(key, fetch, flight),
+                                  name=f"catalog-refresh-{key[0]}", daemon=True)
+        self._refreshers = [t for t in self._refreshers if t.is_alive()]
+        self._refreshers.append(thread)
+        thread.start()
+
+    def _run(self, key: CatalogKey, fetch, flight: "_Flight") -> None:
+        """Fetch ``key`` for ``flight`` and store the outcome."""
+        with self._lock:
+            previous = self._entries.get(key)
+        start = time.perf_counter()
+        error = None
+        try:
+            outcome = fetch(previous)
+            now = self.clock()
+            if outcome.models is None:
+                if previous is None:
+                    raise CatalogFetchError("Provider answered Not Modified without a cached catalog")
+                entry = CatalogEntry(previous.models, now, outcome.etag or previous.etag,
+                                     outcome.last_modified or previous.last_modified)
+                outcome_label = "not_modified"
+            else:
+                entry = CatalogEntry(list(outcome.models), now, outcome.etag, outcome.last_modified)
+                outcome_label = "fetched"
+            self._persist(key, entry)
+        except Exception as e:
+            outcome_label = "error"
+            error = str(e) or e.__class__.__name__
+            self._warn(f"Model catalog request failed for {key[0]} {key[1]}: {error}")
+            entry = None if previous is None else replace(previous, failed_at=self.clock(), error=error)
+        REGISTRY.observe("cardshark_model_catalog_fetch_seconds", time.perf_counter() - start,
+                         provider=key[0], outcome=outcome_label)
+
+        with self._lock:
+            self._stats[_STAT_FOR_OUTCOME[outcome_label]] += 1
+            if entry is not None:
+                self._entries[key] = entry
+            self._inflight.pop(key, None)
+        flight.entry, flight.error = entry, error
+        flight.done.set()
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Block until background refreshes started so far have finished."""
+        with self._lock:
+            threads = list(self._refreshers)
+        for thread in threads:
+            thread.join(timeout)
+
+    # ---- storage ----
+
+    def _load_persisted(self, key: CatalogKey) -> None:
+        """Bring the persisted copy of ``key`` into memory; the file is read outside the lock."""
+        with self._lock:
+            if key in self._entries:
+                return
+        entry = self._load(key)
+        if entry is not None:
+            with self._lock:
+                # A fetch that finished meanwhile is newer than the file
+                self._entries.setdefault(key, entry)
+
+    def _path(self, key: CatalogKey) -> Path:
+        digest = hashlib.sha1("\x1f".join(key).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key[0].lower()}_{digest[:20]}.json"
+
+    def _load(self, key: CatalogKey) -> Optional[CatalogEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if tuple(data.get("key", ())) != key:
+                return None
+            return CatalogEntry(data["models"], float(data["fetched_at"]), data.get("etag"), data.get("last_modified"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._warn(f"Ignoring unreadable model catalog cache {path}: {e}")
+            return None
+
+    def _persist(self, key: CatalogKey, entry: CatalogEntry) -> None:
+        # Best effort; without it the cache just doesn't survive a restart
+        path = self._path(key)
+        try:
+            atomic_write_text(path, json.dumps({
+                "key": list(key), "models": entry.models, "fetched_at": entry.fetched_at,
+                "etag": entry.etag, "last_modified": entry.last_modified,
+            }), fsync=False)
+        except (OSError, TypeError, ValueError) as e:
+            self._warn(f"Could not persist model catalog {path}: {e}")
+
+    def _result(self, entry: CatalogEntry, cached: bool, stale: bool = False) -> CatalogResult:
+        return CatalogResult(entry.models, entry.fetched_at, cached=cached, stale=stale,
+                             error=entry.error if stale else None)
+
+    # ---- maintenance ----
+
+    def invalidate(self, provider: Optional[str] = None) -> None:
+        """Forget cached catalogs (all, or one provider's) in memory and on disk."""
+        with self._lock:
+            keys = [k for k in self._entries if provider is None or k[0] == provider]
+            for key in keys:
+                del self._entries[key]
+        prefix = f"{provider.lower()}_" if provider else ""
+        if self.cache_dir.is_dir():
+            for path in self.cache_dir.glob(f"{prefix}*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+    def _warn(self, message: str) -> None:
+        if self.logger is not None:
+            self.logger.log_warning(message)
+        else:
+            logging.getLogger(__name__).warning(message)
+
+
+MODEL_CATALOGS = ModelCatalogCache()
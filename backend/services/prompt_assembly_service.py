@@ -9,9 +9,16 @@ All prompt assembly now happens here, for all providers.
 
 import re
 import html
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
+from backend.utils.metrics import REGISTRY, timed
+from backend.utils.template_renderer import CompiledTemplate, compile_template, render_template
+
 
 # ── Field Expiration ─────────────────────────────────────────────────────────
 # Ported from frontend ContextSerializer.ts FIELD_EXPIRATION_CONFIG
@@ -111,14 +118,15 @@ def strip_html_tags(content: str) -> str:
 # ── Template Variable Resolution ─────────────────────────────────────────────
 
 def replace_variables(template_str: str, variables: Dict[str, str]) -> str:
-    """Replace {{key}} template variables in a string."""
-    if not template_str:
+    """Replace {{key}} template variables in an ad-hoc string (not cached)."""
+    return render_template(template_str, variables)
+
+
+def render_format(format_str: Optional[str], variables: Dict[str, str]) -> str:
+    """Render an instruct-template format string, reusing its compiled form."""
+    if not format_str:
         return ''
-    result = template_str
-    for key, value in variables.items():
-        pattern = re.compile(r'\{\{' + re.escape(key) + r'\}\}', re.IGNORECASE)
-        result = pattern.sub(value or '', result)
-    return result
+    return compile_template(format_str).render(variables)
 
 
 # ── Token Estimation ─────────────────────────────────────────────────────────
@@ -130,6 +138,29 @@ def estimate_tokens(text: str) -> int:
     return len(text) // 4
 
 
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix (binary search over slice compares)."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+# ── Prompt Layouts ───────────────────────────────────────────────────────────
+# classic:       lore lives in memory at its card position (before_char, an_top, ...)
+# prefix_stable: memory holds only the card, persona and system instruction;
+#                matched/sticky lore moves to the tail next to the session notes.
+#                KoboldCPP reuses its KV cache for the longest unchanged prefix, so
+#                per-turn lore changes no longer force a full context reprocess.
+
+PROMPT_LAYOUT_CLASSIC = 'classic'
+PROMPT_LAYOUT_PREFIX_STABLE = 'prefix_stable'
+
+
 # ── Assembly Result ──────────────────────────────────────────────────────────
 
 @dataclass
@@ -150,6 +181,67 @@ class AssemblyResult:
     debug_info: Dict[str, Any] = field(default_factory=dict)
 
 
+# ── Per-Session Assembly Cache ───────────────────────────────────────────────
+
+def _fingerprint(value: Any) -> str:
+    """Stable digest of JSON-like data (character cards, lore entry lists)."""
+    encoded = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass
+class _SessionAssemblyState:
+    """Cached pieces of the previous assembly for one chat session."""
+    # Formatted history: context is (template formats, char_name, user_name)
+    history_context: Optional[Tuple] = None
+    history_keys: List[Tuple] = field(default_factory=list)
+    history_fragments: List[str] = field(default_factory=list)
+    history_text: str = ''
+    fragments_by_key: Dict[Tuple, str] = field(default_factory=dict)
+    # Memory: key is (character fingerprint, excluded fields, lore fingerprint, names, budget)
+    memory_key: Optional[Tuple] = None
+    memory: str = ''
+    # memory + prompt of the previous turn, for prefix reuse reporting
+    last_sent: str = ''
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class PromptAssemblyCache:
+    """
+    Per-session cache shared across PromptAssemblyService instances.
+
+    Between turns only the last message or two change, so each session keeps
+    the formatted fragment of every history message (keyed by message id,
+    role and content) and the memory block built for the current character
+    card and lore set. The next prompt reuses the unchanged fragments and
+    appends only the new ones.
+    """
+
+    def __init__(self, max_sessions: int = 32):
+        self._max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, _SessionAssemblyState]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_session(self, chat_session_uuid: str) -> _SessionAssemblyState:
+        with self._lock:
+            state = self._sessions.get(chat_session_uuid)
+            if state is None:
+                state = self._sessions[chat_session_uuid] = _SessionAssemblyState()
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(chat_session_uuid)
+            return state
+
+    def invalidate(self, chat_session_uuid: str) -> None:
+        with self._lock:
+            self._sessions.pop(chat_session_uuid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+
 # ── Prompt Assembly Service ──────────────────────────────────────────────────
 
 class PromptAssemblyService:
@@ -166,9 +258,11 @@ class PromptAssemblyService:
     - Backend: kobold_prompt_builder.py functions (unchanged)
     """
 
-    def __init__(self, logger):
+    def __init__(self, logger, cache: Optional[PromptAssemblyCache] = None):
         self.logger = logger
+        self.cache = cache
 
+    @timed("prompt_assembly.assemble")
     def assemble(
         self,
         *,
@@ -187,6 +281,8 @@ class PromptAssemblyService:
         active_sticky_lore: Optional[List[Dict]] = None,
         token_budget: int = 0,
         is_kobold: bool = False,
+        chat_session_uuid: Optional[str] = None,
+        prompt_layout: str = PROMPT_LAYOUT_CLASSIC,
     ) -> AssemblyResult:
         """
         Assemble a complete prompt from raw ingredients.
@@ -194,18 +290,41 @@ class PromptAssemblyService:
         This is the single codepath for all providers. Provider-specific
         formatting (KoboldCPP story-mode vs template-based instruct) is
         handled internally.
+
+        With a cache and a chat_session_uuid, memory and formatted history
+        fragments from the session's previous turn are reused, and
+        debug_info['prefix_reuse'] reports how much of the previous prompt
+        is still a byte-identical prefix. ``prompt_layout`` selects where
+        lore goes (see PROMPT_LAYOUT_PREFIX_STABLE).
         """
         char_data = (character_data or {}).get('data', {}) if character_data else {}
         char_name = char_data.get('name', 'Character')
+        session_state = (
+            self.cache.for_session(chat_session_uuid)
+            if self.cache is not None and chat_session_uuid else None
+        )
 
         # Step 1: Compute field expiration → excluded fields
         excluded_fields = compute_excluded_fields(compression_level, message_count)
 
         # Step 2: Build memory using existing LoreHandler.build_memory()
-        memory = self._build_memory(
-            character_data, excluded_fields, char_name, user_name,
-            matched_lore, active_sticky_lore, token_budget,
-        )
+        prefix_stable = prompt_layout == PROMPT_LAYOUT_PREFIX_STABLE
+        lore_tail = ''
+        if prefix_stable:
+            # Lore-free memory stays byte-identical across turns (the session cache pins it)
+            memory = self._build_memory(
+                character_data, excluded_fields, char_name, user_name,
+                None, None, 0, session_state=session_state,
+            )
+            lore_tail = self._build_lore_tail(
+                matched_lore, active_sticky_lore, token_budget, char_name, user_name,
+            )
+        else:
+            memory = self._build_memory(
+                character_data, excluded_fields, char_name, user_name,
+                matched_lore, active_sticky_lore, token_budget,
+                session_state=session_state,
+            )
 
         # Step 3: Inject user persona
         if user_persona and user_persona.strip():
@@ -216,6 +335,9 @@ class PromptAssemblyService:
         post_history_raw = self._build_post_history_raw(
             char_data, session_notes, char_name, user_name,
         )
+        notes_raw = post_history_raw
+        if lore_tail:
+            post_history_raw = f"{lore_tail}\n{post_history_raw}" if post_history_raw else lore_tail
 
         # Step 5: Build field breakdown for debug info
         field_breakdown = self._build_field_breakdown(
@@ -234,10 +356,15 @@ class PromptAssemblyService:
                 compressed_context=compressed_context,
                 post_history=post_history_raw,
                 continuation_text=continuation_text,
+                session_state=session_state,
             )
         else:
             # Instruct mode: wrap in [Session Notes]...[End Session Notes]
-            post_history_wrapped = self._wrap_post_history_instruct(post_history_raw)
+            post_history_wrapped = self._wrap_post_history_instruct(notes_raw)
+            if lore_tail:
+                post_history_wrapped = (
+                    f"{lore_tail}\n{post_history_wrapped}" if post_history_wrapped else lore_tail
+                )
             result = self._assemble_instruct(
                 memory=memory,
                 chat_history=chat_history,
@@ -249,6 +376,7 @@ class PromptAssemblyService:
                 post_history=post_history_wrapped,
                 continuation_text=continuation_text,
                 has_character=bool(character_data),
+                session_state=session_state,
             )
 
         # Attach debug info
@@ -270,10 +398,42 @@ class PromptAssemblyService:
             'post_history_length': len(post_history_raw) if post_history_raw else 0,
             'message_count': len(chat_history),
             'provider': 'KoboldCPP' if is_kobold else 'instruct',
+            'prompt_layout': PROMPT_LAYOUT_PREFIX_STABLE if prefix_stable else PROMPT_LAYOUT_CLASSIC,
+            'lore_tail_length': len(lore_tail),
         }
+        if session_state is not None:
+            result.debug_info['prefix_reuse'] = self._measure_prefix_reuse(
+                session_state, result, result.debug_info['prompt_layout'],
+            )
 
         return result
 
+    def _measure_prefix_reuse(
+        self,
+        session_state: _SessionAssemblyState,
+        result: AssemblyResult,
+        prompt_layout: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Compare this turn's memory + prompt (KoboldCPP sends them concatenated)
+        with the previous turn's. None on the session's first turn.
+        """
+        sent = result.memory + result.prompt
+        with session_state.lock:
+            previous = session_state.last_sent
+            session_state.last_sent = sent
+        if not previous or not sent:
+            return None
+        reused = common_prefix_length(previous, sent)
+        ratio = reused / len(sent)
+        REGISTRY.observe("cardshark_prompt_prefix_reuse_ratio", ratio, layout=prompt_layout)
+        return {
+            'reused_chars': reused,
+            'total_chars': len(sent),
+            'reused_tokens_est': estimate_tokens(sent[:reused]),
+            'ratio': round(ratio, 4),
+        }
+
     # ── Memory Building ──────────────────────────────────────────────────
 
     def _build_memory(
@@ -285,15 +445,30 @@ class PromptAssemblyService:
         matched_lore: Optional[List[Dict]],
         active_sticky_lore: Optional[List[Dict]],
         token_budget: int,
+        session_state: Optional[_SessionAssemblyState] = None,
     ) -> str:
         """Build memory using existing LoreHandler.build_memory()."""
         if not character_data or not character_data.get('data'):
             return ''
 
+        memory_key = None
+        if session_state is not None:
+            memory_key = (
+                _fingerprint(character_data),
+                tuple(excluded_fields),
+                _fingerprint([matched_lore or [], active_sticky_lore or []]),
+                char_name,
+                user_name,
+                token_budget,
+            )
+            with session_state.lock:
+                if session_state.memory_key == memory_key:
+                    return session_state.memory
+
         try:
             from backend.lore_handler import LoreHandler
             lore_handler = LoreHandler(self.logger)
-            return lore_handler.build_memory(
+            memory = lore_handler.build_memory(
                 character_data,
                 excluded_fields=excluded_fields,
                 char_name=char_name,
@@ -308,6 +483,36 @@ class PromptAssemblyService:
             self.logger.log_error(f"PromptAssemblyService: build_memory failed: {e}")
             return ''
 
+        if session_state is not None:
+            with session_state.lock:
+                session_state.memory_key = memory_key
+                session_state.memory = memory
+        return memory
+
+    def _build_lore_tail(
+        self,
+        matched_lore: Optional[List[Dict]],
+        active_sticky_lore: Optional[List[Dict]],
+        token_budget: int,
+        char_name: str,
+        user_name: str,
+    ) -> str:
+        """
+        Lore block for the prefix-stable layout: the same dedup, token budget
+        and position ordering as build_memory, without the card fields.
+        """
+        if not matched_lore and not active_sticky_lore:
+            return ''
+        from backend.lore_handler import LoreHandler
+        return LoreHandler(self.logger).build_memory(
+            {'data': {}},
+            char_name=char_name,
+            user_name=user_name,
+            lore_entries=matched_lore or [],
+            active_sticky_entries=active_sticky_lore or [],
+            token_budget=token_budget,
+        ).strip()
+
     # ── Post-History Block ───────────────────────────────────────────────
 
     def _build_post_history_raw(
@@ -337,10 +542,7 @@ class PromptAssemblyService:
         raw = '\n'.join(parts)
 
         # Resolve {{char}} and {{user}} tokens (case-insensitive)
-        raw = re.sub(r'\{\{char\}\}', char_name, raw, flags=re.IGNORECASE)
-        raw = re.sub(r'\{\{user\}\}', user_name, raw, flags=re.IGNORECASE)
-
-        return raw
+        return render_template(raw, {'char': char_name, 'user': user_name})
 
     def _wrap_post_history_instruct(self, raw: str) -> str:
         """Wrap raw post-history in [Session Notes] for instruct mode."""
@@ -400,6 +602,7 @@ class PromptAssemblyService:
         post_history: str,
         continuation_text: str,
         has_character: bool,
+        session_state: Optional[_SessionAssemblyState] = None,
     ) -> AssemblyResult:
         """
         Assemble prompt for non-KoboldCPP providers using template formatting.
@@ -415,6 +618,7 @@ class PromptAssemblyService:
         # Format chat history using template
         formatted_history = self._format_chat_history(
             chat_history, char_name, user_name, template_format,
+            session_state=session_state,
         )
 
         # Assemble final prompt (matches frontend assemblePrompt())
@@ -466,6 +670,7 @@ class PromptAssemblyService:
         compressed_context: str,
         post_history: str,
         continuation_text: str,
+        session_state: Optional[_SessionAssemblyState] = None,
     ) -> AssemblyResult:
         """
         Assemble prompt for KoboldCPP.
@@ -488,6 +693,7 @@ class PromptAssemblyService:
                 compressed_context=compressed_context,
                 post_history=post_history,
                 continuation_text=continuation_text,
+                session_state=session_state,
             )
         else:
             return self._assemble_kobold_story(
@@ -513,6 +719,7 @@ class PromptAssemblyService:
         compressed_context: str,
         post_history: str,
         continuation_text: str,
+        session_state: Optional[_SessionAssemblyState] = None,
     ) -> AssemblyResult:
         """
         KoboldCPP with instruct template applied.
@@ -527,6 +734,7 @@ class PromptAssemblyService:
         # Format chat history using template (same as instruct path)
         formatted_history = self._format_chat_history(
             chat_history, char_name, user_name, template_format,
+            session_state=session_state,
         )
 
         # Build prompt
@@ -538,7 +746,7 @@ class PromptAssemblyService:
         # Post-history wrapped in template user format
         if post_history:
             user_fmt = template_format.get('userFormat', '{{content}}')
-            wrapped_post = replace_variables(user_fmt, {
+            wrapped_post = render_format(user_fmt, {
                 'content': post_history,
                 'char': char_name,
                 'user': user_name,
@@ -642,13 +850,13 @@ class PromptAssemblyService:
         # Use explicit outputSequence if present and non-empty
         output_seq = template_format.get('outputSequence')
         if output_seq:
-            return replace_variables(output_seq, {'char': char_name, 'user': ''})
+            return render_format(output_seq, {'char': char_name, 'user': ''})
 
         # Derive from assistantFormat by taking everything before {{content}}
         assistant_fmt = template_format.get('assistantFormat', '')
         if '{{content}}' in assistant_fmt:
             prefix = assistant_fmt.split('{{content}}')[0]
-            return replace_variables(prefix, {'char': char_name, 'user': ''})
+            return render_format(prefix, {'char': char_name, 'user': ''})
 
         return f"{char_name}:"
 
@@ -683,7 +891,7 @@ class PromptAssemblyService:
         else:
             wrapper = '{{content}}'
 
-        return replace_variables(wrapper, {
+        return render_format(wrapper, {
             'content': content,
             'char': char_name,
             'user': user_name,
@@ -697,6 +905,7 @@ class PromptAssemblyService:
         char_name: str,
         user_name: str,
         template_format: Optional[Dict[str, str]],
+        session_state: Optional[_SessionAssemblyState] = None,
     ) -> str:
         """
         Format chat history using template.
@@ -705,54 +914,122 @@ class PromptAssemblyService:
         if not messages:
             return ''
 
-        # Filter out thinking messages and strip HTML
-        processed = []
-        for msg in messages:
-            role = msg.get('role', 'user')
-            if role == 'thinking':
-                continue
-            content = strip_html_tags(msg.get('content', ''))
-            processed.append({'role': role, 'content': content})
+        if template_format:
+            formats = (
+                compile_template(template_format.get('userFormat', '{{content}}') or ''),
+                compile_template(template_format.get('assistantFormat', '{{char}}: {{content}}') or ''),
+                compile_template(template_format.get('systemFormat', '') or ''),
+            )
+            separator = '\n'
+        else:
+            formats = None  # Default formatting (no template)
+            separator = '\n\n'
 
-        if not processed:
-            return ''
+        # Thinking messages are never part of the prompt
+        visible = [msg for msg in messages if msg.get('role', 'user') != 'thinking']
 
-        if not template_format:
-            # Default formatting (no template)
-            parts = []
-            for msg in processed:
-                if msg['role'] == 'assistant':
-                    parts.append(f"{char_name}: {msg['content']}")
-                else:
-                    parts.append(msg['content'])
-            return '\n\n'.join(parts)
-
-        # Template-based formatting
-        user_fmt = template_format.get('userFormat', '{{content}}')
-        assistant_fmt = template_format.get('assistantFormat', '{{char}}: {{content}}')
-        system_fmt = template_format.get('systemFormat', '')
-        system_same_as_user = template_format.get('systemSameAsUser', False)
+        if session_state is None:
+            return separator.join(
+                self._format_history_message(
+                    msg.get('role', 'user'), msg.get('content', ''), char_name, user_name, formats,
+                )
+                for msg in visible
+            )
 
-        parts = []
-        for msg in processed:
-            variables = {
-                'content': msg['content'],
-                'char': char_name,
-                'user': user_name,
-            }
-            if msg['role'] == 'assistant':
-                parts.append(replace_variables(assistant_fmt, variables))
-            elif msg['role'] == 'system':
-                if system_fmt:
-                    parts.append(replace_variables(system_fmt, variables))
-                else:
-                    # No system format: use user format (explicit via
-                    # systemSameAsUser or as default fallback)
-                    parts.append(replace_variables(user_fmt, variables))
-            else:
-                parts.append(replace_variables(user_fmt, variables))
+        with session_state.lock:
+            return self._format_chat_history_cached(
+                visible, char_name, user_name, formats, separator, session_state,
+            )
+
+    def _format_chat_history_cached(
+        self,
+        messages: List[Dict[str, str]],
+        char_name: str,
+        user_name: str,
+        formats: Optional[Tuple[CompiledTemplate, CompiledTemplate, CompiledTemplate]],
+        separator: str,
+        state: _SessionAssemblyState,
+    ) -> str:
+        """
+        Format history reusing the session's fragments from the previous turn.
+
+        Fragments are keyed by (message id, role, content), so an edited or
+        swiped message gets a new fragment while every other one is reused.
+        When the previous history is an unchanged prefix of this one, the new
+        fragments are appended to the previous text instead of re-joining.
+        """
+        context = (formats and tuple(t.source for t in formats), char_name, user_name)
+        if state.history_context != context:
+            state.history_context = context
+            state.history_keys = []
+            state.history_fragments = []
+            state.history_text = ''
+            state.fragments_by_key = {}
+
+        keys = [
+            (msg.get('message_id') or msg.get('id'), msg.get('role', 'user'), msg.get('content', ''))
+            for msg in messages
+        ]
+        by_key = state.fragments_by_key
+        prev_keys = state.history_keys
+        prefix_len = len(prev_keys)
+        appending = 0 < prefix_len <= len(keys) and keys[:prefix_len] == prev_keys
+
+        start = prefix_len if appending else 0
+        new_fragments = []
+        for key in keys[start:]:
+            fragment = by_key.get(key)
+            if fragment is None:
+                fragment = by_key[key] = self._format_history_message(
+                    key[1], key[2], char_name, user_name, formats,
+                )
+            new_fragments.append(fragment)
+
+        if appending:
+            fragments = state.history_fragments + new_fragments
+            text = state.history_text
+            if new_fragments:
+                text = f"{text}{separator}{separator.join(new_fragments)}"
+        else:
+            fragments = new_fragments
+            text = separator.join(fragments)
+            # Drop fragments of messages that left the history (edits, deletes, swipes)
+            state.fragments_by_key = dict(zip(keys, fragments))
+
+        state.history_keys = keys
+        state.history_fragments = fragments
+        state.history_text = text
+        return text
 
-        return '\n'.join(parts)
+    def _format_history_message(
+        self,
+        role: str,
+        content: str,
+        char_name: str,
+        user_name: str,
+        formats: Optional[Tuple[CompiledTemplate, CompiledTemplate, CompiledTemplate]],
+    ) -> str:
+        """Format one history message; ``formats`` is (user, assistant, system) or None."""
+        content = strip_html_tags(content)
+
+        if formats is None:
+            if role == 'assistant':
+                return f"{char_name}: {content}"
+            return content
+
+        user_fmt, assistant_fmt, system_fmt = formats
+        variables = {
+            'content': content,
+            'char': char_name,
+            'user': user_name,
+        }
+        if role == 'assistant':
+            return assistant_fmt.render(variables)
+        if role == 'system' and system_fmt.source:
+            return system_fmt.render(variables)
+        # No system format: use user format (explicit via
+        # systemSameAsUser or as default fallback)
+        return user_fmt.render(variables)
 
     # ── Stop Sequences ───────────────────────────────────────────────────
 
@@ -780,13 +1057,8 @@ class PromptAssemblyService:
             return default_stops
 
         # Resolve {{char}} and {{user}} in stop sequences (case-insensitive)
-        resolved = []
-        for seq in template_stops:
-            s = re.sub(r'\{\{char\}\}', char_name, seq, flags=re.IGNORECASE)
-            s = re.sub(r'\{\{user\}\}', user_name, s, flags=re.IGNORECASE)
-            resolved.append(s)
-
-        return resolved
+        names = {'char': char_name, 'user': user_name}
+        return [render_format(seq, names) for seq in template_stops]
 
     # ── Character Memory (lightweight) ──────────────────────────────────
 
@@ -1007,7 +1279,7 @@ class PromptAssemblyService:
                 )
             else:
                 instruction = f"Write a response as {user_name}:\n{user_name}:"
-            wrapped = replace_variables(user_fmt, {
+            wrapped = render_format(user_fmt, {
                 'content': instruction,
                 'char': char_name,
                 'user': user_name,
@@ -0,0 +1,152 @@
+"""
+@file startup_warmup_service.py
+@description Runs the non-critical startup work (library sync, image sync, user sync)
+in a background thread after the server has started accepting requests, and
+tracks per-phase progress for the health/readiness endpoints.
+@dependencies log_manager
+@consumers main.py, health_endpoints.py
+"""
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.log_manager import LogManager
+
+# Phase callables receive a progress reporter: report(done, total)
+ProgressReporter = Callable[[int, int], None]
+PhaseFn = Callable[[ProgressReporter], Any]
+
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_COMPLETE = "complete"
+STATE_FAILED = "failed"
+STATE_SKIPPED = "skipped"
+
+
+class StartupWarmupService:
+    """
+    Sequential background warm-up runner.
+
+    Phases are registered with ``add_phase`` during the critical startup path and
+    executed in order by ``start`` on a daemon thread. A failing phase is recorded
+    and the remaining phases still run, so one broken sync never blocks the rest.
+    Endpoints keep serving whatever is already in the database while this runs.
+    """
+
+    def __init__(self, logger: LogManager):
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._phases: List[Dict[str, Any]] = []
+        self._state = STATE_PENDING
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+
+    def add_phase(self, name: str, fn: PhaseFn, critical: bool = False) -> None:
+        """Register a warm-up phase. ``critical`` phases mark the whole warm-up failed on error."""
+        with self._lock:
+            if self._state != STATE_PENDING:
+                raise RuntimeError("Cannot add warm-up phases after start()")
+            self._phases.append({
+                "name": name,
+                "fn": fn,
+                "critical": critical,
+                "state": STATE_PENDING,
+                "done": 0,
+                "total": None,
+                "duration_ms": None,
+                "error": None,
+            })
+
+    def start(self) -> threading.Thread:
+        """Run all registered phases on a daemon thread and return it."""
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self._state = STATE_RUNNING
+            self._started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self.run, name="cardshark-warmup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self) -> None:
+        """Execute phases synchronously. ``start`` calls this on a worker thread."""
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.perf_counter()
+            self._state = STATE_RUNNING
+
+        failed = False
+        for phase in self._phases:
+            if self._cancel_event.is_set():
+                self._set_phase(phase, state=STATE_SKIPPED)
+                continue
+
+            self._set_phase(phase, state=STATE_RUNNING)
+            phase_start = time.perf_counter()
+            try:
+                phase["fn"](self._make_reporter(phase))
+                self._set_phase(phase, state=STATE_COMPLETE)
+            except Exception as exc:
+                self.logger.log_error(
+                    f"Startup warm-up phase '{phase['name']}' failed: {exc}\n{traceback.format_exc()}"
+                )
+                self._set_phase(phase, state=STATE_FAILED, error=str(exc))
+                if phase["critical"]:
+                    failed = True
+            finally:
+                self._set_phase(phase, duration_ms=round((time.perf_counter() - phase_start) * 1000, 2))
+
+        with self._lock:
+            self._finished_at = time.perf_counter()
+            self._state = STATE_FAILED if failed else STATE_COMPLETE
+            elapsed = self._finished_at - self._started_at
+
+        self.logger.log_info(f"Startup warm-up finished ({self._state}) in {elapsed:.2f}s")
+        self._done_event.set()
+
+    def cancel(self, timeout: Optional[float] = None) -> None:
+        """Skip any phases that have not started yet and optionally wait for the worker."""
+        self._cancel_event.set()
+        thread = self._thread
+        if thread is not None and timeout is not None:
+            thread.join(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up finishes. Returns False on timeout."""
+        return self._done_event.wait(timeout)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._done_event.is_set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the warm-up progress."""
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = None
+            if self._started_at is not None:
+                elapsed = round(((self._finished_at or now) - self._started_at) * 1000, 2)
+            return {
+                "state": self._state,
+                "ready": self._done_event.is_set(),
+                "elapsed_ms": elapsed,
+                "phases": [
+                    {key: value for key, value in phase.items() if key not in ("fn", "critical")}
+                    for phase in self._phases
+                ],
+            }
+
+    # ------------------------------------------------------------------ #
+
+    def _make_reporter(self, phase: Dict[str, Any]) -> ProgressReporter:
+        def report(done: int, total: int) -> None:
+            self._set_phase(phase, done=done, total=total)
+        return report
+
+    def _set_phase(self, phase: Dict[str, Any], **fields: Any) -> None:
+        with self._lock:
+            phase.update(fields)
@@ -20,6 +20,7 @@ from backend.models.adventure_log import (
     create_empty_room_summary
 )
 from backend.log_manager import LogManager
+from backend.services.generation_scheduler import PRIORITY_BACKGROUND
 
 
 # LLM prompt for structured summarization
@@ -203,7 +204,10 @@ class SummarizationService:
             "stop_sequence": ["\n\n", "```"]
         }
 
-        result = await self.api_handler.generate_with_config(api_config, generation_params)
+        # Room summaries are background work: they yield the backend to chat replies
+        result = await self.api_handler.generate_with_config(
+            api_config, generation_params, priority=PRIORITY_BACKGROUND,
+        )
 
         if 'error' in result:
             raise Exception(result['error'])
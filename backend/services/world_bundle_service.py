@@ -0,0 +1,261 @@
+"""
+backend/services/world_bundle_service.py
+Everything world play needs to enter a world, resolved in one pass.
+
+Entering a world used to cost one request per room (each decoding the room
+PNG), a full character listing to resolve NPC names, and a world PNG read.
+A bundle is built from three batched queries (world row, all placed rooms,
+all referenced NPCs) while the world PNG metadata is read on a worker thread
+in parallel. Rooms and NPC summaries come straight from the indexed rows.
+
+Built bundles are cached with the sync stamps of every row they were built
+from (world, rooms, NPCs); a repeat request, including an If-None-Match
+revalidation, costs one narrow stamp query. The world card read is cached
+by the world row's stamp on its own, so a room edit doesn't re-read the
+world PNG. Every bundle carries a content version used as its ETag. Bundles are served as
+NDJSON with rooms nearest the player first, so the map can render as lines
+arrive.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from backend.log_manager import LogManager
+from backend.models.world_card import WorldCard
+from backend.png_metadata_handler import PngMetadataHandler
+from backend.services.world_graph_service import card_extensions, current_stamps, row_stamp
+from backend.sql_models import Character
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+
+@dataclass
+class WorldBundle:
+    """Encoded bundle lines plus what's needed to order and version them."""
+    world_uuid: str
+    version: str
+    world_line: bytes
+    room_lines: Dict[str, bytes]  # room_uuid -> line, in placement order
+    room_positions: Dict[str, Tuple[int, int]]
+    npc_lines: List[bytes]
+    starting_position: Tuple[int, int]
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def iter_lines(self, focus_room_uuid: Optional[str] = None) -> Iterator[bytes]:
+        """
+        NDJSON lines: the world, rooms ordered by grid distance from the
+        focus room (or the starting position), NPC summaries, then an end marker.
+        """
+        fx, fy = self.room_positions.get(focus_room_uuid, self.starting_position)
+        yield self.world_line
+        for room_uuid in sorted(
+            self.room_lines,
+            key=lambda r: abs(self.room_positions[r][0] - fx) + abs(self.room_positions[r][1] - fy),
+        ):
+            yield self.room_lines[room_uuid]
+        yield from self.npc_lines
+        yield _line({"type": "end", "rooms": len(self.room_lines), "npcs": len(self.npc_lines)})
+
+
+class WorldBundleService:
+    """
+    Builds world bundles and caches them, along with decoded world cards,
+    between requests. Shared across requests (created in main.py's lifespan).
+    """
+
+    def __init__(
+        self,
+        db_session_generator,
+        png_handler: PngMetadataHandler,
+        logger: LogManager,
+        max_cached: int = 16
+    ):
+        self.db_session_generator = db_session_generator
+        self.png_handler = png_handler
+        self.logger = logger
+        self.max_cached = max_cached
+        # world_uuid -> (row stamp, world card dict)
+        self._world_cards: "OrderedDict[str, Tuple[Tuple[Any, ...], Dict[str, Any]]]" = OrderedDict()
+        # world_uuid -> (stamps of the rows it was built from, bundle)
+        self._bundles: "OrderedDict[str, Tuple[Dict[str, Optional[Tuple[Any, ...]]], WorldBundle]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="world-bundle")
+
+    def _get_session_context(self):
+        """Get a database session context manager."""
+        from backend.utils.db_utils import get_session_context
+        return get_session_context(self.db_session_generator, self.logger)
+
+    def get_bundle(self, world_uuid: str) -> Optional[WorldBundle]:
+        """
+        Bundle for a world, rebuilt only when one of its rows was re-synced.
+
+        Returns:
+            WorldBundle, or None if the world doesn't exist or isn't a world card
+        """
+        with self._lock:
+            cached = self._bundles.get(world_uuid)
+        if cached is not None:
+            stamps, bundle = cached
+            if self._current_stamps(stamps.keys()) == stamps:
+                with self._lock:
+                    if world_uuid in self._bundles:
+                        self._bundles.move_to_end(world_uuid)
+                return bundle
+
+        bundle, stamps = self._build(world_uuid)
+        if bundle is not None:
+            with self._lock:
+                self._bundles[world_uuid] = (stamps, bundle)
+                while len(self._bundles) > self.max_cached:
+                    self._bundles.popitem(last=False)
+        return bundle
+
+    def _current_stamps(self, uuids) -> Dict[str, Optional[Tuple[Any, ...]]]:
+        """Current sync stamps of the given rows (None for missing ones)."""
+        with self._get_session_context() as db:
+            return current_stamps(db, uuids)
+
+    def _build(self, world_uuid: str) -> Tuple[Optional[WorldBundle], Dict[str, Optional[Tuple[Any, ...]]]]:
+        """
+        Build a bundle from three batched queries.
+
+        Returns:
+            (bundle or None, stamps of every referenced row keyed by uuid).
+            Room and NPC uuids without a row get a None stamp, so a card
+            created for them later invalidates the bundle too.
+        """
+        stamps: Dict[str, Optional[Tuple[Any, ...]]] = {}
+        with self._get_session_context() as db:
+            world_row = db.query(Character).filter(Character.character_uuid == world_uuid).first()
+            if world_row is None:
+                return None, stamps
+            world_ext = card_extensions(world_row)
+            if world_ext.get("card_type") != "world":
+                return None, stamps
+
+            # The world PNG (lore, full card) is read in parallel with the room/NPC queries
+            stamp = stamps[world_uuid] = row_stamp(world_row)
+            world_card_future = self._executor.submit(
+                self._load_world_card, world_uuid, stamp, world_row.png_file_path
+            )
+
+            world_data = world_ext.get("world_data") or {}
+            placements = [p for p in world_data.get("rooms") or [] if p.get("room_uuid")]
+            room_uuids = {p["room_uuid"] for p in placements}
+            room_rows = {
+                row.character_uuid: row
+                for row in (db.query(Character).filter(Character.character_uuid.in_(room_uuids)).all() if room_uuids else [])
+            }
+
+            stamps.update((uuid, row_stamp(row)) for uuid, row in room_rows.items())
+            stamps.update(dict.fromkeys(room_uuids - room_rows.keys()))
+
+            room_lines: Dict[str, bytes] = {}
+            room_positions: Dict[str, Tuple[int, int]] = {}
+            npc_uuids: Dict[str, None] = {}
+            for placement in placements:
+                room_uuid = placement["room_uuid"]
+                if room_uuid in room_lines:
+                    continue
+                pos = placement.get("grid_position") or {}
+                room_positions[room_uuid] = (int(pos.get("x", 0)), int(pos.get("y", 0)))
+                row = room_rows.get(room_uuid)
+                room_ext = card_extensions(row) if row is not None else {}
+                room_data = (room_ext.get("room_data") or {}) if room_ext.get("card_type") == "room" else None
+                entry: Dict[str, Any] = {
+                    "type": "room",
+                    "room_uuid": room_uuid,
+                    "position": {"x": room_positions[room_uuid][0], "y": room_positions[room_uuid][1]},
+                    "missing": room_data is None,
+                }
+                if room_data is not None:
+                    entry.update({
+                        "name": row.name,
+                        "description": row.description or "",
+                        "first_mes": row.first_mes or "",
+                        "npcs": room_data.get("npcs") or [],
+                        "layout_data": room_data.get("layout_data"),
+                        "image_url": f"/api/room-cards/{room_uuid}/image",
+                    })
+                    npc_uuids.update(dict.fromkeys(n.get("character_uuid") for n in entry["npcs"]))
+                npc_uuids.update(dict.fromkeys(n.get("character_uuid") for n in placement.get("instance_npcs") or []))
+                room_lines[room_uuid] = _line(entry)
+
+            npc_uuids.pop(None, None)
+            npc_rows = (
+                db.query(Character).filter(Character.character_uuid.in_(list(npc_uuids))).all()
+                if npc_uuids else []
+            )
+            npc_lines = [
+                _line({
+                    "type": "npc",
+                    "npc_uuid": row.character_uuid,
+                    "name": row.name,
+                    "personality": row.personality,
+                    "image_url": f"/api/character-image/{row.character_uuid}.png",
+                })
+                for row in sorted(npc_rows, key=lambda r: r.character_uuid)
+            ]
+            stamps.update(dict.fromkeys(npc_uuids))
+            stamps.update((row.character_uuid, row_stamp(row)) for row in npc_rows)
+
+        world_card = world_card_future.result()
+        if world_card is None:
+            return None, stamps
+
+        start = world_data.get("starting_position") or {}
+        digest = hashlib.sha1(json.dumps(world_card, sort_keys=True, default=str).encode("utf-8"))
+        for line in (*room_lines.values(), *npc_lines):
+            digest.update(line)
+        version = digest.hexdigest()[:16]
+
+        bundle = WorldBundle(
+            world_uuid=world_uuid,
+            version=version,
+            world_line=_line({
+                "type": "world",
+                "version": version,
+                "world": world_card,
+                "image_url": f"/api/world-cards-v2/{world_uuid}/image",
+                "room_count": len(room_lines),
+                "npc_count": len(npc_lines),
+            }),
+            room_lines=room_lines,
+            room_positions=room_positions,
+            npc_lines=npc_lines,
+            starting_position=(int(start.get("x", 0)), int(start.get("y", 0))),
+        )
+        return bundle, stamps
+
+    def _load_world_card(self, world_uuid: str, stamp: Tuple[Any, ...], png_path: str) -> Optional[Dict[str, Any]]:
+        """Decoded world card, re-read from the PNG only when its row was re-synced."""
+        with self._lock:
+            cached = self._world_cards.get(world_uuid)
+            if cached is not None and cached[0] == stamp:
+                self._world_cards.move_to_end(world_uuid)
+                return cached[1]
+
+        try:
+            metadata = self.png_handler.read_metadata(png_path)
+            world_card = WorldCard(**metadata).model_dump()
+        except Exception as e:
+            self.logger.log_error(f"Error loading world card {world_uuid} for bundle: {e}")
+            return None
+
+        with self._lock:
+            self._world_cards[world_uuid] = (stamp, world_card)
+            while len(self._world_cards) > self.max_cached:
+                self._world_cards.popitem(last=False)
+        return world_card
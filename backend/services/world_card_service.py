@@ -8,7 +8,7 @@ This service manages CRUD operations for world card PNG files.
 
 import json
 import uuid as uuid_module
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -19,11 +19,23 @@ from backend.models.world_card import (
 )
 from backend.models.world_state import GridSize, Position
 from backend.models.room_card import CreateRoomRequest
+from backend.models.world_progress import WorldUserProgressUpdate
 from backend.services.character_service import CharacterService
 from backend.png_metadata_handler import PngMetadataHandler
 from backend.settings_manager import SettingsManager
 from backend.log_manager import LogManager
 from backend.utils.location_extractor import LocationExtractor
+from backend.services.world_progress_service import WorldUserProgressService
+
+if TYPE_CHECKING:
+    from backend.services.world_graph_service import WorldGraphCache
+
+# UpdateWorldRequest fields that are play-time state rather than authored content
+RUNTIME_FIELDS = (
+    "player_xp", "player_level", "player_gold", "bonded_ally_uuid", "time_state",
+    "npc_relationships", "player_inventory", "ally_inventory", "room_states",
+    "current_room_uuid",
+)
 
 
 class WorldCardService:
@@ -37,12 +49,22 @@ class WorldCardService:
         character_service: CharacterService,
         png_handler: PngMetadataHandler,
         settings_manager: SettingsManager,
-        logger: LogManager
+        logger: LogManager,
+        progress_service: Optional[WorldUserProgressService] = None,
+        graph_cache: Optional["WorldGraphCache"] = None
     ):
         self.character_service = character_service
         self.png_handler = png_handler
         self.settings_manager = settings_manager
         self.logger = logger
+        self.progress_service = progress_service
+        # Shared world graph cache; invalidated whenever a world card is written
+        self.graph_cache = graph_cache
+
+    def _invalidate_graph(self, world_uuid: str) -> None:
+        """Drop the cached world graph after the world card changed."""
+        if self.graph_cache is not None:
+            self.graph_cache.invalidate_world(world_uuid)
 
     def _get_worlds_directory(self) -> Path:
         """Get the worlds directory, creating it if needed."""
@@ -223,7 +245,8 @@ class WorldCardService:
             character_service=self.character_service,
             png_handler=self.png_handler,
             settings_manager=self.settings_manager,
-            logger=self.logger
+            logger=self.logger,
+            graph_cache=self.graph_cache
         )
 
         room_placements = []
@@ -274,25 +297,8 @@ class WorldCardService:
 
         for char in characters:
             try:
-                extensions = json.loads(char.extensions_json) if char.extensions_json else {}
-
-                # Check if it's a world card
-                if extensions.get("card_type") == "world":
-                    world_data = extensions.get("world_data", {})
-
-                    grid_size = world_data.get("grid_size", {"width": 10, "height": 10})
-                    room_count = len(world_data.get("rooms", [])) if world_data else 0
-
-                    summary = WorldCardSummary(
-                        uuid=char.character_uuid,
-                        name=char.name,
-                        description=char.description or "",
-                        image_path=char.png_file_path,
-                        grid_size=GridSize(**grid_size),
-                        room_count=room_count,
-                        created_at=char.created_at.isoformat() if char.created_at else None,
-                        updated_at=char.updated_at.isoformat() if char.updated_at else None
-                    )
+                summary = self._summary_from_character(char)
+                if summary:
                     world_cards.append(summary)
             except Exception as e:
                 self.logger.log_warning(f"Error parsing world card {char.name}: {e}")
@@ -300,6 +306,29 @@ class WorldCardService:
 
         return world_cards
 
+    def _summary_from_character(self, char) -> Optional[WorldCardSummary]:
+        """Build a WorldCardSummary from the indexed database row (no PNG read)."""
+        extensions = json.loads(char.extensions_json) if char.extensions_json else {}
+
+        # Check if it's a world card
+        if extensions.get("card_type") != "world":
+            return None
+
+        world_data = extensions.get("world_data", {})
+        grid_size = world_data.get("grid_size", {"width": 10, "height": 10})
+        room_count = len(world_data.get("rooms", [])) if world_data else 0
+
+        return WorldCardSummary(
+            uuid=char.character_uuid,
+            name=char.name,
+            description=char.description or "",
+            image_path=char.png_file_path,
+            grid_size=GridSize(**grid_size),
+            room_count=room_count,
+            created_at=char.created_at.isoformat() if char.created_at else None,
+            updated_at=char.updated_at.isoformat() if char.updated_at else None
+        )
+
     def get_world_card(self, world_uuid: str) -> Optional[WorldCard]:
         """
         Retrieve a world card by UUID.
@@ -341,9 +370,19 @@ class WorldCardService:
             world_uuid: World UUID
             request: Update parameters
 
+        Runtime fields (XP, gold, time, relationships, inventories, room
+        states, current room) go to the player's progress when ``user_uuid``
+        is given, so play-time saves never touch the PNG. The PNG is only
+        rewritten when authored fields change. Without ``user_uuid`` runtime
+        fields are written into the card as before.
+
         Returns:
             Updated WorldCardSummary or None if not found
         """
+        runtime_fields = [f for f in RUNTIME_FIELDS if getattr(request, f) is not None]
+        if request.user_uuid and runtime_fields and self.progress_service is not None:
+            return self._update_world_runtime(world_uuid, request, runtime_fields)
+
         # Get existing world card
         world_card = self.get_world_card(world_uuid)
         if not world_card:
@@ -415,6 +454,7 @@ class WorldCardService:
             sync_fn=self.character_service.sync_character_file
         )
         self.logger.log_step(f"Updated world card: {png_path}")
+        self._invalidate_graph(world_uuid)
 
         # Sync room card images from assigned backgrounds
         if request.rooms is not None:
@@ -437,6 +477,33 @@ class WorldCardService:
             updated_at=datetime.now(timezone.utc).isoformat()
         )
 
+    def _update_world_runtime(
+        self,
+        world_uuid: str,
+        request: UpdateWorldRequest,
+        runtime_fields: List[str]
+    ) -> Optional[WorldCardSummary]:
+        """Save runtime fields as player progress; rewrite the PNG only for authored fields."""
+        with self.character_service._get_session_context() as db:
+            character = self.character_service.get_character_by_uuid(world_uuid, db)
+            summary = self._summary_from_character(character) if character else None
+        if not summary:
+            return None
+
+        progress_update = WorldUserProgressUpdate.model_validate(
+            {field: getattr(request, field) for field in runtime_fields}
+        )
+        self.progress_service.save_progress(world_uuid, request.user_uuid, progress_update)
+
+        authored = {
+            field: value for field in UpdateWorldRequest.model_fields
+            if field not in RUNTIME_FIELDS and field != "user_uuid"
+            and (value := getattr(request, field)) is not None
+        }
+        if authored:
+            return self.update_world_card(world_uuid, UpdateWorldRequest(**authored))
+        return summary
+
     def _load_room_card_meta(self, room_uuid: str) -> tuple:
         """
         Load a room card's raw metadata dict and PNG file path.
@@ -533,6 +600,8 @@ class WorldCardService:
             )
 
             self.logger.log_step(f"Updated room card image: {room_uuid}")
+            if self.graph_cache is not None:
+                self.graph_cache.invalidate_room(room_uuid)
 
     def delete_world_card(self, world_uuid: str) -> bool:
         """
@@ -561,6 +630,7 @@ class WorldCardService:
 
             # Delete via character service (handles both DB and PNG file)
             success = self.character_service.delete_character(world_uuid, delete_png_file=True)
+            self._invalidate_graph(world_uuid)
 
             if success:
                 self.logger.log_step(f"Deleted world card: {world_uuid}")
@@ -715,7 +785,8 @@ class WorldCardService:
                 character_service=self.character_service,
                 png_handler=self.png_handler,
                 settings_manager=self.settings_manager,
-                logger=self.logger
+                logger=self.logger,
+                graph_cache=self.graph_cache
             )
 
             for room_info in preview.rooms_to_delete:
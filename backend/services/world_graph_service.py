@@ -0,0 +1,357 @@
+"""
+backend/services/world_graph_service.py
+In-memory graph of an active world: grid, room placements, exits and NPC rosters.
+
+World play used to resolve every navigation step by decoding the world PNG
+and the target room PNG. The graph is built once per world from the indexed
+character rows (one query for the world, one IN query for its rooms) and
+then answers neighbour, exit, NPC and path queries from dictionaries.
+
+Graphs are invalidated when a world or room card is saved or deleted
+(WorldCardService / RoomCardHandler call ``invalidate_world`` and
+``invalidate_room``). Decoded room cards are memoized alongside the graph so
+repeated room transitions skip the PNG read. Graphs and room cards are also
+keyed on the sync stamps of the rows they came from, so a PNG rewritten by
+any other path (character save, directory sync) is picked up on the next
+read at the cost of one narrow stamp query.
+"""
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.log_manager import LogManager
+from backend.models.room_card import RoomCard
+from backend.sql_models import Character
+
+# Grid steps for the four exit directions (north is y - 1, as on the world map)
+DIRECTIONS = {
+    "north": (0, -1),
+    "south": (0, 1),
+    "east": (1, 0),
+    "west": (-1, 0),
+}
+
+GridPos = Tuple[int, int]
+
+
+# Columns read by row_stamp, for queries that only need to check staleness
+ROW_STAMP_COLUMNS = (
+    Character.png_file_path,
+    Character.file_last_modified,
+    Character.updated_at,
+    Character.db_metadata_last_synced_at,
+)
+
+
+def row_stamp(row) -> Tuple[Any, ...]:
+    """Values that change whenever a character row is re-synced from its PNG."""
+    return (
+        row.png_file_path,
+        row.file_last_modified,
+        row.updated_at.isoformat() if row.updated_at else None,
+        row.db_metadata_last_synced_at.isoformat() if row.db_metadata_last_synced_at else None,
+    )
+
+
+def current_stamps(db, uuids: Iterable[str]) -> Dict[str, Optional[Tuple[Any, ...]]]:
+    """Sync stamps of the given rows (None for missing ones), in one narrow query."""
+    uuids = list(uuids)
+    rows = (
+        db.query(Character.character_uuid, *ROW_STAMP_COLUMNS)
+        .filter(Character.character_uuid.in_(uuids))
+        .all()
+    )
+    stamps: Dict[str, Optional[Tuple[Any, ...]]] = dict.fromkeys(uuids)
+    stamps.update((row.character_uuid, row_stamp(row)) for row in rows)
+    return stamps
+
+
+def card_extensions(character) -> Dict[str, Any]:
+    """Decode a character row's extensions (stored as JSON or a JSON string)."""
+    raw = character.extensions_json
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+@dataclass
+class RoomNode:
+    """One placed room: position, display name, exits and NPC roster."""
+    room_uuid: str
+    position: GridPos
+    name: str
+    exits: List[Dict[str, Any]] = field(default_factory=list)  # LayoutExit dicts
+    npcs: List[Dict[str, Any]] = field(default_factory=list)  # RoomNPC dicts
+    neighbours: Dict[str, str] = field(default_factory=dict)  # direction -> room_uuid
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "room_uuid": self.room_uuid,
+            "position": {"x": self.position[0], "y": self.position[1]},
+            "name": self.name,
+            "exits": self.exits,
+            "npcs": self.npcs,
+            "neighbours": self.neighbours,
+        }
+
+
+class WorldGraph:
+    """
+    Immutable snapshot of one world's room graph.
+    All lookups are dictionary reads; ``find_path`` is a BFS over the
+    neighbour/exit edges.
+    """
+
+    def __init__(self, world_uuid: str, grid_size: GridPos, starting_position: GridPos, rooms: List[RoomNode]):
+        self.world_uuid = world_uuid
+        self.grid_size = grid_size
+        self.starting_position = starting_position
+        self.rooms: Dict[str, RoomNode] = {}
+        self.cells: Dict[GridPos, str] = {}
+        for node in rooms:
+            # First placement wins when a room or a cell is listed twice
+            if node.room_uuid in self.rooms or node.position in self.cells:
+                continue
+            self.rooms[node.room_uuid] = node
+            self.cells[node.position] = node.room_uuid
+
+        self.npc_rooms: Dict[str, List[str]] = {}
+        self._edges: Dict[str, Tuple[str, ...]] = {}
+        for room_uuid, node in self.rooms.items():
+            x, y = node.position
+            for direction, (dx, dy) in DIRECTIONS.items():
+                target = self.cells.get((x + dx, y + dy))
+                if target:
+                    node.neighbours[direction] = target
+            edges = dict.fromkeys(node.neighbours.values())
+            for exit_def in node.exits:
+                target = exit_def.get("targetRoomId")
+                if target in self.rooms and target != room_uuid:
+                    edges[target] = None
+            self._edges[room_uuid] = tuple(edges)
+            for npc in node.npcs:
+                npc_uuid = npc.get("character_uuid")
+                if npc_uuid:
+                    self.npc_rooms.setdefault(npc_uuid, []).append(room_uuid)
+
+    def room(self, room_uuid: str) -> Optional[RoomNode]:
+        return self.rooms.get(room_uuid)
+
+    def room_at(self, x: int, y: int) -> Optional[str]:
+        return self.cells.get((x, y))
+
+    def neighbours(self, room_uuid: str) -> Tuple[str, ...]:
+        """Rooms reachable in one step (grid-adjacent or linked by an exit)."""
+        return self._edges.get(room_uuid, ())
+
+    def npcs_in(self, room_uuid: str) -> List[Dict[str, Any]]:
+        node = self.rooms.get(room_uuid)
+        return node.npcs if node else []
+
+    def rooms_with_npc(self, npc_uuid: str) -> List[str]:
+        return self.npc_rooms.get(npc_uuid, [])
+
+    def find_path(self, start_uuid: str, goal_uuid: str) -> Optional[List[str]]:
+        """
+        Shortest room path from start to goal (both inclusive).
+
+        Returns:
+            List of room UUIDs, or None if either room is missing or unreachable
+        """
+        if start_uuid not in self.rooms or goal_uuid not in self.rooms:
+            return None
+        if start_uuid == goal_uuid:
+            return [start_uuid]
+
+        previous: Dict[str, Optional[str]] = {start_uuid: None}
+        queue = deque([start_uuid])
+        while queue:
+            current = queue.popleft()
+            for nxt in self._edges[current]:
+                if nxt in previous:
+                    continue
+                previous[nxt] = current
+                if nxt == goal_uuid:
+                    path = [nxt]
+                    while previous[path[-1]] is not None:
+                        path.append(previous[path[-1]])
+                    return path[::-1]
+                queue.append(nxt)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "world_uuid": self.world_uuid,
+            "grid_size": {"width": self.grid_size[0], "height": self.grid_size[1]},
+            "starting_position": {"x": self.starting_position[0], "y": self.starting_position[1]},
+            "rooms": [node.to_dict() for node in self.rooms.values()],
+        }
+
+
+class WorldGraphCache:
+    """
+    Process-wide cache of WorldGraphs and decoded room cards.
+
+    A graph is built on first use from the database and kept until the world
+    or one of its rooms is saved, or their rows are re-synced. Builds run
+    outside the lock; a build that overlaps an invalidation is returned but
+    not cached. Lookups touch the database, so call them off the event loop.
+    """
+
+    def __init__(self, db_session_generator, logger: LogManager, max_worlds: int = 32, max_room_cards: int = 256):
+        self.db_session_generator = db_session_generator
+        self.logger = logger
+        self.max_worlds = max_worlds
+        self.max_room_cards = max_room_cards
+        # world_uuid -> (stamps of the world and room rows it was built from, graph)
+        self._graphs: "OrderedDict[str, Tuple[Dict[str, Optional[Tuple[Any, ...]]], WorldGraph]]" = OrderedDict()
+        # room_uuid -> (row stamp, decoded card)
+        self._room_cards: "OrderedDict[str, Tuple[Tuple[Any, ...], RoomCard]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get_session_context(self):
+        """Get a database session context manager."""
+        from backend.utils.db_utils import get_session_context
+        return get_session_context(self.db_session_generator, self.logger)
+
+    def get_graph(self, world_uuid: str) -> Optional[WorldGraph]:
+        """Cached graph for a world, rebuilt when it is missing or one of its rows was re-synced."""
+        with self._lock:
+            cached = self._graphs.get(world_uuid)
+            generation = self._generation
+        if cached is not None:
+            stamps, graph = cached
+            with self._get_session_context() as db:
+                fresh = current_stamps(db, stamps.keys()) == stamps
+            if fresh:
+                with self._lock:
+                    if world_uuid in self._graphs:
+                        self._graphs.move_to_end(world_uuid)
+                return graph
+
+        graph, stamps = self._build(world_uuid)
+        if graph is None:
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._graphs[world_uuid] = (stamps, graph)
+                while len(self._graphs) > self.max_worlds:
+                    self._graphs.popitem(last=False)
+        return graph
+
+    def get_room_card(self, room_uuid: str, loader: Callable[[], Optional[RoomCard]]) -> Optional[RoomCard]:
+        """
+        Decoded room card, loading it with ``loader`` on a miss or when the
+        room row was re-synced since it was memoized.
+        Callers get a copy, so editing it never touches the cache.
+        """
+        stamp = self._room_stamp(room_uuid)
+        with self._lock:
+            cached = self._room_cards.get(room_uuid)
+            if cached is not None and stamp is not None and cached[0] == stamp:
+                self._room_cards.move_to_end(room_uuid)
+                return cached[1].model_copy(deep=True)
+            self._room_cards.pop(room_uuid, None)
+            generation = self._generation
+
+        card = loader()
+        if card is None or stamp is None:
+            return card
+
+        with self._lock:
+            if generation == self._generation:
+                self._room_cards[room_uuid] = (stamp, card.model_copy(deep=True))
+                while len(self._room_cards) > self.max_room_cards:
+                    self._room_cards.popitem(last=False)
+        return card
+
+    def _room_stamp(self, room_uuid: str) -> Optional[Tuple[Any, ...]]:
+        """Current sync stamp of a room row (one narrow indexed query), or None if missing."""
+        with self._get_session_context() as db:
+            return current_stamps(db, [room_uuid])[room_uuid]
+
+    def invalidate_world(self, world_uuid: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._graphs.pop(world_uuid, None)
+
+    def invalidate_room(self, room_uuid: str) -> None:
+        """Drop a room's card and every cached graph that places it."""
+        with self._lock:
+            self._generation += 1
+            self._room_cards.pop(room_uuid, None)
+            for world_uuid in [w for w, (_, g) in self._graphs.items() if room_uuid in g.rooms]:
+                del self._graphs[world_uuid]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._graphs.clear()
+            self._room_cards.clear()
+
+    def _build(self, world_uuid: str) -> Tuple[Optional[WorldGraph], Dict[str, Optional[Tuple[Any, ...]]]]:
+        """
+        Build a graph from the world row and one batched query for its rooms.
+
+        Returns:
+            (graph or None, stamps of the world and every placed room keyed by
+            uuid; rooms without a row get None, so creating one rebuilds)
+        """
+        stamps: Dict[str, Optional[Tuple[Any, ...]]] = {}
+        with self._get_session_context() as db:
+            world_row = db.query(Character).filter(Character.character_uuid == world_uuid).first()
+            if world_row is None:
+                return None, stamps
+            extensions = card_extensions(world_row)
+            if extensions.get("card_type") != "world":
+                return None, stamps
+            stamps[world_uuid] = row_stamp(world_row)
+
+            world_data = extensions.get("world_data") or {}
+            placements = [p for p in world_data.get("rooms") or [] if p.get("room_uuid")]
+            room_uuids = {p["room_uuid"] for p in placements}
+            room_rows = (
+                db.query(Character).filter(Character.character_uuid.in_(room_uuids)).all()
+                if room_uuids else []
+            )
+            stamps.update(dict.fromkeys(room_uuids))
+            room_info = {}
+            for row in room_rows:
+                stamps[row.character_uuid] = row_stamp(row)
+                room_ext = card_extensions(row)
+                if room_ext.get("card_type") == "room":
+                    room_info[row.character_uuid] = (row.name, room_ext.get("room_data") or {})
+
+        nodes = []
+        for placement in placements:
+            room_uuid = placement["room_uuid"]
+            name, room_data = room_info.get(room_uuid, (None, {}))
+            pos = placement.get("grid_position") or {}
+            layout = room_data.get("layout_data") or {}
+            npcs = placement.get("instance_npcs")
+            if npcs is None:
+                npcs = room_data.get("npcs") or []
+            nodes.append(RoomNode(
+                room_uuid=room_uuid,
+                position=(int(pos.get("x", 0)), int(pos.get("y", 0))),
+                name=placement.get("instance_name") or name or "",
+                exits=list(layout.get("exits") or []),
+                npcs=list(npcs),
+            ))
+
+        grid = world_data.get("grid_size") or {}
+        start = world_data.get("starting_position") or {}
+        graph = WorldGraph(
+            world_uuid=world_uuid,
+            grid_size=(int(grid.get("width", 10)), int(grid.get("height", 10))),
+            starting_position=(int(start.get("x", 0)), int(start.get("y", 0))),
+            rooms=nodes,
+        )
+        return graph, stamps
@@ -7,21 +7,97 @@ Design Philosophy:
 - No foreign key constraints (orphaned rows are harmless)
 - JSON columns for complex nested structures
 - UPSERT pattern for save operations
+- NPC relationships and room states are stored one row per entity
+  (world_npc_relationships / world_room_states), so saves rewrite only the
+  entities that changed
+- Every write bumps world_user_progress.version; JSON Patch requests can
+  pass base_version for optimistic concurrency
+- Runtime saves go through a write-behind cache (WorldProgressWriteBehind):
+  play-time updates are coalesced and only the changed columns are written
 """
+import contextlib
+import copy
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Set, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, delete as sql_delete, select, update as sql_update
+from sqlalchemy.exc import IntegrityError
 
 from backend.database import SessionLocal
-from backend.sql_models import WorldUserProgress as WorldUserProgressModel
+from backend.sql_models import (
+    WorldUserProgress as WorldUserProgressModel,
+    WorldNpcRelationship as WorldNpcRelationshipModel,
+    WorldRoomState as WorldRoomStateModel,
+)
 from backend.models.world_progress import (
+    CharacterInventory,
+    NPCRelationship,
+    RoomInstanceState,
+    TimeState,
     WorldUserProgress,
+    WorldUserProgressPatch,
+    WorldUserProgressPatchResult,
     WorldUserProgressUpdate,
     WorldUserProgressSummary
 )
+from backend.error_handlers import ConflictException
 from backend.log_manager import LogManager
+from backend.utils.json_patch import JsonPatchError, apply_patch, parse_pointer
+from backend.utils.write_behind import DebouncedWriter
+
+# Write-behind timing for runtime progress saves (see WorldProgressWriteBehind)
+PROGRESS_WRITE_DELAY_SECONDS = 0.5
+PROGRESS_WRITE_MAX_DELAY_SECONDS = 2.0
+
+# Progress fields stored as JSON columns on world_user_progress
+_JSON_COLUMNS = {
+    'time_state': 'time_state_json',
+    'player_inventory': 'player_inventory_json',
+    'ally_inventory': 'ally_inventory_json',
+}
+_JSON_MODELS = {
+    'time_state': TimeState,
+    'player_inventory': CharacterInventory,
+    'ally_inventory': CharacterInventory,
+}
+
+# Progress fields stored one row per entity: field -> (table, key column, legacy blob column, model)
+_ENTITY_TABLES = {
+    'npc_relationships': (WorldNpcRelationshipModel, 'npc_uuid', 'npc_relationships_json', NPCRelationship),
+    'room_states': (WorldRoomStateModel, 'room_uuid', 'room_states_json', RoomInstanceState),
+}
+
+# Plain columns and the value a missing progress row starts from
+_SCALAR_DEFAULTS = {
+    'player_xp': 0,
+    'player_level': 1,
+    'player_gold': 0,
+    'current_room_uuid': None,
+    'bonded_ally_uuid': None,
+}
+
+ProgressKey = Tuple[str, str]  # (world_uuid, user_uuid)
+
+
+@dataclass
+class ProgressDelta:
+    """Pending field-level change for one progress row."""
+    fields: Dict[str, Any]  # WorldUserProgressUpdate field -> plain value
+    played_at: datetime
+    writes: int = 1  # Saves coalesced into this delta; the row version advances by this much
+
+
+class ProgressVersionConflict(ConflictException):
+    """A patch's base_version doesn't match the stored progress version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Progress has changed (current version {current_version})")
+        self.current_version = current_version
+        self.details["current_version"] = current_version
 
 
 class WorldUserProgressService:
@@ -30,16 +106,24 @@ class WorldUserProgressService:
     Provides CRUD operations for progress keyed by (world_uuid, user_uuid).
     """
 
-    def __init__(self, db_session_generator, logger: LogManager):
+    def __init__(
+        self,
+        db_session_generator,
+        logger: LogManager,
+        write_behind: Optional["WorldProgressWriteBehind"] = None
+    ):
         """
         Initialize the service.
 
         Args:
             db_session_generator: Callable that returns a database session
             logger: LogManager instance for logging
+            write_behind: Optional shared write-behind cache; when set, reads
+                and saves go through it instead of straight to the database
         """
         self.db_session_generator = db_session_generator
         self.logger = logger
+        self.write_behind = write_behind
 
     def _get_session_context(self):
         """Get a database session context manager."""
@@ -61,6 +145,16 @@ class WorldUserProgressService:
         Returns:
             WorldUserProgress if found, None otherwise
         """
+        if self.write_behind is not None:
+            return self.write_behind.get(world_uuid, user_uuid)
+        return self.read_progress(world_uuid, user_uuid)
+
+    def read_progress(
+        self,
+        world_uuid: str,
+        user_uuid: str
+    ) -> Optional[WorldUserProgress]:
+        """Read progress straight from the database, bypassing any write-behind cache."""
         with self._get_session_context() as db:
             record = db.query(WorldUserProgressModel).filter(
                 and_(
@@ -72,7 +166,11 @@ class WorldUserProgressService:
             if not record:
                 return None
 
-            return self._model_to_pydantic(record)
+            entities = {
+                field: self._load_entities(db, field, world_uuid, user_uuid)
+                for field in _ENTITY_TABLES
+            }
+            return self._model_to_pydantic(record, entities)
 
     def save_progress(
         self,
@@ -89,51 +187,132 @@ class WorldUserProgressService:
             update: Progress data to save
 
         Returns:
-            The saved WorldUserProgress
+            The saved WorldUserProgress (with a write-behind cache the database
+            write follows shortly after)
         """
-        with self._get_session_context() as db:
-            # Check for existing record
-            record = db.query(WorldUserProgressModel).filter(
-                and_(
+        if self.write_behind is not None:
+            return self.write_behind.patch(world_uuid, user_uuid, update)
+
+        delta = ProgressDelta(update_fields(update), datetime.now(timezone.utc))
+        self.write_deltas({(world_uuid, user_uuid): delta})
+        self.logger.log_step(f"Saved progress for world={world_uuid}, user={user_uuid}")
+        return self.read_progress(world_uuid, user_uuid)
+
+    def patch_progress(
+        self,
+        world_uuid: str,
+        user_uuid: str,
+        patch: WorldUserProgressPatch
+    ) -> WorldUserProgressPatchResult:
+        """
+        Apply an RFC 6902 JSON Patch to a world+user's progress.
+
+        Only the fields and entities the operations address are loaded and
+        written: /npc_relationships/<npc> and /room_states/<room> map to single
+        rows, so the cost follows the size of the change, not of the world.
+
+        Args:
+            world_uuid: UUID of the world
+            user_uuid: UUID of the user
+            patch: Operations and optional base_version
+
+        Returns:
+            The new version and the JSON pointers of the fields/entities written
+
+        Raises:
+            JsonPatchError: Malformed operation, missing path, or failed test
+            pydantic.ValidationError: Patched values don't fit the progress schema
+            ProgressVersionConflict: base_version is stale (or a concurrent write won)
+        """
+        operations = [operation.as_dict() for operation in patch.operations]
+        fields, entity_keys = _patch_targets(operations)
+
+        lock = (
+            self.write_behind.exclusive(world_uuid, user_uuid)
+            if self.write_behind is not None else contextlib.nullcontext()
+        )
+        with lock, self._get_session_context() as db:
+            columns = [self._column_for(field) for field in fields if field not in _ENTITY_TABLES]
+            row = db.execute(
+                select(WorldUserProgressModel.id, WorldUserProgressModel.version, *columns)
+                .where(
                     WorldUserProgressModel.world_uuid == world_uuid,
                     WorldUserProgressModel.user_uuid == user_uuid
                 )
             ).first()
+            current_version = row.version if row is not None else 0
+            if patch.base_version is not None and patch.base_version != current_version:
+                raise ProgressVersionConflict(current_version)
+
+            # The partial document: just the addressed fields and entities
+            document: Dict[str, Any] = {}
+            for field in fields:
+                if field in _ENTITY_TABLES:
+                    document[field] = self._load_entities(
+                        db, field, world_uuid, user_uuid, keys=entity_keys.get(field)
+                    )
+                elif row is None:
+                    document[field] = _SCALAR_DEFAULTS.get(field)
+                elif field in _JSON_COLUMNS:
+                    document[field] = self._from_json(getattr(row, _JSON_COLUMNS[field]))
+                else:
+                    document[field] = getattr(row, field)
+            before = copy.deepcopy(document)
 
-            now = datetime.now(timezone.utc)
+            document = apply_patch(document, operations)
+            if not isinstance(document, dict):
+                raise JsonPatchError("Patch must leave the progress document an object")
 
-            if record:
-                # Update existing record
-                self._apply_update(record, update)
-                record.last_played_at = now
-                record.updated_at = now
-                self.logger.log_step(f"Updated progress for world={world_uuid}, user={user_uuid}")
+            now = datetime.now(timezone.utc)
+            changed: List[str] = []
+            values: Dict[str, Any] = {}
+            for field in fields:
+                if field in _ENTITY_TABLES:
+                    changed.extend(self._write_entity_changes(
+                        db, field, world_uuid, user_uuid, before[field], document.get(field), now
+                    ))
+                    continue
+                if document.get(field) == before[field]:
+                    continue
+                value = _validated_field(field, document.get(field))
+                if value != before[field]:
+                    values[self._column_for(field).key] = (
+                        self._to_json(value) if field in _JSON_COLUMNS else value
+                    )
+                    changed.append(f"/{field}")
+
+            if not changed:
+                return WorldUserProgressPatchResult(version=current_version, changed=[])
+
+            values.update(version=current_version + 1, last_played_at=now, updated_at=now)
+            if row is None:
+                db.add(WorldUserProgressModel(
+                    world_uuid=world_uuid, user_uuid=user_uuid, created_at=now, **values
+                ))
+                try:
+                    db.flush()
+                except IntegrityError:
+                    # Another writer created the row first
+                    db.rollback()
+                    raise ProgressVersionConflict(current_version + 1)
             else:
-                # Create new record
-                record = WorldUserProgressModel(
-                    world_uuid=world_uuid,
-                    user_uuid=user_uuid,
-                    player_xp=update.player_xp or 0,
-                    player_level=update.player_level or 1,
-                    player_gold=update.player_gold or 0,
-                    current_room_uuid=update.current_room_uuid,
-                    bonded_ally_uuid=self._handle_bonded_ally(update.bonded_ally_uuid),
-                    time_state_json=self._to_json(update.time_state),
-                    npc_relationships_json=self._to_json(update.npc_relationships),
-                    player_inventory_json=self._to_json(update.player_inventory),
-                    ally_inventory_json=self._to_json(update.ally_inventory),
-                    room_states_json=self._to_json(update.room_states),
-                    last_played_at=now,
-                    created_at=now,
-                    updated_at=now
+                result = db.execute(
+                    sql_update(WorldUserProgressModel)
+                    .where(
+                        WorldUserProgressModel.id == row.id,
+                        WorldUserProgressModel.version == current_version
+                    )
+                    .values(**values)
                 )
-                db.add(record)
-                self.logger.log_step(f"Created progress for world={world_uuid}, user={user_uuid}")
-
+                if result.rowcount == 0:
+                    db.rollback()
+                    raise ProgressVersionConflict(current_version + 1)
             db.commit()
-            db.refresh(record)
 
-            return self._model_to_pydantic(record)
+        self.logger.log_step(
+            f"Patched progress for world={world_uuid}, user={user_uuid}: {len(changed)} change(s)"
+        )
+        return WorldUserProgressPatchResult(version=current_version + 1, changed=changed)
 
     def list_progress_for_world(
         self,
@@ -148,6 +327,9 @@ class WorldUserProgressService:
         Returns:
             List of WorldUserProgressSummary objects
         """
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
         with self._get_session_context() as db:
             records = db.query(WorldUserProgressModel).filter(
                 WorldUserProgressModel.world_uuid == world_uuid
@@ -181,6 +363,9 @@ class WorldUserProgressService:
         Returns:
             True if deleted, False if not found
         """
+        if self.write_behind is not None:
+            self.write_behind.discard(world_uuid, user_uuid)
+
         with self._get_session_context() as db:
             record = db.query(WorldUserProgressModel).filter(
                 and_(
@@ -193,36 +378,129 @@ class WorldUserProgressService:
                 return False
 
             db.delete(record)
+            for table, _, _, _ in _ENTITY_TABLES.values():
+                db.execute(sql_delete(table).where(
+                    table.world_uuid == world_uuid, table.user_uuid == user_uuid
+                ))
             db.commit()
             self.logger.log_step(f"Deleted progress for world={world_uuid}, user={user_uuid}")
             return True
 
-    def _apply_update(
+    def write_deltas(self, deltas: Dict[ProgressKey, ProgressDelta]) -> None:
+        """
+        Write field-level deltas for several progress rows in one transaction.
+
+        Only the columns named in each delta (plus version and timestamps) are
+        updated. A delta's npc_relationships/room_states replace the whole map,
+        but only entity rows whose data differs are written. Rows that don't
+        exist yet are inserted with column defaults for everything else.
+        """
+        with self._get_session_context() as db:
+            for (world_uuid, user_uuid), delta in deltas.items():
+                columns = self._delta_columns(delta.fields)
+                columns['last_played_at'] = delta.played_at
+                columns['updated_at'] = delta.played_at
+                result = db.execute(
+                    sql_update(WorldUserProgressModel)
+                    .where(
+                        WorldUserProgressModel.world_uuid == world_uuid,
+                        WorldUserProgressModel.user_uuid == user_uuid
+                    )
+                    .values(version=WorldUserProgressModel.version + delta.writes, **columns)
+                )
+                if result.rowcount == 0:
+                    db.add(WorldUserProgressModel(
+                        world_uuid=world_uuid,
+                        user_uuid=user_uuid,
+                        version=delta.writes,
+                        created_at=delta.played_at,
+                        **columns
+                    ))
+
+                for field in _ENTITY_TABLES:
+                    if field in delta.fields:
+                        existing = self._load_entities(db, field, world_uuid, user_uuid)
+                        self._write_entity_changes(
+                            db, field, world_uuid, user_uuid, existing, delta.fields[field], delta.played_at
+                        )
+            db.commit()
+
+    def _delta_columns(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Map update field names/values to column names/values (entity maps are written separately)."""
+        columns = {}
+        for field, value in delta.items():
+            if field in _ENTITY_TABLES:
+                # Entity rows take over from the legacy blob
+                columns[_ENTITY_TABLES[field][2]] = None
+            elif field in _JSON_COLUMNS:
+                columns[_JSON_COLUMNS[field]] = self._to_json(value)
+            elif field == 'bonded_ally_uuid':
+                columns[field] = self._handle_bonded_ally(value)
+            else:
+                columns[field] = value
+        return columns
+
+    def _column_for(self, field: str):
+        return getattr(WorldUserProgressModel, _JSON_COLUMNS.get(field, field))
+
+    def _load_entities(
         self,
-        record: WorldUserProgressModel,
-        update: WorldUserProgressUpdate
-    ) -> None:
-        """Apply partial update to an existing record."""
-        if update.player_xp is not None:
-            record.player_xp = update.player_xp
-        if update.player_level is not None:
-            record.player_level = update.player_level
-        if update.player_gold is not None:
-            record.player_gold = update.player_gold
-        if update.current_room_uuid is not None:
-            record.current_room_uuid = update.current_room_uuid
-        if update.bonded_ally_uuid is not None:
-            record.bonded_ally_uuid = self._handle_bonded_ally(update.bonded_ally_uuid)
-        if update.time_state is not None:
-            record.time_state_json = self._to_json(update.time_state)
-        if update.npc_relationships is not None:
-            record.npc_relationships_json = self._to_json(update.npc_relationships)
-        if update.player_inventory is not None:
-            record.player_inventory_json = self._to_json(update.player_inventory)
-        if update.ally_inventory is not None:
-            record.ally_inventory_json = self._to_json(update.ally_inventory)
-        if update.room_states is not None:
-            record.room_states_json = self._to_json(update.room_states)
+        db: Session,
+        field: str,
+        world_uuid: str,
+        user_uuid: str,
+        keys: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Load entity rows for ``field`` as {key: data}; ``keys`` limits the load."""
+        table, key_column, _, _ = _ENTITY_TABLES[field]
+        key_attr = getattr(table, key_column)
+        query = select(key_attr, table.data_json).where(
+            table.world_uuid == world_uuid, table.user_uuid == user_uuid
+        )
+        if keys is not None:
+            query = query.where(key_attr.in_(keys))
+        return {key: data for key, data in db.execute(query).all()}
+
+    def _write_entity_changes(
+        self,
+        db: Session,
+        field: str,
+        world_uuid: str,
+        user_uuid: str,
+        before: Dict[str, Any],
+        after: Optional[Dict[str, Any]],
+        now: datetime
+    ) -> List[str]:
+        """Insert, update or delete only the entity rows that differ. Returns their pointers."""
+        table, key_column, _, model = _ENTITY_TABLES[field]
+        key_attr = getattr(table, key_column)
+        after = {} if after is None else after
+        if not isinstance(after, dict):
+            raise JsonPatchError(f"/{field} must be an object")
+
+        changed = []
+        for key in before.keys() - after.keys():
+            db.execute(sql_delete(table).where(
+                table.world_uuid == world_uuid, table.user_uuid == user_uuid, key_attr == key
+            ))
+            changed.append(f"/{field}/{_escape_token(key)}")
+
+        for key, data in after.items():
+            if key in before and before[key] == data:
+                continue
+            data = model.model_validate(data).model_dump()
+            if key in before and before[key] == data:
+                continue
+            result = db.execute(
+                sql_update(table)
+                .where(table.world_uuid == world_uuid, table.user_uuid == user_uuid, key_attr == key)
+                .values(data_json=data, updated_at=now)
+            )
+            if result.rowcount == 0:
+                db.add(table(world_uuid=world_uuid, user_uuid=user_uuid, data_json=data,
+                             updated_at=now, **{key_column: key}))
+            changed.append(f"/{field}/{_escape_token(key)}")
+        return changed
 
     def _handle_bonded_ally(self, value: Optional[str]) -> Optional[str]:
         """Handle bonded ally UUID - empty string means clear (unbond)."""
@@ -259,8 +537,12 @@ class WorldUserProgressService:
         except (json.JSONDecodeError, TypeError):
             return None
 
-    def _model_to_pydantic(self, record: WorldUserProgressModel) -> WorldUserProgress:
-        """Convert SQLAlchemy model to Pydantic model."""
+    def _model_to_pydantic(
+        self,
+        record: WorldUserProgressModel,
+        entities: Dict[str, Dict[str, Any]]
+    ) -> WorldUserProgress:
+        """Convert SQLAlchemy model (plus its entity rows) to Pydantic model."""
         return WorldUserProgress(
             world_uuid=record.world_uuid,
             user_uuid=record.user_uuid,
@@ -270,11 +552,243 @@ class WorldUserProgressService:
             current_room_uuid=record.current_room_uuid,
             bonded_ally_uuid=record.bonded_ally_uuid,
             time_state=self._from_json(record.time_state_json),
-            npc_relationships=self._from_json(record.npc_relationships_json),
+            npc_relationships=entities.get('npc_relationships') or None,
             player_inventory=self._from_json(record.player_inventory_json),
             ally_inventory=self._from_json(record.ally_inventory_json),
-            room_states=self._from_json(record.room_states_json),
+            room_states=entities.get('room_states') or None,
+            version=record.version or 0,
             last_played_at=record.last_played_at.isoformat() if record.last_played_at else None,
             created_at=record.created_at.isoformat() if record.created_at else None,
             updated_at=record.updated_at.isoformat() if record.updated_at else None
         )
+
+
+def update_fields(update: WorldUserProgressUpdate) -> Dict[str, Any]:
+    """The fields an update sets, as plain data."""
+    return {
+        name: _plain(value)
+        for name in WorldUserProgressUpdate.model_fields
+        if (value := getattr(update, name)) is not None
+    }
+
+
+def _escape_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _patch_targets(operations: Iterable[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Optional[Set[str]]]]:
+    """
+    Top-level fields the operations address, and for entity maps which keys
+    (None = the whole map, e.g. a replace of /npc_relationships).
+    """
+    fields: List[str] = []
+    entity_keys: Dict[str, Optional[Set[str]]] = {}
+    for operation in operations:
+        for pointer in (operation.get("path"), operation.get("from")):
+            if pointer is None:
+                continue
+            if not isinstance(pointer, str):
+                raise JsonPatchError("Patch paths must be strings")
+            tokens = parse_pointer(pointer)
+            if not tokens:
+                raise JsonPatchError("Patching the whole progress document is not supported")
+            field = tokens[0]
+            if field not in _SCALAR_DEFAULTS and field not in _JSON_COLUMNS and field not in _ENTITY_TABLES:
+                raise JsonPatchError(f"Unknown progress field: /{field}")
+            if field not in fields:
+                fields.append(field)
+            if field in _ENTITY_TABLES:
+                if len(tokens) == 1:
+                    entity_keys[field] = None
+                elif entity_keys.get(field, set()) is not None:
+                    entity_keys.setdefault(field, set()).add(tokens[1])
+    return fields, entity_keys
+
+
+def _validated_field(field: str, value: Any) -> Any:
+    """Validate a patched top-level field; returns its normalized plain value."""
+    if value is None:
+        if field in ('player_xp', 'player_level', 'player_gold'):
+            raise JsonPatchError(f"/{field} cannot be removed")
+        return None
+    if field in _JSON_MODELS:
+        return _JSON_MODELS[field].model_validate(value).model_dump()
+    validated = WorldUserProgressUpdate.model_validate({field: value})
+    value = getattr(validated, field)
+    return None if field == 'bonded_ally_uuid' and value == "" else value
+
+
+def _plain(value: Any) -> Any:
+    """Pydantic models (also nested in dicts) to plain JSON-compatible data."""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _merge_pending(
+    older: Dict[ProgressKey, ProgressDelta],
+    newer: Dict[ProgressKey, ProgressDelta]
+) -> Dict[ProgressKey, ProgressDelta]:
+    """Combine two pending batches; fields from ``newer`` win per row."""
+    merged = dict(older)
+    for key, delta in newer.items():
+        base = merged.get(key)
+        merged[key] = delta if base is None else ProgressDelta(
+            {**base.fields, **delta.fields}, delta.played_at, base.writes + delta.writes
+        )
+    return merged
+
+
+class WorldProgressWriteBehind:
+    """
+    Write-behind cache for world runtime progress.
+
+    ``patch`` merges a partial update into the cached progress and records
+    which fields changed, so a save during play costs no database write on the
+    request path. A DebouncedWriter writes the coalesced field deltas after
+    ``delay`` (capped at ``max_delay`` after the first pending change), one
+    UPDATE per row touching only the changed columns. Reads are served from
+    the cache, so clients always see their own writes. Failed writes are
+    retried with backoff; if they keep failing the deltas are dropped and the
+    affected rows are evicted, so reads fall back to what is actually stored.
+    Pending deltas are flushed at interpreter exit and on application shutdown.
+
+    Cached WorldUserProgress objects are shared; treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        store: WorldUserProgressService,
+        delay: float = PROGRESS_WRITE_DELAY_SECONDS,
+        max_delay: float = PROGRESS_WRITE_MAX_DELAY_SECONDS,
+        max_cached: int = 256,
+        **writer_options: Any
+    ):
+        self._store = store
+        self._logger = store.logger
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+        # None = known to have no saved progress
+        self._cache: "OrderedDict[ProgressKey, Optional[WorldUserProgress]]" = OrderedDict()
+        self._writer: DebouncedWriter[Dict[ProgressKey, ProgressDelta]] = DebouncedWriter(
+            lambda pending: self._store.write_deltas(pending),
+            delay,
+            max_delay,
+            name="world-progress-writer",
+            merge=_merge_pending,
+            on_give_up=self._give_up,
+            logger=self._logger,
+            **writer_options
+        )
+
+    def get(self, world_uuid: str, user_uuid: str) -> Optional[WorldUserProgress]:
+        """Current progress for a world+user, loading it once from the database."""
+        key = (world_uuid, user_uuid)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        progress = self._store.read_progress(world_uuid, user_uuid)
+
+        with self._lock:
+            # A patch may have landed while we were reading
+            if key not in self._cache:
+                self._remember(key, progress)
+            return self._cache[key]
+
+    def patch(
+        self,
+        world_uuid: str,
+        user_uuid: str,
+        update: WorldUserProgressUpdate
+    ) -> WorldUserProgress:
+        """Apply a partial update and schedule its write. Returns the merged progress."""
+        key = (world_uuid, user_uuid)
+        delta = update_fields(update)
+        self.get(world_uuid, user_uuid)  # Make sure the base state is cached
+
+        now = datetime.now(timezone.utc)
+        stamp = now.isoformat()
+        with self._lock:
+            base = self._cache.get(key)
+            merged = base.model_dump() if base is not None else {
+                'world_uuid': world_uuid,
+                'user_uuid': user_uuid,
+                'created_at': stamp,
+            }
+            merged.update(delta)
+            if 'bonded_ally_uuid' in delta:
+                merged['bonded_ally_uuid'] = self._store._handle_bonded_ally(delta['bonded_ally_uuid'])
+            merged['version'] = merged.get('version', 0) + 1
+            merged['last_played_at'] = stamp
+            merged['updated_at'] = stamp
+            progress = WorldUserProgress.model_validate(merged)
+            self._remember(key, progress)
+            self._writer.schedule({key: ProgressDelta(dict(delta), now)})
+        return progress
+
+    def discard(self, world_uuid: str, user_uuid: str) -> None:
+        """Drop cached and pending state for a world+user (before deleting its row)."""
+        key = (world_uuid, user_uuid)
+
+        def without_key(pending):
+            if not pending or key not in pending:
+                return pending
+            remaining = {k: v for k, v in pending.items() if k != key}
+            return remaining or None
+
+        # Waits out an in-flight flush so it can't re-create the row afterwards
+        self._writer.edit_pending(without_key)
+        with self._lock:
+            self._cache.pop(key, None)
+
+    @contextlib.contextmanager
+    def exclusive(self, world_uuid: str, user_uuid: str):
+        """
+        Hold off flushes while the caller writes a row's progress directly
+        (e.g. a JSON Patch). Pending deltas are written first; afterwards the
+        cached copy is dropped so the next get() reloads it.
+        """
+        with self._writer.exclusive():
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._cache.pop((world_uuid, user_uuid), None)
+
+    def flush(self) -> bool:
+        """Write all pending deltas now. Returns False if the write failed."""
+        return self._writer.flush()
+
+    @property
+    def has_pending(self) -> bool:
+        return self._writer.has_pending
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Error from the most recent failed write, cleared by the next success."""
+        return self._writer.last_error
+
+    def _give_up(self, pending: Dict[ProgressKey, ProgressDelta], error: str) -> None:
+        """The deltas could not be written: stop serving them as if they were saved."""
+        with self._lock:
+            for key in pending:
+                self._cache.pop(key, None)
+        self._logger.log_error(
+            f"Dropped unsaved world progress for {len(pending)} row(s) after repeated write failures: {error}"
+        )
+
+    def _remember(self, key: ProgressKey, progress: Optional[WorldUserProgress]) -> None:
+        """Cache progress for key, evicting the oldest rows with nothing pending. Caller holds _lock."""
+        self._cache[key] = progress
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._max_cached:
+            pending = self._writer.pending or {}
+            for old_key in list(self._cache):
+                if len(self._cache) <= self._max_cached:
+                    break
+                if old_key != key and old_key not in pending:
+                    del self._cache[old_key]
@@ -1,14 +1,23 @@
 # backend/settings_manager.py
 # Description: Manages settings for the application, including loading, saving, and updating settings.
-import copy
 import json
-import os
 import sys
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterable, List, Optional, Set, Tuple
 import traceback
 import collections.abc # Import for deep_merge type checking
 
+from backend.utils.atomic_files import atomic_write_text
+from backend.utils.write_behind import DebouncedWriter
+
+# Debounce window for write-behind persistence: rapid UI changes (sliders,
+# color pickers) collapse into one write, but never wait longer than the cap.
+SETTINGS_WRITE_DEBOUNCE_SECONDS = 0.5
+SETTINGS_WRITE_MAX_DELAY_SECONDS = 2.0
+
+SettingsListener = Callable[[Dict[str, Any], Set[str]], None]
+
 # Helper function for deep merging dictionaries
 def deep_merge(source, destination):
     """
@@ -32,11 +41,84 @@ def deep_merge(source, destination):
             destination[key] = value
     return destination
 
+def merge_copy_on_write(source, base):
+    """
+    Return a new dict with ``source`` deep-merged onto ``base`` without mutating it.
+
+    Only the branches touched by ``source`` are copied; everything else is
+    shared with ``base``, so a slider update costs O(depth) instead of a full
+    deep copy. Same deletion semantics as ``deep_merge`` (None removes a key).
+    """
+    result = dict(base)
+    for key, value in source.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, collections.abc.Mapping):
+            node = base.get(key)
+            if isinstance(node, collections.abc.Mapping):
+                result[key] = merge_copy_on_write(value, node)
+            else:
+                result[key] = merge_copy_on_write(value, {})
+        else:
+            result[key] = value
+    return result
+
+
+def _normalize_api_templates(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Ensure API configs use templateId only. Copies just the entries it changes."""
+    def normalized(api_config):
+        if 'template' not in api_config and 'templateId' in api_config:
+            return api_config
+        api_config = {k: v for k, v in api_config.items() if k != 'template'}
+        api_config.setdefault('templateId', 'mistral')
+        return api_config
+
+    result = settings
+    if isinstance(settings.get('api'), dict):
+        api = normalized(settings['api'])
+        if api is not settings['api']:
+            result = dict(result)
+            result['api'] = api
+    if isinstance(settings.get('apis'), dict):
+        apis = {api_id: normalized(cfg) if isinstance(cfg, dict) else cfg for api_id, cfg in settings['apis'].items()}
+        if any(apis[api_id] is not cfg for api_id, cfg in settings['apis'].items()):
+            result = dict(result)
+            result['apis'] = apis
+    return result
+
+
+class DebouncedSettingsWriter(DebouncedWriter[Dict[str, Any]]):
+    """
+    Write-behind persister for settings snapshots.
+
+    Only the newest scheduled snapshot is ever written; a failed write is
+    retried with backoff unless a newer snapshot replaces it first.
+    """
+
+    def __init__(self, write_fn: Callable[[Dict[str, Any]], bool],
+                 delay: float = SETTINGS_WRITE_DEBOUNCE_SECONDS,
+                 max_delay: float = SETTINGS_WRITE_MAX_DELAY_SECONDS,
+                 logger=None):
+        super().__init__(write_fn, delay, max_delay, name="settings-writer", logger=logger)
+
+
 class SettingsManager:
+    """
+    Copy-on-write settings store.
+
+    ``settings`` is an immutable snapshot: callers may read and hold on to it
+    but must never mutate it. ``update_settings`` builds a new snapshot that
+    shares unchanged branches with the old one, swaps it in atomically, notifies
+    subscribers, and hands the snapshot to a debounced atomic writer.
+    """
+
     def __init__(self, logger):
         self.logger = logger
         self.settings_file = self._get_settings_path()
-        self.settings = self._load_settings()
+        self._lock = threading.RLock()
+        self._listeners: List[Tuple[SettingsListener, Optional[Set[str]]]] = []
+        self._writer = DebouncedSettingsWriter(self._save_settings, logger=logger)
+        self._snapshot: Dict[str, Any] = self._load_settings()
         # Log initial state after loading
         self.logger.log_step(f"[SettingsManager initialized] Initial settings loaded. models_directory: '{self.settings.get('models_directory')}', model_directory: '{self.settings.get('model_directory')}'")
 
@@ -191,50 +273,20 @@ class SettingsManager:
     # Removed update_settings_with_apis (handled by deep_merge in update_settings)
     # Removed update_api_settings (handled by deep_merge in update_settings)
 
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """The current settings snapshot (read-only; use update_settings to change it)."""
+        return self._snapshot
+
     def _save_settings(self, settings_to_save: Dict[str, Any]) -> bool:
-        """Save the provided settings dictionary to file."""
+        """Atomically write the provided settings dictionary to file."""
         try:
-            # Make a deep copy to avoid modifying the live settings object during processing
-            settings_copy = copy.deepcopy(settings_to_save)            # Convert Python booleans to JSON booleans
-            def convert_booleans(obj):
-                if isinstance(obj, dict):
-                    return {k: convert_booleans(v) for k, v in obj.items()}
-                elif isinstance(obj, list):
-                    return [convert_booleans(x) for x in obj]
-                elif isinstance(obj, bool):
-                    return bool(obj)
-                return obj
-
-            json_settings_to_save = convert_booleans(settings_copy)
-
-            # Ensure templateId consistency (optional but good practice)
-            if 'api' in json_settings_to_save and isinstance(json_settings_to_save['api'], dict):
-                if 'template' in json_settings_to_save['api']:
-                    json_settings_to_save['api'].pop('template')
-                if 'templateId' not in json_settings_to_save['api']:
-                    json_settings_to_save['api']['templateId'] = 'mistral'
-
-            if 'apis' in json_settings_to_save and isinstance(json_settings_to_save['apis'], dict):
-                for api_id, api_config in json_settings_to_save['apis'].items():
-                    if isinstance(api_config, dict):
-                        if 'template' in api_config:
-                            api_config.pop('template')
-                        if 'templateId' not in api_config:
-                            api_config['templateId'] = 'mistral'
-
-            # Save to file
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(json_settings_to_save, f, indent=2)
-
-            # --- Verification Logging ---
-            try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    saved_content = json.load(f)
-                    self.logger.log_step(f"**Verified saved settings:** {json.dumps(saved_content, indent=2)}")
-            except Exception as verify_err:
-                 self.logger.log_error(f"Error verifying saved settings file: {verify_err}")
-            # --- End Verification Logging ---
+            json_settings_to_save = _normalize_api_templates(settings_to_save)
+            payload = json.dumps(json_settings_to_save, indent=2)
+
+            atomic_write_text(self.settings_file, payload)
 
+            self.logger.log_step(f"Saved settings to {self.settings_file}")
             return True
 
         except Exception as e:
@@ -316,26 +368,25 @@ class SettingsManager:
     # Removed update_setting (handled by deep_merge in update_settings)
 
     def update_settings(self, new_settings: Dict[str, Any]) -> bool:
-        """Update multiple settings at once using a deep merge."""
+        """
+        Update multiple settings at once using a copy-on-write deep merge.
+
+        The new snapshot is visible immediately; persistence happens in the
+        background. Returns False only if the merge failed; callers that
+        report the change as saved must ``flush`` and check its result.
+        """
         try:
             self.logger.log_step(f"Updating settings with deep merge: {json.dumps(new_settings)}")
 
-            # Perform a deep merge of new_settings onto a copy of self.settings
-            # This prevents modifying self.settings directly if saving fails
-            current_settings_copy = copy.deepcopy(self.settings)
-            merged_settings = deep_merge(new_settings, current_settings_copy)
-
-            # Optional: Add validation logic here if needed after merge
-            # e.g., validate directory paths in merged_settings
+            with self._lock:
+                previous = self._snapshot
+                merged_settings = merge_copy_on_write(new_settings, previous)
+                self._snapshot = merged_settings
+                listeners = list(self._listeners)
 
-            # Save the fully merged settings
-            if self._save_settings(merged_settings):
-                 # If save is successful, update the live settings object
-                 self.settings = merged_settings
-                 return True
-            else:
-                 # If save fails, the live self.settings remains unchanged
-                 return False
+            self._writer.schedule(merged_settings)
+            self._notify(listeners, previous, merged_settings)
+            return True
 
         except Exception as e:
             self.logger.log_error(f"Error updating multiple settings: {str(e)}")
@@ -343,11 +394,48 @@ class SettingsManager:
             return False
     
     def save_settings(self) -> bool:
-        """Public method to save current settings to file."""
+        """Public method to save current settings to file (debounced write-behind)."""
         try:
-            self.logger.log_step("Saving settings to file")
-            return self._save_settings(self.settings)
+            self._writer.schedule(self._snapshot)
+            return True
         except Exception as e:
             self.logger.log_error(f"Error in save_settings: {str(e)}")
             self.logger.log_error(traceback.format_exc())
-            return False
\ No newline at end of file
+            return False
+
+    def flush(self) -> bool:
+        """Write any pending settings change to disk immediately (e.g. on shutdown)."""
+        return self._writer.flush()
+
+    def subscribe(self, listener: SettingsListener, keys: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        Register ``listener(snapshot, changed_keys)`` for settings changes.
+
+        ``keys`` limits notifications to changes of those top-level keys.
+        Listeners run synchronously on the updating thread and must be cheap.
+        Returns a function that removes the listener.
+        """
+        entry = (listener, set(keys) if keys is not None else None)
+        with self._lock:
+            self._listeners.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._listeners:
+                    self._listeners.remove(entry)
+        return unsubscribe
+
+    def _notify(self, listeners, previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+        if not listeners:
+            return
+        # Unchanged branches are shared between snapshots, so identity is enough
+        changed = {key for key in previous.keys() | current.keys() if previous.get(key) is not current.get(key)}
+        if not changed:
+            return
+        for listener, keys in listeners:
+            if keys is not None and not (keys & changed):
+                continue
+            try:
+                listener(current, changed)
+            except Exception as e:
+                self.logger.log_error(f"Settings listener failed: {e}")
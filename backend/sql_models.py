@@ -240,6 +240,21 @@ class ChatSession(Base):
     character = relationship("Character") # Add back_populates if Character links to ChatSessions
     user_profile = relationship("UserProfile", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="chat_session", cascade="all, delete-orphan")
+    logit_shaper_state = relationship("LogitShaperState", uselist=False, cascade="all, delete-orphan")
+
+
+class LogitShaperState(Base):
+    """
+    Snapshot of a chat session's LogitShaper (rolling word window and active bans).
+    Rebuildable from the session's messages, so it survives restarts without
+    being source-of-truth data.
+    """
+    __tablename__ = "logit_shaper_states"
+    __table_args__ = {'extend_existing': True}
+
+    chat_session_uuid = Column(String, ForeignKey("chat_sessions.chat_session_uuid"), primary_key=True)
+    state_json = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class UserProfileCard(Base):
@@ -314,13 +329,54 @@ class WorldUserProgress(Base):
     player_inventory_json = Column(JSON, nullable=True)  # CharacterInventory
     ally_inventory_json = Column(JSON, nullable=True)  # CharacterInventory
     room_states_json = Column(JSON, nullable=True)  # Record<string, RoomInstanceState>
+    # npc_relationships_json and room_states_json are legacy: that state now lives
+    # one row per entity in world_npc_relationships / world_room_states
 
     # Metadata
+    version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped on every write
     last_played_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class WorldNpcRelationship(Base):
+    """
+    One NPC's relationship state within a world playthrough.
+    Split out of world_user_progress so a save only touches the NPCs that changed.
+    """
+    __tablename__ = "world_npc_relationships"
+    __table_args__ = (
+        UniqueConstraint('world_uuid', 'user_uuid', 'npc_uuid', name='_world_npc_relationship_uc'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    world_uuid = Column(String, nullable=False)
+    user_uuid = Column(String, nullable=False)
+    npc_uuid = Column(String, nullable=False)
+    data_json = Column(JSON, nullable=False)  # NPCRelationship
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class WorldRoomState(Base):
+    """
+    One room's instance state (NPC alive/dead, etc.) within a world playthrough.
+    Split out of world_user_progress so a save only touches the rooms that changed.
+    """
+    __tablename__ = "world_room_states"
+    __table_args__ = (
+        UniqueConstraint('world_uuid', 'user_uuid', 'room_uuid', name='_world_room_state_uc'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    world_uuid = Column(String, nullable=False)
+    user_uuid = Column(String, nullable=False)
+    room_uuid = Column(String, nullable=False)
+    data_json = Column(JSON, nullable=False)  # RoomInstanceState
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class AdventureLogEntry(Base):
     """
     Stores room visit summaries for adventure continuity.
@@ -43,7 +43,10 @@ def smoke_engine():
 
 @pytest.fixture(scope="session")
 def smoke_session_factory(smoke_engine):
-    return sessionmaker(bind=smoke_engine, autocommit=False, autoflush=False)
+    factory = sessionmaker(bind=smoke_engine, autocommit=False, autoflush=False)
+    # Keep generation-keyed response caches honest for the in-memory DB too
+    db_module.track_db_generation(smoke_engine, factory)
+    return factory
 
 
 # ---------------------------------------------------------------------------
@@ -23,6 +23,13 @@ class TestHealth:
         assert body["status"] == "healthy"
         assert "version" in body
 
+    def test_readiness_reports_warmup(self, client):
+        r = client.get("/api/health/ready")
+        assert r.status_code in (200, 503)
+        body = r.json()
+        assert "ready" in body
+        assert "phases" in body
+
 
 # ── Settings ────────────────────────────────────────────────────────────────
 
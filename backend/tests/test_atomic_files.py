@@ -0,0 +1,75 @@
+"""
+Tests for atomic_files.py.
+
+Covers:
+- atomic_write_bytes/atomic_write_text replace the target and create parents
+- A failed write or replace keeps the previous file and removes the temp file
+- replace_with_retry retries a locked target, then gives up
+"""
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.utils import atomic_files
+from backend.utils.atomic_files import atomic_open, atomic_write_bytes, atomic_write_text, replace_with_retry
+
+
+def test_writes_replace_target_and_create_parents(tmp_path):
+    target = tmp_path / "nested" / "dir" / "data.json"
+    atomic_write_text(target, "first")
+    atomic_write_bytes(target, b"second")
+
+    assert target.read_bytes() == b"second"
+    assert list(target.parent.iterdir()) == [target]
+
+
+def test_error_while_writing_keeps_previous_file(tmp_path):
+    target = tmp_path / "manifest.jsonl"
+    atomic_write_text(target, "old\n")
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(target, "w", encoding="utf-8") as f:
+            f.write("half a line")
+            raise RuntimeError("interrupted")
+
+    assert target.read_text(encoding="utf-8") == "old\n"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_failed_replace_removes_temp_file(tmp_path):
+    target = tmp_path / "settings.json"
+    atomic_write_text(target, "{}")
+
+    with patch("backend.utils.atomic_files.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            atomic_write_text(target, '{"theme": "neon"}')
+
+    assert target.read_text(encoding="utf-8") == "{}"
+    assert list(tmp_path.glob(".settings.*.tmp")) == []
+
+
+def test_replace_retries_locked_target(tmp_path, monkeypatch):
+    monkeypatch.setattr(atomic_files, "REPLACE_RETRY_SECONDS", 0)
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.write_text("new")
+    real_replace = atomic_files.os.replace
+    calls = []
+
+    def locked_twice(a, b):
+        calls.append(a)
+        if len(calls) <= 2:
+            raise PermissionError("locked by indexer")
+        real_replace(a, b)
+
+    with patch("backend.utils.atomic_files.os.replace", side_effect=locked_twice):
+        replace_with_retry(src, dst)
+    assert dst.read_text() == "new" and len(calls) == 3
+
+    src.write_text("newer")
+    with patch("backend.utils.atomic_files.os.replace", side_effect=PermissionError("locked")):
+        with pytest.raises(PermissionError):
+            replace_with_retry(src, dst, attempts=2)
@@ -3,11 +3,13 @@ import pytest
 from pathlib import Path
 import json
 import io
-import base64 
-from unittest.mock import MagicMock, call, mock_open
+import os
+from unittest.mock import MagicMock, mock_open
 
 # Modules to test
 from backend import batch_converter
+from backend.character_validator import CharacterValidator
+from backend.png_metadata_handler import PngMetadataHandler
 from PIL import Image 
 
 # Helper to create a dummy image bytes
@@ -18,456 +20,171 @@ def create_dummy_image_bytes(format="PNG"):
     img_byte_arr = img_byte_arr.getvalue()
     return img_byte_arr
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def mock_dependencies(mocker):
-    """Mocks dependencies used in batch_converter.py"""
+    """Mocks dependencies used in batch_converter.py (main() tests)"""
     mocker.patch('backend.batch_converter.LogManager', return_value=MagicMock())
     mocker.patch('backend.batch_converter.PngMetadataHandler', return_value=MagicMock())
     mocker.patch('backend.batch_converter.CharacterValidator', return_value=MagicMock())
 
-    batch_converter.logger = batch_converter.LogManager()
-    batch_converter.png_handler = batch_converter.PngMetadataHandler(batch_converter.logger)
-    batch_converter.validator = batch_converter.CharacterValidator(batch_converter.logger)
+    mocker.patch.object(batch_converter, 'logger', batch_converter.LogManager())
+    mocker.patch.object(batch_converter, 'png_handler', batch_converter.PngMetadataHandler(batch_converter.logger))
+    mocker.patch.object(batch_converter, 'validator', batch_converter.CharacterValidator(batch_converter.logger))
 
     mocker.patch('builtins.open', new_callable=mock_open)
-    
-    default_mock_img = MagicMock(spec=Image.Image)
-    default_mock_img.format = "PNG" 
-    default_mock_img.convert = MagicMock(return_value=default_mock_img)
-    default_mock_img.save = MagicMock() 
-    default_mock_img.__enter__ = MagicMock(return_value=default_mock_img) 
-    default_mock_img.__exit__ = MagicMock(return_value=None)
-    mocker.patch('PIL.Image.open', return_value=default_mock_img) 
-    
-    mocker.patch('json.load', return_value={})
-    mocker.patch('json.dumps', return_value="{}")
-    mocker.patch('base64.b64encode', return_value=b"e30=") 
     mocker.patch('sys.exit', side_effect=SystemExit) 
     mocker.patch('builtins.print')
     mocker.patch('builtins.input') 
     mocker.patch('argparse.ArgumentParser.parse_known_args')
 
 @pytest.fixture
-def temp_char_dir(tmp_path):
-    char_dir = tmp_path / "TestChar"
-    char_dir.mkdir()
+def converter(mocker):
+    """Real handler and validator writing real files; the logger is a mock to assert on."""
+    logger = MagicMock()
+    mocker.patch.object(batch_converter, 'logger', logger)
+    mocker.patch.object(batch_converter, 'png_handler', PngMetadataHandler(logger))
+    mocker.patch.object(batch_converter, 'validator', CharacterValidator(logger))
+    return logger
+
+def write_character(char_dir, name=None, image_name="image1.jpg", json_name=None, image_format="JPEG",
+                    description="A test character."):
+    char_dir.mkdir(parents=True, exist_ok=True)
+    name = name or char_dir.name
+    json_name = json_name or f"v2Import_{char_dir.name}.json"
+    card = {"spec": "chara_card_v2", "spec_version": "2.0", "data": {"name": name, "description": description}}
+    (char_dir / json_name).write_text(json.dumps(card), encoding="utf-8")
+    if image_name:
+        Image.new('RGB', (60, 30), color='red').save(char_dir / image_name, format=image_format)
     return char_dir
 
+def read_card(png_path):
+    return PngMetadataHandler(MagicMock()).read_metadata(str(png_path))
+
+@pytest.fixture
+def temp_char_dir(tmp_path):
+    return tmp_path / "TestChar"
+
 # Tests for process_character_directory
-def test_process_character_directory_success(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.jpg"
-    png_path = temp_char_dir / f"{char_name}.png"
-
-    def mock_glob_side_effect(instance_path, pattern_arg): 
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return [] 
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name, "description": "A test character."}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-
-    mock_img_obj_for_this_test = MagicMock(spec=Image.Image) 
-    mock_img_obj_for_this_test.format = "JPEG" 
-    mock_img_obj_for_this_test.convert = MagicMock(return_value=mock_img_obj_for_this_test)
-    mock_img_obj_for_this_test.save = MagicMock() 
-    mock_img_obj_for_this_test.__enter__ = MagicMock(return_value=mock_img_obj_for_this_test) 
-    mock_img_obj_for_this_test.__exit__ = MagicMock(return_value=None)      
-    pil_image_open_mock = mocker.patch('PIL.Image.open', return_value=mock_img_obj_for_this_test)
-    
-    dummy_png_bytes = create_dummy_image_bytes()
-    batch_converter.png_handler.write_metadata.return_value = dummy_png_bytes
-    
-    mock_open_instance = mock_open()
-    mocker.patch('builtins.open', mock_open_instance)
+def test_process_character_directory_success(converter, temp_char_dir):
+    write_character(temp_char_dir)
+    png_path = temp_char_dir / "TestChar.png"
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
     assert result == "success"
-    pil_image_open_mock.assert_called_once_with(image_path) 
-    mock_img_obj_for_this_test.convert.assert_called_once_with("RGBA") 
-    batch_converter.png_handler.write_metadata.assert_called_once()
-    mock_open_instance.assert_any_call(png_path, "wb")
-    mock_open_instance().write.assert_called_once_with(dummy_png_bytes)
-
-def test_process_character_directory_success_png_image_no_conversion(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.png" 
-    png_path = temp_char_dir / f"{char_name}.png"
-
-    def mock_glob_side_effect_png(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return []
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return [image_path]
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_png, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name, "description": "A test character."}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-
-    mock_img_obj_local = MagicMock(spec=Image.Image)
-    mock_img_obj_local.format = "PNG" 
-    mock_img_obj_local.convert = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__enter__ = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_local)
-    
-    dummy_png_bytes = create_dummy_image_bytes()
-    batch_converter.png_handler.write_metadata.return_value = dummy_png_bytes
-    
-    mock_open_instance = mock_open()
-    mocker.patch('builtins.open', mock_open_instance)
+    assert read_card(png_path)["data"]["name"] == "TestChar"
+    with Image.open(png_path) as img:
+        assert img.format == "PNG" and img.mode == "RGBA" and img.size == (60, 30)
+    assert not list(temp_char_dir.glob(".*.tmp"))
+    converter.log_step.assert_any_call(f"Processed TestChar successfully: {png_path}")
+
+def test_process_character_directory_encodes_once(mocker, converter, temp_char_dir):
+    write_character(temp_char_dir)
+    save_spy = mocker.spy(Image.Image, "save")
+    write_metadata = mocker.spy(batch_converter.png_handler, "write_metadata")
+
+    assert batch_converter.process_character_directory(temp_char_dir, quiet_mode=True) == "success"
+
+    assert save_spy.call_count == 1
+    write_metadata.assert_not_called()
+
+def test_process_character_directory_success_png_image_no_conversion(converter, temp_char_dir):
+    write_character(temp_char_dir, image_name="image1.png", image_format="PNG")
+    png_path = temp_char_dir / "TestChar.png"
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
     assert result == "success"
-    batch_converter.logger.log_step.assert_any_call(f"Processed {char_name} successfully: {png_path}")
-    mock_img_obj_local.convert.assert_not_called() 
-    batch_converter.png_handler.write_metadata.assert_called_once()
-    mock_open_instance.assert_any_call(png_path, "wb")
-    mock_open_instance().write.assert_called_once_with(dummy_png_bytes)
-
-def test_process_character_directory_skip_no_json(mocker, temp_char_dir):
-    char_name = "TestChar"
-    image_path = temp_char_dir / "image1.jpg"
-    def mock_glob_side_effect_no_json(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return []
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_no_json, autospec=True)
+    converter.log_step.assert_any_call(f"Processed TestChar successfully: {png_path}")
+    assert not any("Converting" in c.args[0] for c in converter.log_step.call_args_list)
+    with Image.open(png_path) as img:
+        assert img.mode == "RGB"
+    assert read_card(png_path)["data"]["name"] == "TestChar"
+
+def test_process_character_directory_ignores_previous_output(converter, temp_char_dir):
+    write_character(temp_char_dir, image_name="avatar.png", image_format="PNG")
+    Image.new('RGB', (5, 5), color='blue').save(temp_char_dir / "TestChar.png")
+
+    assert batch_converter.process_character_directory(temp_char_dir, quiet_mode=True) == "success"
+    with Image.open(temp_char_dir / "TestChar.png") as img:
+        assert img.size == (60, 30)
+
+def test_process_character_directory_skip_no_json(converter, temp_char_dir):
+    temp_char_dir.mkdir()
+    Image.new('RGB', (4, 4)).save(temp_char_dir / "image1.jpg")
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
     assert result == "skipped"
-    batch_converter.logger.log_warning.assert_called_once_with(f"Skipping {char_name}: Missing JSON or image file")
-
-def test_process_character_directory_skip_no_image(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    def mock_glob_side_effect_no_image(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return []
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_no_image, autospec=True)
+    converter.log_warning.assert_called_once_with("Skipping TestChar: Missing JSON or image file")
+
+def test_process_character_directory_skip_no_image(converter, temp_char_dir):
+    write_character(temp_char_dir, image_name=None)
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
     assert result == "skipped"
-    batch_converter.logger.log_warning.assert_called_once_with(f"Skipping {char_name}: Missing JSON or image file")
+    converter.log_warning.assert_called_once_with("Skipping TestChar: Missing JSON or image file")
 
-def test_process_character_directory_name_mismatch_warning(mocker, temp_char_dir):
-    dir_actual_name = "TestCharDirName" 
-    metadata_char_name = "TestCharMetadataName" 
-    
-    mock_char_dir_obj = MagicMock(spec=Path)
-    mock_char_dir_obj.name = dir_actual_name
-    
-    json_file_mock = MagicMock(spec=Path)
-    json_file_mock.name = f"v2Import_{dir_actual_name}.json"
-    
-    image_file_mock = MagicMock(spec=Path)
-    image_file_mock.name = "image1.jpg"
-
-    def truediv_side_effect(self_obj, other): 
-        new_mock = MagicMock(spec=Path)
-        new_mock.name = str(other) 
-        new_mock.__str__.return_value = f"{self_obj}/{other}" 
-        return new_mock
-    mock_char_dir_obj.__truediv__ = truediv_side_effect 
-    
-    def glob_side_effect(pattern):
-        if pattern == "*.json": return [json_file_mock]
-        if pattern == "*.jpg": return [image_file_mock]
-        if pattern == "*.jpeg": return []
-        if pattern == "*.png": return []
-        return []
-    mock_char_dir_obj.glob.side_effect = glob_side_effect
-    
-    mock_json_data_raw = {"name": metadata_char_name, "description": "A test character."} 
-    mock_json_data_normalized = {"data": {"name": metadata_char_name, "description": "A test character."}}
-    mocker.patch('json.load', return_value=mock_json_data_raw)
-    batch_converter.validator.normalize.return_value = mock_json_data_normalized
-
-    mock_img_obj_local = MagicMock(spec=Image.Image)
-    mock_img_obj_local.format = "JPEG"
-    mock_img_obj_local.convert = MagicMock(return_value=mock_img_obj_local)
-    mock_img_obj_local.__enter__ = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_local)
-    
-    batch_converter.png_handler.write_metadata.return_value = create_dummy_image_bytes()
-    mocker.patch('builtins.open', mock_open())
+def test_process_character_directory_name_mismatch_warning(converter, tmp_path):
+    char_dir = write_character(tmp_path / "TestCharDirName", name="TestCharMetadataName")
 
-    result = batch_converter.process_character_directory(mock_char_dir_obj, quiet_mode=True)
+    result = batch_converter.process_character_directory(char_dir, quiet_mode=True)
 
-    assert result == "success" 
-    batch_converter.logger.log_warning.assert_any_call(
-        f"Character name mismatch in {mock_char_dir_obj}: "
-        f"Directory: {dir_actual_name}, Metadata: {metadata_char_name}"
+    assert result == "success"
+    converter.log_warning.assert_any_call(
+        f"Character name mismatch in {char_dir}: "
+        f"Directory: TestCharDirName, Metadata: TestCharMetadataName"
     )
 
-def test_process_character_directory_prioritize_v2import_json(mocker, temp_char_dir):
-    char_name = "TestChar"
-    v2_json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    other_json_path = temp_char_dir / "other.json"
-    image_path = temp_char_dir / "image1.jpg"
-
-    def mock_glob_side_effect_v2import(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [other_json_path, v2_json_path]
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_v2import, autospec=True)
-
-    v2_data_content = {"data": {"name": char_name, "source": "v2Import"}}
-
-    mock_open_instance = mock_open()
-    mocker.patch('builtins.open', mock_open_instance)
-    
-    mocker.patch('json.load', return_value=v2_data_content) 
-
-    batch_converter.validator.normalize.return_value = v2_data_content 
-    mock_img_obj_local = MagicMock(spec=Image.Image) 
-    mock_img_obj_local.format = "JPEG"
-    mock_img_obj_local.convert = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__enter__ = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_local)
-    batch_converter.png_handler.write_metadata.return_value = create_dummy_image_bytes()
+def test_process_character_directory_prioritize_v2import_json(converter, temp_char_dir):
+    write_character(temp_char_dir, json_name="other.json", description="other")
+    write_character(temp_char_dir, description="v2Import")
 
     batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
-    mock_open_instance.assert_any_call(v2_json_path, "r", encoding="utf-8")
-    json.load.assert_called_once()
-    batch_converter.validator.normalize.assert_called_once_with(v2_data_content)
-
-
-def test_process_character_directory_prioritize_image1_jpg(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image1_jpg_path = temp_char_dir / "image1.jpg"
-    other_image_path = temp_char_dir / "other.jpg"
-
-    def mock_glob_side_effect_image1(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return [other_image_path, image1_jpg_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_image1, autospec=True)
-
-    mock_json_data = {"data": {"name": char_name}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-    
-    mock_pil_image_local = MagicMock(spec=Image.Image, format="JPEG")
-    mock_pil_image_local.convert = MagicMock(return_value=mock_pil_image_local)
-    mock_pil_image_local.__enter__ = MagicMock(return_value=mock_pil_image_local) 
-    mock_pil_image_local.__exit__ = MagicMock(return_value=None)      
-    mock_img_open = mocker.patch('PIL.Image.open', return_value=mock_pil_image_local) 
-    batch_converter.png_handler.write_metadata.return_value = create_dummy_image_bytes()
-    mocker.patch('builtins.open', mock_open())
-
-    batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
+    assert read_card(temp_char_dir / "TestChar.png")["data"]["description"] == "v2Import"
 
-    mock_img_open.assert_called_once_with(image1_jpg_path)
+def test_process_character_directory_prioritize_image1_jpg(converter, temp_char_dir):
+    write_character(temp_char_dir)
+    Image.new('RGB', (7, 7), color='green').save(temp_char_dir / "other.jpg")
 
+    batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
-def test_process_character_directory_png_handler_fails_alternative_succeeds(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.png"
-    png_path = temp_char_dir / f"{char_name}.png"
+    with Image.open(temp_char_dir / "TestChar.png") as img:
+        assert img.size == (60, 30)
 
-    def mock_glob_side_effect_alt_succeeds(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return []
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return [image_path]
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_alt_succeeds, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-
-    mock_img_obj_for_alt_path = MagicMock(spec=Image.Image, format="PNG")
-    mock_img_obj_for_alt_path.convert = MagicMock(return_value=mock_img_obj_for_alt_path)
-    mock_img_obj_for_alt_path.save = MagicMock() 
-    mock_img_obj_for_alt_path.__enter__ = MagicMock(return_value=mock_img_obj_for_alt_path) 
-    mock_img_obj_for_alt_path.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_for_alt_path) 
-    
-    batch_converter.png_handler.write_metadata.side_effect = Exception("PNG Handler Failed")
-    
-    mock_png_info_instance = MagicMock()
-    mocker.patch('PIL.PngImagePlugin.PngInfo', return_value=mock_png_info_instance)
-    mock_b64encode_global = mocker.patch('base64.b64encode', return_value=b'encoded_metadata')
-    mocker.patch('json.dumps', return_value='{"data": {"name": "TestChar"}}')
+def test_process_character_directory_json_load_fails(converter, temp_char_dir):
+    write_character(temp_char_dir)
+    (temp_char_dir / "v2Import_TestChar.json").write_text("{not json", encoding="utf-8")
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
-    assert result == "success"
-    batch_converter.logger.log_step.assert_any_call("Attempting alternative approach for PNG metadata")
-    batch_converter.logger.log_step.assert_any_call(f"Processed {char_name} using alternative method: {png_path}")
-    
-    json.dumps.assert_called_once_with(mock_json_data)
-    mock_b64encode_global.assert_called_once_with('{"data": {"name": "TestChar"}}'.encode('utf-8'))
-    mock_png_info_instance.add_text.assert_called_once_with('chara', 'encoded_metadata')
-    mock_img_obj_for_alt_path.save.assert_any_call(png_path, "PNG", pnginfo=mock_png_info_instance)
-
-
-def test_process_character_directory_all_handlers_fail(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.png"
-
-    def mock_glob_side_effect_all_fail(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return []
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return [image_path]
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_all_fail, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-
-    mock_img_obj_for_fail_path = MagicMock(spec=Image.Image, format="PNG")
-    mock_img_obj_for_fail_path.convert = MagicMock(return_value=mock_img_obj_for_fail_path)
-    
-    save_call_count = 0
-    def custom_save_side_effect(target_path_or_buffer, format=None, pnginfo=None, **kwargs):
-        nonlocal save_call_count
-        save_call_count += 1
-        if isinstance(target_path_or_buffer, io.BytesIO) and save_call_count == 1: # First call (buffer)
-            # This call should happen inside the first try block for png_handler
-            return None 
-        elif pnginfo is not None: # This identifies the call from the alternative method
-            raise Exception("Alternative Save Failed")
-        return None # Should not be reached if logic is correct
-    mock_img_obj_for_fail_path.save = MagicMock(side_effect=custom_save_side_effect)
-     
-    mock_img_obj_for_fail_path.__enter__ = MagicMock(return_value=mock_img_obj_for_fail_path) 
-    mock_img_obj_for_fail_path.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_for_fail_path) 
-    
-    batch_converter.png_handler.write_metadata.side_effect = Exception("PNG Handler Failed")
-    mocker.patch('PIL.PngImagePlugin.PngInfo', return_value=MagicMock())
-
-    result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
+    assert result == "failed"
+    assert not (temp_char_dir / "TestChar.png").exists()
+    logged_errors = [c.args[0] for c in converter.log_error.call_args_list]
+    assert any(e.startswith("Error processing TestChar: Expecting property name") for e in logged_errors)
 
-    assert result == "failed" 
-    
-    logged_errors = [c.args[0] for c in batch_converter.logger.log_error.call_args_list]
-    assert "PNG metadata error: PNG Handler Failed" in logged_errors
-    assert "Alternative method also failed: Alternative Save Failed" in logged_errors
-
-
-def test_process_character_directory_json_load_fails(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.jpg"
-
-    def mock_glob_side_effect_json_fail(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_json_fail, autospec=True)
-    
-    mocker.patch('json.load', side_effect=json.JSONDecodeError("Error", "doc", 0))
-    mocker.patch('builtins.open', mock_open())
+def test_process_character_directory_image_open_fails(converter, temp_char_dir):
+    write_character(temp_char_dir)
+    (temp_char_dir / "image1.jpg").write_bytes(b"not an image")
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
 
     assert result == "failed"
-    batch_converter.logger.log_error.assert_any_call(f"Error processing {char_name}: Error: line 1 column 1 (char 0)")
-
-
-def test_process_character_directory_image_open_fails(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.jpg"
-
-    def mock_glob_side_effect_img_open_fail(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_img_open_fail, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-    mocker.patch('builtins.open', mock_open())
-    mocker.patch('PIL.Image.open', side_effect=FileNotFoundError("Cannot open image")) 
-
-    result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=True)
+    logged_errors = [c.args[0] for c in converter.log_error.call_args_list]
+    assert any(e.startswith("Error processing TestChar: cannot identify image file") for e in logged_errors)
 
-    assert result == "failed"
-    batch_converter.logger.log_error.assert_any_call(f"Error processing {char_name}: Cannot open image")
-
-def test_process_character_directory_quiet_mode_false_prints_output(mocker, temp_char_dir):
-    char_name = "TestChar"
-    json_path = temp_char_dir / f"v2Import_{char_name}.json"
-    image_path = temp_char_dir / "image1.jpg" 
-    png_path = temp_char_dir / f"{char_name}.png"
-
-    def mock_glob_side_effect_quiet_false(instance_path, pattern_arg):
-        if instance_path == temp_char_dir:
-            if pattern_arg == "*.json": return [json_path]
-            if pattern_arg == "*.jpg": return [image_path]
-            if pattern_arg == "*.jpeg": return []
-            if pattern_arg == "*.png": return []
-        return []
-    mocker.patch('pathlib.Path.glob', side_effect=mock_glob_side_effect_quiet_false, autospec=True)
-    
-    mock_json_data = {"data": {"name": char_name}}
-    mocker.patch('json.load', return_value=mock_json_data)
-    batch_converter.validator.normalize.return_value = mock_json_data
-
-    mock_img_obj_local = MagicMock(spec=Image.Image, format="JPEG") 
-    mock_img_obj_local.convert = MagicMock(return_value=mock_img_obj_local)
-    mock_img_obj_local.__enter__ = MagicMock(return_value=mock_img_obj_local) 
-    mock_img_obj_local.__exit__ = MagicMock(return_value=None)      
-    mocker.patch('PIL.Image.open', return_value=mock_img_obj_local) 
-    
-    batch_converter.png_handler.write_metadata.return_value = create_dummy_image_bytes()
-    mocker.patch('builtins.open', mock_open())
+def test_process_character_directory_quiet_mode_false_prints_output(mocker, converter, temp_char_dir):
+    write_character(temp_char_dir)
+    png_path = temp_char_dir / "TestChar.png"
     mock_print = mocker.patch('builtins.print')
 
     result = batch_converter.process_character_directory(temp_char_dir, quiet_mode=False)
 
     assert result == "success"
-    mock_print.assert_any_call(f"Converting {image_path.name} to PNG format")
-    mock_print.assert_any_call(f"Processed {char_name} successfully: {png_path}")
+    mock_print.assert_any_call("Converting image1.jpg to PNG format")
+    mock_print.assert_any_call(f"Processed TestChar successfully: {png_path}")
 
 @pytest.fixture
 def temp_backup_dir(tmp_path):
@@ -475,85 +192,122 @@ def temp_backup_dir(tmp_path):
     backup_dir.mkdir()
     return backup_dir
 
-def test_process_subdirectories_no_dirs(mocker, temp_backup_dir):
-    def mock_iterdir_side_effect_no_dirs(instance_path):
-        if instance_path == temp_backup_dir:
-            return iter([])
-        return iter([]) 
-    mocker.patch('pathlib.Path.iterdir', side_effect=mock_iterdir_side_effect_no_dirs, autospec=True)
+def manifest_entries(backup_dir):
+    lines = (backup_dir / batch_converter.MANIFEST_NAME).read_text(encoding="utf-8").splitlines()
+    return {entry["dir"]: entry for entry in map(json.loads, lines)}
+
+def test_process_subdirectories_no_dirs(mocker, converter, temp_backup_dir):
     mock_print = mocker.patch('builtins.print')
 
     batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=False)
 
-    batch_converter.logger.log_step.assert_any_call(f"Starting batch processing in: {temp_backup_dir}")
+    converter.log_step.assert_any_call(f"Starting batch processing in: {temp_backup_dir}")
     summary_msg = "Processing complete: 0 successful, 0 skipped, 0 failed out of 0 directories"
-    batch_converter.logger.log_step.assert_any_call(summary_msg)
+    converter.log_step.assert_any_call(summary_msg)
     mock_print.assert_any_call("\n" + summary_msg)
 
-def test_process_subdirectories_multiple_dirs(mocker, temp_backup_dir):
-    mock_char_dir1 = MagicMock(spec=Path)
-    mock_char_dir1.is_dir.return_value = True
-    mock_char_dir1.name = "Char1"
-
-    mock_char_dir2 = MagicMock(spec=Path)
-    mock_char_dir2.is_dir.return_value = True
-    mock_char_dir2.name = "Char2"
-
-    mock_char_dir3 = MagicMock(spec=Path)
-    mock_char_dir3.is_dir.return_value = True
-    mock_char_dir3.name = "Char3"
-    
-    mock_file = MagicMock(spec=Path)
-    mock_file.is_dir.return_value = False 
-
-    def mock_iterdir_side_effect_multiple(instance_path):
-        if instance_path == temp_backup_dir:
-            return iter([mock_char_dir1, mock_file, mock_char_dir2, mock_char_dir3])
-        return iter([])
-    mocker.patch('pathlib.Path.iterdir', side_effect=mock_iterdir_side_effect_multiple, autospec=True)
-    
-    mock_process_char_dir = mocker.patch('backend.batch_converter.process_character_directory', 
-                                         side_effect=["success", "skipped", "failed"])
+def test_process_subdirectories_multiple_dirs(mocker, converter, temp_backup_dir):
+    write_character(temp_backup_dir / "Char1")
+    write_character(temp_backup_dir / "Char2", image_name=None)
+    write_character(temp_backup_dir / "Char3")
+    (temp_backup_dir / "Char3" / "image1.jpg").write_bytes(b"broken")
+    (temp_backup_dir / "notes.txt").write_text("not a directory")
     mock_print = mocker.patch('builtins.print')
 
-    batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=False)
-
-    assert mock_process_char_dir.call_count == 3
-    mock_process_char_dir.assert_any_call(mock_char_dir1, False)
-    mock_process_char_dir.assert_any_call(mock_char_dir2, False)
-    mock_process_char_dir.assert_any_call(mock_char_dir3, False)
+    summary = batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=False, workers=1)
 
     summary_msg = "Processing complete: 1 successful, 1 skipped, 1 failed out of 3 directories"
-    batch_converter.logger.log_step.assert_any_call(summary_msg)
+    converter.log_step.assert_any_call(summary_msg)
     mock_print.assert_any_call("\n" + summary_msg)
-
-def test_process_subdirectories_exception_in_processing(mocker, temp_backup_dir):
-    mock_char_dir1 = MagicMock(spec=Path, name="Char1Path")
-    mock_char_dir1.is_dir.return_value = True
-    mock_char_dir1.name = "Char1" 
-
-    def mock_iterdir_side_effect_exception(instance_path):
-        if instance_path == temp_backup_dir:
-            return iter([mock_char_dir1])
-        return iter([])
-    mocker.patch('pathlib.Path.iterdir', side_effect=mock_iterdir_side_effect_exception, autospec=True)
-    
-    mock_process_char_dir = mocker.patch('backend.batch_converter.process_character_directory', 
-                                         side_effect=Exception("Big error!"))
+    assert (summary["done"], summary["success"], summary["skipped"], summary["failed"]) == (3, 1, 1, 1)
+
+    entries = manifest_entries(temp_backup_dir)
+    assert {name: e["status"] for name, e in entries.items()} == {
+        "Char1": "success", "Char2": "skipped", "Char3": "failed"}
+    assert entries["Char1"]["output"] == "Char1.png" and len(entries["Char1"]["source_hash"]) == 64
+
+def test_process_subdirectories_resumes_from_manifest(mocker, converter, temp_backup_dir):
+    for name in ("Char1", "Char2", "Char3"):
+        write_character(temp_backup_dir / name)
+    (temp_backup_dir / "Char3" / "image1.jpg").write_bytes(b"broken")
+    batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=True, workers=1)
+
+    # Touched but identical (hash match), edited, and fixed since the first run
+    image = temp_backup_dir / "Char1" / "image1.jpg"
+    os.utime(image, ns=(image.stat().st_atime_ns, image.stat().st_mtime_ns + 10**9))
+    write_character(temp_backup_dir / "Char2", description="edited")
+    write_character(temp_backup_dir / "Char3")
+    # An interrupted append leaves a torn line behind
+    with open(temp_backup_dir / batch_converter.MANIFEST_NAME, "a", encoding="utf-8") as f:
+        f.write('{"version": 1, "dir": "Cha')
+    convert = mocker.spy(batch_converter.png_handler, "encode_card_image")
+
+    summary = batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=True, workers=1)
+
+    assert (summary["success"], summary["unchanged"], summary["failed"]) == (2, 1, 0)
+    assert convert.call_count == 2
+    assert read_card(temp_backup_dir / "Char2" / "Char2.png")["data"]["description"] == "edited"
+    converter.log_step.assert_any_call(
+        "Processing complete: 2 successful, 0 skipped, 0 failed out of 3 directories (1 unchanged since the last run)")
+    # Compacted to one line per directory
+    lines = (temp_backup_dir / batch_converter.MANIFEST_NAME).read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+
+    # Nothing left to do; the manifest entry is reused without even hashing
+    summary = batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=True, workers=1)
+    assert summary["unchanged"] == 3 and convert.call_count == 2
+
+def test_process_subdirectories_process_pool(converter, temp_backup_dir):
+    for i in range(6):
+        write_character(temp_backup_dir / f"Char{i}")
+    snapshots = []
+
+    summary = batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=True, workers=3,
+                                                     progress=snapshots.append)
+
+    assert summary["success"] == 6
+    assert snapshots[-1]["done"] == snapshots[-1]["total"] == 6
+    converter.log_step.assert_any_call("Converting 6 directories with 3 worker(s)")
+    for i in range(6):
+        assert read_card(temp_backup_dir / f"Char{i}" / f"Char{i}.png")["data"]["name"] == f"Char{i}"
+
+def test_pool_workers_log_to_console_only(mocker, converter, tmp_path):
+    """Workers never open log files; the parent's logger is only created when first used."""
+    mocker.patch.object(batch_converter.LogManager, '_get_base_dir', return_value=tmp_path)
+    mocker.patch('builtins.print')
+    pool = batch_converter._pool(2)
+    assert pool._initializer is batch_converter._init_worker
+    pool.shutdown()
+
+    batch_converter._init_worker()
+    worker_logger = batch_converter.logger
+    assert isinstance(worker_logger, batch_converter.LogManager)
+    assert worker_logger.log_filename is None
+    assert batch_converter.png_handler.logger is worker_logger
+    assert batch_converter.validator.logger is worker_logger
+    worker_logger.log_step("step")
+    worker_logger.log_error("error")
+    assert not (tmp_path / "logs").exists()
+
+    mocker.patch.object(batch_converter, 'logger', None)
+    parent_logger = batch_converter._components()
+    assert parent_logger.log_filename.parent == tmp_path / "logs"
+
+def test_process_subdirectories_exception_in_processing(mocker, converter, temp_backup_dir):
+    (temp_backup_dir / "Char1").mkdir()
+    mocker.patch('backend.batch_converter.convert_character_directory', side_effect=Exception("Big error!"))
     mock_print = mocker.patch('builtins.print')
-    mocker.patch('traceback.format_exc', return_value="Traceback details")
 
-    batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=False)
+    batch_converter.process_subdirectories(temp_backup_dir, quiet_mode=False, workers=1)
 
-    mock_process_char_dir.assert_called_once_with(mock_char_dir1, False)
-    batch_converter.logger.log_error.assert_any_call(f"Error processing Char1: Big error!")
-    batch_converter.logger.log_error.assert_any_call("Traceback details")
-    mock_print.assert_any_call(f"Error processing Char1: Big error!")
-    
+    converter.log_error.assert_any_call("Error processing Char1: Big error!")
+    mock_print.assert_any_call("Error processing Char1: Big error!")
     summary_msg = "Processing complete: 0 successful, 0 skipped, 1 failed out of 1 directories"
-    batch_converter.logger.log_step.assert_any_call(summary_msg)
+    converter.log_step.assert_any_call(summary_msg)
     mock_print.assert_any_call("\n" + summary_msg)
+    assert manifest_entries(temp_backup_dir)["Char1"]["error"] == "Big error!"
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_batch_mode_no_backup_dir(mocker):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -571,6 +325,7 @@ def test_main_batch_mode_no_backup_dir(mocker):
     batch_converter.sys.exit.assert_called_once_with(1) 
     mocked_builtins_input.assert_not_called() 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_batch_mode_no_backup_dir_exe_mode(mocker):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -588,6 +343,7 @@ def test_main_batch_mode_no_backup_dir_exe_mode(mocker):
     mocked_builtins_input.assert_called_once_with("Press Enter to exit...")
     batch_converter.sys.exit.assert_called_once_with(1) 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_backup_dir_not_exists(mocker):
     backup_dir_path_str = "/fake/backup"
     mock_args = MagicMock()
@@ -612,6 +368,7 @@ def test_main_backup_dir_not_exists(mocker):
     batch_converter.logger.log_error.assert_any_call(expected_error_print)
     batch_converter.sys.exit.assert_called_once_with(1)
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_backup_dir_is_file(mocker):
     backup_dir_path_str = "/fake/backup/file.txt"
     mock_args = MagicMock()
@@ -638,6 +395,7 @@ def test_main_backup_dir_is_file(mocker):
     batch_converter.sys.exit.assert_called_once_with(1)
 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_successful_run_dev_mode(mocker, temp_backup_dir):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -667,11 +425,12 @@ def test_main_successful_run_dev_mode(mocker, temp_backup_dir):
     mock_print.assert_any_call("Running in development mode")
     mock_print.assert_any_call(f"Processing directory: {temp_backup_dir}\n") 
     
-    mock_process_subdirs.assert_called_once_with(temp_backup_dir, False)
+    mock_process_subdirs.assert_called_once_with(temp_backup_dir, False, workers=mock_args.workers)
     mocked_builtins_input.assert_not_called() 
     batch_converter.sys.exit.assert_not_called()
 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_successful_run_exe_mode_quiet(mocker, temp_backup_dir):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -696,10 +455,11 @@ def test_main_successful_run_exe_mode_quiet(mocker, temp_backup_dir):
 
     assert not any("CardShark Batch Character Converter" in call_args[0][0] for call_args in mock_print.call_args_list if call_args[0])
 
-    mock_process_subdirs.assert_called_once_with(temp_backup_dir, True) 
+    mock_process_subdirs.assert_called_once_with(temp_backup_dir, True, workers=mock_args.workers) 
     mocked_builtins_input.assert_not_called() 
     batch_converter.sys.exit.assert_not_called()
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_successful_run_exe_mode_verbose_pause(mocker, temp_backup_dir):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -723,11 +483,12 @@ def test_main_successful_run_exe_mode_verbose_pause(mocker, temp_backup_dir):
     batch_converter.main()
 
     mock_print.assert_any_call("Running in executable mode")
-    mock_process_subdirs.assert_called_once_with(temp_backup_dir, False) 
+    mock_process_subdirs.assert_called_once_with(temp_backup_dir, False, workers=mock_args.workers) 
     mocked_builtins_input.assert_called_once_with("\nProcessing complete. Press Enter to exit...") 
     batch_converter.sys.exit.assert_not_called()
 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_not_batch_mode_and_not_main_dunder(mocker):
     mock_args = MagicMock()
     mock_args.batch = False 
@@ -745,6 +506,7 @@ def test_main_not_batch_mode_and_not_main_dunder(mocker):
     batch_converter.sys.exit.assert_not_called()
 
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_general_exception_handling(mocker, temp_backup_dir):
     mock_args = MagicMock()
     mock_args.batch = True
@@ -774,5 +536,6 @@ def test_main_general_exception_handling(mocker, temp_backup_dir):
     batch_converter.logger.log_error.assert_any_call("Main Traceback")
     batch_converter.sys.exit.assert_called_once_with(1)
 
+@pytest.mark.usefixtures("mock_dependencies")
 def test_main_guard_calls_main(mocker):
     pass
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Tests for the benchmark suite (benchmarks/).
+
+Covers:
+- Generators are deterministic and write readable card PNGs
+- Fake LLM server speaks the KoboldCPP and OpenAI streaming formats
+  the provider adapters parse, and honours abort
+- Every scenario runs at the tiny scale and reports timing stats
+- Baseline comparison flags median regressions
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_provider_adapters import KoboldCppAdapter, OpenAIAdapter
+from backend.png_metadata_handler import PngMetadataHandler
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+from benchmarks.generators import make_card, make_chat, make_lore_book, write_library
+from benchmarks.run import compare, main, run_benchmarks
+from benchmarks.scenarios import SCENARIOS
+
+
+class TestGenerators:
+    def test_deterministic(self):
+        assert make_card(3, seed=1) == make_card(3, seed=1)
+        assert make_card(3, seed=1) != make_card(4, seed=1)
+        assert make_lore_book(10) == make_lore_book(10)
+
+    def test_chat_ends_on_user(self):
+        chat = make_chat(7)
+        assert len(chat) == 7
+        assert chat[-1]["role"] == "user"
+        assert chat[-2]["role"] == "assistant"
+
+    def test_library_cards_round_trip(self, tmp_path):
+        handler = PngMetadataHandler(MagicMock())
+        paths = write_library(tmp_path, 3, handler, lore_every=2, lore_entries=5)
+        assert [p.name for p in paths] == ["card_00000.png", "card_00001.png", "card_00002.png"]
+        card = handler.read_metadata(str(paths[0]))
+        assert card["data"]["name"] == make_card(0)["data"]["name"]
+        assert len(card["data"]["character_book"]["entries"]) == 5
+        assert "character_book" not in handler.read_metadata(str(paths[1]))["data"]
+
+
+class TestFakeLLMServer:
+    @pytest.fixture
+    def server(self):
+        with FakeLLMServer(FakeLLMConfig(tokens_per_second=0, first_token_latency=0, max_tokens=6)) as server:
+            yield server
+
+    def _stream(self, url, payload, adapter):
+        with requests.post(url, json=payload, stream=True, timeout=10) as response:
+            parsed = [adapter.parse_streaming_response(line) for line in response.iter_lines() if line]
+        return "".join(p["content"] for p in parsed if p)
+
+    def test_kobold_stream(self, server):
+        text = self._stream(server.url + "/api/extra/generate/stream", {"max_length": 4},
+                            KoboldCppAdapter(MagicMock()))
+        assert text == "The lantern swayed as"
+
+    def test_openai_stream(self, server):
+        text = self._stream(server.url + "/v1/chat/completions", {"stream": True},
+                            OpenAIAdapter(MagicMock()))
+        assert text == "The lantern swayed as the wind"
+
+    def test_model_endpoints(self, server):
+        assert requests.get(server.url + "/api/v1/model", timeout=5).json()["result"]
+        assert requests.get(server.url + "/api/extra/true_max_context_length", timeout=5).json() == {"value": 8192}
+
+    def test_abort_ends_stream(self):
+        config = FakeLLMConfig(tokens_per_second=20, first_token_latency=0, max_tokens=200)
+        with FakeLLMServer(config) as server:
+            lines = []
+
+            def consume():
+                with requests.post(server.url + "/api/extra/generate/stream", json={}, stream=True, timeout=20) as r:
+                    lines.extend(line for line in r.iter_lines() if line.startswith(b"data:"))
+
+            reader = threading.Thread(target=consume)
+            reader.start()
+            for _ in range(200):
+                if lines:
+                    break
+                reader.join(0.05)
+            assert requests.post(server.url + "/api/extra/abort", timeout=5).json() == {"success": True}
+            reader.join(10)
+        assert 1 < len(lines) < 200
+        assert json.loads(lines[-1][5:])["finish_reason"] == "stop"
+
+
+def test_all_scenarios_run_at_tiny_scale():
+    report = run_benchmarks("tiny", list(SCENARIOS), iterations=1)
+    assert report["schema"] == 1
+    assert set(report["results"]) == set(SCENARIOS)
+    for name, result in report["results"].items():
+        assert result["iterations"] == 1, name
+        assert result["median_ms"] > 0, name
+    assert report["results"]["sync_cold"]["extra"]["cards"] == report["scale"]["cards"]
+    assert report["results"]["sync_warm"]["extra"]["changed"] == 0
+    assert report["results"]["stream_e2e"]["extra"]["tokens"] == report["scale"]["stream_tokens"]
+
+
+def test_compare_flags_regressions(tmp_path):
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}
+    current = {"results": {"a": {"median_ms": 10.5}, "b": {"median_ms": 13.0}, "new": {"median_ms": 1.0}}}
+    rows = {row["scenario"]: row for row in compare(baseline, current, threshold=0.10)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regressed"]
+    assert rows["b"]["regressed"]
+
+    out = tmp_path / "bench.json"
+    assert main(["--scale", "tiny", "--only", "lore_match", "--iterations", "1", "--out", str(out)]) == 0
+    assert json.loads(out.read_text())["results"]["lore_match"]["iterations"] == 1
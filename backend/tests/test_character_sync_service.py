@@ -0,0 +1,251 @@
+"""
+Tests for character_sync_service.py
+
+Covers:
+- New / modified / unchanged detection against the preloaded path index
+- Bulk inserts and updates (including chunk boundaries)
+- Duplicate UUID handling (including rows without a PNG path), uppercase
+  .PNG extensions and field preservation on update
+- No-change sync does not read any PNG metadata
+- Opt-in benchmark: no-change sync over 20k cards (CARDSHARK_BENCHMARKS=1)
+"""
+import os
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database import Base
+import backend.sql_models as sql_models
+import backend.services.character_sync_service as sync_module
+from backend.png_metadata_handler import PngMetadataHandler
+from backend.services.character_sync_service import CharacterSyncService
+from backend.utils.path_utils import normalize_path
+
+
+@pytest.fixture
+def mock_logger():
+    return MagicMock()
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def char_dir(tmp_path):
+    directory = tmp_path / "characters"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def service(session_factory, char_dir, mock_logger):
+    settings = MagicMock()
+    settings.get_setting.side_effect = lambda key, *a: str(char_dir) if key == "character_directory" else None
+    return CharacterSyncService(
+        db_session_generator=session_factory,
+        png_handler=PngMetadataHandler(mock_logger),
+        settings_manager=settings,
+        logger=mock_logger,
+    )
+
+
+def _write_card(path: Path, name: str, char_uuid=None, mtime=None, **fields):
+    data = {"name": name, "description": f"{name} description", **fields}
+    if char_uuid:
+        data["character_uuid"] = char_uuid
+    card = {"spec": "chara_card_v2", "spec_version": "2.0", "data": data}
+    buffer = BytesIO()
+    Image.new("RGB", (2, 2)).save(buffer, format="PNG")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(PngMetadataHandler(MagicMock()).write_metadata(buffer.getvalue(), card))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def _sync(service):
+    """Drive the sync passes directly (smoke fixtures patch ``sync_characters``)."""
+    files = service._scan_png_files()
+    with service._get_session_context() as db:
+        stats = service._sync_files_to_db(db, files=files)
+        service._sync_db_to_files(db, scanned_paths={p for p, _, _ in files})
+    return stats
+
+
+class TestSyncDetection:
+    def test_new_cards_are_inserted(self, service, session_factory, char_dir):
+        _write_card(char_dir / "alice.png", "Alice", "uuid-alice")
+        _write_card(char_dir / "worlds" / "realm.png", "Realm", "uuid-realm", extensions={"world_data": {"rooms": []}})
+        _write_card(char_dir / "npcs" / "guard.png", "Guard", "uuid-guard")
+
+        stats = _sync(service)
+
+        assert stats == {'total': 3, 'processed': 3, 'new': 3, 'updated': 0, 'errors': 0}
+        with session_factory() as db:
+            rows = {c.character_uuid: c for c in db.query(sql_models.Character).all()}
+        assert set(rows) == {"uuid-alice", "uuid-realm", "uuid-guard"}
+        assert rows["uuid-alice"].png_file_path == normalize_path(char_dir / "alice.png")
+        assert '"cardshark_folder": "Worlds"' in rows["uuid-realm"].extensions_json
+        assert '"cardshark_folder": "NPCs"' in rows["uuid-guard"].extensions_json
+        assert '"cardshark_folder": "Characters"' in rows["uuid-alice"].extensions_json
+
+    def test_unchanged_cards_skip_metadata_reads(self, service, char_dir):
+        _write_card(char_dir / "alice.png", "Alice", "uuid-alice")
+        _sync(service)
+
+        with patch.object(service.png_handler, "read_character_data") as read:
+            stats = _sync(service)
+
+        read.assert_not_called()
+        assert stats['new'] == 0 and stats['updated'] == 0 and stats['processed'] == 1
+
+    def test_modified_card_is_updated(self, service, session_factory, char_dir):
+        path = _write_card(char_dir / "alice.png", "Alice", "uuid-alice", mtime=1_000_000)
+        _sync(service)
+
+        _write_card(path, "Alice Prime", "uuid-alice", mtime=2_000_000, personality="Bold")
+        stats = _sync(service)
+
+        assert stats['updated'] == 1
+        with session_factory() as db:
+            row = db.get(sql_models.Character, "uuid-alice")
+            assert row.name == "Alice Prime"
+            assert row.personality == "Bold"
+            assert row.file_last_modified == 2_000_000
+
+    def test_update_keeps_name_when_card_omits_it(self, service, session_factory, char_dir):
+        path = _write_card(char_dir / "alice.png", "Alice", "uuid-alice", mtime=1_000_000)
+        _sync(service)
+
+        card = {"spec": "chara_card_v2", "data": {"character_uuid": "uuid-alice", "description": "new"}}
+        buffer = BytesIO()
+        Image.new("RGB", (2, 2)).save(buffer, format="PNG")
+        path.write_bytes(PngMetadataHandler(MagicMock()).write_metadata(buffer.getvalue(), card))
+        os.utime(path, (2_000_000, 2_000_000))
+        _sync(service)
+
+        with session_factory() as db:
+            row = db.get(sql_models.Character, "uuid-alice")
+            assert row.name == "Alice"
+            assert row.description == "new"
+
+    def test_duplicate_uuid_gets_new_uuid(self, service, session_factory, char_dir):
+        _write_card(char_dir / "a.png", "A", "same-uuid")
+        _write_card(char_dir / "b.png", "B", "same-uuid")
+
+        stats = _sync(service)
+
+        assert stats['new'] == 2
+        with session_factory() as db:
+            uuids = [c.character_uuid for c in db.query(sql_models.Character).all()]
+        assert len(set(uuids)) == 2
+        assert "same-uuid" in uuids
+
+    def test_uuid_of_row_without_path_gets_new_uuid(self, service, session_factory, char_dir):
+        with session_factory() as db:
+            db.add(sql_models.Character(character_uuid="taken-uuid", name="Pathless", png_file_path=""))
+            db.commit()
+        _write_card(char_dir / "copy.png", "Copy", "taken-uuid")
+
+        stats = _sync(service)
+
+        assert stats['new'] == 1 and stats['errors'] == 0
+        with session_factory() as db:
+            assert db.query(sql_models.Character).count() == 2
+
+    def test_uppercase_extension_is_scanned(self, service, session_factory, char_dir):
+        _write_card(char_dir / "Shout.PNG", "Shout", "uuid-shout")
+
+        assert _sync(service)['new'] == 1
+        with session_factory() as db:
+            assert db.get(sql_models.Character, "uuid-shout") is not None
+
+    def test_missing_uuid_is_generated_and_written_back(self, service, session_factory, char_dir):
+        path = _write_card(char_dir / "nouuid.png", "No UUID")
+
+        _sync(service)
+
+        with session_factory() as db:
+            row = db.query(sql_models.Character).one()
+        written = service.png_handler.read_character_data(path)
+        assert written["data"]["character_uuid"] == row.character_uuid
+        # Post-write mtime is recorded, so the next sync sees the file as unchanged
+        assert _sync(service)['updated'] == 0
+
+    def test_inserts_span_multiple_chunks(self, service, session_factory, char_dir, monkeypatch):
+        monkeypatch.setattr(sync_module, "SYNC_CHUNK_SIZE", 2)
+        for i in range(5):
+            _write_card(char_dir / f"c{i}.png", f"C{i}", f"uuid-{i}")
+
+        stats = _sync(service)
+
+        assert stats['new'] == 5 and stats['errors'] == 0
+        with session_factory() as db:
+            assert db.query(sql_models.Character).count() == 5
+
+    def test_failed_bulk_write_falls_back_to_rows(self, service, session_factory, char_dir):
+        _write_card(char_dir / "ok.png", "Ok", "uuid-ok")
+        _write_card(char_dir / "clash.png", "Clash", "uuid-clash")
+        # A row already holding clash.png's path makes its insert violate the unique constraint
+        with session_factory() as db:
+            db.add(sql_models.Character(
+                character_uuid="uuid-other", name="Other",
+                png_file_path=normalize_path(char_dir / "clash.png"),
+            ))
+            db.commit()
+
+        # Pretend nothing is known so both files are inserted in one bulk write
+        with patch.object(service, "_load_path_index", return_value={}):
+            stats = _sync(service)
+
+        assert stats['errors'] == 1
+        with session_factory() as db:
+            assert db.get(sql_models.Character, "uuid-ok") is not None
+
+
+@pytest.mark.skipif(
+    os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+    reason="Set CARDSHARK_BENCHMARKS=1 to run sync benchmarks",
+)
+def test_no_change_sync_benchmark(service, session_factory, char_dir):
+    card_count = int(os.environ.get("CARDSHARK_BENCH_CARDS", "20000"))
+    rows = []
+    for i in range(card_count):
+        path = char_dir / f"card_{i:06d}.png"
+        path.write_bytes(b"")
+        os.utime(path, (1_000_000, 1_000_000))
+        rows.append({
+            "character_uuid": f"bench-{i}",
+            "name": f"Bench {i}",
+            "png_file_path": normalize_path(path),
+            "file_last_modified": 1_000_000,
+            "is_incomplete": False,
+        })
+    with session_factory() as db:
+        db.bulk_insert_mappings(sql_models.Character, rows)
+        db.commit()
+
+    start = time.perf_counter()
+    stats = _sync(service)
+    elapsed = time.perf_counter() - start
+
+    assert stats['processed'] == card_count and stats['updated'] == 0
+    assert elapsed < 1.0, f"cards={card_count} no-change sync={elapsed * 1000:.1f}ms"
@@ -0,0 +1,190 @@
+"""
+Tests for content_filter_engine.py and its wiring into ContentFilterManager / ApiHandler.
+
+Covers:
+- Matching modes: exact, case-insensitive, word-boundary; regex rules skipped
+- Multi-word phrases and matches split across streamed tokens
+- Leftmost-longest resolution and the bounded look-behind buffer
+- Manager rebuilds the engine when packages are activated or edited,
+  without affecting streams already in flight
+- SSE relay: substitutions applied to streamed chunks after thinking-tag filtering
+- Opt-in benchmark: per-token cost with 10 vs 5000 rules (CARDSHARK_BENCHMARKS=1)
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_handler import ApiHandler, ThinkingTagFilter
+from backend.content_filter_engine import ContentFilterEngine
+from backend.content_filter_manager import ContentFilterManager
+
+
+def _rule(original, substitution, mode="case-insensitive", strategy="client-replace", **extra):
+    return {"original": original, "substitutions": [substitution], "mode": mode,
+            "enabled": True, "strategy": strategy, **extra}
+
+
+def _stream(engine, tokens):
+    stream = engine.stream()
+    return "".join(stream.process(t) for t in tokens) + stream.flush()
+
+
+class TestMatching:
+    def test_case_insensitive_keeps_leading_capital(self):
+        engine = ContentFilterEngine([_rule("crimson", "red")])
+        assert engine.apply("Crimson dusk, crimson CRIMSON") == "Red dusk, red RED"
+
+    def test_exact_mode_is_case_sensitive(self):
+        engine = ContentFilterEngine([_rule("Orbs", "Eyes", mode="exact")])
+        assert engine.apply("Orbs and orbs") == "Eyes and orbs"
+
+    def test_word_boundary_mode(self):
+        engine = ContentFilterEngine([_rule("ass", "butt", mode="word-boundary")])
+        assert engine.apply("a class act, you ass.") == "a class act, you butt."
+
+    def test_multi_word_phrase_and_removal(self):
+        engine = ContentFilterEngine([_rule("pools of ", "")])
+        assert engine.apply("her pools of blue") == "her blue"
+
+    def test_leftmost_longest(self):
+        engine = ContentFilterEngine([_rule("blue", "B"), _rule("blue eyes", "BE"), _rule("eyes", "E")])
+        assert engine.apply("blue eyes, blue sky, eyes") == "BE, B sky, E"
+
+    def test_skips_disabled_api_ban_and_regex_rules(self):
+        engine = ContentFilterEngine([
+            _rule("alpha", "a", enabled=False),
+            _rule("beta", "b", strategy="api-ban"),
+            _rule("g.mma", "g", mode="regex"),
+            _rule("delta", "d", strategy="auto"),
+        ])
+        assert engine.rule_count == 1
+        assert engine.skipped_rules == 1
+        assert engine.apply("alpha beta gamma delta") == "alpha beta gamma d"
+
+    def test_random_substitution_choice(self):
+        engine = ContentFilterEngine([{"original": "damn", "substitutions": ["darn", "dang"],
+                                       "mode": "case-insensitive", "enabled": True}])
+        random.seed(1)
+        results = {engine.apply("damn") for _ in range(50)}
+        assert results == {"darn", "dang"}
+
+
+class TestStreaming:
+    def test_match_split_across_tokens(self):
+        engine = ContentFilterEngine([_rule("cerulean sky", "blue sky"), _rule("whilst", "while")])
+        tokens = ["The ceru", "lean s", "ky, whi", "l", "st we", " wait"]
+        assert _stream(engine, tokens) == "The blue sky, while we wait"
+
+    def test_look_behind_is_bounded_by_longest_pattern(self):
+        engine = ContentFilterEngine([_rule("alabaster", "pale")])
+        stream = engine.stream()
+
+        assert stream.process("skin of alab") == "skin of "
+        assert stream.pending == "alab"
+        assert stream.process("x") == "alabx"
+        assert stream.pending == ""
+
+    def test_word_boundary_waits_for_next_character(self):
+        engine = ContentFilterEngine([_rule("ass", "butt", mode="word-boundary")])
+        assert _stream(engine, ["you ", "ass", "ert"]) == "you assert"
+        assert _stream(engine, ["you ", "ass", "!"]) == "you butt!"
+        assert _stream(engine, ["cl", "ass"]) == "class"
+        assert _stream(engine, ["you ", "ass"]) == "you butt"
+
+    def test_streamed_output_matches_one_shot(self):
+        engine = ContentFilterEngine([_rule("orbs", "eyes"), _rule("azure", "blue"), _rule("pools of", "")])
+        text = "Her azure orbs, deep pools of azure, met his orbs." * 3
+        tokens = [text[i:i + 3] for i in range(0, len(text), 3)]
+        assert _stream(engine, tokens) == engine.apply(text)
+
+
+@pytest.fixture
+def filters_dir(tmp_path):
+    directory = tmp_path / "content_filters"
+    directory.mkdir()
+    (directory / "prose_filter.json").write_text(json.dumps({
+        "name": "Prose", "rules": [_rule("orbs", "eyes")],
+    }), encoding="utf-8")
+    return directory
+
+
+@pytest.fixture
+def manager(filters_dir):
+    with patch.object(ContentFilterManager, "_get_filters_dir", return_value=filters_dir):
+        return ContentFilterManager(MagicMock())
+
+
+class TestManagerRebuild:
+    def test_no_active_packages_means_no_stream_filter(self, manager):
+        assert manager.get_stream_filter() is None
+
+    def test_activation_and_edit_rebuild_engine(self, manager):
+        manager.activate_package("prose_filter")
+        assert manager.engine.apply("orbs") == "eyes"
+
+        in_flight = manager.get_stream_filter()
+        manager.update_package("prose_filter", [_rule("orbs", "peepers")])
+
+        assert manager.engine.apply("orbs") == "peepers"
+        # Streams started before the edit keep their engine
+        assert in_flight.process("orbs ") == "eyes "
+
+
+def _sse(content):
+    return f"data: {json.dumps({'content': content})}\n\n".encode("utf-8")
+
+
+class TestSseRelay:
+    def test_chunks_are_filtered_after_thinking_tags(self):
+        engine = ContentFilterEngine([_rule("crimson", "red")])
+        handler = ApiHandler(MagicMock())
+        thinking, content = ThinkingTagFilter(), engine.stream()
+
+        out = []
+        for token in ["<think>crimson</think>The crim", "son tide"]:
+            chunk = handler._apply_thinking_filter(_sse(token), thinking, content)
+            if chunk:
+                out.append(json.loads(chunk.decode().strip()[6:])["content"])
+        out.append(content.process(thinking.flush()) + content.flush())
+
+        assert "".join(out) == "The red tide"
+
+    def test_handler_resolves_lazy_manager(self, manager):
+        from backend.utils.lazy_loading import LazyHandler
+
+        manager.activate_package("prose_filter")
+        handler = ApiHandler(MagicMock(), content_filter_manager=LazyHandler(lambda: manager))
+        assert handler._create_content_filter().process("orbs ") == "eyes "
+        assert ApiHandler(MagicMock())._create_content_filter() is None
+
+
+@pytest.mark.skipif(
+    os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+    reason="Set CARDSHARK_BENCHMARKS=1 to run content filter benchmarks",
+)
+def test_per_token_cost_independent_of_rule_count():
+    rng = random.Random(7)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 12)))
+             for _ in range(5000)]
+    text = " ".join(rng.choice(words) for _ in range(20000))
+    tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def per_token_us(rule_count):
+        engine = ContentFilterEngine([_rule(w, w.upper()) for w in words[:rule_count]])
+        stream = engine.stream()
+        start = time.perf_counter()
+        for token in tokens:
+            stream.process(token)
+        stream.flush()
+        return (time.perf_counter() - start) / len(tokens) * 1_000_000
+
+    small, large = per_token_us(10), per_token_us(5000)
+    assert large < small * 5, f"10 rules={small:.2f}us/token 5000 rules={large:.2f}us/token"
@@ -0,0 +1,140 @@
+"""
+Tests for client-disconnect cancellation (utils/cancellation.py).
+
+Covers:
+- StreamCancel runs callbacks once and only while their block is active
+- KoboldCppAdapter.abort() calls /api/extra/abort on the server root
+- Cancelling ApiHandler.stream_generate mid-stream aborts the upstream
+  generation, ends the stream without [DONE] or an error, frees the
+  scheduler slot and records the cancel in metrics
+- CancellableStreamingResponse fires the cancel while the body iterator is
+  blocked waiting for upstream tokens
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import anyio
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_handler import ApiHandler
+from backend.api_provider_adapters import KoboldCppAdapter
+from backend.services.generation_scheduler import SCHEDULER
+from backend.utils.cancellation import CancellableStreamingResponse, StreamCancel
+from backend.utils.metrics import REGISTRY
+from backend.utils.thread_offload import iterate_in_thread
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+
+
+class TestStreamCancel:
+    def test_callbacks_run_once_while_registered(self):
+        cancel = StreamCancel()
+        calls = []
+        with cancel.on_cancel(lambda: calls.append('inner')):
+            pass
+        with cancel.on_cancel(lambda: calls.append('active')):
+            assert cancel.cancel('timeout') is True
+            assert cancel.cancel() is False
+        assert calls == ['active']
+        assert cancel.cancelled and cancel.reason == 'timeout'
+
+    def test_register_after_cancel_runs_immediately(self):
+        cancel = StreamCancel()
+        cancel.cancel()
+        calls = []
+        with cancel.on_cancel(lambda: calls.append(1)):
+            assert calls == [1]
+
+    def test_callback_errors_are_swallowed(self):
+        cancel = StreamCancel()
+        calls = []
+        with cancel.on_cancel(lambda: calls.append(1)), cancel.on_cancel(lambda: 1 / 0):
+            cancel.cancel()
+        assert calls == [1]
+
+
+@pytest.fixture
+def slow_server():
+    config = FakeLLMConfig(tokens_per_second=20, first_token_latency=0, max_tokens=400)
+    with FakeLLMServer(config) as server:
+        yield server
+
+
+def test_kobold_abort_endpoint(slow_server):
+    adapter = KoboldCppAdapter(MagicMock())
+    assert adapter.abort(slow_server.url + '/api/extra/generate/stream', None) is False  # nothing running
+
+
+def test_cancel_mid_stream_aborts_upstream(slow_server):
+    REGISTRY.reset()
+    cancel = StreamCancel()
+    request = {
+        'api_config': {'provider': 'KoboldCPP', 'url': slow_server.url,
+                       'generation_settings': {'max_length': 400}},
+        'generation_params': {'prompt': 'Hello', 'memory': '', 'stop_sequence': [], '_pre_assembled': True},
+    }
+    chunks = []
+    logger = MagicMock()
+    stream = ApiHandler(logger).stream_generate(request, cancel=cancel)
+
+    def consume():
+        for chunk in stream:
+            chunks.append(chunk)
+
+    reader = threading.Thread(target=consume)
+    reader.start()
+    for _ in range(200):
+        if chunks:
+            break
+        time.sleep(0.01)
+    start = time.perf_counter()
+    assert cancel.cancel()
+    reader.join(5)
+
+    assert not reader.is_alive()
+    assert time.perf_counter() - start < 2
+    assert 1 <= len(chunks) < 100
+    assert not any(b'[DONE]' in c or b'"error"' in c for c in chunks)
+    steps = [call.args[0] for call in logger.log_step.call_args_list]
+    assert any('upstream abort confirmed: True' in step for step in steps)
+    backend = next(b for b in SCHEDULER.snapshot() if b['backend'].endswith(slow_server.url.lower()))
+    assert backend['active'] == 0
+    _, _, count = REGISTRY.histogram(
+        'cardshark_generation_cancel_seconds', provider='KoboldCPP', reason='client_disconnect',
+    ).snapshot()
+    assert count == 1
+
+
+def test_streaming_response_cancels_on_disconnect():
+    cancel = StreamCancel()
+    upstream_done = threading.Event()
+    sent = []
+
+    def body():
+        yield b'data: {"content": "Hi"}\n\n'
+        with cancel.on_cancel(upstream_done.set):
+            upstream_done.wait(5)  # blocked on the upstream until the cancel aborts it
+
+    response = CancellableStreamingResponse(iterate_in_thread(body()), cancel=cancel,
+                                            media_type='text/event-stream')
+
+    async def main():
+        async def receive():
+            if not sent:
+                await anyio.sleep(0.05)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        with anyio.fail_after(3):
+            await response({'type': 'http', 'asgi': {'spec_version': '2.3'}}, receive, send)
+
+    anyio.run(main)
+    assert cancel.cancelled and cancel.reason == 'client_disconnect'
+    assert upstream_done.is_set()
@@ -0,0 +1,152 @@
+"""
+Tests for generation_context_loader.py
+
+Covers:
+- History, session notes, enabled lore entries and activations loaded together
+- Round trips: a fixed number of SQL statements, independent of lore entry count
+- The context is immutable; callers get mutable copies
+- Missing session / character and partial failures
+- ApiHandler activates matched lore entries, skipping entries in cooldown
+"""
+import uuid
+from dataclasses import FrozenInstanceError
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine
+
+from backend import sql_models
+from backend.database import Base
+from backend.services.generation_context_loader import load_generation_context
+
+
+def _seed(db: Session, entry_count: int = 3):
+    character_uuid = f"char-{uuid.uuid4()}"
+    session_uuid = str(uuid.uuid4())
+    db.add(sql_models.Character(character_uuid=character_uuid, name="Aria", png_file_path=f"{character_uuid}.png"))
+    db.add(sql_models.ChatSession(chat_session_uuid=session_uuid, character_uuid=character_uuid,
+                                  start_time=datetime.utcnow(), session_notes="Keep it short."))
+    for i, (role, content) in enumerate([("user", "Hi"), ("assistant", "Hello"), ("user", "The river?")]):
+        db.add(sql_models.ChatMessage(message_id=str(uuid.uuid4()), chat_session_uuid=session_uuid, role=role,
+                                      content=content, status="complete", timestamp=datetime.utcnow(),
+                                      sequence_number=i))
+    book = sql_models.LoreBook(character_uuid=character_uuid, name="Book")
+    db.add(book)
+    db.flush()
+    entries = []
+    for i in range(entry_count):
+        entry = sql_models.LoreEntry(lore_book_id=book.id, content=f"Lore {i}", enabled=True,
+                                     keys_json=["river"] if i % 2 else '["river"]',
+                                     extensions_json={"sticky": 3})
+        db.add(entry)
+        entries.append(entry)
+    db.add(sql_models.LoreEntry(lore_book_id=book.id, content="Disabled", enabled=False, keys_json=[]))
+    db.flush()
+    db.add(sql_models.LoreActivation(activation_id=str(uuid.uuid4()), chat_session_uuid=session_uuid,
+                                     lore_entry_id=entries[0].id, character_uuid=character_uuid,
+                                     activated_at_message_number=1, sticky_remaining=2))
+    db.add(sql_models.LoreActivation(activation_id=str(uuid.uuid4()), chat_session_uuid=session_uuid,
+                                     lore_entry_id=entries[1].id, character_uuid=character_uuid,
+                                     activated_at_message_number=0, sticky_remaining=0, cooldown_remaining=1))
+    db.flush()
+    return session_uuid, character_uuid, entries
+
+
+class TestLoad:
+    def test_loads_everything_in_one_pass(self, db_session):
+        session_uuid, character_uuid, entries = _seed(db_session)
+
+        ctx = load_generation_context(db_session, chat_session_uuid=session_uuid,
+                                      character_uuid=character_uuid, load_history=True)
+
+        assert [m["content"] for m in ctx.chat_history] == ["Hi", "Hello", "The river?"]
+        assert ctx.session_found and ctx.session_notes == "Keep it short."
+        assert [e["content"] for e in ctx.lore_entries] == ["Lore 0", "Lore 1", "Lore 2"]
+        assert all(list(e["keys"]) == ["river"] for e in ctx.lore_entries)
+        assert ctx.lore_entries[0]["extensions"]["sticky"] == 3
+        assert ctx.active_lore_ids == {entries[0].id}
+        assert ctx.cooldown_lore_ids == {entries[1].id}
+        assert ctx.query_count == 4 and ctx.errors == ()
+
+    def test_statement_count_does_not_grow_with_lore(self, db_session):
+        session_uuid, character_uuid, _ = _seed(db_session, entry_count=40)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.bind, "before_cursor_execute", listener)
+        try:
+            load_generation_context(db_session, chat_session_uuid=session_uuid,
+                                    character_uuid=character_uuid, load_history=True)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listener)
+
+        assert len(statements) == 4
+
+    def test_history_only_when_requested(self, db_session):
+        session_uuid, _, _ = _seed(db_session)
+        ctx = load_generation_context(db_session, chat_session_uuid=session_uuid)
+        assert ctx.chat_history is None
+        assert ctx.session_notes == "Keep it short."
+
+    def test_unknown_session_and_character(self, db_session):
+        ctx = load_generation_context(db_session, chat_session_uuid="missing",
+                                      character_uuid="missing", load_history=True)
+        assert ctx.chat_history is None and not ctx.session_found
+        assert ctx.session_notes is None
+        assert ctx.lore_entries == ()
+
+    def test_failed_stage_is_recorded(self, db_session):
+        session_uuid, character_uuid, _ = _seed(db_session)
+        with patch("backend.services.generation_context_loader.get_chat_messages_for_generation",
+                   side_effect=RuntimeError("boom")):
+            ctx = load_generation_context(db_session, chat_session_uuid=session_uuid,
+                                          character_uuid=character_uuid, load_history=True)
+        assert ctx.errors == ("session: boom",)
+        assert len(ctx.lore_entries) == 3
+
+
+class TestImmutability:
+    def test_context_is_read_only(self, db_session):
+        session_uuid, character_uuid, _ = _seed(db_session)
+        ctx = load_generation_context(db_session, chat_session_uuid=session_uuid,
+                                      character_uuid=character_uuid, load_history=True)
+
+        with pytest.raises(FrozenInstanceError):
+            ctx.session_notes = "changed"
+        with pytest.raises(TypeError):
+            ctx.lore_entries[0]["content"] = "changed"
+
+        history = ctx.history_list()
+        history[0]["content"] = "edited"
+        entries = ctx.lore_entry_list()
+        entries[0]["keys"].append("lake")
+        assert ctx.chat_history[0]["content"] == "Hi"
+        assert list(ctx.lore_entries[0]["keys"]) == ["river"]
+
+
+def test_api_handler_records_activations_outside_cooldown():
+    from backend.api_handler import ApiHandler
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    with factory() as db:
+        session_uuid, character_uuid, entries = _seed(db)
+        db.commit()
+        entry_ids = [e.id for e in entries]
+
+    handler = ApiHandler(MagicMock())
+    with patch("backend.database.SessionLocal", factory):
+        ctx = handler._load_generation_context(chat_session_uuid=session_uuid, character_uuid=character_uuid,
+                                               load_history=True)
+        matched = [e for e in ctx.lore_entry_list()]
+        handler._record_lore_activations(ctx, matched, character_uuid, message_number=3)
+
+    with factory() as db:
+        rows = {a.lore_entry_id: a for a in db.query(sql_models.LoreActivation).all()}
+    assert rows[entry_ids[0]].sticky_remaining == 3     # extended to the entry's sticky
+    assert rows[entry_ids[1]].cooldown_remaining == 1   # still cooling down, not re-activated
+    assert rows[entry_ids[2]].sticky_remaining == 3     # newly activated
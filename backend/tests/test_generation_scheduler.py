@@ -0,0 +1,199 @@
+"""
+Tests for the generation scheduler (services/generation_scheduler.py).
+
+Covers:
+- Per-backend concurrency caps (KoboldCPP serial, hosted APIs wider)
+- Interactive requests are granted before queued background ones, FIFO within a class
+- Cancelling a queued request frees its place without reaching the backend
+- A cancel racing the slot grant hands the slot on instead of proceeding
+- slot() / slot_async() hold and release slots
+- Queue depth / active gauges and the wait-time histogram on /api/metrics
+- ApiHandler.stream_generate waits for a slot, emits queued events and
+  releases its place on client disconnect
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import anyio
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_handler import ApiHandler
+from backend.services.generation_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    GenerationCancelled,
+    GenerationScheduler,
+    SCHEDULER,
+)
+from backend.utils.metrics import REGISTRY
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+
+KOBOLD = {'provider': 'KoboldCPP', 'url': 'http://localhost:5001'}
+OPENAI = {'provider': 'OpenAI', 'url': 'https://api.openai.com/v1'}
+
+
+def test_kobold_is_serial_hosted_is_not():
+    scheduler = GenerationScheduler()
+    first = scheduler.submit(KOBOLD)
+    second = scheduler.submit({**KOBOLD, 'url': 'HTTP://localhost:5001/'})  # same backend
+    assert first.granted and not second.granted
+
+    hosted = [scheduler.submit(OPENAI) for _ in range(5)]
+    assert [t.granted for t in hosted] == [True] * 4 + [False]
+
+    first.release()
+    assert second.granted
+
+
+def test_interactive_before_background():
+    scheduler = GenerationScheduler()
+    holder = scheduler.submit(KOBOLD, PRIORITY_BACKGROUND)
+    background = [scheduler.submit(KOBOLD, PRIORITY_BACKGROUND) for _ in range(2)]
+    interactive = scheduler.submit(KOBOLD, PRIORITY_INTERACTIVE)
+
+    holder.release()
+    assert interactive.granted
+    assert not any(t.granted for t in background)
+
+    interactive.release()
+    assert background[0].granted and not background[1].granted
+    background[0].release()
+    assert background[1].granted
+
+
+def test_cancelled_waiter_is_skipped():
+    scheduler = GenerationScheduler()
+    holder = scheduler.submit(KOBOLD)
+    abandoned = scheduler.submit(KOBOLD)
+    waiting = scheduler.submit(KOBOLD)
+    abandoned.release()
+    abandoned.release()  # idempotent
+
+    assert scheduler.snapshot()[0]['queued'] == {'interactive': 1, 'background': 0}
+    holder.release()
+    assert waiting.granted and not abandoned.granted
+    assert scheduler.snapshot()[0]['active'] == 1
+
+
+def test_slot_cancel_event():
+    scheduler = GenerationScheduler()
+    cancel = threading.Event()
+    cancel.set()
+    with scheduler.slot(KOBOLD):
+        with pytest.raises(GenerationCancelled):
+            with scheduler.slot(KOBOLD, PRIORITY_BACKGROUND, cancel=cancel):
+                pass
+    assert scheduler.snapshot()[0]['active'] == 0
+    assert scheduler.snapshot()[0]['queued']['background'] == 0
+
+
+def test_cancel_racing_grant_hands_slot_on():
+    scheduler = GenerationScheduler()
+    holder = scheduler.submit(KOBOLD)
+    raced = scheduler.submit(KOBOLD)
+    waiting = scheduler.submit(KOBOLD)
+
+    holder.release()  # grants `raced`...
+    raced.cancel()    # ...as its client disconnects, before it checks in
+    assert raced.granted and not raced.claim()
+    assert waiting.granted and waiting.claim()
+    assert scheduler.snapshot()[0]['active'] == 1
+
+    # Once claimed, a late cancel leaves the slot with its holder until release
+    waiting.cancel()
+    assert scheduler.snapshot()[0]['active'] == 1
+    waiting.release()
+    assert scheduler.snapshot()[0]['active'] == 0
+
+
+def test_slot_cancel_set_as_grant_lands():
+    scheduler = GenerationScheduler()
+    cancel = threading.Event()
+    cancel.set()
+    # Free backend: the grant lands at submit, after the caller already gave up
+    with pytest.raises(GenerationCancelled):
+        with scheduler.slot(KOBOLD, cancel=cancel):
+            pytest.fail("entered a slot after cancellation")
+    assert scheduler.snapshot()[0]['active'] == 0
+
+
+def test_slot_async_waits_for_release():
+    scheduler = GenerationScheduler()
+    holder = scheduler.submit(KOBOLD)
+    order = []
+
+    async def main():
+        async def waiter():
+            async with scheduler.slot_async(KOBOLD, PRIORITY_BACKGROUND):
+                order.append('granted')
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(waiter)
+            await anyio.sleep(0.05)
+            order.append('release')
+            holder.release()
+
+    anyio.run(main)
+    assert order == ['release', 'granted']
+    assert scheduler.snapshot()[0]['active'] == 0
+
+
+def test_metrics_exported():
+    REGISTRY.reset()
+    backend = {'provider': 'KoboldCPP', 'url': 'http://metrics-test:5001'}
+    holder = SCHEDULER.submit(backend)
+    queued = SCHEDULER.submit(backend, PRIORITY_BACKGROUND)
+    try:
+        text = REGISTRY.render_prometheus()
+        assert '# TYPE cardshark_generation_queue_depth gauge' in text
+        assert 'cardshark_generation_queue_depth{backend="KoboldCPP http://metrics-test:5001",priority="background"} 1' in text
+        assert 'cardshark_generation_active{backend="KoboldCPP http://metrics-test:5001"} 1' in text
+        assert 'cardshark_generation_queue_wait_seconds_count{backend="KoboldCPP http://metrics-test:5001",priority="interactive"} 1' in text
+    finally:
+        queued.release()
+        holder.release()
+
+
+class TestStreamGenerate:
+    @pytest.fixture
+    def server(self):
+        config = FakeLLMConfig(tokens_per_second=0, first_token_latency=0, max_tokens=4)
+        with FakeLLMServer(config) as server:
+            yield server
+
+    def _request(self, server, **params):
+        return {
+            'api_config': {'provider': 'KoboldCPP', 'url': server.url, 'generation_settings': {'max_length': 4}},
+            'generation_params': {'prompt': 'Hello', 'memory': '', 'stop_sequence': [],
+                                  '_pre_assembled': True, **params},
+        }
+
+    def test_waits_for_slot_then_streams(self, server, monkeypatch):
+        monkeypatch.setattr('backend.api_handler.QUEUE_KEEPALIVE_SECONDS', 0.01)
+        holder = SCHEDULER.submit({'provider': 'KoboldCPP', 'url': server.url}, PRIORITY_BACKGROUND)
+        stream = ApiHandler(MagicMock()).stream_generate(self._request(server))
+
+        first = json.loads(next(stream)[6:])
+        assert first['queued'] is True and 'content' not in first
+        holder.release()
+        content = [json.loads(chunk[6:]) for chunk in stream if b'[DONE]' not in chunk]
+        assert ''.join(c.get('content', '') for c in content) == 'The lantern swayed as'
+        assert SCHEDULER.snapshot() and all(b['active'] == 0 for b in SCHEDULER.snapshot())
+
+    def test_disconnect_while_queued_leaves_queue(self, server, monkeypatch):
+        monkeypatch.setattr('backend.api_handler.QUEUE_KEEPALIVE_SECONDS', 0.01)
+        backend = {'provider': 'KoboldCPP', 'url': server.url}
+        holder = SCHEDULER.submit(backend)
+        stream = ApiHandler(MagicMock()).stream_generate(self._request(server))
+        assert b'"queued"' in next(stream)
+        stream.close()
+
+        entry = next(b for b in SCHEDULER.snapshot() if b['backend'].endswith(server.url.lower()))
+        assert entry['queued'] == {'interactive': 0, 'background': 0}
+        holder.release()
+        assert next(b for b in SCHEDULER.snapshot() if b['backend'].endswith(server.url.lower()))['active'] == 0
@@ -0,0 +1,279 @@
+"""
+Tests for json_responses.py and the database write generation counter.
+
+Covers:
+- dumps_json_bytes for Pydantic models, orjson and the stdlib fallback
+- CachedPayload gzip negotiation (Accept-Encoding q-values) and ETag /
+  If-None-Match handling
+- SerializedResponseCache invalidation by database generation
+- /api/characters serves the cached listing without re-running the directory
+  sync until the DB generation or the directory fingerprint changes
+- track_db_generation: ORM writes and bulk writes bump, reads don't
+- GZipMiddleware wiring: large JSON is compressed, SSE is not
+"""
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import backend.utils.json_responses as json_responses
+from backend.database import Base, get_db_generation, track_db_generation
+import backend.sql_models as sql_models
+from backend.dependencies import get_character_service_dependency, get_logger_dependency
+from backend.endpoints import character_endpoints
+from backend.services.character_indexing_service import CharacterIndexingService
+from backend.utils.json_responses import (
+    GZIP_MINIMUM_SIZE,
+    CachedPayload,
+    FastJSONResponse,
+    SerializedResponseCache,
+    accepts_gzip,
+    dumps_json_bytes,
+)
+
+
+class Item(BaseModel):
+    name: str
+    created: datetime
+
+
+class ItemList(BaseModel):
+    success: bool = True
+    items: List[Item]
+
+
+def _items(count: int) -> ItemList:
+    stamp = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return ItemList(items=[Item(name=f"item {i}", created=stamp) for i in range(count)])
+
+
+class TestDumps:
+    def test_model_matches_pydantic_json(self):
+        model = _items(3)
+        assert json.loads(dumps_json_bytes(model)) == json.loads(model.model_dump_json())
+
+    def test_plain_data_with_nested_models(self):
+        data = {"data": _items(1), "when": datetime(2026, 1, 1), 1: "non-str key"}
+        decoded = json.loads(dumps_json_bytes(data))
+        assert decoded["data"]["items"][0]["name"] == "item 0"
+        assert decoded["when"].startswith("2026-01-01T00:00:00")
+        assert decoded["1"] == "non-str key"
+
+    def test_stdlib_fallback_matches_orjson(self, monkeypatch):
+        data = {"content": "héllo\nworld", "n": [1, 2.5, None, True]}
+        fast = dumps_json_bytes(data)
+        monkeypatch.setattr(json_responses, "orjson", None)
+        assert json.loads(dumps_json_bytes(data)) == json.loads(fast)
+
+
+def _request(headers=None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+class TestCachedPayload:
+    def test_gzip_when_accepted_and_large(self):
+        payload = CachedPayload(b"x" * (GZIP_MINIMUM_SIZE * 4))
+
+        response = payload.to_response(_request({"Accept-Encoding": "gzip, br"}))
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == payload.body
+        assert payload.gzipped is payload.gzipped  # compressed once
+
+    def test_identity_when_not_accepted_or_small(self):
+        large = CachedPayload(b"x" * (GZIP_MINIMUM_SIZE * 4))
+        small = CachedPayload(b"{}")
+
+        assert "content-encoding" not in large.to_response(_request()).headers
+        assert "content-encoding" not in small.to_response(_request({"Accept-Encoding": "gzip"})).headers
+
+    def test_gzip_refused_with_zero_quality(self):
+        payload = CachedPayload(b"x" * (GZIP_MINIMUM_SIZE * 4))
+
+        response = payload.to_response(_request({"Accept-Encoding": "br, gzip;q=0"}))
+
+        assert "content-encoding" not in response.headers
+
+    def test_accept_encoding_parsing(self):
+        assert accepts_gzip("gzip")
+        assert accepts_gzip("deflate, GZIP;q=0.5")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip("gzip;q=0.0, *")
+        assert not accepts_gzip("*;q=0")
+        assert not accepts_gzip("br, x-gzipped")
+
+    def test_matching_etag_returns_304(self):
+        payload = CachedPayload(b'{"a":1}')
+
+        response = payload.to_response(_request({"If-None-Match": payload.etag}))
+
+        assert response.status_code == 304
+        assert response.body == b""
+
+
+class TestSerializedResponseCache:
+    def test_entry_reused_until_generation_changes(self):
+        generation = [1]
+        cache = SerializedResponseCache(generation_fn=lambda: generation[0])
+
+        stored = cache.put("k", 1, {"v": 1})
+        assert cache.get("k") is stored
+
+        generation[0] = 2
+        assert cache.get("k") is None
+
+    def test_body_built_during_a_write_is_not_cached(self):
+        generation = [5]
+        cache = SerializedResponseCache(generation_fn=lambda: generation[0])
+
+        payload = cache.put("k", 4, {"v": 1})
+
+        assert json.loads(payload.body) == {"v": 1}
+        assert cache.get("k") is None
+
+    def test_lru_eviction(self):
+        cache = SerializedResponseCache(max_entries=2, generation_fn=lambda: 0)
+        for key in ("a", "b", "c"):
+            cache.put(key, 0, key)
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+
+
+class TestDbGeneration:
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        track_db_generation(engine, factory)
+        return factory
+
+    def test_orm_write_bumps_generation(self, session_factory):
+        before = get_db_generation()
+        with session_factory() as db:
+            db.add(sql_models.Character(character_uuid="u1", name="A", png_file_path="a.png"))
+            db.commit()
+        assert get_db_generation() > before
+
+    def test_bulk_write_bumps_generation(self, session_factory):
+        before = get_db_generation()
+        with session_factory() as db:
+            db.bulk_insert_mappings(sql_models.Character, [
+                {"character_uuid": "u2", "name": "B", "png_file_path": "b.png"},
+            ])
+            db.commit()
+        assert get_db_generation() > before
+
+    def test_reads_do_not_bump_generation(self, session_factory):
+        before = get_db_generation()
+        with session_factory() as db:
+            db.query(sql_models.Character).all()
+            db.commit()
+        assert get_db_generation() == before
+
+
+def _make_app():
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+    @app.get("/items")
+    async def items():
+        return FastJSONResponse(_items(200))
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for i in range(50):
+                yield f"data: {'x' * 64} {i}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class TestCompressionMiddleware:
+    def test_large_json_is_gzipped(self):
+        with TestClient(_make_app()) as client:
+            response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["items"]) == 200
+
+    def test_event_stream_is_not_compressed(self):
+        with TestClient(_make_app()) as client:
+            response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text.count("data:") == 50
+
+
+class TestCharacterListCache:
+    @pytest.fixture
+    def indexing(self):
+        indexing = MagicMock()
+        indexing.directory_fingerprint.return_value = "fp-1"
+        indexing.get_characters_with_directory_sync = AsyncMock(return_value=[])
+        return indexing
+
+    @pytest.fixture
+    def client(self, indexing):
+        character_endpoints._character_list_cache.clear()
+        app = FastAPI()
+        app.include_router(character_endpoints.router)
+        app.dependency_overrides[character_endpoints.get_character_indexing_service] = lambda: indexing
+        app.dependency_overrides[get_character_service_dependency] = lambda: MagicMock()
+        app.dependency_overrides[get_logger_dependency] = lambda: MagicMock()
+        with TestClient(app) as client:
+            yield client
+        character_endpoints._character_list_cache.clear()
+
+    def test_cached_listing_skips_directory_sync(self, client, indexing):
+        first = client.get("/api/characters")
+        second = client.get("/api/characters")
+
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert indexing.get_characters_with_directory_sync.await_count == 1
+
+        # Files changed on disk: the fingerprint moves and the sync runs again
+        indexing.directory_fingerprint.return_value = "fp-2"
+        client.get("/api/characters")
+        assert indexing.get_characters_with_directory_sync.await_count == 2
+
+    def test_directory_fingerprint_tracks_png_changes(self, tmp_path):
+        char_service = MagicMock()
+        char_service._get_character_dirs.return_value = [str(tmp_path)]
+        service = CharacterIndexingService(char_service, MagicMock(), MagicMock())
+        card = tmp_path / "a.png"
+        card.write_bytes(b"one")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        before = service.directory_fingerprint()
+        (tmp_path / "notes.txt").write_text("still ignored")
+        assert service.directory_fingerprint() == before
+
+        card.write_bytes(b"two!")
+        os.utime(card, ns=(1, 1))
+        assert service.directory_fingerprint() != before
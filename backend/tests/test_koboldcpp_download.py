@@ -0,0 +1,145 @@
+"""
+Tests for the KoboldCPP binary download (KoboldCPPManager.download).
+
+Covers:
+- A clean download is verified against the release asset's SHA-256 and
+  moved into place; progress callbacks are throttled
+- A dropped connection resumes with an HTTP Range request
+- An interrupted download resumes from the .part file on the next call
+- Servers that ignore Range restart cleanly
+- A checksum mismatch leaves the installed binary untouched
+- A leftover .part from another asset is not resumed
+- Read sizes grow with throughput
+"""
+import os
+import platform
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend import koboldcpp_manager as kcpp
+from backend.koboldcpp_manager import KoboldCPPManager
+from benchmarks.fake_release_server import FakeReleaseConfig, FakeReleaseServer
+
+SIZE = 3 * 1024 * 1024
+
+
+@pytest.fixture
+def make_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(KoboldCPPManager, "_get_base_dir", lambda self: str(tmp_path))
+    monkeypatch.setattr(kcpp, "DOWNLOAD_RETRY_DELAY", 0)
+    stack = ExitStack()
+
+    def make(**config):
+        server = stack.enter_context(FakeReleaseServer(FakeReleaseConfig(size=SIZE, **config)))
+        monkeypatch.setattr(KoboldCPPManager, "RELEASE_API_URL", server.release_api_url)
+        return KoboldCPPManager(), server
+
+    with stack:
+        yield make
+
+
+def _target(manager) -> Path:
+    return Path(manager.koboldcpp_dir) / ("koboldcpp.exe" if platform.system() == "Windows" else "koboldcpp")
+
+
+def test_clean_download_is_verified(make_manager):
+    manager, server = make_manager()
+    events = []
+    result = manager.download(callback=events.append)
+
+    assert result["status"] == "completed" and result["verified"] is True
+    assert result["sha256"] == server.sha256
+    target = _target(manager)
+    assert target.read_bytes() == server.payload
+    if platform.system() != "Windows":
+        assert os.access(target, os.X_OK)
+    assert sorted(os.listdir(manager.koboldcpp_dir)) == [target.name]
+
+    statuses = [e["status"] for e in events]
+    assert statuses[-2:] == ["verifying", "completed"]
+    downloading = [e for e in events if e["status"] == "downloading"]
+    assert 1 <= len(downloading) <= 5  # throttled, not one per chunk
+    assert downloading[-1]["bytes_downloaded"] == SIZE and downloading[-1]["percent"] == 100
+
+
+def test_dropped_connection_resumes_with_range(make_manager):
+    manager, server = make_manager(drop_after=1024 * 1024)
+    result = manager.download()
+
+    assert result["status"] == "completed"
+    # Resumed where the file ended (a read cut short by the drop is fetched again)
+    first, resumed = server.request_offsets
+    assert first == 0 and 0 < resumed <= 1024 * 1024
+    assert _target(manager).read_bytes() == server.payload
+
+
+def test_interrupted_download_resumes_on_next_call(make_manager, monkeypatch):
+    monkeypatch.setattr(kcpp, "DOWNLOAD_ATTEMPTS", 1)
+    manager, server = make_manager(drop_after=1024 * 1024)
+
+    failed = manager.download()
+    assert failed["status"] == "error"
+    target = _target(manager)
+    assert not target.exists()
+    kept = Path(str(target) + ".part").stat().st_size
+    assert 0 < kept <= 1024 * 1024
+
+    events = []
+    result = manager.download(callback=events.append)
+    assert result["status"] == "completed" and result["verified"] is True
+    assert server.request_offsets == [0, kept]
+    assert events[0]["resumed_from"] == kept
+    assert target.read_bytes() == server.payload
+
+
+def test_server_without_ranges_restarts(make_manager):
+    manager, server = make_manager(drop_after=1024 * 1024, ranges=False)
+    result = manager.download()
+
+    assert result["status"] == "completed"
+    assert server.request_offsets == [0, 0]
+    assert _target(manager).read_bytes() == server.payload
+
+
+def test_checksum_mismatch_keeps_installed_binary(make_manager):
+    manager, server = make_manager(corrupt=True)
+    target = _target(manager)
+    target.write_bytes(b"previous koboldcpp")
+
+    result = manager.download()
+    assert result["status"] == "error" and result["error_code"] == "checksum_mismatch"
+    assert target.read_bytes() == b"previous koboldcpp"
+    assert sorted(os.listdir(manager.koboldcpp_dir)) == [target.name]
+
+
+def test_part_from_another_asset_is_discarded(make_manager):
+    manager, server = make_manager()
+    part = Path(str(_target(manager)) + ".part")
+    part.write_bytes(b"x" * 1000)
+    Path(str(part) + ".json").write_text('{"url": "https://example.invalid/other", "total": 5000}')
+
+    result = manager.download()
+    assert result["status"] == "completed"
+    assert server.request_offsets == [0]
+    assert _target(manager).read_bytes() == server.payload
+
+
+def test_read_size_adapts_to_throughput():
+    sizes = []
+
+    def read(amount, decode_content=True):
+        sizes.append(amount)
+        return b"x" * amount if len(sizes) < 12 else b""
+
+    response = MagicMock()
+    response.raw.read = read
+    list(kcpp._iter_adaptive(response))
+    assert sizes[0] == kcpp.DOWNLOAD_CHUNK_MIN
+    assert sizes[-1] == kcpp.DOWNLOAD_CHUNK_MAX
+    assert sizes == sorted(sizes)
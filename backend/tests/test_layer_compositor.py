@@ -0,0 +1,271 @@
+"""
+Tests for the layered-character compositor (services/layer_compositor.py).
+
+Covers:
+- Composites match a plain bottom-up alpha_composite (mixed sizes and modes)
+- Swapping the top layer decodes one file and composites once
+- Changing a middle layer recomposes from the nearest stored prefix
+- Editing a layer on disk is picked up without invalidation; missing and
+  unreadable layers are skipped
+- The decoded-layer cache stays inside its byte budget
+- Default budgets grow to hold a 30+ layer stack at the base size, up to a ceiling
+- Thumbnails are persisted and reused by a fresh compositor
+- Without a logger, warnings go to the logging module
+- /api/layered-characters composite and thumbnail endpoints
+"""
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.endpoints.layered_character_endpoints import (
+    get_layer_compositor,
+    get_layered_characters_dir,
+    router,
+)
+from backend.error_handlers import register_exception_handlers
+from backend.services import layer_compositor
+from backend.services.layer_compositor import LayerCompositor, find_base_image, fit_size
+
+SIZE = (64, 48)
+
+
+def _layer(path: Path, color, box, size=SIZE, mode="RGBA") -> Path:
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    image.paste(color, box)
+    image.convert(mode).save(path)
+    return path
+
+
+@pytest.fixture
+def stack(tmp_path):
+    base = tmp_path / "base.png"
+    Image.new("RGB", SIZE, (200, 180, 160)).save(base)
+    layers = [
+        _layer(tmp_path / f"layer_{i}.png", (40 * i, 255 - 30 * i, 90, 128 + 10 * i), (i * 4, i * 3, 40 + i, 30 + i))
+        for i in range(8)
+    ]
+    return base, layers
+
+
+@pytest.fixture
+def compositor(tmp_path):
+    return LayerCompositor(thumbnail_dir=tmp_path / "thumbs", checkpoint_every=4)
+
+
+def _reference(base, layers):
+    composite = Image.open(base).convert("RGBA")
+    for path in layers:
+        layer = Image.open(path).convert("RGBA")
+        if layer.size != composite.size:
+            layer = layer.resize(composite.size)
+        composite = Image.alpha_composite(composite, layer)
+    return composite
+
+
+def _delta(compositor, key, before):
+    return compositor.stats()[key] - before[key]
+
+
+def test_matches_reference(tmp_path, stack, compositor):
+    base, layers = stack
+    layers = layers + [
+        _layer(tmp_path / "half.png", (0, 0, 255, 200), (0, 0, 10, 10), size=(32, 24)),
+        _layer(tmp_path / "opaque.png", (9, 9, 9, 255), (50, 0, 64, 8), mode="RGB"),
+    ]
+    assert list(compositor.compose(base, layers).getdata()) == list(_reference(base, layers).getdata())
+
+
+def test_top_layer_swap_composites_once(stack, compositor):
+    base, layers = stack
+    below, top_a, top_b = layers[:6], layers[6], layers[7]
+    compositor.compose(base, below + [top_a])
+
+    before = compositor.stats()
+    result = compositor.compose(base, below + [top_b])
+    assert _delta(compositor, "composites", before) == 1
+    assert _delta(compositor, "layer_misses", before) == 1  # only the new top layer is decoded
+    assert list(result.getdata()) == list(_reference(base, below + [top_b]).getdata())
+
+    # Toggling the top layer off and on again is served from memoized prefixes
+    before = compositor.stats()
+    compositor.compose(base, below)
+    compositor.compose(base, below + [top_b])
+    assert _delta(compositor, "composites", before) == 0
+
+
+def test_middle_change_recomposes_from_checkpoint(stack, compositor):
+    base, layers = stack
+    compositor.compose(base, layers)
+
+    changed = list(layers)
+    changed[5] = layers[0]
+    before = compositor.stats()
+    result = compositor.compose(base, changed)
+    # Prefix of 4 layers is a checkpoint; layers 5..8 are recomposed
+    assert _delta(compositor, "composites", before) == 4
+    assert _delta(compositor, "layer_misses", before) == 0
+    assert list(result.getdata()) == list(_reference(base, changed).getdata())
+
+
+def test_edited_and_broken_layers(tmp_path, stack, compositor):
+    base, layers = stack
+    first = compositor.compose(base, layers[:3])
+
+    stat = os.stat(layers[2])
+    _layer(layers[2], (255, 0, 0, 255), (0, 0, 64, 48))
+    os.utime(layers[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    edited = compositor.compose(base, layers[:3])
+    assert edited.getpixel((60, 45)) == (255, 0, 0, 255)
+    assert edited.getpixel((60, 45)) != first.getpixel((60, 45))
+
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not a png")
+    result = compositor.compose(base, [layers[0], tmp_path / "missing.png", broken, layers[1]])
+    assert list(result.getdata()) == list(_reference(base, [layers[0], layers[1]]).getdata())
+
+    with pytest.raises(OSError):
+        compositor.compose(tmp_path / "missing.png", layers)
+
+
+def test_layer_cache_budget(stack, tmp_path):
+    base, layers = stack
+    layer_bytes = SIZE[0] * SIZE[1] * 4
+    compositor = LayerCompositor(thumbnail_dir=tmp_path / "thumbs", layer_cache_bytes=layer_bytes * 3)
+    compositor.compose(base, layers)
+    stats = compositor.stats()
+    assert stats["layers_cached"] == 3
+    assert stats["layer_cache_bytes"] <= layer_bytes * 3
+
+
+@pytest.fixture
+def tall_stack(tmp_path):
+    base = tmp_path / "base.png"
+    Image.new("RGB", SIZE, (200, 180, 160)).save(base)
+    layers = [
+        _layer(tmp_path / f"tall_{i}.png", (7 * i, 255 - 7 * i, 90, 160), (i, i, 20 + i, 16 + i))
+        for i in range(34)
+    ]
+    return base, layers
+
+
+def test_budgets_sized_from_base_canvas(tall_stack, tmp_path, monkeypatch):
+    # Floors scaled down so 64x48 art stands in for a 2k stack against the old fixed budgets
+    frame = SIZE[0] * SIZE[1] * 4
+    monkeypatch.setattr(layer_compositor, "LAYER_CACHE_FLOOR_BYTES", frame * 8)
+    monkeypatch.setattr(layer_compositor, "PREFIX_CACHE_FLOOR_BYTES", frame * 2)
+    base, layers = tall_stack
+    compositor = LayerCompositor(thumbnail_dir=tmp_path / "thumbs", checkpoint_every=4)
+    compositor.compose(base, layers)
+
+    stats = compositor.stats()
+    assert stats["layer_cache_budget"] == frame * 35
+    assert stats["prefix_cache_budget"] == frame * (35 // 4 + 2)
+    assert stats["layers_cached"] == 35
+
+    # Toggling a middle layer decodes nothing and recomposes from a checkpoint
+    before = compositor.stats()
+    result = compositor.compose(base, layers[:17] + layers[18:])
+    assert _delta(compositor, "layer_misses", before) == 0
+    assert _delta(compositor, "composites", before) == 17  # from the 16-layer checkpoint up
+    assert _delta(compositor, "prefix_hits", before) == 1
+    assert list(result.getdata()) == list(_reference(base, layers[:17] + layers[18:]).getdata())
+
+
+def test_budget_ceiling_and_override(tall_stack, tmp_path, monkeypatch):
+    frame = SIZE[0] * SIZE[1] * 4
+    monkeypatch.setattr(layer_compositor, "LAYER_CACHE_FLOOR_BYTES", 0)
+    monkeypatch.setattr(layer_compositor, "LAYER_CACHE_CEILING_BYTES", frame * 10)
+    base, layers = tall_stack
+    compositor = LayerCompositor(thumbnail_dir=tmp_path / "thumbs")
+    compositor.compose(base, layers)
+    assert compositor.stats()["layer_cache_budget"] == frame * 10
+    assert compositor.stats()["layer_cache_bytes"] <= frame * 10
+
+    monkeypatch.setattr(layer_compositor, "LAYER_CACHE_BYTES_OVERRIDE", frame * 3)
+    pinned = LayerCompositor(thumbnail_dir=tmp_path / "thumbs")
+    pinned.compose(base, layers)
+    assert pinned.stats()["layer_cache_budget"] == frame * 3
+
+
+def test_thumbnails_persist(stack, tmp_path):
+    _, layers = stack
+    first = LayerCompositor(thumbnail_dir=tmp_path / "thumbs")
+    thumb = first.thumbnail(layers[0], (16, 16))
+    assert max(thumb.size) == 16
+    assert first.thumbnail(layers[0], (16, 16)) is thumb
+    assert first.stats()["thumbnail_misses"] == 1 and first.stats()["thumbnail_hits"] == 1
+
+    second = LayerCompositor(thumbnail_dir=tmp_path / "thumbs")
+    assert list(second.thumbnail(layers[0], (16, 16)).getdata()) == list(thumb.getdata())
+    assert second.stats()["thumbnail_disk_hits"] == 1
+    second.thumbnail(layers[1], (16, 16))
+    assert second.stats()["thumbnail_misses"] == 1
+
+
+def test_warnings_without_logger_use_logging(stack, tmp_path, caplog):
+    base, layers = stack
+    compositor = LayerCompositor(thumbnail_dir=tmp_path / "thumbs")
+    with caplog.at_level("WARNING", logger="backend.services.layer_compositor"):
+        compositor.compose(base, [*layers, tmp_path / "missing.png"])
+    assert any("Skipping missing layer" in record.getMessage() for record in caplog.records)
+
+
+def test_find_base_image_and_fit_size(tmp_path):
+    assert find_base_image(tmp_path) is None
+    (tmp_path / "Base").mkdir()
+    for name in ("b.png", "a.PNG", "notes.txt"):
+        (tmp_path / "Base" / name).write_bytes(b"")
+    assert find_base_image(tmp_path).name == "a.PNG"
+    assert fit_size((2048, 1024), (350, 350)) == (350, 175)
+    assert fit_size((100, 200), (350, 350)) == (100, 200)
+
+
+class TestEndpoints:
+    @pytest.fixture
+    def client(self, tmp_path, stack, compositor):
+        base, layers = stack
+        character = tmp_path / "Characters" / "Aria"
+        (character / "Base").mkdir(parents=True)
+        (character / "Hair").mkdir()
+        base.rename(character / "Base" / "body.png")
+        for layer in layers[:2]:
+            layer.rename(character / "Hair" / layer.name)
+
+        app = FastAPI()
+        app.include_router(router)
+        register_exception_handlers(app)
+        app.dependency_overrides[get_layered_characters_dir] = lambda: tmp_path / "Characters"
+        app.dependency_overrides[get_layer_compositor] = lambda: compositor
+        with TestClient(app) as client:
+            yield client
+
+    def _image(self, response):
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "image/png"
+        return Image.open(io.BytesIO(response.content))
+
+    def test_composite(self, client):
+        image = self._image(client.post("/api/layered-characters/Aria/composite",
+                                        json={"layers": ["Hair/layer_0.png", "Hair/layer_1.png"]}))
+        assert image.size == SIZE
+        preview = self._image(client.post("/api/layered-characters/Aria/composite",
+                                          json={"layers": ["Hair/layer_0.png"], "max_width": 32}))
+        assert preview.size == (32, 24)
+
+    def test_thumbnail(self, client):
+        image = self._image(client.get("/api/layered-characters/Aria/thumbnail/Hair/layer_0.png?size=16"))
+        assert max(image.size) == 16
+
+    def test_errors(self, client):
+        assert client.post("/api/layered-characters/Nobody/composite", json={}).status_code == 404
+        assert client.get("/api/layered-characters/Aria/thumbnail/Hair/missing.png").status_code == 404
+        escaped = client.post("/api/layered-characters/Aria/composite", json={"layers": ["../../../etc/passwd"]})
+        assert escaped.status_code == 422
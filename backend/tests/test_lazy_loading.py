@@ -0,0 +1,235 @@
+"""
+Tests for lazy_loading.py and the import-time budget of backend.main.
+
+Covers:
+- LazyHandler constructs exactly once, including under concurrent first use
+- DeferredRouterMiddleware includes routers on first hit, runs slow loaders
+  off the event loop, keeps static mounts last, and loads everything for the
+  OpenAPI schema
+- ``python -X importtime -c "import backend.main"``: rarely used subsystems
+  stay unimported and lazy handlers stay unbuilt
+- Opt-in benchmark: the cumulative import time stays under budget
+  (CARDSHARK_BENCHMARKS=1, CARDSHARK_IMPORT_BUDGET_MS, default 5000)
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.lazy_loading import DeferredRouterMiddleware, LazyHandler, resolve_lazy
+
+DEFERRED_MODULES = (
+    "backend.koboldcpp_handler",
+    "backend.koboldcpp_manager",
+    "backend.services.world_export_service",
+    "backend.batch_converter",
+    "backend.png_debug_handler",
+    "backend.endpoints.world_card_endpoints_v2",
+    "backend.endpoints.room_card_endpoints",
+    "backend.endpoints.lore_endpoints",
+    "backend.endpoints.layered_character_endpoints",
+    "backend.services.layer_compositor",
+)
+
+
+class TestLazyHandler:
+    def test_constructs_once_on_first_get(self):
+        calls = []
+        lazy = LazyHandler(lambda: calls.append(1) or object())
+
+        assert not lazy.is_initialized
+        first = lazy.get()
+        assert lazy.get() is first
+        assert lazy.is_initialized
+        assert calls == [1]
+
+    def test_concurrent_first_use_builds_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        lazy = LazyHandler(factory)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(lazy.get())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_resolve_lazy_passes_through_plain_values(self):
+        value = object()
+        assert resolve_lazy(value) is value
+        assert resolve_lazy(LazyHandler(lambda: value)) is value
+
+
+def _make_app(loads):
+    app = FastAPI(openapi_url="/api/openapi.json")
+
+    def load_tools():
+        loads.append("tools")
+        router = APIRouter(prefix="/api/tools")
+
+        @router.get("/ping")
+        async def ping():
+            return {"pong": True}
+
+        return router
+
+    app.add_middleware(DeferredRouterMiddleware, fastapi_app=app, routers={"/api/tools": load_tools})
+    return app
+
+
+class TestDeferredRouterMiddleware:
+    def test_prefix_matches_whole_segments(self):
+        loads = []
+        app = _make_app(loads)
+
+        with TestClient(app) as client:
+            assert client.get("/api/toolsmith").status_code == 404
+        assert loads == []
+
+    def test_router_loaded_on_first_request(self):
+        loads = []
+        app = _make_app(loads)
+
+        @app.get("/api/other")
+        async def other():
+            return {}
+
+        with TestClient(app) as client:
+            assert client.get("/api/other").status_code == 200
+            assert loads == []
+
+            r = client.get("/api/tools/ping")
+            assert r.status_code == 200
+            assert r.json() == {"pong": True}
+            client.get("/api/tools/ping")
+            assert loads == ["tools"]
+
+    def test_routes_inserted_before_static_mounts(self):
+        loads = []
+        app = _make_app(loads)
+        app.mount("/", PlainTextResponse("spa"), name="frontend")
+
+        with TestClient(app) as client:
+            r = client.get("/api/tools/ping")
+            assert r.json() == {"pong": True}
+        assert isinstance(app.router.routes[-1], Mount)
+
+    def test_slow_loader_does_not_block_other_requests(self):
+        release = threading.Event()
+        loader_threads = []
+        app = FastAPI()
+
+        def load_slow():
+            loader_threads.append(threading.get_ident())
+            release.wait(5)
+            router = APIRouter(prefix="/api/slow")
+
+            @router.get("/ping")
+            async def ping():
+                return {"pong": True}
+
+            return router
+
+        app.add_middleware(DeferredRouterMiddleware, fastapi_app=app, routers={"/api/slow": load_slow})
+
+        @app.get("/api/other")
+        async def other():
+            return {}
+
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+                slow = [asyncio.ensure_future(client.get("/api/slow/ping")) for _ in range(2)]
+                # The loader is stuck on a worker thread; the loop still serves requests
+                other = await asyncio.wait_for(client.get("/api/other"), timeout=2)
+                assert other.status_code == 200
+                release.set()
+                return [r.json() for r in await asyncio.gather(*slow)]
+
+        loop_thread = threading.get_ident()
+        assert asyncio.run(main()) == [{"pong": True}, {"pong": True}]
+        assert len(loader_threads) == 1 and loader_threads[0] != loop_thread
+
+    def test_openapi_schema_includes_deferred_routes(self):
+        loads = []
+        app = _make_app(loads)
+
+        with TestClient(app) as client:
+            schema = client.get("/api/openapi.json").json()
+
+        assert "/api/tools/ping" in schema["paths"]
+        assert loads == ["tools"]
+
+
+def _run_import_probe():
+    probe = (
+        "import sys, backend.main as m\n"
+        "print('LAZY', m.content_filter_manager.is_initialized, m.template_handler.is_initialized, "
+        "m.background_handler.is_initialized)\n"
+        "print('MODULES', ' '.join(sorted(n for n in sys.modules if n.startswith('backend.'))))\n"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+@pytest.fixture(scope="module")
+def import_probe():
+    result = _run_import_probe()
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result
+
+
+class TestImportTimeBudget:
+    def test_rarely_used_modules_are_not_imported(self, import_probe):
+        modules_line = next(l for l in import_probe.stdout.splitlines() if l.startswith("MODULES"))
+        imported = set(modules_line.split()[1:])
+        assert not imported.intersection(DEFERRED_MODULES)
+
+    def test_handlers_are_not_constructed_at_import(self, import_probe):
+        lazy_line = next(l for l in import_probe.stdout.splitlines() if l.startswith("LAZY"))
+        assert lazy_line.split()[1:] == ["False", "False", "False"]
+
+    @pytest.mark.skipif(
+        os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+        reason="Set CARDSHARK_BENCHMARKS=1 to run import-time benchmarks",
+    )
+    def test_cumulative_import_time_within_budget(self, import_probe):
+        budget_ms = float(os.environ.get("CARDSHARK_IMPORT_BUDGET_MS", "5000"))
+        cumulative_us = None
+        for line in import_probe.stderr.splitlines():
+            if line.startswith("import time:") and line.rstrip().endswith("| backend.main"):
+                cumulative_us = int(line.split("|")[1])
+        assert cumulative_us is not None, "backend.main missing from -X importtime output"
+        assert cumulative_us / 1000 < budget_ms, (
+            f"backend.main cumulative={cumulative_us / 1000:.1f}ms budget={budget_ms:.0f}ms"
+        )
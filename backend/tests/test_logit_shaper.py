@@ -7,7 +7,11 @@ Verifies:
 - Contractions are protected
 - Words exceeding the threshold in the rolling window get banned
 - Bans decay after TTL expires
+- Window word/proper-noun counts are maintained incrementally
+- State snapshots to SQLite and is restored or rebuilt after a restart
 """
+import json
+
 import pytest
 from pathlib import Path
 import sys
@@ -204,3 +208,126 @@ class TestHardRegenerate:
             "Hard Regenerate must not advance the LogitShaper turn counter — "
             "each click replaces the current turn rather than appending a new one."
         )
+
+
+class TestIncrementalWindow:
+    def test_proper_nouns_precomputed_per_turn(self):
+        from backend.logit_shaper import _find_proper_nouns
+
+        nouns = _find_proper_nouns("Shimmering light. The warrior saw Elena.\nMarcus waved at Elena's friend.")
+        assert "elena" in nouns
+        assert "shimmering" not in nouns
+        assert "marcus" not in nouns  # line start counts as sentence start
+
+    def test_counts_track_window_and_regeneration(self):
+        shaper = LogitShaper()
+        shaper.analyze_output("The glistening blade.")
+        shaper.analyze_output("A glistening shield.")
+        assert shaper._word_turns["glistening"] == 2
+
+        shaper.analyze_output("A plain shield.", is_regeneration=True)
+        assert shaper._word_turns["glistening"] == 1
+        assert shaper._word_turns["shield"] == 1
+
+        for i in range(WINDOW_SIZE):
+            shaper.analyze_output(f"Filler number {i}.")
+        assert "glistening" not in shaper._word_turns
+        assert sum(1 for _ in shaper._word_turns.elements()) < 20
+
+    def test_proper_noun_evicted_from_window_loses_protection(self):
+        shaper = LogitShaper()
+        for _ in range(WINDOW_SIZE):
+            shaper.analyze_output("They met Valerian again. The valerian grew.")
+        assert "valerian" not in shaper.get_banned_tokens()
+
+        # Once no buffered turn has it capitalized mid-sentence, it can be banned
+        for _ in range(WINDOW_SIZE - 1):
+            shaper.analyze_output("Valerian tea. The valerian root.")
+            assert "valerian" not in shaper.get_banned_tokens()
+        shaper.analyze_output("Valerian tea. The valerian root.")
+        assert "valerian" in shaper.get_banned_tokens()
+
+    def test_detection_does_not_rescan_turn_text(self, monkeypatch):
+        import backend.logit_shaper as shaper_module
+
+        shaper = LogitShaper()
+        calls = []
+        original = shaper_module._find_proper_nouns
+        monkeypatch.setattr(shaper_module, "_find_proper_nouns", lambda text: calls.append(text) or original(text))
+        for text in ["The glistening surface.", "A glistening blade.", "His glistening armor."]:
+            shaper.analyze_output(text)
+
+        assert len(calls) == 3  # once per turn, never per candidate word
+
+
+@pytest.fixture
+def shaper_session_factory():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.database import Base
+    import backend.sql_models  # noqa: F401
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def clean_registry():
+    import backend.logit_shaper as shaper_module
+    shaper_module._shaper_registry.clear()
+    yield shaper_module
+    shaper_module._shaper_registry.clear()
+
+
+GLISTENING_TURNS = [
+    "The glistening surface caught her eye.",
+    "A glistening blade lay on the table.",
+    "His glistening armor reflected the light.",
+]
+
+
+class TestPersistence:
+    def test_state_round_trip(self):
+        shaper = LogitShaper()
+        for text in GLISTENING_TURNS:
+            shaper.analyze_output(text)
+
+        restored = LogitShaper.from_state(json.loads(json.dumps(shaper.to_state())))
+
+        assert restored.get_banned_tokens() == shaper.get_banned_tokens()
+        assert restored.current_turn_number == shaper.current_turn_number
+        assert restored._word_turns == shaper._word_turns
+
+    def test_bans_survive_restart(self, shaper_session_factory, clean_registry):
+        shaper = clean_registry.get_or_create_shaper("s1", session_factory=shaper_session_factory)
+        for text in GLISTENING_TURNS:
+            shaper.analyze_output(text)
+        assert clean_registry.persist_shaper("s1", shaper_session_factory)
+
+        clean_registry._shaper_registry.clear()  # simulated restart / stale cleanup
+        restored = clean_registry.get_or_create_shaper("s1", session_factory=shaper_session_factory)
+
+        assert restored is not shaper
+        assert "glistening" in restored.get_banned_tokens()
+
+    def test_rebuilds_from_messages_without_snapshot(self, shaper_session_factory, clean_registry):
+        from backend import sql_models
+
+        with shaper_session_factory() as db:
+            db.add(sql_models.ChatSession(chat_session_uuid="s2", character_uuid="c"))
+            for i, text in enumerate(["Hello there."] + GLISTENING_TURNS):
+                db.add(sql_models.ChatMessage(message_id=f"a{i}", chat_session_uuid="s2", role="assistant",
+                                              content=text, sequence_number=i * 2 + 1))
+                db.add(sql_models.ChatMessage(message_id=f"u{i}", chat_session_uuid="s2", role="user",
+                                              content="glistening glistening", sequence_number=i * 2 + 2))
+            db.commit()
+
+        shaper = clean_registry.get_or_create_shaper("s2", session_factory=shaper_session_factory)
+
+        assert "glistening" in shaper.get_banned_tokens()
+
+    def test_unknown_session_starts_empty(self, shaper_session_factory, clean_registry):
+        shaper = clean_registry.get_or_create_shaper("nope", session_factory=shaper_session_factory)
+        assert shaper.get_banned_tokens() == [] and shaper.current_turn_number == 0
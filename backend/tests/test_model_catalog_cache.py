@@ -0,0 +1,263 @@
+"""
+Tests for the provider model catalog cache (services/model_catalog_cache.py).
+
+Covers:
+- Repeat list_models calls inside the TTL don't contact the provider
+- Stale catalogs are served immediately and revalidated in the background
+  with If-None-Match (304 keeps the catalog)
+- A changed catalog is picked up on refresh
+- Provider outages serve the last catalog, marked stale; with nothing cached
+  the error is returned
+- Entries are separated per API key, persisted without the key, and reused
+  by a fresh cache
+- Persisted catalogs are read outside the cache lock; without a logger,
+  warnings go to the logging module
+- Concurrent misses share one provider request
+- Search and paging (filter_models, /api/openrouter/models, /api/featherless/models)
+  and the response envelope ModelSelector reads
+"""
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_provider_adapters import (
+    ApiProviderAdapter,
+    FeatherlessAdapter,
+    OllamaAdapter,
+    OpenRouterAdapter,
+)
+from backend.dependencies import get_logger_dependency
+from backend.endpoints.settings_endpoints import router as settings_router
+from backend.services.model_catalog_cache import (
+    CatalogFetch,
+    CatalogFetchError,
+    ModelCatalogCache,
+    catalog_key,
+    filter_models,
+)
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+
+API_KEY = "sk-or-secret-key"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(FakeLLMConfig(catalog_size=50)) as server:
+        yield server
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock, monkeypatch):
+    cache = ModelCatalogCache(cache_dir=tmp_path / "catalogs", ttl_seconds=60, clock=clock, logger=MagicMock())
+    monkeypatch.setattr(ApiProviderAdapter, "catalog_cache", cache)
+    return cache
+
+
+def test_fresh_catalog_is_served_from_cache(server, cache):
+    adapter = OpenRouterAdapter(MagicMock())
+    first = adapter.list_models(server.url, API_KEY)
+    second = adapter.list_models(server.url, API_KEY)
+
+    assert first["success"] and len(first["models"]) == 50
+    assert first["cached"] is False and second["cached"] is True and second["stale"] is False
+    assert second["models"] == first["models"]
+    assert server.model_list_requests == 1
+
+
+def test_stale_catalog_revalidates_in_background(server, cache, clock):
+    adapter = FeatherlessAdapter(MagicMock())
+    adapter.list_models(server.url, API_KEY)
+    clock.now += 120
+
+    stale = adapter.list_models(server.url, API_KEY)
+    assert stale["success"] and stale["stale"] is True and len(stale["models"]) == 50
+    cache.wait_for_refreshes(5)
+    assert server.model_list_requests == 2
+    assert server.not_modified_responses == 1
+
+    fresh = adapter.list_models(server.url, API_KEY)
+    assert fresh["stale"] is False and fresh["fetched_at"] == clock.now
+    assert server.model_list_requests == 2
+
+
+def test_changed_catalog_on_refresh(server, cache):
+    adapter = OllamaAdapter(MagicMock())
+    before = adapter.list_models(server.url)
+    server.config.catalog_version = 2
+    server.config.catalog_size = 60
+    after = adapter.list_models(server.url, refresh=True)
+
+    assert len(before["models"]) == 50 and len(after["models"]) == 60
+    assert after["cached"] is False
+    assert server.not_modified_responses == 0
+
+
+def test_outage_serves_last_catalog(server, cache, clock):
+    adapter = OpenRouterAdapter(MagicMock())
+    adapter.list_models(server.url, API_KEY)
+    server.config.models_status = 503
+    clock.now += 50
+
+    result = adapter.list_models(server.url, API_KEY, refresh=True)
+    assert result["success"] and result["stale"] is True
+    assert len(result["models"]) == 50 and "503" in result["error"]
+
+    # Past the TTL, but a refresh failed recently: no new request yet
+    clock.now += 15
+    requests_before = server.model_list_requests
+    assert adapter.list_models(server.url, API_KEY)["stale"] is True
+    cache.wait_for_refreshes(5)
+    assert server.model_list_requests == requests_before
+
+    nothing_cached = adapter.list_models(server.url, "another-key")
+    assert nothing_cached["success"] is False and "503" in nothing_cached["error"]
+
+    # Once the backoff is over the background refresh recovers the catalog
+    server.config.models_status = 200
+    clock.now += 30
+    adapter.list_models(server.url, API_KEY)
+    cache.wait_for_refreshes(5)
+    recovered = adapter.list_models(server.url, API_KEY)
+    assert recovered["stale"] is False and "error" not in recovered
+
+
+def test_keys_are_separate_and_persisted_without_secret(server, cache, tmp_path, clock):
+    adapter = OpenRouterAdapter(MagicMock())
+    adapter.list_models(server.url, API_KEY)
+    adapter.list_models(server.url, "other-key")
+    assert server.model_list_requests == 2
+
+    files = list((tmp_path / "catalogs").glob("*.json"))
+    assert len(files) == 2
+    assert all(API_KEY not in f.read_text(encoding="utf-8") for f in files)
+
+    restarted = ModelCatalogCache(cache_dir=tmp_path / "catalogs", ttl_seconds=60, clock=clock)
+    adapter.catalog_cache = restarted
+    result = adapter.list_models(server.url, API_KEY)
+    assert result["cached"] is True and len(result["models"]) == 50
+    assert server.model_list_requests == 2
+
+
+def test_persisted_catalog_read_outside_lock(tmp_path, clock, caplog):
+    cache = ModelCatalogCache(cache_dir=tmp_path / "catalogs", ttl_seconds=60, clock=clock)
+    key = catalog_key("OpenRouter", "http://provider", API_KEY)
+    cache._path(key).parent.mkdir(parents=True)
+    cache._path(key).write_text("{not json", encoding="utf-8")
+    load = cache._load
+    lock_held = []
+
+    def watched_load(k):
+        lock_held.append(cache._lock.locked())
+        return load(k)
+
+    cache._load = watched_load
+    with caplog.at_level("WARNING", logger="backend.services.model_catalog_cache"):
+        result = cache.get(key, lambda previous: CatalogFetch([{"id": "m"}]))
+
+    assert lock_held == [False]
+    assert result.models == [{"id": "m"}]
+    assert any("unreadable model catalog cache" in r.getMessage() for r in caplog.records)
+
+
+def test_concurrent_misses_share_one_request(cache):
+    calls = []
+    release = threading.Event()
+
+    def fetch(previous):
+        calls.append(previous)
+        release.wait(5)
+        return CatalogFetch([{"id": "a"}], etag='"1"')
+
+    key = catalog_key("OpenRouter", "https://openrouter.ai/api/v1", API_KEY)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(key, fetch))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1 and calls[0] is None
+    assert [r.models for r in results] == [[{"id": "a"}]] * 4
+
+
+def test_first_fetch_failure_raises(cache):
+    def fetch(previous):
+        raise CatalogFetchError("API returned status 401", 401)
+
+    with pytest.raises(CatalogFetchError, match="401"):
+        cache.get(catalog_key("Featherless", "https://api.featherless.ai/v1"), fetch)
+    assert cache.stats()["errors"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_filter_models():
+    models = [
+        {"id": "meta-llama/llama-3-70b", "name": "Llama 3 70B", "description": "Instruct"},
+        {"id": "mistralai/mixtral", "name": "Mixtral", "description": "Sparse mixture"},
+        {"id": "meta-llama/llama-3-8b", "name": "Llama 3 8B"},
+    ]
+    page, total = filter_models(models, search="LLAMA 3", offset=1, limit=5)
+    assert total == 2 and [m["id"] for m in page] == ["meta-llama/llama-3-8b"]
+    page, total = filter_models(models, search="mixture")
+    assert total == 1 and page[0]["id"] == "mistralai/mixtral"
+    assert filter_models(models, limit=2) == (models[:2], 3)
+
+
+class TestRoutes:
+    @pytest.fixture
+    def client(self, cache):
+        app = FastAPI()
+        app.include_router(settings_router)
+        app.dependency_overrides[get_logger_dependency] = lambda: MagicMock()
+        with TestClient(app) as client:
+            yield client
+
+    def test_openrouter_models_paged(self, client, server):
+        response = client.post("/api/openrouter/models",
+                               json={"url": server.url, "apiKey": API_KEY, "search": "qwen", "limit": 3})
+        assert response.status_code == 200, response.text
+        data = response.json()["data"]
+        assert data["total"] == 7 and len(data["models"]) == 3
+        assert all("qwen" in m["id"] for m in data["models"])
+
+        second = client.post("/api/openrouter/models",
+                             json={"url": server.url, "apiKey": API_KEY, "offset": 48}).json()["data"]
+        assert second["cached"] is True and second["total"] == 50 and len(second["models"]) == 2
+        assert server.model_list_requests == 1
+
+    @pytest.mark.parametrize("route", ["/api/openrouter/models", "/api/featherless/models"])
+    def test_response_shape(self, client, server, route):
+        # ModelSelector.tsx reads success and data.models from this envelope
+        body = client.post(route, json={"url": server.url, "apiKey": API_KEY, "limit": 2}).json()
+        assert body["success"] is True
+        assert {"models", "total", "offset", "limit", "cached"} <= set(body["data"])
+        assert all({"id", "name"} <= set(model) for model in body["data"]["models"])
+
+    def test_featherless_models_unpaged_by_default(self, client, server):
+        data = client.post("/api/featherless/models", json={"url": server.url, "apiKey": API_KEY}).json()["data"]
+        assert len(data["models"]) == data["total"] == 50
+        assert data["limit"] is None
+        json.dumps(data)  # plain JSON all the way down
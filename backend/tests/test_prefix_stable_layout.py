@@ -0,0 +1,131 @@
+"""
+Tests for the prefix-stable prompt layout in prompt_assembly_service.py.
+
+Covers:
+- Lore moves out of memory into the tail next to the session notes
+  (KoboldCPP story / instruct and template instruct paths)
+- Memory stays byte-identical across turns while the matched lore changes
+- Prefix reuse is reported per session and is higher than the classic layout
+- The reuse ratio is observed in the metrics registry
+- common_prefix_length
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.prompt_assembly_service import (
+    PROMPT_LAYOUT_CLASSIC,
+    PROMPT_LAYOUT_PREFIX_STABLE,
+    PromptAssemblyCache,
+    PromptAssemblyService,
+    common_prefix_length,
+)
+from backend.utils.metrics import REGISTRY
+
+CHATML = {
+    'id': 'chatml',
+    'userFormat': '<|im_start|>user\n{{content}}<|im_end|>',
+    'assistantFormat': '<|im_start|>assistant\n{{content}}<|im_end|>',
+    'systemFormat': '<|im_start|>system\n{{content}}<|im_end|>',
+    'outputSequence': '<|im_start|>assistant\n',
+    'stopSequences': ['<|im_end|>'],
+}
+
+CHARACTER = {'data': {'name': 'Aria', 'description': 'An elven ranger.',
+                      'personality': 'Brave.', 'scenario': 'The forest burns.'}}
+
+DRAGON = {'id': 1, 'content': 'Dragons nest in the northern peaks.', 'position': 'before_char'}
+RIVER = {'id': 2, 'content': 'The river Anduin runs cold.', 'position': 'an_top'}
+
+
+def _history(count):
+    return [
+        {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'Message {i} about the forest.'}
+        for i in range(count)
+    ]
+
+
+def _assemble(service, history, lore, layout, **overrides):
+    kwargs = dict(chat_history=history, character_data=CHARACTER, template_format=CHATML,
+                  user_name='Sam', message_count=len(history), chat_session_uuid='s1',
+                  matched_lore=lore, session_notes='Aria is wounded.', prompt_layout=layout)
+    kwargs.update(overrides)
+    return service.assemble(**kwargs)
+
+
+@pytest.fixture
+def service():
+    return PromptAssemblyService(MagicMock(), cache=PromptAssemblyCache())
+
+
+@pytest.mark.parametrize('overrides', [
+    {'is_kobold': True},
+    {'is_kobold': True, 'template_format': None},
+    {'is_kobold': False},
+])
+def test_lore_moves_to_tail(service, overrides):
+    classic = _assemble(service, _history(4), [DRAGON], PROMPT_LAYOUT_CLASSIC,
+                        chat_session_uuid='classic', **overrides)
+    stable = _assemble(service, _history(4), [DRAGON], PROMPT_LAYOUT_PREFIX_STABLE, **overrides)
+
+    assert DRAGON['content'] in classic.memory
+    assert DRAGON['content'] not in stable.memory
+    assert DRAGON['content'] in stable.prompt
+    # Lore sits after the chat history, ahead of the session notes
+    assert stable.prompt.index('Message 3') < stable.prompt.index(DRAGON['content'])
+    assert stable.prompt.index(DRAGON['content']) < stable.prompt.index('Aria is wounded.')
+    assert stable.debug_info['prompt_layout'] == PROMPT_LAYOUT_PREFIX_STABLE
+    assert stable.debug_info['lore_tail_length'] > 0
+
+
+def test_memory_stable_while_lore_changes(service):
+    first = _assemble(service, _history(4), [DRAGON], PROMPT_LAYOUT_PREFIX_STABLE, is_kobold=True)
+    second = _assemble(service, _history(6), [RIVER], PROMPT_LAYOUT_PREFIX_STABLE, is_kobold=True)
+
+    assert first.memory == second.memory
+    assert RIVER['content'] in second.prompt
+    assert DRAGON['content'] not in second.prompt
+
+
+def test_prefix_reuse_beats_classic(service):
+    ratios = {}
+    for layout in (PROMPT_LAYOUT_CLASSIC, PROMPT_LAYOUT_PREFIX_STABLE):
+        first = _assemble(service, _history(20), [DRAGON], layout, is_kobold=True, chat_session_uuid=layout)
+        assert first.debug_info['prefix_reuse'] is None
+        second = _assemble(service, _history(22), [RIVER], layout, is_kobold=True, chat_session_uuid=layout)
+        reuse = second.debug_info['prefix_reuse']
+        assert reuse['total_chars'] == len(second.memory + second.prompt)
+        ratios[layout] = reuse['ratio']
+
+    assert ratios[PROMPT_LAYOUT_PREFIX_STABLE] > 0.8
+    assert ratios[PROMPT_LAYOUT_PREFIX_STABLE] > ratios[PROMPT_LAYOUT_CLASSIC]
+
+
+def test_reuse_ratio_observed():
+    REGISTRY.reset()
+    service = PromptAssemblyService(MagicMock(), cache=PromptAssemblyCache())
+    _assemble(service, _history(4), [DRAGON], PROMPT_LAYOUT_PREFIX_STABLE)
+    _assemble(service, _history(6), [DRAGON], PROMPT_LAYOUT_PREFIX_STABLE)
+
+    _, _, count = REGISTRY.histogram('cardshark_prompt_prefix_reuse_ratio', layout='prefix_stable').snapshot()
+    assert count == 1
+    assert 'cardshark_prompt_prefix_reuse_ratio_bucket{layout="prefix_stable",le="0.5"}' in REGISTRY.render_prometheus()
+
+
+def test_no_reuse_report_without_session():
+    service = PromptAssemblyService(MagicMock())
+    result = _assemble(service, _history(4), [DRAGON], PROMPT_LAYOUT_PREFIX_STABLE, chat_session_uuid=None)
+    assert 'prefix_reuse' not in result.debug_info
+    assert DRAGON['content'] not in result.memory
+
+
+def test_common_prefix_length():
+    assert common_prefix_length('', 'abc') == 0
+    assert common_prefix_length('abc', 'abc') == 3
+    assert common_prefix_length('abcdef', 'abcxyz') == 3
+    assert common_prefix_length('abc', 'abcdef') == 3
+    assert common_prefix_length('xbc', 'abc') == 0
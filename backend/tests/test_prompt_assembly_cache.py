@@ -0,0 +1,163 @@
+"""
+Tests for PromptAssemblyCache in prompt_assembly_service.py.
+
+Covers:
+- Cached assembly produces the same prompt and memory as uncached assembly
+  across appended turns, edited messages, and template / name changes
+- Only new or changed messages are formatted on the next turn
+- Memory is rebuilt only when the card, excluded fields or lore set change
+- Opt-in benchmark: assembly time for turn N+1 on a 2k-message chat stays
+  near constant (CARDSHARK_BENCHMARKS=1)
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.services.prompt_assembly_service import (
+    PromptAssemblyCache,
+    PromptAssemblyService,
+)
+
+CHATML = {
+    'id': 'chatml',
+    'userFormat': '<|im_start|>user\n{{content}}<|im_end|>',
+    'assistantFormat': '<|im_start|>assistant\n{{content}}<|im_end|>',
+    'systemFormat': '<|im_start|>system\n{{content}}<|im_end|>',
+    'outputSequence': '<|im_start|>assistant\n',
+    'stopSequences': ['<|im_end|>'],
+}
+
+CHARACTER = {'data': {'name': 'Aria', 'description': 'An elven ranger, {{user}}\'s guide.',
+                      'personality': 'Brave.', 'scenario': 'The forest burns.'}}
+
+
+def _history(count, offset=0):
+    return [
+        {'role': 'user' if i % 2 == 0 else 'assistant',
+         'content': f'<p>Message {i} about the <b>forest</b> &amp; {{{{char}}}}.</p>'}
+        for i in range(offset, offset + count)
+    ]
+
+
+def _assemble(service, history, **overrides):
+    kwargs = dict(chat_history=history, character_data=CHARACTER, template_format=CHATML,
+                  user_name='Sam', message_count=len(history), chat_session_uuid='s1')
+    kwargs.update(overrides)
+    return service.assemble(**kwargs)
+
+
+@pytest.fixture
+def cached():
+    return PromptAssemblyService(MagicMock(), cache=PromptAssemblyCache())
+
+
+@pytest.fixture
+def uncached():
+    return PromptAssemblyService(MagicMock())
+
+
+class TestEquivalence:
+    @pytest.mark.parametrize('template', [CHATML, None])
+    @pytest.mark.parametrize('is_kobold', [False, True])
+    def test_appended_turns_match_uncached(self, cached, uncached, template, is_kobold):
+        history = _history(6)
+        for turn in range(4):
+            a = _assemble(cached, history, template_format=template, is_kobold=is_kobold)
+            b = _assemble(uncached, history, template_format=template, is_kobold=is_kobold)
+            assert (a.prompt, a.memory) == (b.prompt, b.memory)
+            history = history + _history(2, offset=6 + 2 * turn)
+
+    def test_edit_delete_and_thinking_messages(self, cached, uncached):
+        history = _history(8)
+        _assemble(cached, history)
+
+        edited = [dict(m) for m in history]
+        edited[3]['content'] = 'Rewritten reply'
+        del edited[5]
+        edited.insert(2, {'role': 'thinking', 'content': 'hidden'})
+
+        assert _assemble(cached, edited).prompt == _assemble(uncached, edited).prompt
+
+    def test_template_and_name_changes_reset_fragments(self, cached, uncached):
+        history = _history(4)
+        _assemble(cached, history)
+
+        other = dict(CHATML, userFormat='[INST] {{content}} [/INST]')
+        assert _assemble(cached, history, template_format=other).prompt == \
+            _assemble(uncached, history, template_format=other).prompt
+        assert _assemble(cached, history, user_name='Kim').prompt == \
+            _assemble(uncached, history, user_name='Kim').prompt
+
+    def test_sessions_are_isolated(self, cached, uncached):
+        _assemble(cached, _history(4))
+        other = _history(3, offset=50)
+        assert _assemble(cached, other, chat_session_uuid='s2').prompt == _assemble(uncached, other).prompt
+
+
+class TestIncrementalWork:
+    def test_only_new_messages_are_formatted(self, cached):
+        history = _history(100)
+        _assemble(cached, history)
+
+        with patch.object(cached, '_format_history_message', wraps=cached._format_history_message) as fmt:
+            _assemble(cached, history + _history(2, offset=100))
+        assert fmt.call_count == 2
+
+    def test_swipe_reuses_everything_but_the_last_message(self, cached):
+        history = _history(50)
+        _assemble(cached, history)
+
+        swiped = history[:-1] + [{'role': 'assistant', 'content': 'Another take'}]
+        with patch.object(cached, '_format_history_message', wraps=cached._format_history_message) as fmt:
+            _assemble(cached, swiped)
+        assert fmt.call_count == 1
+
+    def test_memory_rebuilt_only_when_inputs_change(self, cached):
+        from backend.lore_handler import LoreHandler
+
+        history = _history(4)
+        with patch.object(LoreHandler, 'build_memory', autospec=True, side_effect=LoreHandler.build_memory) as build:
+            _assemble(cached, history)
+            _assemble(cached, history + _history(2, offset=4))
+            assert build.call_count == 1
+
+            _assemble(cached, history, matched_lore=[{'content': 'The river is cold.'}])
+            assert build.call_count == 2
+
+            card = {'data': dict(CHARACTER['data'], personality='Cautious.')}
+            assert 'Cautious.' in _assemble(cached, history, character_data=card).memory
+            assert build.call_count == 3
+
+    def test_session_cache_is_bounded(self):
+        cache = PromptAssemblyCache(max_sessions=2)
+        first = cache.for_session('a')
+        cache.for_session('b')
+        cache.for_session('c')
+        assert cache.for_session('a') is not first
+
+
+@pytest.mark.skipif(
+    os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+    reason="Set CARDSHARK_BENCHMARKS=1 to run prompt assembly benchmarks",
+)
+def test_next_turn_cost_on_long_chat(cached, uncached):
+    history = _history(2000)
+    _assemble(cached, history)
+
+    def best_of(service, runs=3):
+        timings = []
+        for i in range(runs):
+            turn = history + _history(2, offset=2000 + 2 * i)
+            start = time.perf_counter()
+            _assemble(service, turn)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    cold, warm = best_of(uncached), best_of(cached)
+    assert warm < cold / 3, f"2k messages: uncached={cold * 1000:.1f}ms cached={warm * 1000:.1f}ms"
@@ -0,0 +1,208 @@
+"""
+Tests for settings_manager.py
+
+Covers:
+- Copy-on-write snapshots: old snapshots are never mutated, unchanged
+  branches are shared, None still deletes a key
+- Debounced write-behind: bursts of updates coalesce into one atomic write,
+  flush() persists immediately, no temp files are left behind
+- Change notifications filtered by top-level key
+- Endpoints that report a setting as saved return an error when the write fails
+- Opt-in benchmark: update cost stays in the microsecond range
+  (CARDSHARK_BENCHMARKS=1)
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.settings_manager import (
+    DebouncedSettingsWriter,
+    SettingsManager,
+    merge_copy_on_write,
+)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    with patch.object(SettingsManager, "_get_settings_path", return_value=settings_file):
+        manager = SettingsManager(MagicMock())
+    yield manager
+    manager.flush()
+
+
+def _read(manager):
+    return json.loads(manager.settings_file.read_text(encoding="utf-8"))
+
+
+class TestMergeCopyOnWrite:
+    def test_base_is_not_mutated(self):
+        base = {"a": {"b": 1, "c": 2}, "d": 3}
+        result = merge_copy_on_write({"a": {"b": 10}}, base)
+
+        assert base == {"a": {"b": 1, "c": 2}, "d": 3}
+        assert result == {"a": {"b": 10, "c": 2}, "d": 3}
+
+    def test_unchanged_branches_are_shared(self):
+        base = {"theme": "dark", "syntax": {"bold": {"color": "#fff"}}, "api": {"url": "x"}}
+        result = merge_copy_on_write({"syntax": {"bold": {"color": "#000"}}}, base)
+
+        assert result["api"] is base["api"]
+        assert result["syntax"] is not base["syntax"]
+
+    def test_none_deletes_key(self):
+        result = merge_copy_on_write({"a": None, "b": {"c": None}}, {"a": 1, "b": {"c": 2, "d": 3}})
+        assert result == {"b": {"d": 3}}
+
+
+class TestSettingsSnapshot:
+    def test_update_swaps_snapshot_and_keeps_old_one_intact(self, manager):
+        before = manager.settings
+        old_volume = before["sfxVolume"]
+
+        assert manager.update_settings({"sfxVolume": 5})
+
+        assert manager.settings["sfxVolume"] == 5
+        assert before["sfxVolume"] == old_volume
+        assert manager.get_setting("sfxVolume") == 5
+
+    def test_settings_cannot_be_reassigned(self, manager):
+        with pytest.raises(AttributeError):
+            manager.settings = {}
+
+    def test_legacy_template_field_is_normalized_on_write(self, manager):
+        manager.update_settings({"api": {"template": "chatml"}})
+        manager.flush()
+
+        assert "template" not in _read(manager)["api"]
+        # The in-memory snapshot is untouched by the write path
+        assert manager.settings["api"]["template"] == "chatml"
+
+
+class TestPersistence:
+    def test_burst_of_updates_coalesces_into_one_write(self, manager):
+        with patch.object(manager, "_save_settings", wraps=manager._save_settings) as save:
+            manager._writer = DebouncedSettingsWriter(save, delay=0.05, max_delay=1.0)
+            for volume in range(20):
+                manager.update_settings({"musicVolume": volume})
+            time.sleep(0.3)
+
+        assert save.call_count == 1
+        assert _read(manager)["musicVolume"] == 19
+
+    def test_max_delay_bounds_postponement(self):
+        writes = []
+        writer = DebouncedSettingsWriter(writes.append, delay=0.2, max_delay=0.3)
+        deadline = time.monotonic() + 0.8
+        i = 0
+        while time.monotonic() < deadline:
+            writer.schedule({"i": i})
+            i += 1
+            time.sleep(0.05)
+        writer.flush()
+
+        # Continuous updates still produce intermediate writes
+        assert len(writes) >= 2
+
+    def test_flush_writes_immediately_and_atomically(self, manager):
+        manager.update_settings({"theme": "light"})
+        assert manager._writer.has_pending
+
+        assert manager.flush()
+
+        assert not manager._writer.has_pending
+        assert _read(manager)["theme"] == "light"
+        assert list(manager.settings_file.parent.glob(".settings.*.tmp")) == []
+
+    def test_failed_replace_keeps_previous_file(self, manager):
+        manager.update_settings({"theme": "light"})
+        manager.flush()
+
+        manager.update_settings({"theme": "neon"})
+        with patch("backend.utils.atomic_files.os.replace", side_effect=OSError("disk full")):
+            assert manager.flush() is False
+
+        assert _read(manager)["theme"] == "light"
+        assert list(manager.settings_file.parent.glob(".settings.*.tmp")) == []
+
+
+class TestSubscriptions:
+    def test_listener_receives_changed_keys(self, manager):
+        calls = []
+        manager.subscribe(lambda snapshot, changed: calls.append((snapshot["theme"], changed)))
+
+        manager.update_settings({"theme": "light"})
+
+        assert calls == [("light", {"theme"})]
+
+    def test_key_filter_and_unsubscribe(self, manager):
+        calls = []
+        unsubscribe = manager.subscribe(lambda s, c: calls.append(c), keys=["character_directory"])
+
+        manager.update_settings({"sfxVolume": 1})
+        manager.update_settings({"character_directory": "elsewhere"})
+        unsubscribe()
+        manager.update_settings({"character_directory": "again"})
+
+        assert calls == [{"character_directory"}]
+
+    def test_failing_listener_does_not_break_update(self, manager):
+        def broken(snapshot, changed):
+            raise RuntimeError("boom")
+
+        manager.subscribe(broken)
+        assert manager.update_settings({"theme": "light"})
+        assert manager.settings["theme"] == "light"
+
+
+class TestPersistingEndpoints:
+    @pytest.fixture
+    def app(self, manager, monkeypatch):
+        import backend.main
+        from fastapi import FastAPI
+        from backend.dependencies import get_logger_dependency
+        from backend.endpoints.content_filter_endpoints import router as content_filter_router
+        from backend.error_handlers import register_exception_handlers
+        from backend.koboldcpp_handler import router as koboldcpp_router
+
+        monkeypatch.setattr(backend.main, "settings_manager", manager)
+        app = FastAPI()
+        register_exception_handlers(app)
+        app.include_router(content_filter_router)
+        app.include_router(koboldcpp_router)
+        app.dependency_overrides[get_logger_dependency] = lambda: MagicMock()
+        return app
+
+    @pytest.mark.parametrize("path, body", [
+        ("/api/content-filters/incomplete-sentences", {"enabled": False}),
+        ("/api/koboldcpp/models-directory", {"directory": "/models"}),
+    ])
+    def test_failed_write_is_reported(self, app, manager, path, body):
+        from fastapi.testclient import TestClient
+
+        client = TestClient(app)
+        assert client.post(path, json=body).status_code == 200
+        assert manager.flush() and not manager._writer.has_pending
+
+        with patch("backend.utils.atomic_files.os.replace", side_effect=OSError("disk full")):
+            assert client.post(path, json=body).status_code >= 400
+
+
+@pytest.mark.skipif(
+    os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+    reason="Set CARDSHARK_BENCHMARKS=1 to run settings benchmarks",
+)
+def test_rapid_updates_cost_microseconds(manager):
+    iterations = 2000
+    start = time.perf_counter()
+    for i in range(iterations):
+        manager.update_settings({"syntaxHighlighting": {"bold": {"textColor": f"#{i:06x}"}}})
+    per_update_us = (time.perf_counter() - start) / iterations * 1_000_000
+    assert per_update_us < 1000, f"update_settings={per_update_us:.1f}us/update"
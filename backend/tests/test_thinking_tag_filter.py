@@ -0,0 +1,143 @@
+"""
+Tests for ThinkingTagFilter's single-scan tag matcher and reasoning pass-through.
+
+Covers:
+- Streamed output matches the one-shot regex strip for any token split
+- Partial tags held back are bounded by the longest tag
+- capture_reasoning collects the text inside the tags, including across tokens
+- SSE relay emits reasoning as separate 'reasoning_content' events
+- Opt-in benchmark: cost over recorded-style reasoning streams stays linear
+  in the chunk size (CARDSHARK_BENCHMARKS=1)
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.api_handler import ApiHandler, ThinkingTagFilter
+
+TRACE = (
+    "<think>The user asks if a < b. Let me check <b>both</b> cases...\n"
+    "If a<b then yes.</think>Yes, a is smaller. Note x < y too.\n"
+    "<|channel>thought Double-check <channel  nothing here<channel|> Done <thinking>more</thinking>!"
+)
+
+
+def _stream(tag_filter, tokens):
+    return "".join(tag_filter.process(t) for t in tokens) + tag_filter.flush()
+
+
+def _random_split(text, rng, max_len=6):
+    tokens, i = [], 0
+    while i < len(text):
+        step = rng.randint(1, max_len)
+        tokens.append(text[i:i + step])
+        i += step
+    return tokens
+
+
+class TestStreaming:
+    def test_any_split_matches_one_shot_strip(self):
+        expected = ThinkingTagFilter._STRIP_RE.sub("", TRACE)
+        rng = random.Random(11)
+        for _ in range(200):
+            assert _stream(ThinkingTagFilter(), _random_split(TRACE, rng)) == expected
+
+    def test_single_character_tokens(self):
+        assert _stream(ThinkingTagFilter(), list(TRACE)) == ThinkingTagFilter._STRIP_RE.sub("", TRACE)
+
+    def test_pending_holds_only_a_possible_tag(self):
+        tag_filter = ThinkingTagFilter()
+
+        assert tag_filter.process("a <b> c <thin") == "a <b> c "
+        assert tag_filter.pending == "<thin"
+        assert tag_filter.process("g") == "<thing"
+        assert tag_filter.pending == ""
+        assert len(ThinkingTagFilter.OPEN_TAGS[-1]) == ThinkingTagFilter.MAX_TAG_LEN
+
+    def test_unfinished_partial_tag_is_emitted_on_flush(self):
+        tag_filter = ThinkingTagFilter()
+        assert tag_filter.process("trailing <thi") == "trailing "
+        assert tag_filter.flush() == "<thi"
+
+
+class TestReasoningCapture:
+    def test_reasoning_is_collected_not_emitted(self):
+        tag_filter = ThinkingTagFilter(capture_reasoning=True)
+
+        visible = _stream(tag_filter, ["Hi <think>a < b", " so yes</th", "ink> there"])
+
+        assert visible == "Hi  there"
+        assert tag_filter.take_reasoning() == "a < b so yes"
+        assert tag_filter.take_reasoning() == ""
+
+    def test_unclosed_reasoning_is_kept_on_flush(self):
+        tag_filter = ThinkingTagFilter(capture_reasoning=True)
+        tag_filter.process("<think>cut off </thi")
+
+        assert tag_filter.flush() == ""
+        assert tag_filter.take_reasoning() == "cut off </thi"
+
+    def test_disabled_by_default(self):
+        tag_filter = ThinkingTagFilter()
+        tag_filter.process("<think>secret</think>")
+        assert tag_filter.take_reasoning() == ""
+
+
+def _sse(content):
+    return f"data: {json.dumps({'content': content})}\n\n".encode("utf-8")
+
+
+def _events(chunk):
+    return [json.loads(block[6:]) for block in chunk.decode().split("\n\n") if block.startswith("data: ")]
+
+
+class TestSseRelay:
+    def test_reasoning_goes_out_as_separate_event(self):
+        handler = ApiHandler(MagicMock())
+        tag_filter = ThinkingTagFilter(capture_reasoning=True)
+
+        first = handler._apply_thinking_filter(_sse("<think>plan"), tag_filter)
+        second = handler._apply_thinking_filter(_sse(" it</think>Answer"), tag_filter)
+
+        assert _events(first) == [{"reasoning_content": "plan"}]
+        assert _events(second) == [{"reasoning_content": " it"}, {"content": "Answer"}]
+
+    def test_reasoning_is_dropped_without_capture(self):
+        handler = ApiHandler(MagicMock())
+        assert handler._apply_thinking_filter(_sse("<think>plan"), ThinkingTagFilter()) is None
+
+
+@pytest.mark.skipif(
+    os.environ.get("CARDSHARK_BENCHMARKS") != "1",
+    reason="Set CARDSHARK_BENCHMARKS=1 to run thinking filter benchmarks",
+)
+def test_cost_is_linear_in_stream_length():
+    rng = random.Random(5)
+    words = "let me think whether a < b holds and if <x> matters so x<y".split()
+
+    def reasoning_trace(tokens):
+        return (["<think>"] + [" " + rng.choice(words) for _ in range(tokens)] + ["</th", "ink>"]
+                + [" " + rng.choice(words) for _ in range(tokens // 8)])
+
+    def seconds(tokens, chunked):
+        trace = reasoning_trace(tokens)
+        if chunked:
+            # Providers that batch output deliver long runs of text in one chunk
+            trace = ["".join(trace)]
+        start = time.perf_counter()
+        _stream(ThinkingTagFilter(capture_reasoning=True), trace)
+        return time.perf_counter() - start
+
+    for chunked in (False, True):
+        small, large = seconds(4096, chunked), seconds(8 * 4096, chunked)
+        assert large < small * 8 * 3, (
+            f"chunked={chunked} 4k tokens={small * 1000:.1f}ms 32k tokens={large * 1000:.1f}ms"
+        )
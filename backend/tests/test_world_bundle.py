@@ -0,0 +1,229 @@
+"""
+Tests for the world bundle (backend/services/world_bundle_service.py).
+
+Covers:
+- One world row query, one batched room query, one batched NPC query
+- Room entries from indexed rows (no room PNG reads), missing rooms flagged
+- NPC summaries for room and instance NPCs
+- World card PNG read once per row stamp
+- Built bundles served from cache after one stamp query; rebuilt when a
+  world, room or NPC row is re-synced or a referenced card appears
+- Content version changes with room edits
+- NDJSON endpoint: ordering by focus room, ETag / If-None-Match, 404
+"""
+import contextlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database import Base
+from backend.dependencies import get_logger_dependency, get_world_bundle_service_dependency
+from backend.endpoints.world_card_endpoints_v2 import router
+from backend.models.world_card import create_empty_world_card
+from backend.services.world_bundle_service import WorldBundleService
+from backend.sql_models import Character
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def png_handler():
+    handler = MagicMock()
+    handler.read_metadata.return_value = create_empty_world_card("Realm", world_uuid="world").model_dump(mode="json")
+    return handler
+
+
+@pytest.fixture
+def service(engine, png_handler):
+    return WorldBundleService(sessionmaker(bind=engine), png_handler, MagicMock())
+
+
+@contextlib.contextmanager
+def _capture_sql(engine):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def _add(engine, uuid, name, extensions=None, **fields):
+    with sessionmaker(bind=engine)() as db:
+        db.add(Character(
+            character_uuid=uuid,
+            name=name,
+            png_file_path=f"/cards/{uuid}.png",
+            extensions_json=json.dumps(extensions or {}),
+            **fields,
+        ))
+        db.commit()
+
+
+@pytest.fixture
+def world(engine):
+    _add(engine, "guard", "Guard", personality="stern")
+    _add(engine, "ghost", "Ghost", personality="wistful")
+    _add(engine, "hall", "Hall", {
+        "card_type": "room",
+        "room_data": {
+            "uuid": "hall",
+            "npcs": [{"character_uuid": "guard", "hostile": False}],
+            "layout_data": {"gridSize": {"cols": 9, "rows": 9}},
+        },
+    }, description="A long hall", first_mes="You enter the hall.")
+    _add(engine, "yard", "Yard", {"card_type": "room", "room_data": {"uuid": "yard", "npcs": []}})
+    _add(engine, "world", "Realm", {
+        "card_type": "world",
+        "world_data": {
+            "uuid": "world",
+            "grid_size": {"width": 5, "height": 5},
+            "starting_position": {"x": 0, "y": 0},
+            "rooms": [
+                {"room_uuid": "hall", "grid_position": {"x": 0, "y": 0}},
+                {"room_uuid": "yard", "grid_position": {"x": 4, "y": 4},
+                 "instance_npcs": [{"character_uuid": "ghost"}]},
+                {"room_uuid": "gone", "grid_position": {"x": 1, "y": 0}},
+            ],
+        },
+    })
+    return "world"
+
+
+def _lines(bundle, focus=None):
+    return [json.loads(line) for line in bundle.iter_lines(focus)]
+
+
+class TestWorldBundleService:
+    def test_batched_queries(self, engine, service, world):
+        with _capture_sql(engine) as statements:
+            bundle = service.get_bundle(world)
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 3
+        assert bundle is not None
+
+    def test_contents(self, service, png_handler, world):
+        lines = _lines(service.get_bundle(world))
+        assert [line["type"] for line in lines] == ["world", "room", "room", "room", "npc", "npc", "end"]
+
+        assert lines[0]["world"]["data"]["name"] == "Realm"
+        assert lines[0]["room_count"] == 3
+
+        rooms = {line["room_uuid"]: line for line in lines if line["type"] == "room"}
+        assert rooms["hall"]["first_mes"] == "You enter the hall."
+        assert rooms["hall"]["layout_data"] == {"gridSize": {"cols": 9, "rows": 9}}
+        assert rooms["hall"]["image_url"] == "/api/room-cards/hall/image"
+        assert rooms["gone"]["missing"] is True
+
+        npcs = [line for line in lines if line["type"] == "npc"]
+        assert [(n["npc_uuid"], n["personality"]) for n in npcs] == [("ghost", "wistful"), ("guard", "stern")]
+
+        # Only the world PNG is read; rooms come from the index
+        png_handler.read_metadata.assert_called_once_with("/cards/world.png")
+
+    def test_world_card_cached_by_row_stamp(self, engine, service, png_handler, world):
+        first = service.get_bundle(world)
+        assert service.get_bundle(world).version == first.version
+        assert png_handler.read_metadata.call_count == 1
+
+        with sessionmaker(bind=engine)() as db:
+            db.query(Character).filter_by(character_uuid="world").update(
+                {"db_metadata_last_synced_at": datetime(2030, 1, 1, tzinfo=timezone.utc)}
+            )
+            db.commit()
+        service.get_bundle(world)
+        assert png_handler.read_metadata.call_count == 2
+
+    def test_version_tracks_room_edits(self, engine, service, world):
+        before = service.get_bundle(world).version
+        with sessionmaker(bind=engine)() as db:
+            # Saves re-sync the row, which moves its stamp
+            db.query(Character).filter_by(character_uuid="yard").update(
+                {"description": "Muddy", "db_metadata_last_synced_at": datetime(2030, 1, 1, tzinfo=timezone.utc)}
+            )
+            db.commit()
+        assert service.get_bundle(world).version != before
+
+    def test_cached_bundle_costs_one_stamp_query(self, engine, service, world):
+        first = service.get_bundle(world)
+        with _capture_sql(engine) as statements:
+            second = service.get_bundle(world)
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+        assert second is first
+
+    @pytest.mark.parametrize("uuid", ["world", "hall", "guard"])
+    def test_resynced_row_rebuilds_bundle(self, engine, service, world, uuid):
+        first = service.get_bundle(world)
+        with sessionmaker(bind=engine)() as db:
+            db.query(Character).filter_by(character_uuid=uuid).update(
+                {"db_metadata_last_synced_at": datetime(2030, 1, 1, tzinfo=timezone.utc)}
+            )
+            db.commit()
+        assert service.get_bundle(world) is not first
+
+    def test_new_card_for_missing_room_rebuilds_bundle(self, engine, service, world):
+        first = service.get_bundle(world)
+        _add(engine, "gone", "Gone", {"card_type": "room", "room_data": {"uuid": "gone", "npcs": []}})
+        rooms = {line["room_uuid"]: line for line in _lines(service.get_bundle(world)) if line["type"] == "room"}
+        assert rooms["gone"]["missing"] is False
+        assert service.get_bundle(world) is not first
+
+    def test_focus_orders_rooms_by_distance(self, service, world):
+        bundle = service.get_bundle(world)
+        rooms = [line["room_uuid"] for line in _lines(bundle, "yard") if line["type"] == "room"]
+        assert rooms == ["yard", "gone", "hall"]
+
+    def test_missing_world(self, service, world):
+        assert service.get_bundle("nope") is None
+        assert service.get_bundle("hall") is None
+
+
+class TestWorldBundleEndpoint:
+    @pytest.fixture
+    def client(self, service, world):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_world_bundle_service_dependency] = lambda: service
+        app.dependency_overrides[get_logger_dependency] = lambda: MagicMock()
+        return TestClient(app)
+
+    def test_streams_ndjson_with_etag(self, client):
+        response = client.get("/api/world-cards-v2/world/bundle", params={"focus_room": "hall"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[1]["room_uuid"] == "hall"
+        assert lines[-1] == {"type": "end", "rooms": 3, "npcs": 2}
+
+        etag = response.headers["etag"]
+        assert etag == f'"{lines[0]["version"]}"'
+        cached = client.get("/api/world-cards-v2/world/bundle", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+    def test_unknown_world(self, client):
+        assert client.get("/api/world-cards-v2/missing/bundle").status_code == 404
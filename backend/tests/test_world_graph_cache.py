@@ -0,0 +1,320 @@
+"""
+Tests for the in-memory world graph (backend/services/world_graph_service.py).
+
+Covers:
+- Building a graph from character rows in two queries (world + rooms)
+- Grid neighbours, exit edges, instance NPC overrides, NPC lookups
+- BFS pathing
+- Cache hits cost one stamp query; invalidation on world/room saves, rebuilds
+  when a world or room row is re-synced, builds racing an invalidation
+- Memoized room cards in RoomCardHandler, re-read when the room row is re-synced
+- Graph endpoints
+"""
+import contextlib
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database import Base
+from backend.dependencies import get_world_graph_cache_dependency
+from backend.endpoints.world_card_endpoints_v2 import router
+from backend.handlers.room_card_handler import RoomCardHandler
+from backend.models.room_card import create_empty_room_card
+from backend.services.world_graph_service import WorldGraphCache
+from backend.sql_models import Character
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def cache(engine):
+    return WorldGraphCache(sessionmaker(bind=engine), MagicMock())
+
+
+@contextlib.contextmanager
+def _capture_sql(engine):
+    statements = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def _add_card(engine, uuid, name, extensions):
+    with sessionmaker(bind=engine)() as db:
+        db.add(Character(
+            character_uuid=uuid,
+            name=name,
+            png_file_path=f"/cards/{uuid}.png",
+            # Stored double-encoded by the sync path; the graph must accept both forms
+            extensions_json=json.dumps(extensions),
+        ))
+        db.commit()
+
+
+def _room(engine, uuid, npcs=(), exits=()):
+    _add_card(engine, uuid, uuid.title(), {
+        "card_type": "room",
+        "room_data": {
+            "uuid": uuid,
+            "npcs": [{"character_uuid": n, "role": None, "hostile": False} for n in npcs],
+            "layout_data": {"exits": list(exits)} if exits else None,
+        },
+    })
+
+
+def _world(engine, placements, uuid="world"):
+    _add_card(engine, uuid, "World", {
+        "card_type": "world",
+        "world_data": {
+            "uuid": uuid,
+            "grid_size": {"width": 4, "height": 3},
+            "rooms": placements,
+            "starting_position": {"x": 0, "y": 0},
+        },
+    })
+
+
+def _place(room_uuid, x, y, **extra):
+    return {"room_uuid": room_uuid, "grid_position": {"x": x, "y": y}, **extra}
+
+
+@pytest.fixture
+def world(engine):
+    """
+    Layout (x right, y down):
+        hall  gate  .     tower
+        yard  .     .     .
+    The tower is only reachable through the hall's portal exit.
+    """
+    _room(engine, "hall", npcs=["guard"], exits=[
+        {"col": 1, "row": 1, "targetRoomId": "tower", "type": "portal"},
+    ])
+    _room(engine, "gate", npcs=["guard", "merchant"])
+    _room(engine, "yard")
+    _room(engine, "tower")
+    _room(engine, "cellar")  # not placed in this world
+    _world(engine, [
+        _place("hall", 0, 0),
+        _place("gate", 1, 0, instance_name="Old Gate", instance_npcs=[{"character_uuid": "ghost"}]),
+        _place("yard", 0, 1),
+        _place("tower", 3, 0),
+    ])
+    return "world"
+
+
+class TestWorldGraph:
+    def test_build_uses_two_queries(self, engine, cache, world):
+        with _capture_sql(engine) as statements:
+            graph = cache.get_graph(world)
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+        assert set(graph.rooms) == {"hall", "gate", "yard", "tower"}
+        assert graph.grid_size == (4, 3)
+
+    def test_neighbours_and_exits(self, cache, world):
+        graph = cache.get_graph(world)
+        assert graph.room("hall").neighbours == {"east": "gate", "south": "yard"}
+        assert set(graph.neighbours("hall")) == {"gate", "yard", "tower"}
+        # Exits are one-way: the tower has no way back
+        assert graph.neighbours("tower") == ()
+        assert graph.room_at(1, 0) == "gate"
+        assert graph.room_at(2, 2) is None
+
+    def test_npc_rosters_honour_instance_overrides(self, cache, world):
+        graph = cache.get_graph(world)
+        assert graph.room("gate").name == "Old Gate"
+        assert [n["character_uuid"] for n in graph.npcs_in("gate")] == ["ghost"]
+        assert graph.rooms_with_npc("guard") == ["hall"]
+        assert graph.rooms_with_npc("merchant") == []
+
+    def test_find_path(self, cache, world):
+        graph = cache.get_graph(world)
+        assert graph.find_path("yard", "gate") == ["yard", "hall", "gate"]
+        assert graph.find_path("yard", "tower") == ["yard", "hall", "tower"]
+        assert graph.find_path("tower", "hall") is None
+        assert graph.find_path("hall", "hall") == ["hall"]
+        assert graph.find_path("hall", "cellar") is None
+
+    def test_missing_or_non_world_card(self, engine, cache, world):
+        assert cache.get_graph("nope") is None
+        assert cache.get_graph("hall") is None
+
+
+class TestWorldGraphCache:
+    def test_cached_graph_costs_one_stamp_query(self, engine, cache, world):
+        first = cache.get_graph(world)
+        with _capture_sql(engine) as statements:
+            assert cache.get_graph(world) is first
+        assert len(statements) == 1
+
+    def test_resynced_room_row_rebuilds_graph(self, engine, cache, world):
+        # A room saved through the character editor or found by a directory sync
+        # never calls invalidate_room; its row stamp moves instead.
+        first = cache.get_graph(world)
+        with sessionmaker(bind=engine)() as db:
+            db.query(Character).filter(Character.character_uuid == "hall").update({
+                "file_last_modified": 12345,
+                "extensions_json": json.dumps({"card_type": "room", "room_data": {"uuid": "hall", "npcs": []}}),
+            })
+            db.commit()
+        graph = cache.get_graph(world)
+        assert graph is not first
+        assert graph.npcs_in("hall") == [] and graph.room("hall").exits == []
+
+    def test_new_card_for_missing_room_rebuilds_graph(self, engine, cache):
+        _world(engine, [_place("hall", 0, 0), _place("cellar", 1, 0)])
+        _room(engine, "hall")
+        assert cache.get_graph("world").room("cellar").name == ""
+        _room(engine, "cellar")
+        assert cache.get_graph("world").room("cellar").name == "Cellar"
+
+    def test_invalidate_room_drops_worlds_placing_it(self, engine, cache, world):
+        _world(engine, [_place("cellar", 0, 0)], uuid="other")
+        graph = cache.get_graph(world)
+        other = cache.get_graph("other")
+
+        cache.invalidate_room("hall")
+        assert cache.get_graph(world) is not graph
+        assert cache.get_graph("other") is other
+
+    def test_invalidate_world(self, cache, world):
+        graph = cache.get_graph(world)
+        cache.invalidate_world(world)
+        assert cache.get_graph(world) is not graph
+
+    def test_build_overlapping_invalidation_is_not_cached(self, cache, world):
+        original_build = cache._build
+
+        def build_then_invalidate(world_uuid):
+            graph = original_build(world_uuid)
+            cache.invalidate_room("hall")  # a save lands while we were building
+            return graph
+
+        cache._build = build_then_invalidate
+        assert cache.get_graph(world) is not None
+        cache._build = original_build
+        assert world not in cache._graphs
+
+    def test_lru_bound(self, engine, world):
+        cache = WorldGraphCache(sessionmaker(bind=engine), MagicMock(), max_worlds=1)
+        _world(engine, [], uuid="other")
+        cache.get_graph(world)
+        cache.get_graph("other")
+        assert list(cache._graphs) == ["other"]
+
+
+class TestRoomCardMemo:
+    def _handler(self, cache):
+        character_service = MagicMock()
+        character_service.get_character_by_uuid.return_value = MagicMock(png_file_path="/cards/hall.png")
+        png_handler = MagicMock()
+        png_handler.read_metadata.return_value = create_empty_room_card("Hall", room_uuid="hall").model_dump(mode="json")
+        return RoomCardHandler(character_service, png_handler, MagicMock(), MagicMock(), graph_cache=cache), png_handler
+
+    def test_room_card_decoded_once(self, cache, world):
+        handler, png_handler = self._handler(cache)
+        first = handler.get_room_card("hall")
+        first.data.name = "Edited"  # callers get copies
+        second = handler.get_room_card("hall")
+        assert second.data.name == "Hall"
+        assert png_handler.read_metadata.call_count == 1
+
+        cache.invalidate_room("hall")
+        handler.get_room_card("hall")
+        assert png_handler.read_metadata.call_count == 2
+
+    def test_resynced_room_row_is_read_again(self, engine, cache, world):
+        # Saves through /api/characters/save-card or a directory sync never call
+        # invalidate_room; the row's sync stamp changes instead.
+        handler, png_handler = self._handler(cache)
+        handler.get_room_card("hall")
+        with sessionmaker(bind=engine)() as db:
+            db.query(Character).filter(Character.character_uuid == "hall").update({"file_last_modified": 12345})
+            db.commit()
+        png_handler.read_metadata.return_value = create_empty_room_card("Great Hall", room_uuid="hall").model_dump(mode="json")
+
+        assert handler.get_room_card("hall").data.name == "Great Hall"
+        assert handler.get_room_card("hall").data.name == "Great Hall"
+        assert png_handler.read_metadata.call_count == 2
+
+    def test_without_cache_reads_png_each_time(self):
+        handler, png_handler = self._handler(None)
+        handler.get_room_card("hall")
+        handler.get_room_card("hall")
+        assert png_handler.read_metadata.call_count == 2
+
+
+class TestGraphEndpoints:
+    @pytest.fixture
+    def client(self, cache, world):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_world_graph_cache_dependency] = lambda: cache
+        return TestClient(app)
+
+    def test_graph(self, client):
+        response = client.get("/api/world-cards-v2/world/graph")
+        assert response.status_code == 200
+        rooms = response.json()["data"]["graph"]["rooms"]
+        assert {r["room_uuid"] for r in rooms} == {"hall", "gate", "yard", "tower"}
+
+    def test_room_node(self, client):
+        data = client.get("/api/world-cards-v2/world/graph/rooms/hall").json()["data"]
+        assert data["room"]["neighbours"] == {"east": "gate", "south": "yard"}
+        assert set(data["reachable"]) == {"gate", "yard", "tower"}
+        assert client.get("/api/world-cards-v2/world/graph/rooms/cellar").status_code == 404
+
+    def test_path(self, client):
+        data = client.get(
+            "/api/world-cards-v2/world/graph/path", params={"from_room": "yard", "to_room": "tower"}
+        ).json()["data"]
+        assert data == {"path": ["yard", "hall", "tower"], "reachable": True}
+        data = client.get(
+            "/api/world-cards-v2/world/graph/path", params={"from_room": "tower", "to_room": "yard"}
+        ).json()["data"]
+        assert data == {"path": [], "reachable": False}
+
+    def test_unknown_world(self, client):
+        assert client.get("/api/world-cards-v2/missing/graph").status_code == 404
+
+    def test_graph_lookup_runs_off_the_event_loop(self, client, cache, monkeypatch):
+        import asyncio
+
+        on_loop = []
+        original = cache.get_graph
+
+        def recording_get_graph(world_uuid):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return original(world_uuid)
+
+        monkeypatch.setattr(cache, "get_graph", recording_get_graph)
+        assert client.get("/api/world-cards-v2/world/graph").status_code == 200
+        assert on_loop == [False]
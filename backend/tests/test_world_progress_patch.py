@@ -0,0 +1,300 @@
+"""
+Tests for JSON Patch progress updates and the normalized progress layout.
+
+Covers:
+- json_patch: RFC 6902 operations, pointer escaping, failures
+- NPC relationships / room states stored one row per entity; full saves
+  rewrite only the entities that changed
+- patch_progress: loads and writes only addressed entities, bumps the
+  version, honours base_version, validates patched values
+- Interaction with the write-behind cache
+- Migration 2.7.2: legacy JSON blobs moved into entity rows
+- PATCH endpoint status codes
+"""
+import contextlib
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database import Base
+from backend.database_migrations import _migrate_normalize_world_progress
+from backend.dependencies import get_logger_dependency, get_world_progress_service_dependency
+from backend.endpoints.world_progress_endpoints import router
+from backend.models.world_progress import WorldUserProgressPatch, WorldUserProgressUpdate
+from backend.services.world_progress_service import (
+    ProgressVersionConflict,
+    WorldProgressWriteBehind,
+    WorldUserProgressService,
+)
+from backend.sql_models import WorldNpcRelationship, WorldRoomState, WorldUserProgress
+from backend.utils.json_patch import JsonPatchError, JsonPatchTestFailed, apply_patch
+
+
+class TestJsonPatch:
+    def test_rfc_operations(self):
+        doc = {"foo": ["bar", "baz"], "a": {"b": 1}}
+        apply_patch(doc, [
+            {"op": "add", "path": "/foo/1", "value": "qux"},
+            {"op": "add", "path": "/foo/-", "value": "end"},
+            {"op": "remove", "path": "/foo/0"},
+            {"op": "replace", "path": "/a/b", "value": 2},
+            {"op": "copy", "from": "/a", "path": "/c"},
+            {"op": "move", "from": "/c/b", "path": "/d"},
+            {"op": "test", "path": "/d", "value": 2},
+        ])
+        assert doc == {"foo": ["qux", "baz", "end"], "a": {"b": 2}, "c": {}, "d": 2}
+
+    def test_pointer_escaping(self):
+        doc = {"a/b": {"m~n": 1}}
+        apply_patch(doc, [{"op": "replace", "path": "/a~1b/m~0n", "value": 5}])
+        assert doc == {"a/b": {"m~n": 5}}
+
+    @pytest.mark.parametrize("operation", [
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "remove", "path": "/list/5"},
+        {"op": "add", "path": "/list/01", "value": 1},
+        {"op": "move", "from": "/obj", "path": "/obj/child"},
+        {"op": "frobnicate", "path": "/obj"},
+        {"op": "add", "path": "no-slash", "value": 1},
+    ])
+    def test_invalid_operations(self, operation):
+        with pytest.raises(JsonPatchError):
+            apply_patch({"list": [1], "obj": {}}, [operation])
+
+    def test_failed_test_operation(self):
+        with pytest.raises(JsonPatchTestFailed):
+            apply_patch({"a": 1}, [{"op": "test", "path": "/a", "value": 2}])
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def service(engine):
+    return WorldUserProgressService(sessionmaker(bind=engine), MagicMock())
+
+
+@contextlib.contextmanager
+def _capture_sql(engine):
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def _writes(statements):
+    return [s for s in statements if s.upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+
+
+def _npc(npc_uuid, affinity=20, **extra):
+    return {"npc_uuid": npc_uuid, "affinity": affinity, **extra}
+
+
+def _patch(*operations, base_version=None):
+    return WorldUserProgressPatch.model_validate({"operations": list(operations), "base_version": base_version})
+
+
+@pytest.fixture
+def large_world(service):
+    service.save_progress("w1", "u1", WorldUserProgressUpdate(
+        player_xp=10,
+        npc_relationships={f"npc-{i}": _npc(f"npc-{i}", sentiment_history=[0.1] * 50) for i in range(200)},
+        room_states={f"room-{i}": {"npc_states": {}} for i in range(50)},
+    ))
+    return service
+
+
+class TestNormalizedStorage:
+    def test_entities_are_stored_as_rows(self, large_world, engine):
+        with sessionmaker(bind=engine)() as db:
+            assert db.query(WorldNpcRelationship).count() == 200
+            assert db.query(WorldRoomState).count() == 50
+            row = db.query(WorldUserProgress).one()
+            assert row.npc_relationships_json is None and row.version == 1
+
+        progress = large_world.get_progress("w1", "u1")
+        assert progress.npc_relationships["npc-7"].affinity == 20
+        assert len(progress.room_states) == 50
+
+    def test_full_save_rewrites_only_changed_entities(self, large_world, engine):
+        relationships = {f"npc-{i}": _npc(f"npc-{i}", sentiment_history=[0.1] * 50) for i in range(200)}
+        relationships["npc-3"]["affinity"] = 55
+        del relationships["npc-4"]
+
+        with _capture_sql(engine) as statements:
+            large_world.save_progress("w1", "u1", WorldUserProgressUpdate(npc_relationships=relationships))
+
+        entity_writes = [s for s in _writes(statements) if "world_npc_relationships" in s]
+        assert len(entity_writes) == 2  # one UPDATE, one DELETE
+        progress = large_world.get_progress("w1", "u1")
+        assert progress.npc_relationships["npc-3"].affinity == 55
+        assert "npc-4" not in progress.npc_relationships
+        assert progress.version == 2
+
+
+class TestPatchProgress:
+    def test_patch_touches_only_addressed_entities(self, large_world, engine):
+        with _capture_sql(engine) as statements:
+            result = large_world.patch_progress("w1", "u1", _patch(
+                {"op": "replace", "path": "/npc_relationships/npc-42/affinity", "value": 80},
+                {"op": "add", "path": "/npc_relationships/npc-42/sentiment_history/-", "value": 0.9},
+                {"op": "replace", "path": "/player_gold", "value": 12},
+                base_version=1,
+            ))
+
+        assert result.version == 2
+        assert sorted(result.changed) == ["/npc_relationships/npc-42", "/player_gold"]
+        writes = _writes(statements)
+        assert len(writes) == 2
+        assert "npc_relationships_json" not in " ".join(writes)
+        # The NPC load is keyed, not the whole table
+        assert any("world_npc_relationships" in s and " IN " in s for s in statements)
+
+        progress = large_world.get_progress("w1", "u1")
+        assert progress.npc_relationships["npc-42"].affinity == 80
+        assert progress.npc_relationships["npc-42"].sentiment_history[-1] == 0.9
+        assert (progress.player_gold, progress.player_xp, progress.version) == (12, 10, 2)
+
+    def test_add_and_remove_entities(self, large_world):
+        large_world.patch_progress("w1", "u1", _patch(
+            {"op": "add", "path": "/npc_relationships/new-npc", "value": _npc("new-npc", 35)},
+            {"op": "remove", "path": "/room_states/room-0"},
+        ))
+        progress = large_world.get_progress("w1", "u1")
+        assert progress.npc_relationships["new-npc"].affinity == 35
+        assert "room-0" not in progress.room_states
+
+    def test_stale_base_version_conflicts(self, large_world):
+        with pytest.raises(ProgressVersionConflict) as exc_info:
+            large_world.patch_progress("w1", "u1", _patch(
+                {"op": "replace", "path": "/player_xp", "value": 1}, base_version=0,
+            ))
+        assert exc_info.value.current_version == 1
+        assert large_world.get_progress("w1", "u1").player_xp == 10
+
+    def test_failed_test_or_invalid_value_writes_nothing(self, large_world):
+        with pytest.raises(JsonPatchTestFailed):
+            large_world.patch_progress("w1", "u1", _patch(
+                {"op": "replace", "path": "/player_xp", "value": 99},
+                {"op": "test", "path": "/player_gold", "value": 1000},
+            ))
+        with pytest.raises(ValidationError):
+            large_world.patch_progress("w1", "u1", _patch(
+                {"op": "replace", "path": "/npc_relationships/npc-1/affinity", "value": "very"},
+            ))
+        with pytest.raises(JsonPatchError):
+            large_world.patch_progress("w1", "u1", _patch({"op": "replace", "path": "/version", "value": 9}))
+
+        progress = large_world.get_progress("w1", "u1")
+        assert (progress.player_xp, progress.version) == (10, 1)
+
+    def test_no_op_patch_keeps_version(self, large_world):
+        result = large_world.patch_progress("w1", "u1", _patch(
+            {"op": "test", "path": "/player_xp", "value": 10},
+        ))
+        assert (result.version, result.changed) == (1, [])
+
+    def test_patch_creates_missing_progress(self, service):
+        result = service.patch_progress("w2", "u1", _patch(
+            {"op": "add", "path": "/room_states/r1", "value": {"npc_states": {}}},
+            {"op": "replace", "path": "/player_level", "value": 3},
+        ))
+        progress = service.get_progress("w2", "u1")
+        assert result.version == progress.version == 1
+        assert progress.player_level == 3 and "r1" in progress.room_states
+
+    def test_write_behind_is_flushed_and_reloaded(self, large_world, engine):
+        cache = WorldProgressWriteBehind(large_world, delay=60, max_delay=60)
+        service = WorldUserProgressService(sessionmaker(bind=engine), MagicMock(), write_behind=cache)
+
+        assert service.save_progress("w1", "u1", WorldUserProgressUpdate(player_gold=7)).version == 2
+        result = service.patch_progress("w1", "u1", _patch(
+            {"op": "replace", "path": "/npc_relationships/npc-1/affinity", "value": 66}, base_version=2,
+        ))
+
+        progress = service.get_progress("w1", "u1")
+        assert result.version == progress.version == 3
+        assert progress.player_gold == 7
+        assert progress.npc_relationships["npc-1"].affinity == 66
+
+
+def test_migration_moves_legacy_blobs_into_rows():
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    relationships = json.dumps({"npc-a": _npc("npc-a", 44)})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE world_user_progress (id INTEGER PRIMARY KEY, world_uuid VARCHAR, user_uuid VARCHAR, "
+            "player_xp INTEGER, player_level INTEGER, player_gold INTEGER, current_room_uuid VARCHAR, "
+            "bonded_ally_uuid VARCHAR, time_state_json JSON, npc_relationships_json JSON, "
+            "player_inventory_json JSON, ally_inventory_json JSON, room_states_json JSON, "
+            "last_played_at DATETIME, created_at DATETIME, updated_at DATETIME)"
+        ))
+        # Stored the way the service used to: a JSON-encoded string in a JSON column
+        conn.execute(text(
+            "INSERT INTO world_user_progress (world_uuid, user_uuid, player_xp, player_level, player_gold, "
+            "npc_relationships_json, room_states_json) VALUES ('w1', 'u1', 5, 1, 0, :npcs, :rooms)"
+        ), {"npcs": json.dumps(relationships), "rooms": json.dumps(json.dumps({"r1": {"npc_states": {}}}))})
+
+    _migrate_normalize_world_progress(engine)
+    _migrate_normalize_world_progress(engine)  # Idempotent
+
+    progress = WorldUserProgressService(sessionmaker(bind=engine), MagicMock()).get_progress("w1", "u1")
+    assert progress.version == 0
+    assert progress.npc_relationships["npc-a"].affinity == 44
+    assert list(progress.room_states) == ["r1"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT npc_relationships_json FROM world_user_progress")).scalar() is None
+
+
+class TestPatchEndpoint:
+    @pytest.fixture
+    def client(self, large_world):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_world_progress_service_dependency] = lambda: large_world
+        app.dependency_overrides[get_logger_dependency] = lambda: MagicMock()
+        return TestClient(app)
+
+    def test_status_codes(self, client):
+        url = "/api/world/w1/progress/u1"
+        ok = client.patch(url, json={"base_version": 1, "operations": [
+            {"op": "replace", "path": "/player_xp", "value": 11},
+        ]})
+        assert ok.status_code == 200
+        assert ok.json()["data"]["version"] == 2
+
+        stale = client.patch(url, json={"base_version": 1, "operations": [
+            {"op": "replace", "path": "/player_xp", "value": 12},
+        ]})
+        assert stale.status_code == 409
+        assert stale.json()["detail"]["current_version"] == 2
+
+        bad = client.patch(url, json={"operations": [{"op": "remove", "path": "/npc_relationships/nobody"}]})
+        assert bad.status_code == 422
+
+        assert client.get(url).json()["data"]["version"] == 2
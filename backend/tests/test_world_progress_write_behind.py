@@ -0,0 +1,241 @@
+"""
+Tests for world runtime state persistence off the world PNG path.
+
+Covers:
+- WorldProgressWriteBehind: read-your-writes, coalesced deltas, only changed
+  columns written, insert-or-update, failed writes re-queued, deltas that keep
+  failing dropped and evicted from the cache, discard on delete
+- WorldUserProgressService delegating to the write-behind cache
+- WorldCardService.update_world_card routing runtime fields to player progress
+  (no PNG read or write) and rewriting the PNG only for authored fields
+"""
+import contextlib
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.database import Base
+from backend.models.world_card import UpdateWorldRequest, create_empty_world_card
+from backend.models.world_progress import WorldUserProgressUpdate
+from backend.services.world_card_service import WorldCardService
+from backend.services.world_progress_service import (
+    WorldProgressWriteBehind,
+    WorldUserProgressService,
+)
+from backend.sql_models import WorldUserProgress as WorldUserProgressModel
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def store(session_factory):
+    return WorldUserProgressService(session_factory, MagicMock())
+
+
+@pytest.fixture
+def write_behind(store):
+    # Long delay: tests flush explicitly
+    cache = WorldProgressWriteBehind(store, delay=60, max_delay=60)
+    yield cache
+    cache.flush()
+
+
+def _row(session_factory, world="w1", user="u1"):
+    with session_factory() as db:
+        return db.query(WorldUserProgressModel).filter_by(world_uuid=world, user_uuid=user).first()
+
+
+@contextlib.contextmanager
+def _capture_sql(engine):
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+class TestWriteBehind:
+    def test_patch_is_visible_before_it_is_written(self, write_behind, session_factory):
+        progress = write_behind.patch("w1", "u1", WorldUserProgressUpdate(player_xp=40, player_gold=5))
+
+        assert progress.player_xp == 40
+        assert write_behind.get("w1", "u1").player_gold == 5
+        assert write_behind.has_pending
+        assert _row(session_factory) is None
+
+        assert write_behind.flush()
+        row = _row(session_factory)
+        assert (row.player_xp, row.player_gold, row.player_level) == (40, 5, 1)
+        assert not write_behind.has_pending
+
+    def test_moves_coalesce_into_one_update_of_changed_columns(self, write_behind, store, engine):
+        store.save_progress("w1", "u1", WorldUserProgressUpdate(
+            player_xp=1, npc_relationships={"npc": {"npc_uuid": "npc", "affinity": 10}},
+        ))
+        write_behind.get("w1", "u1")
+
+        for step in range(20):
+            write_behind.patch("w1", "u1", WorldUserProgressUpdate(
+                player_gold=step, current_room_uuid=f"room-{step}",
+            ))
+
+        with _capture_sql(engine) as statements:
+            write_behind.flush()
+
+        writes = [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "INSERT"))]
+        assert len(writes) == 1
+        assert "player_gold" in writes[0] and "current_room_uuid" in writes[0]
+        # Untouched JSON blobs are not rewritten
+        assert "npc_relationships_json" not in writes[0]
+
+        saved = store.read_progress("w1", "u1")
+        assert saved.player_gold == 19
+        assert saved.current_room_uuid == "room-19"
+        assert saved.npc_relationships["npc"].affinity == 10
+
+    def test_bonded_ally_empty_string_clears(self, write_behind, store):
+        write_behind.patch("w1", "u1", WorldUserProgressUpdate(bonded_ally_uuid="ally"))
+        assert write_behind.patch("w1", "u1", WorldUserProgressUpdate(bonded_ally_uuid="")).bonded_ally_uuid is None
+        write_behind.flush()
+        assert store.read_progress("w1", "u1").bonded_ally_uuid is None
+
+    def test_failed_write_is_requeued_under_newer_changes(self, write_behind, store, session_factory):
+        write_behind.patch("w1", "u1", WorldUserProgressUpdate(player_xp=10, player_gold=1))
+        original = store.write_deltas
+        store.write_deltas = MagicMock(side_effect=RuntimeError("disk full"))
+        assert not write_behind.flush()
+
+        write_behind.patch("w1", "u1", WorldUserProgressUpdate(player_gold=2))
+        store.write_deltas = original
+        assert write_behind.flush()
+
+        row = _row(session_factory)
+        assert (row.player_xp, row.player_gold) == (10, 2)
+
+    def test_write_that_keeps_failing_is_dropped(self, store, session_factory):
+        write_behind = WorldProgressWriteBehind(store, delay=60, max_delay=60, max_attempts=2)
+        write_behind.patch("w1", "u1", WorldUserProgressUpdate(player_xp=10))
+        write_behind.flush()
+        write_behind.patch("w1", "u1", WorldUserProgressUpdate(player_xp=20))
+        original = store.write_deltas
+        store.write_deltas = MagicMock(side_effect=RuntimeError("disk full"))
+
+        assert not write_behind.flush()
+        assert write_behind.has_pending and write_behind.last_error == "disk full"
+        assert not write_behind.flush()
+
+        # Given up: nothing pending, and reads show what is really stored
+        assert not write_behind.has_pending
+        store.write_deltas = original
+        assert write_behind.get("w1", "u1").player_xp == 10
+        assert _row(session_factory).player_xp == 10
+
+    def test_delete_discards_pending_state(self, write_behind, session_factory):
+        service = WorldUserProgressService(session_factory, MagicMock(), write_behind=write_behind)
+        service.save_progress("w1", "u1", WorldUserProgressUpdate(player_xp=3))
+        write_behind.flush()
+        service.save_progress("w1", "u1", WorldUserProgressUpdate(player_xp=4))
+
+        assert service.delete_progress("w1", "u1")
+        write_behind.flush()
+        assert _row(session_factory) is None
+        assert service.get_progress("w1", "u1") is None
+
+    def test_list_flushes_first(self, write_behind, session_factory):
+        service = WorldUserProgressService(session_factory, MagicMock(), write_behind=write_behind)
+        service.save_progress("w1", "u1", WorldUserProgressUpdate(player_xp=7))
+        assert [s.player_xp for s in service.list_progress_for_world("w1")] == [7]
+
+    def test_cache_evicts_only_written_rows(self, store):
+        cache = WorldProgressWriteBehind(store, delay=60, max_delay=60, max_cached=2)
+        cache.patch("w1", "a", WorldUserProgressUpdate(player_xp=1))
+        cache.patch("w1", "b", WorldUserProgressUpdate(player_xp=2))
+        cache.patch("w1", "c", WorldUserProgressUpdate(player_xp=3))
+        assert cache.flush()
+        assert [store.read_progress("w1", u).player_xp for u in "abc"] == [1, 2, 3]
+
+
+@pytest.fixture
+def world_service(tmp_path, store, write_behind):
+    card = create_empty_world_card("Test World", world_uuid="w1")
+    png_path = tmp_path / "world.png"
+    png_path.write_bytes(b"png")
+    character = SimpleNamespace(
+        character_uuid="w1", name="Test World", description="", png_file_path=str(png_path),
+        extensions_json=json.dumps(card.data.extensions.model_dump(mode="json")),
+        created_at=None, updated_at=None,
+    )
+
+    character_service = MagicMock()
+    character_service._get_session_context = lambda: contextlib.nullcontext(MagicMock())
+    character_service.get_character_by_uuid.return_value = character
+    png_handler = MagicMock()
+    png_handler.read_metadata.return_value = card.model_dump(mode="json")
+
+    return WorldCardService(
+        character_service=character_service,
+        png_handler=png_handler,
+        settings_manager=MagicMock(),
+        logger=MagicMock(),
+        progress_service=WorldUserProgressService(store.db_session_generator, MagicMock(), write_behind=write_behind),
+    )
+
+
+class TestWorldCardRouting:
+    def test_runtime_update_never_touches_png(self, world_service, write_behind):
+        summary = world_service.update_world_card("w1", UpdateWorldRequest(
+            user_uuid="u1", player_xp=120, current_room_uuid="room-2",
+            time_state={"currentDay": 2, "messagesInDay": 3, "totalMessages": 40, "timeOfDay": 0.5},
+        ))
+
+        assert summary.uuid == "w1" and summary.name == "Test World"
+        world_service.png_handler.read_metadata.assert_not_called()
+        world_service.png_handler.save_card_png.assert_not_called()
+        progress = write_behind.get("w1", "u1")
+        assert (progress.player_xp, progress.current_room_uuid) == (120, "room-2")
+        assert progress.time_state.currentDay == 2
+
+    def test_authored_fields_still_rewrite_png_without_runtime_state(self, world_service, write_behind):
+        world_service.update_world_card("w1", UpdateWorldRequest(
+            user_uuid="u1", name="Renamed", player_gold=9,
+        ))
+
+        world_service.png_handler.save_card_png.assert_called_once()
+        saved_card = world_service.png_handler.save_card_png.call_args[0][1]
+        assert saved_card["data"]["name"] == "Renamed"
+        assert saved_card["data"]["extensions"]["world_data"].get("player_gold") in (None, 0)
+        assert write_behind.get("w1", "u1").player_gold == 9
+
+    def test_without_user_runtime_fields_are_written_into_card(self, world_service):
+        world_service.update_world_card("w1", UpdateWorldRequest(player_xp=5))
+
+        saved_card = world_service.png_handler.save_card_png.call_args[0][1]
+        assert saved_card["data"]["extensions"]["world_data"]["player_xp"] == 5
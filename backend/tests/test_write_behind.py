@@ -0,0 +1,120 @@
+"""
+Tests for write_behind.py (DebouncedWriter).
+
+Covers:
+- Scheduled values are merged and written once after the debounce delay
+- Failed writes are retried in the background with exponential backoff
+- After max_attempts consecutive failures the value is dropped and handed
+  to on_give_up; values scheduled later are still written
+- edit_pending and exclusive() wait for in-flight writes
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.utils.write_behind import DebouncedWriter
+
+
+def _union(older, newer):
+    return older | newer
+
+
+def test_scheduled_values_are_merged_into_one_write():
+    writes = []
+    written = threading.Event()
+
+    def write(value):
+        writes.append(value)
+        written.set()
+
+    writer = DebouncedWriter(write, delay=0.05, max_delay=1.0, merge=_union)
+    for i in range(5):
+        writer.schedule({i})
+
+    assert written.wait(2)
+    assert writes == [{0, 1, 2, 3, 4}]
+    assert not writer.has_pending
+
+
+def test_failed_write_is_retried_with_backoff():
+    attempts = []
+    done = threading.Event()
+
+    def write(value):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise OSError("disk busy")
+        done.set()
+
+    logger = MagicMock()
+    writer = DebouncedWriter(write, delay=0.01, max_delay=0.01, logger=logger,
+                             retry_base_seconds=0.05, retry_max_seconds=1.0)
+    writer.schedule("value")
+
+    assert done.wait(5)
+    first_gap, second_gap = attempts[1] - attempts[0], attempts[2] - attempts[1]
+    assert first_gap >= 0.045 and second_gap >= 0.095  # 0.05s, then doubled
+    assert writer.last_error is None and writer.failures == 0
+    assert logger.warning.call_count == 2
+
+
+def test_gives_up_after_max_attempts_and_keeps_newer_values():
+    given_up = []
+    logger = MagicMock()
+    fail = [True]
+    writes = []
+
+    def write(value):
+        if fail[0]:
+            return False
+        writes.append(value)
+
+    writer = DebouncedWriter(write, delay=60, max_delay=60, merge=_union, logger=logger,
+                             on_give_up=lambda value, error: given_up.append((value, error)),
+                             max_attempts=3)
+    writer.schedule({"a"})
+    for _ in range(2):
+        assert not writer.flush()
+        assert writer.pending == {"a"}
+    assert not writer.flush()
+
+    assert given_up == [({"a"}, "write failed")]
+    assert not writer.has_pending
+    logger.error.assert_called_once()
+
+    fail[0] = False
+    writer.schedule({"b"})
+    assert writer.flush()
+    assert writes == [{"b"}]
+
+
+def test_edit_pending_waits_for_in_flight_write():
+    entered, release = threading.Event(), threading.Event()
+    writes = []
+
+    def write(value):
+        entered.set()
+        release.wait(5)
+        writes.append(value)
+
+    writer = DebouncedWriter(write, delay=60, max_delay=60, merge=_union)
+    writer.schedule({"first"})
+    flusher = threading.Thread(target=writer.flush)
+    flusher.start()
+    assert entered.wait(5)
+
+    writer.schedule({"second"})
+    editor = threading.Thread(target=writer.edit_pending, args=(lambda pending: None,))
+    editor.start()
+    editor.join(0.1)
+    assert editor.is_alive()  # blocked behind the in-flight write
+
+    release.set()
+    flusher.join(5)
+    editor.join(5)
+    assert writes == [{"first"}]
+    assert not writer.has_pending
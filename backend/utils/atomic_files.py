@@ -0,0 +1,78 @@
+"""
+@file atomic_files.py
+@description Atomic file replacement: write to a temp file in the target's directory,
+             fsync it, then os.replace it over the target, so readers and crashes
+             only ever see the old or the new file.
+@dependencies none
+@consumers settings_manager.py, batch_converter.py, koboldcpp_manager.py,
+           services/layer_compositor.py, services/model_catalog_cache.py
+"""
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+# On Windows the target can be briefly locked by antivirus/indexers
+REPLACE_ATTEMPTS = 5
+REPLACE_RETRY_SECONDS = 0.05
+
+
+def replace_with_retry(src: os.PathLike, dst: os.PathLike, attempts: int = REPLACE_ATTEMPTS) -> None:
+    """os.replace, retried with a short linear backoff while the target is locked."""
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(REPLACE_RETRY_SECONDS * (attempt + 1))
+
+
+@contextlib.contextmanager
+def atomic_open(
+    path: os.PathLike,
+    mode: str = "wb",
+    encoding: Optional[str] = None,
+    fsync: bool = True,
+) -> Iterator[IO]:
+    """
+    Open a temp file next to ``path`` for writing; on a clean exit it is
+    flushed, fsynced and moved over ``path``. On any error the temp file is
+    removed and ``path`` is left untouched. Parent directories are created.
+
+        with atomic_open(manifest, "w", encoding="utf-8") as f:
+            f.write(text)
+    """
+    if mode not in ("w", "wb"):
+        raise ValueError(f"atomic_open only supports 'w' and 'wb', not {mode!r}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        replace_with_retry(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_bytes(path: os.PathLike, data: bytes, fsync: bool = True) -> None:
+    """Atomically replace ``path`` with ``data``."""
+    with atomic_open(path, "wb", fsync=fsync) as f:
+        f.write(data)
+
+
+def atomic_write_text(path: os.PathLike, text: str, encoding: str = "utf-8", fsync: bool = True) -> None:
+    """Atomically replace ``path`` with ``text``."""
+    with atomic_open(path, "w", encoding=encoding, fsync=fsync) as f:
+        f.write(text)
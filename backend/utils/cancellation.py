@@ -0,0 +1,123 @@
+"""
+@file cancellation.py
+@description Client-disconnect propagation for streaming generations.
+             A StreamCancel is shared by a generation endpoint and the worker
+             thread driving ApiHandler.stream_generate. CancellableStreamingResponse
+             watches the ASGI receive channel and fires it as soon as the client
+             goes away, even while the worker is blocked waiting on upstream
+             tokens. Adapters register callbacks that close the upstream
+             connection and ask the provider to abort (KoboldCPP /api/extra/abort),
+             so the backend stops generating for a reply nobody will read.
+@dependencies anyio, starlette
+@consumers api_handler.py, api_provider_adapters.py, endpoints/generation_endpoints.py
+"""
+import contextlib
+import socket
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+import anyio
+import anyio.to_thread
+from starlette.responses import StreamingResponse
+from starlette.types import Message, Receive, Scope, Send
+
+CANCEL_CLIENT_DISCONNECT = "client_disconnect"
+CANCEL_TIMEOUT = "timeout"
+
+
+class StreamCancel:
+    """One-shot cancellation handle with callbacks scoped to the work in flight."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+        self.reason: Optional[str] = None
+        self.cancelled_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = CANCEL_CLIENT_DISCONNECT) -> bool:
+        """Cancel and run the registered callbacks (blocking). False if already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks = list(reversed(self._callbacks))
+        for callback in callbacks:
+            _run_quietly(callback)
+        return True
+
+    @contextlib.contextmanager
+    def on_cancel(self, callback: Callable[[], Any]) -> Iterator[None]:
+        """Run ``callback`` if cancelled while the block runs (right away if already cancelled)."""
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            _run_quietly(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+def _run_quietly(callback: Callable[[], Any]) -> None:
+    # Best effort: the upstream may already be gone
+    try:
+        callback()
+    except Exception:
+        pass
+
+
+def close_upstream(response) -> None:
+    """
+    Close a streaming ``requests`` response from another thread. close() alone
+    doesn't wake a recv() blocked in iter_lines(); shutting the socket down does.
+    """
+    connection = getattr(getattr(response, "raw", None), "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        with contextlib.suppress(OSError):
+            sock.shutdown(socket.SHUT_RDWR)
+    response.close()
+
+
+class CancellableStreamingResponse(StreamingResponse):
+    """StreamingResponse that cancels ``cancel`` the moment the client disconnects."""
+
+    def __init__(self, content, cancel: StreamCancel, **kwargs):
+        super().__init__(content, **kwargs)
+        self.cancel = cancel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        disconnected = anyio.Event()
+        finished = False
+
+        async def watch() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            if not finished:
+                await anyio.to_thread.run_sync(self.cancel.cancel, CANCEL_CLIENT_DISCONNECT)
+
+        async def receive_disconnect() -> Message:
+            # The watcher owns the real receive channel
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(watch)
+            try:
+                await super().__call__(scope, receive_disconnect, send)
+            finally:
+                finished = True
+                task_group.cancel_scope.cancel()
@@ -0,0 +1,143 @@
+"""
+@file json_patch.py
+@description Minimal RFC 6902 JSON Patch (add, remove, replace, move, copy, test)
+             with RFC 6901 JSON Pointers. Patches are applied in place to plain
+             dict/list documents; a failed operation raises JsonPatchError and may
+             leave earlier operations applied, so callers patch a copy.
+@dependencies none
+@consumers services/world_progress_service.py
+"""
+import copy
+from typing import Any, Iterable, List, Mapping, Tuple
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class JsonPatchError(ValueError):
+    """A patch operation is malformed or cannot be applied to the document."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """A ``test`` operation did not match the document."""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer into unescaped reference tokens ('' is the whole document)."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _array_index(token: str, length: int, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return length
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > length or (index == length and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    """Walk to the container that holds the last token."""
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_array_index(token, len(target), allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return target, tokens[-1]
+
+
+def get_value(document: Any, pointer: str) -> Any:
+    """Value at ``pointer``; raises JsonPatchError if it doesn't exist."""
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return document
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_array_index(token, len(parent), allow_end=False)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _add(document: Any, pointer: str, value: Any) -> Any:
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        return value
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(token, len(parent), allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at {pointer}")
+    return document
+
+
+def _remove(document: Any, pointer: str) -> Tuple[Any, Any]:
+    tokens = parse_pointer(pointer)
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent, token = _resolve_parent(document, tokens)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return document, parent.pop(token)
+    if isinstance(parent, list):
+        return document, parent.pop(_array_index(token, len(parent), allow_end=False))
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def apply_operation(document: Any, operation: Mapping[str, Any]) -> Any:
+    """Apply one operation and return the (possibly replaced) document."""
+    op = operation.get("op")
+    path = operation.get("path")
+    if op not in OPERATIONS:
+        raise JsonPatchError(f"Unsupported patch operation: {op!r}")
+    if not isinstance(path, str):
+        raise JsonPatchError(f"Patch operation {op!r} needs a string 'path'")
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise JsonPatchError(f"Patch operation {op!r} needs a 'value'")
+
+    if op == "add":
+        return _add(document, path, copy.deepcopy(operation["value"]))
+    if op == "remove":
+        return _remove(document, path)[0]
+    if op == "replace":
+        get_value(document, path)  # Target must exist
+        if not parse_pointer(path):
+            return copy.deepcopy(operation["value"])
+        document, _ = _remove(document, path)
+        return _add(document, path, copy.deepcopy(operation["value"]))
+    if op == "test":
+        if get_value(document, path) != operation["value"]:
+            raise JsonPatchTestFailed(f"Test failed at {path}")
+        return document
+
+    source = operation.get("from")
+    if not isinstance(source, str):
+        raise JsonPatchError(f"Patch operation {op!r} needs a string 'from'")
+    if op == "move":
+        if path != source and path.startswith(source + "/"):
+            raise JsonPatchError(f"Cannot move {source} into itself")
+        document, value = _remove(document, source)
+        return _add(document, path, value)
+    return _add(document, path, copy.deepcopy(get_value(document, source)))
+
+
+def apply_patch(document: Any, operations: Iterable[Mapping[str, Any]]) -> Any:
+    """Apply ``operations`` in order to ``document`` (modified in place) and return it."""
+    for operation in operations:
+        document = apply_operation(document, operation)
+    return document
@@ -0,0 +1,163 @@
+"""
+@file json_responses.py
+@description Fast JSON responses for large payloads. FastJSONResponse serializes
+             Pydantic models with model_dump_json() and other content with orjson
+             (when installed). SerializedResponseCache keeps pre-serialized,
+             pre-gzipped list payloads keyed by the database write generation.
+@dependencies orjson (optional), pydantic, starlette, database.py
+@consumers endpoints/character_endpoints.py, endpoints/chat_endpoints.py
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.database import get_db_generation
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is the fallback
+    orjson = None
+
+# Responses smaller than this are not worth compressing (matches the GZip middleware)
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 6
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json_bytes(content: Any) -> bytes:
+    """Serialize ``content`` to compact JSON bytes using the fastest available encoder."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json(by_alias=True).encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that skips FastAPI's response_model re-validation.
+
+    Return it from endpoints whose payload is already a validated Pydantic
+    model (or plain JSON data). Keep ``response_model`` on the route so the
+    OpenAPI schema is unchanged.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json_bytes(content)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip.
+
+    Honours quality values: ``gzip;q=0`` refuses gzip, and a wildcard only
+    counts when gzip isn't listed explicitly.
+    """
+    gzip_q = wildcard_q = None
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            gzip_q = q
+        elif coding == "*":
+            wildcard_q = q
+    if gzip_q is not None:
+        return gzip_q > 0
+    return wildcard_q is not None and wildcard_q > 0
+
+
+class CachedPayload:
+    """A serialized JSON body plus its lazily built gzip encoding and ETag."""
+
+    __slots__ = ("body", "etag", "_gzipped", "_lock")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self._gzipped: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            with self._lock:
+                if self._gzipped is None:
+                    self._gzipped = gzip.compress(self.body, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+        return self._gzipped
+
+    def to_response(self, request: Request) -> Response:
+        """Build a response, negotiating gzip and answering If-None-Match with 304."""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        body = self.body
+        if len(body) >= GZIP_MINIMUM_SIZE and accepts_gzip(request.headers.get("accept-encoding", "")):
+            body = self.gzipped
+            headers["Content-Encoding"] = "gzip"
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class SerializedResponseCache:
+    """
+    LRU cache of serialized response bodies, valid for one database generation.
+
+    Any database write bumps the generation (see ``database.track_db_generation``).
+    That makes every cached entry stale, so the next request rebuilds it. A body
+    built while a write was in progress is returned but not cached.
+    """
+
+    def __init__(self, max_entries: int = 32, generation_fn: Callable[[], int] = get_db_generation):
+        self._max_entries = max_entries
+        self._generation_fn = generation_fn
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedPayload]:
+        generation = self._generation_fn()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, generation: int, content: Any) -> CachedPayload:
+        """Serialize ``content`` and cache it if ``generation`` is still current."""
+        payload = CachedPayload(dumps_json_bytes(content))
+        if generation == self._generation_fn():
+            with self._lock:
+                self._entries[key] = (generation, payload)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
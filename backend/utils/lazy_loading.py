@@ -0,0 +1,130 @@
+"""
+@file lazy_loading.py
+@description Helpers for deferring expensive imports and handler construction until
+             first use: LazyHandler for app.state singletons and
+             DeferredRouterMiddleware for rarely used API routers.
+@dependencies starlette, anyio
+@consumers main.py, dependencies.py
+"""
+import threading
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+import anyio.to_thread
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+T = TypeVar("T")
+
+
+class LazyHandler(Generic[T]):
+    """
+    Thread-safe, construct-once wrapper for an app.state handler.
+
+    Sync endpoints run on the threadpool, so two first requests can race; the
+    factory is guarded by a lock and runs exactly once.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+
+def resolve_lazy(value):
+    """Return the wrapped handler for a LazyHandler, or the value unchanged."""
+    return value.get() if isinstance(value, LazyHandler) else value
+
+
+class DeferredRouterMiddleware:
+    """
+    Include rarely used routers the first time a request hits their prefix.
+
+    ``routers`` maps a path prefix to a loader returning the APIRouter. Loaders
+    should use a plain ``from ... import router`` so PyInstaller's static
+    analysis still bundles the module. The router is included before the
+    request reaches routing, so the first call behaves exactly like an eagerly
+    registered route. Requests for the OpenAPI schema/docs load everything so
+    the schema is complete.
+
+    Importing a router module can block (koboldcpp_handler builds a manager that
+    checks GitHub for releases), so loaders run on a worker thread; only the
+    route-table update happens on the event loop, where it can't interleave with
+    routing of other requests.
+    """
+
+    SCHEMA_PATHS = ("/api/openapi.json", "/api/docs", "/api/redoc")
+
+    def __init__(self, app: ASGIApp, fastapi_app, routers: Dict[str, Callable[[], Any]]):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.pending: Dict[str, Callable[[], Any]] = dict(routers)
+        self._imported: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.pending and scope["type"] in ("http", "websocket"):
+            path = scope.get("path", "")
+            if path.startswith(self.SCHEMA_PATHS):
+                for prefix in list(self.pending):
+                    await self._load_async(prefix)
+            else:
+                for prefix in list(self.pending):
+                    # Match whole path segments: "/api/world" must not claim "/api/worlds"
+                    if path == prefix or path.startswith(prefix + "/"):
+                        await self._load_async(prefix)
+        await self.app(scope, receive, send)
+
+    async def _load_async(self, prefix: str) -> None:
+        router = await anyio.to_thread.run_sync(self._import, prefix)
+        if router is not None:
+            self._include(prefix, router)
+
+    def load(self, prefix: str) -> None:
+        """Import and include one router synchronously (outside the serving loop)."""
+        router = self._import(prefix)
+        if router is not None:
+            self._include(prefix, router)
+
+    def load_all(self) -> None:
+        for prefix in list(self.pending):
+            self.load(prefix)
+
+    def _import(self, prefix: str) -> Optional[Any]:
+        """Run the loader once; concurrent first requests wait on the lock in their threads."""
+        with self._lock:
+            if prefix not in self.pending:
+                return None
+            router = self._imported.get(prefix)
+            if router is None:
+                router = self._imported[prefix] = self.pending[prefix]()
+            return router
+
+    def _include(self, prefix: str, router: Any) -> None:
+        # No awaits in here: on the event loop this runs between two requests' routing
+        if self.pending.pop(prefix, None) is None:
+            return
+        self._imported.pop(prefix, None)
+        routes = self.fastapi_app.router.routes
+        existing = len(routes)
+        self.fastapi_app.include_router(router)
+        # Static mounts (the frozen build's "/" SPA catch-all) must stay last,
+        # so move the new routes in front of the first Mount.
+        added = routes[existing:]
+        del routes[existing:]
+        insert_at = next((i for i, route in enumerate(routes) if isinstance(route, Mount)), len(routes))
+        routes[insert_at:insert_at] = added
+        # Force the OpenAPI schema to be rebuilt with the new routes
+        self.fastapi_app.openapi_schema = None
@@ -0,0 +1,354 @@
+"""
+@file metrics.py
+@description Lightweight spans, latency histograms and generation traces.
+             `span()` / `@timed` time a block into a per-span histogram; the
+             histograms are rendered in Prometheus text format on /api/metrics.
+             Spans also land in the active generation Trace (debug view of the
+             last N generations) and in the current request's Server-Timing
+             header. A span costs a couple of microseconds; set
+             CARDSHARK_METRICS=0 to turn recording off entirely.
+@dependencies (none)
+@consumers main.py, api_handler.py, endpoints/health_endpoints.py,
+           services/prompt_assembly_service.py, services/compression_service.py,
+           services/character_indexing_service.py, services/generation_scheduler.py,
+           png_metadata_handler.py
+"""
+import contextlib
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+METRICS_ENABLED = os.environ.get("CARDSHARK_METRICS", "1").lower() not in ("0", "false", "f")
+
+# Upper bounds in seconds: sub-millisecond cache hits up to multi-minute generations
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# Fractions (e.g. prompt prefix reuse)
+RATIO_BUCKETS = (0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0)
+
+# Generations kept for /api/metrics/traces
+TRACE_HISTORY = 20
+
+# Trace of the generation running in this context, if any
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("cardshark_trace", default=None)
+# (name, seconds) spans finished while handling the current HTTP request
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("cardshark_request_spans", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds)."""
+
+    __slots__ = ("buckets", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+# Gauge collector: returns (labels, value) pairs when /api/metrics is rendered
+GaugeCollector = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and label values, plus collected gauges."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._gauges: Dict[str, GaugeCollector] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._help[name] = help_text
+        self._buckets[name] = buckets
+
+    def gauge(self, name: str, help_text: str, collect: GaugeCollector) -> None:
+        """Register a gauge whose current values are read at render time."""
+        self._help[name] = help_text
+        self._gauges[name] = collect
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self._buckets.get(name, DEFAULT_BUCKETS)))
+        return histogram
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        by_name: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], Histogram]]] = {}
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                by_name.setdefault(name, []).append((labels, histogram))
+
+        lines: List[str] = []
+        for name, series in by_name.items():
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                counts, total, count = histogram.snapshot()
+                base = [f'{k}="{_escape_label(v)}"' for k, v in labels]
+                for bound, cumulative in zip(
+                    [*(_format_bound(b) for b in histogram.buckets), "+Inf"], itertools.accumulate(counts)
+                ):
+                    bucket_labels = ",".join([*base, f'le="{bound}"'])
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                label_str = "{" + ",".join(base) + "}" if base else ""
+                lines.append(f"{name}_sum{label_str} {total:.6f}")
+                lines.append(f"{name}_count{label_str} {count}")
+        for name, collect in sorted(self._gauges.items()):
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in collect():
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(labels.items()))
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("cardshark_span_seconds", "Time spent in instrumented code spans")
+REGISTRY.describe("cardshark_generation_stage_seconds", "Generation pipeline stage latency")
+REGISTRY.describe("cardshark_http_request_seconds", "HTTP time to response start by endpoint")
+REGISTRY.describe("cardshark_generation_cancel_seconds", "Time from a generation cancel to its stream ending")
+REGISTRY.describe(
+    "cardshark_prompt_prefix_reuse_ratio",
+    "Share of the prompt identical to the session's previous prompt (KV cache reuse)",
+    buckets=RATIO_BUCKETS,
+)
+
+
+class Trace:
+    """
+    Timeline of one generation: stage spans (with nested service spans)
+    and point-in-time marks such as time to first token.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, **attrs: Any):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.marks: Dict[str, float] = {}
+        self.duration_ms: Optional[float] = None
+        self.status = "running"
+        self._depth = 0
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a generation stage. Spans opened inside (in services) nest
+        under it. Must not span a ``yield`` of the enclosing generator.
+        """
+        token = _current_trace.set(self)
+        try:
+            with _timed_block(name, "cardshark_generation_stage_seconds", "stage"):
+                yield
+        finally:
+            _current_trace.reset(token)
+
+    def mark(self, name: str) -> float:
+        """Record a point in time (ms since the trace started), e.g. first token."""
+        value = self.elapsed_ms()
+        self.marks[name] = round(value, 3)
+        REGISTRY.observe("cardshark_generation_stage_seconds", value / 1000, stage=name)
+        return value
+
+    def _record(self, name: str, start: float, seconds: float, depth: int) -> None:
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round(seconds * 1000, 3),
+            "depth": depth,
+        })
+
+    def finish(self, status: str = "ok") -> None:
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round(self.elapsed_ms(), 3)
+        self.status = status
+        REGISTRY.observe("cardshark_generation_stage_seconds", self.duration_ms / 1000, stage="total")
+        TRACES.add(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "marks": self.marks,
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+        }
+
+
+class TraceLog:
+    """Most recent finished traces (bounded)."""
+
+    def __init__(self, maxlen: int = TRACE_HISTORY):
+        self._traces: Deque[Trace] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace) -> None:
+        if REGISTRY.enabled:
+            with self._lock:
+                self._traces.append(trace)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return [t.to_dict() for t in traces[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+TRACES = TraceLog()
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time a block into the span histogram, the active trace and the request timing."""
+    return _timed_block(name, "cardshark_span_seconds", "span")
+
+
+@contextlib.contextmanager
+def _timed_block(name: str, metric: str, label: str) -> Iterator[None]:
+    if not REGISTRY.enabled:
+        yield
+        return
+    trace = _current_trace.get()
+    depth = 0
+    if trace is not None:
+        depth = trace._depth
+        trace._depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        REGISTRY.histogram(metric, **{label: name}).observe(seconds)
+        if trace is not None:
+            trace._depth = depth
+            trace._record(name, start, seconds, depth)
+        request_spans = _request_spans.get()
+        if request_spans is not None:
+            request_spans.append((name, seconds))
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of ``span`` for sync and async functions."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_server_timing(spans: List[Tuple[str, float]], total_seconds: float) -> str:
+    """Server-Timing header value; repeated spans are summed."""
+    totals: Dict[str, float] = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    entries = [f"{name.replace('.', '-')};dur={seconds * 1000:.2f}" for name, seconds in totals.items()]
+    entries.append(f"app;dur={total_seconds * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class RequestTimingMiddleware:
+    """
+    Pure ASGI middleware: adds a Server-Timing header (spans finished before
+    the response started, plus total app time) and records time to response
+    start per endpoint. Streaming bodies pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REGISTRY.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                endpoint = scope.get("endpoint")
+                REGISTRY.observe(
+                    "cardshark_http_request_seconds", elapsed,
+                    endpoint=getattr(endpoint, "__name__", "unmatched"),
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(spans, elapsed).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
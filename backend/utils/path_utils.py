@@ -1,5 +1,6 @@
 """Path utilities for consistent path handling across the application."""
 
+import os
 import sys
 from pathlib import Path
 from typing import Union, Optional
@@ -37,6 +38,19 @@ def normalize_path(path_input: Union[str, Path]) -> str:
         return str(path_input)
 
 
+def join_normalized_path(normalized_dir: str, name: str) -> str:
+    """
+    Build the normalized path of a direct (non-symlink) child of a directory.
+
+    Equivalent to ``normalize_path(Path(normalized_dir) / name)`` when
+    ``normalized_dir`` came from ``normalize_path``, without resolving the
+    child on disk. Used when listing large directories.
+    """
+    if sys.platform.startswith('win'):
+        name = name.lower()
+    return os.path.join(normalized_dir, name)
+
+
 def paths_are_equal(path1: Union[str, Path], path2: Union[str, Path]) -> bool:
     """
     Compare two paths for equality using normalized paths.
@@ -0,0 +1,120 @@
+"""
+@file template_renderer.py
+@description Precompiled renderer for {{variable}} instruct templates. Each template
+             format string is split once into literal and slot segments (cached by
+             content), so rendering a message is a list fill and a single join.
+             Ad-hoc strings are rendered the same way without being cached.
+@dependencies none
+@consumers services/prompt_assembly_service.py
+"""
+import re
+from functools import lru_cache
+from typing import List, Mapping, Optional, Tuple
+
+# A slot is {{name}} with no braces inside; names match case-insensitively
+_SLOT_RE = re.compile(r'\{\{([^{}]*)\}\}')
+
+
+@lru_cache(maxsize=256)
+def _variable_pattern(key: str) -> 're.Pattern':
+    return re.compile(r'\{\{' + re.escape(key) + r'\}\}', re.IGNORECASE)
+
+
+def _substitute_sequential(text: str, items: List[Tuple[str, str]]) -> str:
+    """Replace each {{key}} in turn, inserting values literally."""
+    for key, value in items:
+        if '{{' not in text:
+            break
+        text = _variable_pattern(key).sub(lambda _m, value=value: value, text)
+    return text
+
+
+class CompiledTemplate:
+    """
+    A template split into literal text and variable slots.
+
+    ``render`` gives the same result as substituting the variables one after
+    another in dict order: a value may itself contain {{placeholders}} for
+    variables that come later (e.g. a message mentioning {{char}}), and those
+    are resolved too. Values are inserted literally, backslashes included.
+    Slots with no matching variable are left as written.
+    """
+
+    __slots__ = ('source', '_parts', '_slots')
+
+    def __init__(self, source: str):
+        self.source = source
+        parts: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        pos = 0
+        for match in _SLOT_RE.finditer(source):
+            if match.start() > pos:
+                parts.append(source[pos:match.start()])
+            slots.append((len(parts), match.group(1).lower()))
+            parts.append(match.group(0))  # Kept when the variable isn't supplied
+            pos = match.end()
+        if pos < len(source):
+            parts.append(source[pos:])
+        self._parts = parts
+        self._slots = tuple(slots)
+
+    @property
+    def slot_names(self) -> Tuple[str, ...]:
+        return tuple(name for _, name in self._slots)
+
+    def render(self, variables: Mapping[str, Optional[str]]) -> str:
+        if not self._slots:
+            return self.source
+
+        out = self._parts.copy()
+        for index, name in self._slots:
+            value = variables.get(name)
+            if value is None:
+                if name not in variables:
+                    key = _find_key(variables, name)
+                    if key is None:
+                        continue
+                    value = variables[key]
+            if not value:
+                value = ''
+            elif '{{' in value:
+                value = _resolve_nested(variables, name, value)
+            out[index] = value
+        return ''.join(out)
+
+
+def _find_key(variables: Mapping[str, Optional[str]], name: str) -> Optional[str]:
+    """Case-insensitive key lookup (slot names are stored lowercased)."""
+    for key in variables:
+        if key.lower() == name:
+            return key
+    return None
+
+
+def _resolve_nested(variables: Mapping[str, Optional[str]], name: str, value: str) -> str:
+    """Resolve placeholders in ``value`` for the variables that follow ``name``."""
+    keys = list(variables)
+    position = next(i for i, key in enumerate(keys) if key.lower() == name)
+    return _substitute_sequential(value, [(key, variables[key] or '') for key in keys[position + 1:]])
+
+
+@lru_cache(maxsize=512)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Compile an instruct-template format string once; later calls reuse it.
+
+    Only for the template's own format strings (userFormat, systemFormat,
+    stop sequences, ...), which repeat every turn. One-off text such as
+    post-history instructions or session notes goes through ``render_template``
+    so it doesn't push the real templates out of the cache.
+    """
+    return CompiledTemplate(template)
+
+
+def render_template(template: str, variables: Mapping[str, Optional[str]]) -> str:
+    """Render an ad-hoc {{variable}} string without caching its compiled form."""
+    if not template:
+        return ''
+    if '{{' not in template:
+        return template
+    return CompiledTemplate(template).render(variables)
@@ -0,0 +1,77 @@
+"""
+@file thread_offload.py
+@description Dedicated worker-thread limiters for blocking work, kept apart from
+             Starlette's default threadpool (40 threads). Generation streams block
+             a thread for their whole lifetime while waiting on the upstream LLM, so
+             they get their own limiter; SQLite work gets a small one of its own.
+             Sync `def` endpoints keep the default pool to themselves.
+@dependencies anyio
+@consumers database.py, endpoints/generation_endpoints.py
+"""
+import functools
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+import anyio
+import anyio.to_thread
+from anyio.lowlevel import RunVar
+
+T = TypeVar("T")
+
+# Concurrent SQLite calls; SQLite serializes writers anyway, so a few threads suffice
+DB_THREAD_LIMIT = 8
+# Concurrent generation streams (each holds one thread while waiting for tokens)
+STREAM_THREAD_LIMIT = 256
+
+# Limiters are bound to the running event loop, like anyio's default limiter
+_db_limiter: RunVar[anyio.CapacityLimiter] = RunVar("cardshark_db_limiter")
+_stream_limiter: RunVar[anyio.CapacityLimiter] = RunVar("cardshark_stream_limiter")
+
+
+def _limiter(var: RunVar, total_tokens: int) -> anyio.CapacityLimiter:
+    try:
+        return var.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(total_tokens)
+        var.set(limiter)
+        return limiter
+
+
+def db_thread_limiter() -> anyio.CapacityLimiter:
+    return _limiter(_db_limiter, DB_THREAD_LIMIT)
+
+
+def stream_thread_limiter() -> anyio.CapacityLimiter:
+    return _limiter(_stream_limiter, STREAM_THREAD_LIMIT)
+
+
+async def run_in_db_thread(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking database work on the database threads."""
+    return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs), limiter=db_thread_limiter())
+
+
+async def iterate_in_thread(
+    iterator: Iterator[T],
+    limiter: Optional[anyio.CapacityLimiter] = None,
+) -> AsyncIterator[T]:
+    """
+    Drive a blocking (sync) iterator from worker threads.
+
+    Each ``next()`` runs under ``limiter`` (the stream limiter by default)
+    instead of the default threadpool. Generators are closed in a worker
+    thread when iteration stops early, e.g. on client disconnect.
+    """
+    limiter = limiter or stream_thread_limiter()
+    sentinel = object()
+    finished = False
+    try:
+        while True:
+            item = await anyio.to_thread.run_sync(next, iterator, sentinel, limiter=limiter)
+            if item is sentinel:
+                finished = True
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if not finished and close is not None:
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(close, limiter=limiter)
@@ -0,0 +1,186 @@
+"""
+@file write_behind.py
+@description DebouncedWriter: coalescing write-behind scheduler with a single daemon
+             writer thread, bounded retries with exponential backoff, and a flush
+             at interpreter exit.
+@dependencies none
+@consumers settings_manager.py, services/world_progress_service.py
+"""
+import atexit
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+P = TypeVar("P")
+
+# Consecutive failed writes before the pending value is given up on
+WRITE_MAX_ATTEMPTS = 5
+# Backoff after the first failure, doubled per further failure up to the cap
+WRITE_RETRY_BASE_SECONDS = 0.5
+WRITE_RETRY_MAX_SECONDS = 30.0
+
+
+def _replace(older, newer):
+    return newer
+
+
+class DebouncedWriter(Generic[P]):
+    """
+    Write-behind scheduler for one pending value.
+
+    ``schedule`` merges a value into the pending one (the newest replaces the
+    older by default) and pushes the write deadline out by ``delay``, capped at
+    ``max_delay`` after the first pending change. A daemon thread writes the
+    pending value once the deadline passes; ``flush`` writes it immediately.
+    Writes are serialized, so an older value can never land after a newer one.
+
+    ``write_fn`` signals failure by raising or returning False. A failed value
+    is merged back underneath anything scheduled since and retried with
+    exponential backoff; after ``max_attempts`` consecutive failures it is
+    dropped, logged, and handed to ``on_give_up``.
+    """
+
+    def __init__(
+        self,
+        write_fn: Callable[[P], Optional[bool]],
+        delay: float,
+        max_delay: float,
+        name: str = "write-behind",
+        merge: Callable[[P, P], P] = _replace,
+        on_give_up: Optional[Callable[[P, str], None]] = None,
+        logger=None,
+        max_attempts: int = WRITE_MAX_ATTEMPTS,
+        retry_base_seconds: float = WRITE_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = WRITE_RETRY_MAX_SECONDS,
+    ):
+        self._write_fn = write_fn
+        self._delay = delay
+        self._max_delay = max_delay
+        self._name = name
+        self._merge = merge
+        self._on_give_up = on_give_up
+        self._logger = logger or logging.getLogger(__name__)
+        self._max_attempts = max_attempts
+        self._retry_base = retry_base_seconds
+        self._retry_max = retry_max_seconds
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending: Optional[P] = None
+        self._deadline = 0.0
+        self._hard_deadline = 0.0
+        self._retry_at = 0.0
+        self._failures = 0
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+        atexit.register(self.flush)
+
+    @property
+    def has_pending(self) -> bool:
+        return self._pending is not None
+
+    @property
+    def pending(self) -> Optional[P]:
+        """The value waiting to be written (read-only)."""
+        return self._pending
+
+    @property
+    def failures(self) -> int:
+        """Consecutive failed writes of the current pending value."""
+        return self._failures
+
+    def schedule(self, value: P) -> None:
+        with self._cond:
+            self._add_locked(value, older=False)
+
+    def flush(self) -> bool:
+        """Write the pending value now, if any. Returns False if the write failed."""
+        with self._write_lock:
+            return self._flush_locked()
+
+    def edit_pending(self, fn: Callable[[Optional[P]], Optional[P]]) -> None:
+        """Replace the pending value with ``fn(pending)``, after any in-flight write."""
+        with self._write_lock:
+            with self._cond:
+                self._pending = fn(self._pending)
+
+    @contextlib.contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Flush, then hold off writes while the caller touches the target directly."""
+        with self._write_lock:
+            self._flush_locked()
+            try:
+                yield
+            finally:
+                self._flush_locked()
+
+    # ------------------------------------------------------------------ #
+
+    def _add_locked(self, value: P, older: bool) -> None:
+        """Merge ``value`` into the pending one. Caller holds _cond."""
+        now = time.monotonic()
+        if self._pending is None:
+            self._hard_deadline = now + self._max_delay
+            self._pending = value
+        elif older:
+            self._pending = self._merge(value, self._pending)
+        else:
+            self._pending = self._merge(self._pending, value)
+        # Don't let a continuous stream of changes postpone the write forever
+        self._deadline = min(now + self._delay, self._hard_deadline)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _flush_locked(self) -> bool:
+        with self._cond:
+            value, self._pending = self._pending, None
+        if value is None:
+            return True
+
+        error = "write failed"
+        try:
+            ok = self._write_fn(value) is not False
+        except Exception as exc:
+            ok, error = False, str(exc)
+
+        with self._cond:
+            if ok:
+                self._failures = 0
+                self._retry_at = 0.0
+                self.last_error = None
+                return True
+            self._failures += 1
+            self.last_error = error
+            attempts = self._failures
+            give_up = attempts >= self._max_attempts
+            if give_up:
+                self._failures = 0
+                self._retry_at = 0.0
+            else:
+                backoff = min(self._retry_base * 2 ** (attempts - 1), self._retry_max)
+                self._retry_at = time.monotonic() + backoff
+                self._add_locked(value, older=True)
+
+        if give_up:
+            self._logger.error(f"{self._name}: giving up after {attempts} failed writes: {error}")
+            if self._on_give_up is not None:
+                self._on_give_up(value, error)
+        else:
+            self._logger.warning(
+                f"{self._name}: write failed ({error}); retry {attempts}/{self._max_attempts - 1} in {backoff:.1f}s"
+            )
+        return False
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                remaining = max(self._deadline, self._retry_at) - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
@@ -0,0 +1,6 @@
+"""
+Reproducible performance benchmarks for the CardShark backend.
+
+Run with ``python -m benchmarks.run`` from the repository root; see
+benchmarks/README.md for scenarios, scales and comparing results.
+"""
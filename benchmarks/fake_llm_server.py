@@ -0,0 +1,298 @@
+"""
+benchmarks/fake_llm_server.py
+Local stand-in for KoboldCPP and OpenAI-compatible servers.
+
+Streams deterministic tokens with a configurable first-token latency and
+token rate, so end-to-end generation can be measured without a model:
+
+    python -m benchmarks.fake_llm_server --port 5001 --tps 40 --latency 0.25
+
+Endpoints:
+    POST /api/extra/generate/stream   KoboldCPP SSE (event: message / data: {"token"})
+    POST /api/v1/generate             KoboldCPP non-streaming
+    GET  /api/v1/model                KoboldCPP loaded model
+    GET  /api/extra/true_max_context_length
+    POST /api/extra/abort             KoboldCPP abort (ends the active stream)
+    POST /v1/chat/completions         OpenAI chat completions (stream or not)
+    GET  /v1/models                   OpenAI / Featherless model list (ETag, 304)
+    GET  /api/v1/models               OpenRouter model list (ETag, 304)
+    GET  /api/tags                    Ollama model list (ETag, 304)
+"""
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+MODEL_NAME = "fake/benchmark-7b"
+
+
+@dataclass
+class FakeLLMConfig:
+    tokens_per_second: float = 50.0  # 0 = as fast as possible
+    first_token_latency: float = 0.1  # seconds before the first token
+    max_tokens: int = 128  # cap when the request doesn't ask for fewer
+    context_length: int = 8192
+    catalog_size: int = 1  # models in the /models lists
+    catalog_version: int = 1  # bump to change the catalog (and its ETag)
+    models_status: int = 200  # e.g. 503 to simulate a provider outage
+
+
+def fake_catalog(size: int, version: int = 1) -> List[Dict[str, Any]]:
+    """Deterministic OpenRouter-style model list; the first entry is MODEL_NAME."""
+    vendors = ("meta-llama", "mistralai", "qwen", "google", "nousresearch", "anthropic", "sao10k")
+    models = []
+    for i in range(size):
+        vendor = vendors[i % len(vendors)]
+        model_id = MODEL_NAME if i == 0 else f"{vendor}/model-{i}-v{version}"
+        models.append({
+            "id": model_id,
+            "name": f"{vendor.title()} Model {i}",
+            "description": f"Synthetic {vendor} model number {i} for catalog benchmarks.",
+            "context_length": 4096 * (1 + i % 8),
+            "pricing": {"prompt": f"{i % 5 / 1e6:.7f}", "completion": f"{i % 7 / 1e6:.7f}"},
+        })
+    return models
+
+
+def fake_tokens(count: int) -> Iterator[str]:
+    """Deterministic token stream: a short phrase repeated."""
+    phrase = ("The", " lantern", " swayed", " as", " the", " wind", " rose", ",", " and", " she", " smiled", ".")
+    for i in range(count):
+        yield phrase[i % len(phrase)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep benchmark output clean
+        pass
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            return {}
+
+    def _json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _token_count(self, body: Dict[str, Any]) -> int:
+        requested = body.get("max_length") or body.get("max_tokens") or self.server.config.max_tokens
+        return max(1, min(int(requested), self.server.config.max_tokens))
+
+    def _paced(self, count: int) -> Iterator[str]:
+        """Tokens at the configured rate; stops early on /api/extra/abort."""
+        config = self.server.config
+        abort = self.server.new_stream()
+        time.sleep(config.first_token_latency)
+        interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        start = time.perf_counter()
+        for i, token in enumerate(fake_tokens(count)):
+            if abort.is_set():
+                return
+            if interval:
+                delay = start + i * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield token
+
+    def _stream(self, events: Iterator[bytes]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in events:
+                self.wfile.write(event)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _catalog(self, shape: str) -> None:
+        """Model list with an ETag / Last-Modified; 304 when the client's copy is current."""
+        server = self.server
+        config = server.config
+        with server.counter_lock:
+            server.model_list_requests += 1
+        if config.models_status != 200:
+            self._json({"error": {"message": "models unavailable"}}, config.models_status)
+            return
+        etag = f'"catalog-{config.catalog_size}-{config.catalog_version}"'
+        last_modified = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(1_700_000_000 + config.catalog_version))
+        if self.headers.get("If-None-Match") == etag:
+            with server.counter_lock:
+                server.not_modified_responses += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        models = fake_catalog(config.catalog_size, config.catalog_version)
+        if shape == "ollama":
+            payload = {"models": [{"name": m["id"], "size": 4 * 1024 ** 3} for m in models]}
+        else:
+            payload = {"object": "list", "data": [{**m, "object": "model"} for m in models]}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path in ("/v1/models", "/api/v1/models"):
+            self._catalog("openai")
+        elif path == "/api/tags":
+            self._catalog("ollama")
+        elif self.path == "/api/v1/model":
+            self._json({"result": MODEL_NAME})
+        elif self.path == "/api/extra/true_max_context_length":
+            self._json({"value": self.server.config.context_length})
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/api/extra/generate/stream":
+            self._stream(self._kobold_events(self._token_count(body)))
+        elif self.path == "/api/v1/generate":
+            text = "".join(self._paced(self._token_count(body)))
+            self._json({"results": [{"text": text}]})
+        elif self.path == "/api/extra/abort":
+            self._json({"success": self.server.abort()})
+        elif self.path == "/v1/chat/completions":
+            if body.get("stream"):
+                self._stream(self._openai_events(self._token_count(body)))
+            else:
+                text = "".join(self._paced(self._token_count(body)))
+                self._json({
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "model": MODEL_NAME,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                })
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def _kobold_events(self, count: int) -> Iterator[bytes]:
+        for token in self._paced(count):
+            yield f"event: message\ndata: {json.dumps({'token': token, 'finish_reason': None})}\n\n".encode("utf-8")
+        yield f"event: message\ndata: {json.dumps({'token': '', 'finish_reason': 'stop'})}\n\n".encode("utf-8")
+
+    def _openai_events(self, count: int) -> Iterator[bytes]:
+        for token in self._paced(count):
+            chunk = {"object": "chat.completion.chunk", "model": MODEL_NAME,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeLLMConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self._abort: Optional[threading.Event] = None
+        self._abort_lock = threading.Lock()
+        self.counter_lock = threading.Lock()
+        self.model_list_requests = 0
+        self.not_modified_responses = 0
+
+    def new_stream(self) -> threading.Event:
+        with self._abort_lock:
+            self._abort = threading.Event()
+            return self._abort
+
+    def abort(self) -> bool:
+        with self._abort_lock:
+            if self._abort is None or self._abort.is_set():
+                return False
+            self._abort.set()
+            return True
+
+
+class FakeLLMServer:
+    """
+    Fake LLM server on a background thread (port 0 picks a free port).
+
+        with FakeLLMServer(FakeLLMConfig(tokens_per_second=100)) as server:
+            requests.post(server.url + "/api/extra/generate/stream", ...)
+    """
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeLLMConfig()
+        self._server = _Server((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def model_list_requests(self) -> int:
+        return self._server.model_list_requests
+
+    @property
+    def not_modified_responses(self) -> int:
+        return self._server.not_modified_responses
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake KoboldCPP / OpenAI streaming server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--tps", type=float, default=50.0, help="tokens per second (0 = unthrottled)")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds before the first token")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(tokens_per_second=args.tps, first_token_latency=args.latency, max_tokens=args.max_tokens)
+    server = FakeLLMServer(config, host=args.host, port=args.port)
+    print(f"Fake LLM server on {server.url} ({args.tps} tok/s, {args.latency}s first-token latency)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+benchmarks/fake_release_server.py
+Local stand-in for the GitHub release API and asset downloads used by
+KoboldCPPManager.download, so resume and checksum handling can be tested
+and timed offline:
+
+    with FakeReleaseServer(FakeReleaseConfig(size=8 * 1024 * 1024, drop_after=1024 * 1024)) as server:
+        KoboldCPPManager.RELEASE_API_URL = server.release_api_url
+
+Endpoints:
+    GET /repos/LostRuins/koboldcpp/releases/latest   release JSON; assets carry a "sha256:<hex>" digest
+    GET /download/<asset>                             asset bytes with ETag; honours Range / If-Range
+
+Faults: ``drop_after`` cuts the first ``drops`` downloads after that many
+bytes (the Content-Length still promises the whole asset), ``ranges=False``
+ignores Range like a server without resume support, and ``corrupt`` serves
+bytes that don't match the published digest.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import unquote, urlsplit
+
+RELEASE_PATH = "/repos/LostRuins/koboldcpp/releases/latest"
+ASSET_NAMES = ("koboldcpp.exe", "koboldcpp-linux-x64", "koboldcpp-mac-arm64")
+WRITE_BLOCK = 256 * 1024
+
+
+@dataclass
+class FakeReleaseConfig:
+    size: int = 4 * 1024 * 1024  # asset size in bytes
+    version: str = "1.99.1"
+    seed: int = 0
+    drop_after: Optional[int] = None  # bytes sent before a faulty download is cut
+    drops: int = 1  # how many downloads are cut
+    ranges: bool = True  # False: always answer 200 with the whole asset
+    corrupt: bool = False  # serve bytes that don't match the digest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep test output clean
+        pass
+
+    def _json(self, payload, status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path)
+        if path == RELEASE_PATH:
+            self._json(self.server.release_json(self._origin()))
+        elif path.startswith("/download/") and path[len("/download/"):] in ASSET_NAMES:
+            self._download()
+        else:
+            self._json({"message": "Not Found"}, 404)
+
+    def _origin(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _download(self) -> None:
+        server = self.server
+        payload = server.payload
+        size = len(payload)
+        start = 0
+        range_match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if server.config.ranges and range_match and (if_range is None or if_range == server.etag):
+            start = int(range_match.group(1))
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        drop_after = server.take_drop()
+        server.record_request(start)
+
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("ETag", server.etag)
+        self.send_header("Accept-Ranges", "bytes" if server.config.ranges else "none")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.end_headers()
+
+        end = size if drop_after is None else min(size, start + drop_after)
+        try:
+            for offset in range(start, end, WRITE_BLOCK):
+                self.wfile.write(payload[offset:min(offset + WRITE_BLOCK, end)])
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        if end < size:
+            # Simulated network drop: close without sending the rest
+            self.wfile.flush()
+            self.close_connection = True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeReleaseConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.payload = random.Random(config.seed).randbytes(config.size)
+        digest = hashlib.sha256(self.payload).hexdigest()
+        self.digest = digest
+        self.etag = f'"{digest[:16]}"'
+        if config.corrupt:
+            self.payload = self.payload[:-1] + bytes([self.payload[-1] ^ 0xFF])
+        self._lock = threading.Lock()
+        self._drops_left = config.drops if config.drop_after is not None else 0
+        self.request_offsets: List[int] = []
+
+    def take_drop(self) -> Optional[int]:
+        with self._lock:
+            if self._drops_left <= 0:
+                return None
+            self._drops_left -= 1
+            return self.config.drop_after
+
+    def record_request(self, start: int) -> None:
+        with self._lock:
+            self.request_offsets.append(start)
+
+    def release_json(self, origin: str):
+        return {
+            "tag_name": f"v{self.config.version}",
+            "html_url": f"{origin}/releases/v{self.config.version}",
+            "assets": [
+                {
+                    "name": name,
+                    "size": len(self.payload),
+                    "digest": f"sha256:{self.digest}",
+                    "browser_download_url": f"{origin}/download/{name}",
+                }
+                for name in ASSET_NAMES
+            ],
+        }
+
+
+class FakeReleaseServer:
+    """
+    Fake release server on a background thread (port 0 picks a free port).
+
+        with FakeReleaseServer() as server:
+            requests.get(server.asset_url("koboldcpp-linux-x64"))
+    """
+
+    def __init__(self, config: Optional[FakeReleaseConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeReleaseConfig()
+        self._server = _Server((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def release_api_url(self) -> str:
+        return self.url + RELEASE_PATH
+
+    @property
+    def payload(self) -> bytes:
+        return self._server.payload
+
+    @property
+    def sha256(self) -> str:
+        """The published digest (what the asset should hash to)."""
+        return self._server.digest
+
+    @property
+    def request_offsets(self) -> List[int]:
+        """Start offset of every download request served, in order."""
+        return list(self._server.request_offsets)
+
+    def asset_url(self, name: str) -> str:
+        return f"{self.url}/download/{name}"
+
+    def start(self) -> "FakeReleaseServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-release", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeReleaseServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
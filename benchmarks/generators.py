@@ -0,0 +1,189 @@
+"""
+benchmarks/generators.py
+Deterministic synthetic data: card libraries, lore books, long chats and
+layered-character stacks.
+
+Everything is derived from a seed, so two runs at the same scale see the
+same bytes and the same text. Card libraries are real PNG files with the
+``chara`` chunk written by PngMetadataHandler, exactly as the app stores them.
+"""
+import json
+import os
+import random
+import uuid
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from backend.png_metadata_handler import PngMetadataHandler
+
+_WORDS = (
+    "amber archive blade bridge candle castle cellar cinder cloak copper crown dagger "
+    "dawn desert dragon dusk ember falcon forest forge garden ghost glacier harbor "
+    "hearth helm island ivory jade lantern ledger marsh meadow mirror moon oath orchard "
+    "pilgrim quarry raven relic river ruin saddle scroll shadow shrine silver spire "
+    "storm tavern thorn tide tower valley velvet warden whisper willow wolf"
+).split()
+
+_NAMES = (
+    "Aria Bram Cael Dara Eshe Fenn Galen Hale Isolde Jory Kestrel Lune Mira Nox "
+    "Orin Pell Quill Rook Sable Thane Una Vesper Wren Yara Zane"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(6, 16)) for _ in range(sentences))
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def make_lore_book(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """``count`` lore entries (plain, whole-word, substring and regex keys)."""
+    rng = random.Random(f"lore-{seed}")
+    entries = []
+    for i in range(count):
+        key = f"{rng.choice(_WORDS)}{i}" if i % 4 else rng.choice(_WORDS)
+        entry: Dict[str, Any] = {
+            "id": i + 1,
+            "keys": [key, f"{rng.choice(_WORDS)} {rng.choice(_WORDS)}"],
+            "content": _paragraph(rng, 2),
+            "enabled": i % 10 != 9,
+            "insertion_order": i,
+            "position": "before_char",
+            "case_sensitive": False,
+            "extensions": {"match_whole_words": i % 3 != 0},
+        }
+        if i % 25 == 0:
+            entry["keys"].append(f"/{rng.choice(_WORDS)}s?/")
+        entries.append(entry)
+    return entries
+
+
+def make_card(index: int, seed: int = 0, lore_entries: int = 0) -> Dict[str, Any]:
+    """A chara_card_v2 dict with realistic field sizes."""
+    rng = random.Random(f"card-{seed}-{index}")
+    name = f"{rng.choice(_NAMES)} {index}"
+    data: Dict[str, Any] = {
+        "name": name,
+        "description": _paragraph(rng, 12),
+        "personality": _paragraph(rng, 3),
+        "scenario": _paragraph(rng, 4),
+        "first_mes": _paragraph(rng, 5),
+        "mes_example": "\n".join(f"<START>\n{{{{user}}}}: {_sentence(rng, 8)}\n{{{{char}}}}: {_paragraph(rng, 2)}" for _ in range(3)),
+        "creator_notes": _sentence(rng, 12),
+        "system_prompt": "",
+        "post_history_instructions": "",
+        "tags": rng.sample(_WORDS, 3),
+        "creator": "benchmarks",
+        "character_version": "1.0",
+        "alternate_greetings": [_paragraph(rng, 3) for _ in range(2)],
+        "extensions": {"card_type": "character"},
+        "character_uuid": _uuid(rng),
+    }
+    if lore_entries:
+        data["character_book"] = {"entries": make_lore_book(lore_entries, seed=index), "scan_depth": 3}
+    return {"spec": "chara_card_v2", "spec_version": "2.0", "data": data}
+
+
+def make_chat(count: int, seed: int = 0, user_name: str = "User", char_name: str = "Character") -> List[Dict[str, str]]:
+    """Alternating user/assistant messages, ending on a user turn."""
+    rng = random.Random(f"chat-{seed}")
+    messages = []
+    for i in range(count):
+        # Last message is always the user's
+        role = "user" if (count - i) % 2 == 1 else "assistant"
+        messages.append({
+            "role": role,
+            "content": _paragraph(rng, rng.randint(1, 4) if role == "user" else rng.randint(3, 8)),
+        })
+    return messages
+
+
+def _base_image(size: Tuple[int, int], seed: int) -> bytes:
+    rng = random.Random(f"image-{seed}")
+    image = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def card_png(card: Dict[str, Any], png_handler: PngMetadataHandler, image: Optional[bytes] = None) -> bytes:
+    """PNG bytes with the card embedded."""
+    return png_handler.write_metadata(image or _base_image((64, 96), 0), card)
+
+
+def write_library(
+    directory: Path,
+    count: int,
+    png_handler: PngMetadataHandler,
+    seed: int = 0,
+    lore_every: int = 10,
+    lore_entries: int = 20,
+) -> List[Path]:
+    """
+    Write ``count`` card PNGs into ``directory`` (every ``lore_every``-th card
+    carries a lore book). File mtimes are fixed so reruns are identical.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    image = _base_image((64, 96), seed)
+    paths = []
+    for i in range(count):
+        card = make_card(i, seed=seed, lore_entries=lore_entries if lore_every and i % lore_every == 0 else 0)
+        path = directory / f"card_{i:05d}.png"
+        path.write_bytes(card_png(card, png_handler, image))
+        os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+        paths.append(path)
+    return paths
+
+
+def write_layer_stack(directory: Path, count: int, size: int, seed: int = 0) -> Tuple[Path, List[Path]]:
+    """
+    A layered character: an opaque base PNG and ``count`` RGBA layers, each a
+    translucent rectangle over transparency. Returns (base, layers bottom-up).
+    """
+    rng = random.Random(f"layers-{seed}")
+    directory.mkdir(parents=True, exist_ok=True)
+    base = directory / "base.png"
+    Image.new("RGB", (size, size), (rng.randrange(256), rng.randrange(256), rng.randrange(256))).save(
+        base, compress_level=1)
+    layers = []
+    for i in range(count):
+        layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        left, top = rng.randrange(size // 2), rng.randrange(size // 2)
+        box = (left, top, left + rng.randrange(1, size // 2), top + rng.randrange(1, size // 2))
+        layer.paste((rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randrange(64, 256)), box)
+        path = directory / f"layer_{i:03d}.png"
+        layer.save(path, compress_level=1)
+        layers.append(path)
+    return base, layers
+
+
+def write_backup(directory: Path, count: int, seed: int = 0, size: Tuple[int, int] = (256, 384)) -> List[Path]:
+    """
+    A character backup as read by backend.batch_converter: one directory per
+    character with a ``v2Import_<name>.json`` card and an ``image1.jpg``.
+    """
+    rng = random.Random(f"backup-{seed}")
+    paths = []
+    for i in range(count):
+        card = make_card(i, seed=seed)
+        name = card["data"]["name"].replace(" ", "_")
+        card["data"]["name"] = name
+        char_dir = directory / name
+        char_dir.mkdir(parents=True, exist_ok=True)
+        (char_dir / f"v2Import_{name}.json").write_text(json.dumps(card), encoding="utf-8")
+        # Smooth random colour field: compresses like a painted portrait, not like noise
+        tiles = (size[0] // 16, size[1] // 16)
+        image = Image.frombytes("RGB", tiles, rng.randbytes(tiles[0] * tiles[1] * 3)).resize(size, Image.BICUBIC)
+        image.save(char_dir / "image1.jpg", quality=90)
+        paths.append(char_dir)
+    return paths
@@ -0,0 +1,179 @@
+"""
+benchmarks/run.py
+Run benchmark scenarios and write the results as JSON.
+
+    python -m benchmarks.run --scale small --out bench.json
+    python -m benchmarks.run --only sync_warm,lore_match --compare bench.json
+
+Each scenario runs ``warmup`` untimed iterations and then ``iterations``
+timed ones. The JSON carries the commit, interpreter and scale alongside
+per-scenario timing stats, so results from different commits can be
+compared with ``--compare`` (exits 1 when a median regresses past
+``--threshold``).
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from benchmarks.scenarios import SCALES, SCENARIOS, BenchContext, Scale
+
+RESULTS_SCHEMA = 1
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(durations: List[float], ops: int = 1) -> Dict[str, float]:
+    """Timing stats in milliseconds."""
+    ordered = sorted(durations)
+    median = statistics.median(ordered)
+    return {
+        "iterations": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p95_ms": _percentile(ordered, 0.95) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "stdev_ms": statistics.stdev(ordered) * 1000 if len(ordered) > 1 else 0.0,
+        "ops": ops,
+        "median_per_op_ms": median * 1000 / ops,
+    }
+
+
+def run_scenario(name: str, ctx: BenchContext) -> Dict[str, Any]:
+    case = SCENARIOS[name](ctx)
+    durations: List[float] = []
+    extras: Dict[str, List[float]] = {}
+    try:
+        for i in range(ctx.scale.warmup + ctx.scale.iterations):
+            if case.reset is not None:
+                case.reset()
+            start = time.perf_counter()
+            extra = case.run()
+            elapsed = time.perf_counter() - start
+            if i < ctx.scale.warmup:
+                continue
+            durations.append(elapsed)
+            for key, value in (extra or {}).items():
+                extras.setdefault(key, []).append(float(value))
+    finally:
+        if case.teardown is not None:
+            case.teardown()
+
+    result = summarize(durations, case.ops)
+    result["extra"] = {key: statistics.median(values) for key, values in extras.items()}
+    return result
+
+
+def run_benchmarks(scale_name: str, names: Iterable[str], seed: int = 0,
+                   iterations: Optional[int] = None, progress=None) -> Dict[str, Any]:
+    scale = SCALES[scale_name]
+    if iterations is not None:
+        scale = Scale(**{**scale.__dict__, "iterations": iterations})
+
+    ctx = BenchContext(scale=scale, seed=seed)
+    results: Dict[str, Any] = {}
+    try:
+        for name in names:
+            if progress:
+                progress(name)
+            results[name] = run_scenario(name, ctx)
+    finally:
+        ctx.close()
+
+    return {
+        "schema": RESULTS_SCHEMA,
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": {"name": scale_name, **scale.__dict__},
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-scenario median change; ``regressed`` when slower by more than ``threshold`` (fraction)."""
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        old, new = before["median_ms"], result["median_ms"]
+        change = (new - old) / old if old else 0.0
+        rows.append({"scenario": name, "baseline_ms": old, "current_ms": new,
+                     "change": change, "regressed": change > threshold})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CardShark performance benchmarks")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", help="comma-separated scenarios (default: all)")
+    parser.add_argument("--iterations", type=int, help="override the scale's iteration count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (default 0.10 = 10%%)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(SCENARIOS))
+        return 0
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    report = run_benchmarks(
+        args.scale, names, seed=args.seed, iterations=args.iterations,
+        progress=lambda name: print(f"running {name}...", file=sys.stderr),
+    )
+
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+    for name, result in report["results"].items():
+        extra = ", ".join(f"{k}={v:.1f}" for k, v in result["extra"].items())
+        print(f"{name:<22} median {result['median_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms"
+              + (f"  ({extra})" if extra else ""), file=sys.stderr)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = compare(baseline, report, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regressed"] else ""
+            print(f"{row['scenario']:<22} {row['baseline_ms']:9.2f} -> {row['current_ms']:9.2f} ms "
+                  f"({row['change']:+.1%}) {flag}", file=sys.stderr)
+        if any(row["regressed"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
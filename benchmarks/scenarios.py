@@ -0,0 +1,536 @@
+"""
+benchmarks/scenarios.py
+Benchmark scenarios over synthetic data.
+
+Each scenario builds its fixtures once and returns a Case: ``run`` is the
+timed operation (it may return extra measurements such as time to first
+token), ``reset`` runs untimed before every iteration.
+"""
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.png_metadata_handler import PngMetadataHandler
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+from benchmarks.fake_release_server import FakeReleaseConfig, FakeReleaseServer
+from benchmarks.generators import (
+    card_png,
+    make_card,
+    make_chat,
+    make_lore_book,
+    write_backup,
+    write_layer_stack,
+    write_library,
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    cards: int
+    lore_entries: int
+    chat_messages: int
+    stream_tokens: int
+    tokens_per_second: float
+    first_token_latency: float
+    layers: int
+    layer_size: int
+    iterations: int
+    warmup: int = 1
+
+
+SCALES: Dict[str, Scale] = {
+    # Runs in seconds; the test suite uses it to keep every scenario runnable
+    "tiny": Scale(cards=12, lore_entries=40, chat_messages=60, stream_tokens=16,
+                  tokens_per_second=0, first_token_latency=0.0, layers=4, layer_size=64, iterations=2),
+    "small": Scale(cards=300, lore_entries=500, chat_messages=1000, stream_tokens=128,
+                   tokens_per_second=200, first_token_latency=0.05, layers=32, layer_size=1024, iterations=5),
+    "large": Scale(cards=3000, lore_entries=2000, chat_messages=5000, stream_tokens=512,
+                   tokens_per_second=400, first_token_latency=0.05, layers=32, layer_size=2048, iterations=5),
+}
+
+
+class QuietLogger:
+    """LogManager stand-in that discards everything (logging isn't what we measure)."""
+
+    def __getattr__(self, name):
+        return self._discard
+
+    @staticmethod
+    def _discard(*args, **kwargs):
+        return None
+
+
+class StaticSettings:
+    """The slice of SettingsManager the services read."""
+
+    def __init__(self, **values):
+        self.settings = values
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+@dataclass
+class Case:
+    run: Callable[[], Optional[Dict[str, float]]]
+    reset: Optional[Callable[[], None]] = None
+    teardown: Optional[Callable[[], None]] = None
+    ops: int = 1  # operations per run, for per-op figures
+
+
+@dataclass
+class BenchContext:
+    """Shared fixtures for one benchmark session (one temp directory)."""
+    scale: Scale
+    seed: int = 0
+    workdir: Path = field(default_factory=lambda: Path(tempfile.mkdtemp(prefix="cardshark-bench-")))
+    logger: QuietLogger = field(default_factory=QuietLogger)
+
+    def __post_init__(self):
+        self.png_handler = PngMetadataHandler(self.logger)
+        self._library: Optional[List[Path]] = None
+        self._databases = 0
+
+    @property
+    def library_dir(self) -> Path:
+        return self.workdir / "characters"
+
+    def library(self) -> List[Path]:
+        """Card PNGs for this scale, generated on first use."""
+        if self._library is None:
+            self._library = write_library(self.library_dir, self.scale.cards, self.png_handler, seed=self.seed)
+        return self._library
+
+    def settings(self) -> StaticSettings:
+        return StaticSettings(character_directory=str(self.library_dir))
+
+    def new_database(self):
+        """Session factory for a fresh file-backed SQLite database."""
+        from backend.database import Base
+        import backend.sql_models  # noqa: F401 - register tables
+
+        self._databases += 1
+        path = self.workdir / f"bench_{self._databases}.db"
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def close(self) -> None:
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Case]] = {}
+
+
+def scenario(name: str):
+    def register(fn: Callable[[BenchContext], Case]):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+def _sync_service(ctx: BenchContext, session_factory):
+    from backend.services.character_sync_service import CharacterSyncService
+    return CharacterSyncService(session_factory, ctx.png_handler, ctx.settings(), ctx.logger)
+
+
+def _run_sync(service) -> Dict[str, Any]:
+    """
+    The passes ``sync_characters`` runs, without its console banner (the
+    smoke-test fixtures also patch ``sync_characters`` for the whole session).
+    """
+    files = service._scan_png_files()
+    with service._get_session_context() as db:
+        stats = service._sync_files_to_db(db, files=files)
+        service._sync_db_to_files(db, scanned_paths={db_path for db_path, _, _ in files})
+    return stats
+
+
+@scenario("metadata_read")
+def metadata_read(ctx: BenchContext) -> Case:
+    sample = ctx.library()[:50]
+
+    def run():
+        for path in sample:
+            ctx.png_handler.read_metadata(str(path))
+
+    return Case(run=run, ops=len(sample))
+
+
+@scenario("metadata_write")
+def metadata_write(ctx: BenchContext) -> Case:
+    card = make_card(0, seed=ctx.seed, lore_entries=min(ctx.scale.lore_entries, 200))
+    image = card_png(make_card(1, seed=ctx.seed), ctx.png_handler)
+
+    def run():
+        ctx.png_handler.write_metadata(image, card)
+
+    return Case(run=run)
+
+
+@scenario("sync_cold")
+def sync_cold(ctx: BenchContext) -> Case:
+    ctx.library()
+    state: Dict[str, Any] = {}
+
+    def reset():
+        state["service"] = _sync_service(ctx, ctx.new_database())
+
+    def run():
+        stats = _run_sync(state["service"])
+        return {"cards": stats["new"]}
+
+    return Case(run=run, reset=reset, ops=ctx.scale.cards)
+
+
+@scenario("sync_warm")
+def sync_warm(ctx: BenchContext) -> Case:
+    ctx.library()
+    service = _sync_service(ctx, ctx.new_database())
+    _run_sync(service)
+
+    def run():
+        stats = _run_sync(service)
+        return {"changed": stats["new"] + stats["updated"]}
+
+    return Case(run=run, ops=ctx.scale.cards)
+
+
+def _gallery_client(ctx: BenchContext):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.dependencies import (
+        get_character_service_dependency,
+        get_logger_dependency,
+        get_settings_manager_dependency,
+    )
+    from backend.endpoints.character_endpoints import router
+    from backend.services.character_service import CharacterService
+
+    ctx.library()
+    session_factory = ctx.new_database()
+    _run_sync(_sync_service(ctx, session_factory))
+    char_service = CharacterService(session_factory, ctx.png_handler, ctx.settings(), ctx.logger)
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_character_service_dependency] = lambda: char_service
+    app.dependency_overrides[get_settings_manager_dependency] = ctx.settings
+    app.dependency_overrides[get_logger_dependency] = lambda: ctx.logger
+    return TestClient(app)
+
+
+def _gallery_case(ctx: BenchContext, cached: bool) -> Case:
+    from backend.endpoints.character_endpoints import _character_list_cache
+
+    client = _gallery_client(ctx)
+
+    def run():
+        response = client.get("/api/characters")
+        response.raise_for_status()
+        return {"bytes": len(response.content)}
+
+    def teardown():
+        client.close()
+        _character_list_cache.clear()
+
+    return Case(run=run, reset=None if cached else _character_list_cache.clear, teardown=teardown)
+
+
+@scenario("gallery_load")
+def gallery_load(ctx: BenchContext) -> Case:
+    return _gallery_case(ctx, cached=False)
+
+
+@scenario("gallery_load_cached")
+def gallery_load_cached(ctx: BenchContext) -> Case:
+    return _gallery_case(ctx, cached=True)
+
+
+@scenario("lore_match")
+def lore_match(ctx: BenchContext) -> Case:
+    from backend.lore_handler import LoreHandler
+
+    handler = LoreHandler(ctx.logger)
+    book = make_lore_book(ctx.scale.lore_entries, seed=ctx.seed)
+    chat = make_chat(ctx.scale.chat_messages, seed=ctx.seed)
+
+    def run():
+        return {"matched": len(handler.match_lore_entries(book, chat_messages=chat, scan_depth=10))}
+
+    return Case(run=run)
+
+
+def _template() -> Dict[str, Any]:
+    return {
+        "name": "ChatML",
+        "systemFormat": "<|im_start|>system\n{{content}}<|im_end|>",
+        "userFormat": "<|im_start|>user\n{{content}}<|im_end|>",
+        "assistantFormat": "<|im_start|>assistant\n{{content}}<|im_end|>",
+        "stopSequences": ["<|im_end|>", "<|im_start|>"],
+    }
+
+
+@scenario("prompt_assembly")
+def prompt_assembly(ctx: BenchContext) -> Case:
+    from backend.services.prompt_assembly_service import PromptAssemblyService
+
+    assembler = PromptAssemblyService(ctx.logger)
+    card = make_card(0, seed=ctx.seed)
+    chat = make_chat(ctx.scale.chat_messages, seed=ctx.seed)
+    lore = make_lore_book(min(ctx.scale.lore_entries, 50), seed=ctx.seed)
+
+    def run():
+        result = assembler.assemble(
+            chat_history=chat,
+            character_data=card,
+            template_format=_template(),
+            user_name="User",
+            message_count=len(chat),
+            matched_lore=lore,
+        )
+        return {"prompt_chars": len(result.prompt) + len(result.memory)}
+
+    return Case(run=run)
+
+
+def _stream_case(ctx: BenchContext, background_jobs: bool) -> Case:
+    """ApiHandler.stream_generate against the fake KoboldCPP server."""
+    import threading
+
+    import requests
+
+    from backend.api_handler import ApiHandler
+    from backend.services.generation_scheduler import PRIORITY_BACKGROUND, SCHEDULER
+
+    server = FakeLLMServer(FakeLLMConfig(
+        tokens_per_second=ctx.scale.tokens_per_second,
+        first_token_latency=ctx.scale.first_token_latency,
+        max_tokens=ctx.scale.stream_tokens,
+    )).start()
+    handler = ApiHandler(ctx.logger)
+    card = make_card(0, seed=ctx.seed)
+    card["data"].pop("character_uuid")  # keep the pre-flight off the app database
+    chat = make_chat(min(ctx.scale.chat_messages, 200), seed=ctx.seed)
+    request = {
+        "api_config": {
+            "url": server.url,
+            "provider": "KoboldCPP",
+            "template_format": _template(),
+            "generation_settings": {"max_length": ctx.scale.stream_tokens, "max_context_length": 32768},
+        },
+        "generation_params": {
+            "backend_assembly": True,
+            "character_data": card,
+            "chat_history": chat,
+            "user_name": "User",
+        },
+    }
+
+    def run():
+        start = time.perf_counter()
+        first_token = None
+        chunks = 0
+        for chunk in handler.stream_generate(request):
+            if b'"error"' in chunk:
+                raise RuntimeError(chunk.decode("utf-8", "replace"))
+            if b'"content"' in chunk:
+                chunks += 1
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+        total = time.perf_counter() - start
+        streaming = total - (first_token or 0.0)
+        return {
+            "ttft_ms": (first_token or 0.0) * 1000,
+            "tokens": chunks,
+            "tokens_per_second": (chunks - 1) / streaming if chunks > 1 and streaming > 0 else 0.0,
+        }
+
+    stop = threading.Event()
+    workers: List[threading.Thread] = []
+
+    def summarize_forever():
+        # Room-summary stand-in: back-to-back background jobs on the same backend
+        while not stop.is_set():
+            with SCHEDULER.slot(request["api_config"], PRIORITY_BACKGROUND, cancel=stop):
+                requests.post(server.url + "/api/v1/generate",
+                              json={"max_length": ctx.scale.stream_tokens}, timeout=60)
+
+    def teardown():
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=60)
+        server.stop()
+
+    if background_jobs:
+        workers.extend(threading.Thread(target=summarize_forever, daemon=True) for _ in range(2))
+        for worker in workers:
+            worker.start()
+
+    return Case(run=run, teardown=teardown)
+
+
+@scenario("stream_e2e")
+def stream_e2e(ctx: BenchContext) -> Case:
+    return _stream_case(ctx, background_jobs=False)
+
+
+@scenario("stream_e2e_contended")
+def stream_e2e_contended(ctx: BenchContext) -> Case:
+    """stream_e2e while background summaries keep the backend busy."""
+    return _stream_case(ctx, background_jobs=True)
+
+
+def _layer_stack(ctx: BenchContext):
+    return write_layer_stack(ctx.workdir / "layers", ctx.scale.layers + 1, ctx.scale.layer_size, seed=ctx.seed)
+
+
+@scenario("layer_composite_cold")
+def layer_composite_cold(ctx: BenchContext) -> Case:
+    """Every layer decoded from disk and composited (first preview of a character)."""
+    from backend.services.layer_compositor import LayerCompositor
+
+    base, layers = _layer_stack(ctx)
+    layers = layers[:ctx.scale.layers]
+    state: Dict[str, Any] = {}
+
+    def reset():
+        state["compositor"] = LayerCompositor(thumbnail_dir=ctx.workdir / "thumbnails")
+
+    def run():
+        state["compositor"].preview(base, layers, (350, 350))
+        return {"composites": state["compositor"].stats()["composites"]}
+
+    return Case(run=run, reset=reset, ops=ctx.scale.layers)
+
+
+@scenario("layer_toggle")
+def layer_toggle(ctx: BenchContext) -> Case:
+    """Swapping the top layer of a warm stack, preview included (one layer-item click)."""
+    from backend.services.layer_compositor import LayerCompositor
+
+    base, layers = _layer_stack(ctx)
+    below, choices = layers[:ctx.scale.layers - 1], layers[ctx.scale.layers - 1:]
+    compositor = LayerCompositor(thumbnail_dir=ctx.workdir / "thumbnails")
+    for top in choices:
+        compositor.compose(base, below + [top])
+    state = {"turn": 0}
+
+    def run():
+        state["turn"] += 1
+        before = compositor.stats()["composites"]
+        compositor.preview(base, below + [choices[state["turn"] % 2]], (350, 350))
+        return {"composites": compositor.stats()["composites"] - before}
+
+    def reset():
+        # Each click picks a layer item the stack hasn't seen composited yet
+        compositor.invalidate([choices[(state["turn"] + 1) % 2]])
+
+    return Case(run=run, reset=reset)
+
+
+@scenario("batch_convert")
+def batch_convert(ctx: BenchContext) -> Case:
+    """backend.batch_converter over a backup with one directory per card, all cores."""
+    from backend import batch_converter
+    from backend.character_validator import CharacterValidator
+
+    backup_dir = ctx.workdir / "backup"
+    char_dirs = write_backup(backup_dir, ctx.scale.cards, seed=ctx.seed)
+    saved = batch_converter.logger, batch_converter.png_handler, batch_converter.validator
+    batch_converter.logger = ctx.logger
+    batch_converter.png_handler = ctx.png_handler
+    batch_converter.validator = CharacterValidator(ctx.logger)
+
+    def reset():
+        (backup_dir / batch_converter.MANIFEST_NAME).unlink(missing_ok=True)
+        for char_dir in char_dirs:
+            (char_dir / f"{char_dir.name}.png").unlink(missing_ok=True)
+
+    def run():
+        summary = batch_converter.process_subdirectories(backup_dir, quiet_mode=True)
+        return {"converted": summary["success"], "failed": summary["failed"]}
+
+    def teardown():
+        batch_converter.logger, batch_converter.png_handler, batch_converter.validator = saved
+
+    return Case(run=run, reset=reset, teardown=teardown, ops=len(char_dirs))
+
+
+def _catalog_case(ctx: BenchContext, warm: bool) -> Case:
+    """OpenRouterAdapter.list_models against the fake server, plus one searched page."""
+    from backend.api_provider_adapters import OpenRouterAdapter
+    from backend.services.model_catalog_cache import ModelCatalogCache, page_model_list
+
+    catalog_size = ctx.scale.cards * 10
+    server = FakeLLMServer(FakeLLMConfig(catalog_size=catalog_size)).start()
+    adapter = OpenRouterAdapter(ctx.logger)
+    adapter.catalog_cache = ModelCatalogCache(cache_dir=ctx.workdir / "model_catalogs", logger=ctx.logger)
+
+    def reset():
+        if not warm:
+            adapter.catalog_cache.invalidate()
+
+    def run():
+        result = adapter.list_models(server.url, "bench-key")
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        page = page_model_list(result, search="llama model", limit=50)
+        return {"models": len(result["models"]), "matches": page["total"], "cached": float(result["cached"])}
+
+    if warm:
+        run()
+    return Case(run=run, reset=reset, teardown=server.stop)
+
+
+@scenario("model_catalog_cold")
+def model_catalog_cold(ctx: BenchContext) -> Case:
+    return _catalog_case(ctx, warm=False)
+
+
+@scenario("model_catalog_cached")
+def model_catalog_cached(ctx: BenchContext) -> Case:
+    """model_catalog_cold served from the catalog cache (no provider request)."""
+    return _catalog_case(ctx, warm=True)
+
+
+@scenario("koboldcpp_download")
+def koboldcpp_download(ctx: BenchContext) -> Case:
+    """KoboldCPPManager.download of a 64 KiB-per-card binary from the fake release server, checksum included."""
+    from backend import koboldcpp_manager
+    from backend.koboldcpp_manager import KoboldCPPManager
+
+    size = ctx.scale.cards * 64 * 1024
+    server = FakeReleaseServer(FakeReleaseConfig(size=size, seed=ctx.seed)).start()
+    saved = KoboldCPPManager.RELEASE_API_URL, KoboldCPPManager._get_base_dir, koboldcpp_manager.logger.level
+    koboldcpp_manager.logger.setLevel("WARNING")
+    KoboldCPPManager.RELEASE_API_URL = server.release_api_url
+    KoboldCPPManager._get_base_dir = lambda self: str(ctx.workdir)
+    manager = KoboldCPPManager()
+    progress_events = []
+
+    def reset():
+        progress_events.clear()
+        shutil.rmtree(manager.koboldcpp_dir, ignore_errors=True)
+
+    def run():
+        start = time.perf_counter()
+        result = manager.download(callback=progress_events.append)
+        if result["status"] != "completed" or not result["verified"]:
+            raise RuntimeError(result)
+        elapsed = time.perf_counter() - start
+        return {"mb_per_second": size / elapsed / 1e6, "progress_events": len(progress_events)}
+
+    def teardown():
+        KoboldCPPManager.RELEASE_API_URL, KoboldCPPManager._get_base_dir, level = saved
+        koboldcpp_manager.logger.setLevel(level)
+        server.stop()
+
+    return Case(run=run, reset=reset, teardown=teardown)
@@ -339,6 +339,7 @@ hidden_imports = [    # Core FastAPI and dependencies
     'fastapi',
     'starlette',
     'pydantic',
+    'orjson',  # Optional fast JSON encoder used by json_responses
     'requests',
     'uvicorn',
     'uvicorn.main',
@@ -382,6 +383,7 @@ hidden_imports = [    # Core FastAPI and dependencies
     'backend.batch_converter',
     'backend.character_validator',
     'backend.content_filter_manager',
+    'backend.content_filter_engine',
     'backend.database',
     'backend.database_migrations',
     'backend.dependencies',
@@ -417,6 +419,7 @@ hidden_imports = [    # Core FastAPI and dependencies
     'backend.endpoints.gallery_endpoints',
     'backend.endpoints.generation_endpoints',
     'backend.endpoints.health_endpoints',
+    'backend.endpoints.layered_character_endpoints',
     'backend.endpoints.lore_endpoints',
     'backend.endpoints.npc_room_assignment_endpoints',
     'backend.endpoints.room_card_endpoints',
@@ -447,16 +450,23 @@ hidden_imports = [    # Core FastAPI and dependencies
     'backend.services.chat_models',
     'backend.services.chat_service',
     'backend.services.database_chat_endpoint_adapters',
+    'backend.services.generation_context_loader',
+    'backend.services.generation_scheduler',
     'backend.services.image_storage_service',
+    'backend.services.layer_compositor',
     'backend.services.lore_activation_tracker',
+    'backend.services.model_catalog_cache',
     'backend.services.npc_room_assignment_service',
     'backend.services.reliable_chat_manager_db',
     'backend.services.room_service',
+    'backend.services.startup_warmup_service',
     'backend.services.summarization_service',
     'backend.services.user_profile_service',
     'backend.services.world_card_service',
     'backend.services.world_export_service',
     'backend.services.world_progress_service',
+    'backend.services.world_graph_service',
+    'backend.services.world_bundle_service',
     'backend.services.world_service',
 
     # Models subdirectory
@@ -473,12 +483,21 @@ hidden_imports = [    # Core FastAPI and dependencies
 
     # Utils subdirectory
     'backend.utils',
+    'backend.utils.cancellation',
     'backend.utils.constants',
     'backend.utils.cross_drive_static_files',
     'backend.utils.jsonl_chat_utils',
+    'backend.utils.lazy_loading',
+    'backend.utils.metrics',
+    'backend.utils.json_patch',
+    'backend.utils.json_responses',
+    'backend.utils.template_renderer',
+    'backend.utils.thread_offload',
     'backend.utils.location_extractor',
     'backend.utils.path_utils',
     'backend.utils.user_dirs',
+    'backend.utils.write_behind',
+    'backend.utils.atomic_files',
     'backend.utils.worldcard_location_utils',
 
     # Worldcards subdirectory
@@ -7,6 +7,10 @@ import re
 import shutil
 from pathlib import Path
 
+from backend.services.layer_compositor import LayerCompositor, find_base_image
+
+PREVIEW_SIZE = (350, 350)
+
 class CharacterCreator:
     def __init__(self, root):
         self.root = root
@@ -20,7 +24,10 @@ class CharacterCreator:
         self.selected_layers = {}  # Dictionary to hold selected layer for each category
         self.active_layers = []  # List to store active layer paths in order
         self.base_image = None
+        self.base_image_path = None
         self.current_composite = None
+        # Decoded layers, composite prefixes and thumbnails are cached across toggles
+        self.compositor = LayerCompositor()
         
         # Layout
         self.setup_ui()
@@ -233,15 +240,14 @@ class CharacterCreator:
                     self.active_layers_listbox.insert(tk.END, f"{category}: {layer}")
         
         # Load base image if available
-        base_dir = os.path.join(char_dir, "Base")
-        base_pngs = [f for f in os.listdir(base_dir) if f.lower().endswith('.png')] if os.path.exists(base_dir) else []
+        base_path = find_base_image(char_dir)
         
-        if base_pngs:
-            # Use the first base PNG found
-            self.base_image = Image.open(os.path.join(base_dir, base_pngs[0]))
+        if base_path is not None:
+            self.set_base_image(base_path)
             self.update_preview()
         else:
             self.base_image = None
+            self.base_image_path = None
             self.preview_canvas.delete("all")
             self.preview_canvas.create_text(175, 200, text="No base image found", fill="gray")
     
@@ -282,9 +288,8 @@ class CharacterCreator:
             layer_path = os.path.join(category_dir, layer_file)
             
             try:
-                # Create thumbnail
-                img = Image.open(layer_path)
-                img.thumbnail((80, 80))
+                # Thumbnails come from the compositor's persisted cache
+                img = self.compositor.thumbnail(layer_path, (80, 80))
                 photo = ImageTk.PhotoImage(img)
                 
                 # Keep a reference to the photo to prevent garbage collection
@@ -347,51 +352,31 @@ class CharacterCreator:
             layer_name = os.path.basename(layer_path)
             self.active_layers_listbox.insert(tk.END, f"{category}: {layer_name}")
     
+    def set_base_image(self, base_path):
+        """Use base_path as the bottom of the layer stack"""
+        self.base_image_path = str(base_path)
+        self.base_image = self.compositor.compose(self.base_image_path, [])
+    
     def update_preview(self):
         """Update the character preview by compositing all active layers"""
-        if not self.base_image:
+        if not self.base_image_path:
             return
         
-        # Start with a copy of the base image
-        composite = self.base_image.copy()
-        
-        # Composite all active layers in order
-        for layer_path in self.active_layers:
-            try:
-                layer = Image.open(layer_path)
-                # Ensure layer has the same size as base image
-                if layer.size != composite.size:
-                    layer = layer.resize(composite.size)
-                
-                # Use alpha compositing to overlay the layer
-                if layer.mode == 'RGBA':
-                    composite = Image.alpha_composite(composite.convert("RGBA"), layer)
-                else:
-                    # If the layer doesn't have an alpha channel, convert it
-                    composite.paste(layer, (0, 0), layer.convert("RGBA"))
-            except Exception as e:
-                print(f"Error compositing layer {layer_path}: {e}")
+        try:
+            # Only the layers above the first changed one are re-composited
+            composite = self.compositor.compose(self.base_image_path, self.active_layers)
+            display_image = self.compositor.preview(self.base_image_path, self.active_layers, PREVIEW_SIZE)
+        except OSError as e:
+            print(f"Error compositing character preview: {e}")
+            return
         
         # Store the current composite for saving/exporting
         self.current_composite = composite
         
-        # Resize for display if needed
-        display_size = (350, 350)
-        aspect_ratio = composite.width / composite.height
-        
-        if aspect_ratio > 1:  # Wider than tall
-            display_width = min(composite.width, display_size[0])
-            display_height = int(display_width / aspect_ratio)
-        else:  # Taller than wide
-            display_height = min(composite.height, display_size[1])
-            display_width = int(display_height * aspect_ratio)
-        
-        display_image = composite.resize((display_width, display_height), Image.LANCZOS)
-        
         # Convert to PhotoImage and display
         photo = ImageTk.PhotoImage(display_image)
         self.preview_canvas.delete("all")
-        self.preview_canvas.create_image(display_size[0]//2, display_size[1]//2, image=photo)
+        self.preview_canvas.create_image(PREVIEW_SIZE[0]//2, PREVIEW_SIZE[1]//2, image=photo)
         self.preview_canvas.photo = photo  # Keep a reference to prevent garbage collection
     
     def add_category(self):
@@ -543,7 +528,7 @@ class CharacterCreator:
             
             # If this is the first base image, set it as our base
             if category == "Base" and self.base_image is None:
-                self.base_image = img
+                self.set_base_image(dest_path)
                 self.update_preview()
             
             # Refresh layer items view
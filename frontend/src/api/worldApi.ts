@@ -10,7 +10,11 @@ import {
   WorldDeleteResult,
   WorldUserProgress,
   WorldUserProgressUpdate,
-  WorldUserProgressSummary
+  WorldUserProgressSummary,
+  WorldUserProgressPatchResult,
+  JsonPatchOperation,
+  WorldBundle,
+  WorldBundleRoom
 } from '../types/worldCard';
 import { EDITOR_GRID_SIZE } from '../types/editorGrid';
 
@@ -82,6 +86,62 @@ export const worldApi = {
     return data.data.world;
   },
 
+  /**
+   * Load the world card, every placed room and NPC summaries in one request.
+   * The response is NDJSON; rooms nearest `focusRoomUuid` arrive first and
+   * are reported through `onRoom` as they are parsed.
+   */
+  async getWorldBundle(
+    uuid: string,
+    options: { focusRoomUuid?: string; onRoom?: (room: WorldBundleRoom) => void } = {}
+  ): Promise<WorldBundle> {
+    const query = options.focusRoomUuid ? `?focus_room=${encodeURIComponent(options.focusRoomUuid)}` : '';
+    const response = await fetch(`${BASE_URL}/${uuid}/bundle${query}`);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: 'World not found' }));
+      throw new Error(error.detail || 'Failed to fetch world bundle');
+    }
+
+    const rooms: WorldBundle['rooms'] = {};
+    const npcs: WorldBundle['npcs'] = {};
+    let header: Pick<WorldBundle, 'version' | 'world'> | null = null;
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const entry = JSON.parse(line);
+      if (entry.type === 'world') {
+        header = { version: entry.version, world: entry.world };
+      } else if (entry.type === 'room') {
+        rooms[entry.room_uuid] = entry;
+        options.onRoom?.(entry);
+      } else if (entry.type === 'npc') {
+        npcs[entry.npc_uuid] = entry;
+      }
+    };
+
+    if (response.body) {
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value, { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop() ?? '';
+        lines.forEach(handleLine);
+        if (done) break;
+      }
+      handleLine(buffered);
+    } else {
+      (await response.text()).split('\n').forEach(handleLine);
+    }
+
+    if (!header) {
+      throw new Error('Failed to fetch world bundle');
+    }
+    return { ...(header as Pick<WorldBundle, 'version' | 'world'>), rooms, npcs };
+  },
+
   /**
    * Update an existing world card
    */
@@ -245,7 +305,7 @@ export const worldApi = {
   /**
    * Save (upsert) progress for a world+user combination.
    */
-  async saveProgress(worldUuid: string, userUuid: string, update: WorldUserProgressUpdate): Promise<void> {
+  async saveProgress(worldUuid: string, userUuid: string, update: WorldUserProgressUpdate): Promise<WorldUserProgress | null> {
     const response = await fetch(`${PROGRESS_BASE_URL}/${worldUuid}/progress/${userUuid}`, {
       method: 'PUT',
       headers: {
@@ -258,6 +318,37 @@ export const worldApi = {
       const error = await response.json().catch(() => ({ detail: 'Failed to save progress' }));
       throw new Error(error.detail || 'Failed to save progress');
     }
+
+    const data = await response.json().catch(() => null);
+    return data?.data?.progress ?? null;
+  },
+
+  /**
+   * Apply JSON Patch operations to progress. Only the touched fields and
+   * NPC/room entries are written. Rejects (409) if baseVersion is stale.
+   */
+  async patchProgress(
+    worldUuid: string,
+    userUuid: string,
+    operations: JsonPatchOperation[],
+    baseVersion?: number
+  ): Promise<WorldUserProgressPatchResult> {
+    const response = await fetch(`${PROGRESS_BASE_URL}/${worldUuid}/progress/${userUuid}`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ operations, base_version: baseVersion ?? null }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: 'Failed to patch progress' }));
+      const detail = typeof error.detail === 'string' ? error.detail : error.detail?.message;
+      throw new Error(detail || 'Failed to patch progress');
+    }
+
+    const data = await response.json();
+    return data.data;
   },
 
   /**
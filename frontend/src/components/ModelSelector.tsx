@@ -98,7 +98,7 @@ const OpenRouterModelSelector: React.FC<OpenRouterModelSelectorProps> = ({
         throw new Error(fetchedData.error || 'Backend failed to fetch models');
       }
       // Add explicit types to sort callback parameters
-      const validModels = (fetchedData.models || [])
+      const validModels = (fetchedData.data?.models || fetchedData.models || [])
         .filter((model: OpenRouterModel) => model.id && model.name)
         .sort((a: OpenRouterModel, b: OpenRouterModel) => (a.name || '').localeCompare(b.name || ''));
       setModels(validModels);
@@ -224,7 +224,7 @@ const FeatherlessModelSelector: React.FC<FeatherlessModelSelectorProps> = ({
         throw new Error(fetchedData.error || 'Backend failed to fetch models');
       }
       // Add explicit types to sort callback parameters
-      const validModels = (fetchedData.models || [])
+      const validModels = (fetchedData.data?.models || fetchedData.models || [])
         .filter((model: FeatherlessModelInfo) => model.id && model.name)
         .sort((a: FeatherlessModelInfo, b: FeatherlessModelInfo) => (a.name || "").localeCompare(b.name || ""));
       setModels(validModels);
@@ -286,7 +286,8 @@ export function SamplerSettingsPanel({ onClose }: SamplerSettingsPanelProps) {
     dynatemp_max: (gen?.dynatemp_max as number) ?? 2.0,
     dynatemp_exponent: (gen?.dynatemp_exponent as number) ?? d.dynatemp_exponent!,
     reasoning_model: (gen?.reasoning_model as boolean) ?? false,
-    logit_shaper: (gen?.logit_shaper as boolean) ?? false
+    logit_shaper: (gen?.logit_shaper as boolean) ?? false,
+    prefix_stable_prompt: (gen?.prefix_stable_prompt as boolean) ?? false
   });
 
   const [settings, setSettings] = useState(() =>
@@ -610,6 +611,20 @@ export function SamplerSettingsPanel({ onClose }: SamplerSettingsPanelProps) {
             <span className="ml-1 text-xs text-gray-600">(KoboldCPP only)</span>
             <span className="ml-1 text-xs text-gray-500 cursor-help" title="Tracks repeated descriptive words across the last 3 responses and temporarily blocks them for 3 turns. Only works with KoboldCPP in native mode (not OpenAI-compatible).">(?)</span>
           </div>
+          <div className="flex items-center mt-2">
+            <input
+              type="checkbox"
+              id="sampler-prefix-stable"
+              checked={settings.prefix_stable_prompt ?? false}
+              onChange={(e) => handleSettingChange('prefix_stable_prompt', e.target.checked)}
+              className="mr-2 h-4 w-4 rounded-sm bg-stone-700 border-stone-500 focus:ring-2 focus:ring-blue-500"
+            />
+            <label htmlFor="sampler-prefix-stable" className="text-xs text-gray-300">
+              Prefix-Stable Prompt
+            </label>
+            <span className="ml-1 text-xs text-gray-600">(KoboldCPP only)</span>
+            <span className="ml-1 text-xs text-gray-500 cursor-help" title="Keeps the character card and system prompt at the front of the context and moves lore next to the latest messages, so KoboldCPP can reuse its cached context instead of reprocessing the whole prompt when lore changes.">(?)</span>
+          </div>
         </details>
 
         {/* Sampler Order */}
@@ -11,7 +11,7 @@
 import { useCallback, useState } from 'react';
 import type { MutableRefObject } from 'react';
 import { adventureLogApi } from '../api/adventureLogApi';
-import type { WorldCard, RoomInstanceState } from '../types/worldCard';
+import type { WorldBundle, WorldCard, RoomInstanceState } from '../types/worldCard';
 import type { GridWorldState, GridRoom, CombatDisplayNPC } from '../types/worldGrid';
 import type { ExitDirection, TilePosition, LocalMapConfig, LocalMapState } from '../types/localMap';
 import { DEFAULT_LAYOUT_GRID_SIZE, LOCAL_MAP_TILE_SIZE } from '../types/localMap';
@@ -65,6 +65,7 @@ const OPPOSITE_DIRECTIONS: Record<ExitDirection, ExitDirection> = {
 
 interface UseRoomTransitionOptions {
   worldCard: WorldCard | null;
+  worldBundle: WorldBundle | null;
   worldState: GridWorldState | null;
   worldId: string | undefined;
   currentRoom: GridRoom | null;
@@ -108,6 +109,7 @@ interface UseRoomTransitionReturn {
 export function useRoomTransition(options: UseRoomTransitionOptions): UseRoomTransitionReturn {
   const {
     worldCard,
+    worldBundle,
     worldState,
     worldId,
     currentRoom,
@@ -229,12 +231,13 @@ export function useRoomTransition(options: UseRoomTransitionOptions): UseRoomTra
     return prepareTargetRoomRuntime({
       worldState,
       worldCard,
+      worldBundle,
       targetRoomStub,
       entryDir,
       localMapConfig: LOCAL_MAP_CONFIG,
       roomStates: roomStatesRef.current,
     });
-  }, [roomStatesRef, worldCard, worldState]);
+  }, [roomStatesRef, worldBundle, worldCard, worldState]);
 
   const preloadRoomTransitionAssets = useCallback(async (roomNpcsToLoad: CombatDisplayNPC[], keepActiveNpc: boolean) => {
     setTransitionPhase('loading_assets');
@@ -370,6 +373,8 @@ export function useRoomTransition(options: UseRoomTransitionOptions): UseRoomTra
     try {
       await persistRuntimeState({
         worldId,
+        userUuid: currentUser?.user_uuid,
+        roomId: preparedRoom.room.id,
         roomGridPosition: preparedRoom.roomGridPosition,
         playerProgression,
         keepActiveNpc,
@@ -386,6 +391,7 @@ export function useRoomTransition(options: UseRoomTransitionOptions): UseRoomTra
   }, [
     activeNpcId,
     allyInventory,
+    currentUser,
     npcRelationships,
     playerInventory,
     playerProgression.gold,
@@ -6,23 +6,22 @@
  */
 import { useState, useEffect } from 'react';
 import { worldApi } from '../api/worldApi';
-import { roomApi } from '../api/roomApi';
 import { adventureLogApi } from '../api/adventureLogApi';
-import type { WorldCard, RoomInstanceState, WorldUserProgress } from '../types/worldCard';
+import type { WorldBundle, WorldCard, RoomInstanceState, WorldUserProgress } from '../types/worldCard';
 import type { GridWorldState, GridRoom, CombatDisplayNPC } from '../types/worldGrid';
 import type { NPCRelationship, TimeState } from '../types/worldRuntime';
 import type { CharacterInventory } from '../types/inventory';
 import type { CharacterCard } from '../types/schema';
 import type { PlayerProgression } from '../utils/progressionUtils';
 import type { AdventureContext } from '../types/adventureLog';
-import { resolveNpcDisplayData } from '../utils/worldStateApi';
-import { roomCardToGridRoom, placementToGridRoomStub } from '../utils/roomCardAdapter';
+import { bundleRoomNpcs, bundleRoomToGridRoom, placementToGridRoomStub } from '../utils/roomCardAdapter';
 import { calculateLevelFromXP } from '../utils/progressionUtils';
 
 
 /** Data returned once load completes. The view populates its own state from this. */
 export interface WorldLoadResult {
   worldCard: WorldCard;
+  worldBundle: WorldBundle; // Rooms and NPC summaries for transitions without refetching
   worldState: GridWorldState;
   currentRoom: GridRoom;
   roomNpcs: CombatDisplayNPC[];
@@ -78,10 +77,6 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
         setIsLoading(true);
         setError(null);
 
-        // Load world card (V2) - single API call
-        const world = await worldApi.getWorld(worldId);
-        const worldData = world.data.extensions.world_data;
-
         // =========================================
         // LOAD PER-USER PROGRESS FROM NEW API
         // =========================================
@@ -95,6 +90,13 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
           console.warn('[Progress] Failed to load progress:', err);
         }
 
+        // World card, every room and NPC summaries in one request (rooms near the player first)
+        const worldBundle = await worldApi.getWorldBundle(worldId, {
+          focusRoomUuid: progress?.current_room_uuid ?? undefined,
+        });
+        const world = worldBundle.world;
+        const worldData = world.data.extensions.world_data;
+
         // Load adventure context for narrative continuity
         let adventureContext: AdventureContext | null = null;
         try {
@@ -163,15 +165,22 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
         const savedBondedAllyUuid = progress?.bonded_ally_uuid;
         const gridSize = worldData.grid_size;
 
-        // Build grid from placements WITHOUT fetching each room (lazy loading)
+        // Build grid from the bundle's rooms (stubs for rooms whose card is missing)
         const grid: (GridRoom | null)[][] = Array(gridSize.height)
           .fill(null)
           .map(() => Array(gridSize.width).fill(null));
 
         let legacyRoomCount = 0;
+        let missingRoomCount = 0;
         for (const placement of worldData.rooms) {
           const { x, y } = placement.grid_position;
-          const gridRoom = placementToGridRoomStub(placement);
+          const bundleRoom = worldBundle.rooms[placement.room_uuid];
+          if (!bundleRoom || bundleRoom.missing) {
+            missingRoomCount++;
+          }
+          const gridRoom = bundleRoom && !bundleRoom.missing
+            ? bundleRoomToGridRoom(bundleRoom, placement.grid_position, placement)
+            : placementToGridRoomStub(placement);
           if (y >= 0 && y < gridSize.height && x >= 0 && x < gridSize.width) {
             grid[y][x] = gridRoom;
           }
@@ -196,8 +205,13 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
           starting_position: worldData.starting_position,
         };
 
-        // Fetch the CURRENT room's full data
-        const playerPos = worldData.player_position;
+        // Fetch the CURRENT room's full data. Per-user progress records the room the
+        // player was last in; the card's player_position is the fallback for older saves.
+        const progressPlacement = progress?.current_room_uuid
+          ? worldData.rooms.find(r => r.room_uuid === progress?.current_room_uuid)
+          : undefined;
+        const playerPos = progressPlacement?.grid_position ?? worldData.player_position;
+        gridWorldState.player_position = playerPos;
         console.log(`[WorldPlayView] Player position: (${playerPos.x}, ${playerPos.y})`);
 
         const currentPlacement = worldData.rooms.find(
@@ -208,66 +222,45 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
         let roomNpcs: CombatDisplayNPC[] = [];
         let introductionText: string | null = null;
         let introductionRoomId = '';
-        let missingRoomCount = 0;
-
-        if (currentPlacement) {
-          try {
-            const roomCard = await roomApi.getRoom(currentPlacement.room_uuid);
-            const fullCurrentRoom = roomCardToGridRoom(roomCard, playerPos, currentPlacement);
 
-            // Update grid with full room data
-            if (playerPos.y >= 0 && playerPos.y < gridSize.height &&
-              playerPos.x >= 0 && playerPos.x < gridSize.width) {
-              grid[playerPos.y][playerPos.x] = fullCurrentRoom;
-            }
-
-            currentRoom = fullCurrentRoom;
-
-            // Resolve NPCs in the room and merge with combat data
-            const npcUuids = fullCurrentRoom.npcs.map(npc => npc.character_uuid);
-            const resolvedNpcs = await resolveNpcDisplayData(npcUuids);
-
-            let npcsWithCombatData: CombatDisplayNPC[] = resolvedNpcs.map(npc => {
-              const roomNpc = fullCurrentRoom.npcs.find(rn => rn.character_uuid === npc.id);
-              return {
-                ...npc,
-                hostile: roomNpc?.hostile,
-                monster_level: roomNpc?.monster_level,
-              };
-            });
-
-            // Apply persisted room state
-            const savedRoomState = restoredRoomStates[fullCurrentRoom.id];
-            if (savedRoomState?.npc_states) {
-              npcsWithCombatData = npcsWithCombatData
-                .filter(npc => savedRoomState.npc_states[npc.id]?.status !== 'dead')
-                .map(npc => {
-                  const npcState = savedRoomState.npc_states[npc.id];
-                  if (npcState?.status === 'incapacitated') {
-                    return { ...npc, isIncapacitated: true };
-                  }
-                  return npc;
-                });
-              console.log('[RuntimeState] Applied saved room state: filtered dead, marked incapacitated');
-            }
-            roomNpcs = npcsWithCombatData;
+        const currentBundleRoom = currentPlacement ? worldBundle.rooms[currentPlacement.room_uuid] : undefined;
+        if (currentPlacement && (!currentBundleRoom || currentBundleRoom.missing)) {
+          console.warn(`Failed to load starting room ${currentPlacement.room_uuid}: room card not found`);
+          currentRoom = placementToGridRoomStub(currentPlacement);
+        } else if (currentPlacement && currentBundleRoom) {
+          const fullCurrentRoom = bundleRoomToGridRoom(currentBundleRoom, playerPos, currentPlacement);
+          currentRoom = fullCurrentRoom;
+
+          // NPC display data comes from the bundle's summaries, merged with combat data
+          let npcsWithCombatData: CombatDisplayNPC[] = bundleRoomNpcs(worldBundle, fullCurrentRoom);
+
+          // Apply persisted room state
+          const savedRoomState = restoredRoomStates[fullCurrentRoom.id];
+          if (savedRoomState?.npc_states) {
+            npcsWithCombatData = npcsWithCombatData
+              .filter(npc => savedRoomState.npc_states[npc.id]?.status !== 'dead')
+              .map(npc => {
+                const npcState = savedRoomState.npc_states[npc.id];
+                if (npcState?.status === 'incapacitated') {
+                  return { ...npc, isIncapacitated: true };
+                }
+                return npc;
+              });
+            console.log('[RuntimeState] Applied saved room state: filtered dead, marked incapacitated');
+          }
+          roomNpcs = npcsWithCombatData;
 
-            console.log('Initial room NPCs loaded:', npcsWithCombatData);
+          console.log('Initial room NPCs loaded:', npcsWithCombatData);
 
-            // Update grid in gridWorldState
-            gridWorldState.grid = grid;
+          // Update grid in gridWorldState
+          gridWorldState.grid = grid;
 
-            if (fullCurrentRoom.introduction_text) {
-              introductionText = fullCurrentRoom.introduction_text;
-              introductionRoomId = fullCurrentRoom.id;
-            }
-
-            console.log(`World loaded: ${worldData.rooms.length} rooms on map, 1 room fetched (lazy loading)`);
-          } catch (err) {
-            console.warn(`Failed to load starting room ${currentPlacement.room_uuid}:`, err);
-            missingRoomCount = 1;
-            currentRoom = placementToGridRoomStub(currentPlacement);
+          if (fullCurrentRoom.introduction_text) {
+            introductionText = fullCurrentRoom.introduction_text;
+            introductionRoomId = fullCurrentRoom.id;
           }
+
+          console.log(`World loaded: ${worldData.rooms.length} rooms from one bundle request`);
         } else {
           // No placement found at player position - create a minimal stub
           currentRoom = {
@@ -303,6 +296,7 @@ export function useWorldLoader({ worldId, userUuid, onNoUser }: UseWorldLoaderOp
 
         setResult({
           worldCard: world,
+          worldBundle,
           worldState: gridWorldState,
           currentRoom,
           roomNpcs,
@@ -11,6 +11,7 @@ import type { NPCRelationship, TimeState } from '../types/worldRuntime';
 import type { CharacterInventory } from '../types/inventory';
 import type { PlayerProgression } from '../utils/progressionUtils';
 import { snapshotRoomState } from '../worldplay/roomTransition';
+import { buildProgressPatch } from '../utils/progressPatch';
 
 export interface UseWorldPersistenceOptions {
   worldId: string;
@@ -46,6 +47,9 @@ export function useWorldPersistence({
 }: UseWorldPersistenceOptions): UseWorldPersistenceReturn {
   // Debounce timer ref
   const saveTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // Last progress this hook saved and the server version it produced; later
+  // saves send only the difference as a JSON Patch
+  const lastSavedRef = useRef<{ key: string; update: WorldUserProgressUpdate; version: number } | null>(null);
 
   /**
    * Save all world runtime state to the backend via the per-user progress API.
@@ -78,7 +82,26 @@ export function useWorldPersistence({
         room_states: roomStatesRef.current,
       };
 
-      await worldApi.saveProgress(worldId, userUuid, progressUpdate);
+      const saveKey = `${worldId}:${userUuid}`;
+      const lastSaved = lastSavedRef.current;
+      if (lastSaved && lastSaved.key === saveKey) {
+        const operations = buildProgressPatch(lastSaved.update, progressUpdate);
+        if (operations.length === 0) return;
+        try {
+          const result = await worldApi.patchProgress(worldId, userUuid, operations, lastSaved.version);
+          lastSavedRef.current = { key: saveKey, update: structuredClone(progressUpdate), version: result.version };
+          console.log(`[RuntimeState] Patched ${result.changed.length} progress entries`);
+          return;
+        } catch (patchErr) {
+          // Progress changed elsewhere (or the patch didn't apply): fall back to a full save
+          console.warn('[RuntimeState] Patch rejected, saving full state:', patchErr);
+        }
+      }
+
+      const saved = await worldApi.saveProgress(worldId, userUuid, progressUpdate);
+      lastSavedRef.current = saved?.version !== undefined
+        ? { key: saveKey, update: structuredClone(progressUpdate), version: saved.version }
+        : null;
       console.log('[RuntimeState] Saved to backend (per-user progress)');
     } catch (err) {
       console.error('[RuntimeState] Failed to save:', err);
@@ -14,6 +14,7 @@ interface UseWorldPlayDevToolsOptions {
   currentRoom: GridRoom | null;
   worldState: GridWorldState | null;
   worldId: string;
+  userUuid?: string;
   roomStatesRef: MutableRefObject<Record<string, RoomInstanceState>>;
   setRoomNpcs: (npcs: CombatDisplayNPC[]) => void;
   setLocalMapStateCache: (state: LocalMapState | null) => void;
@@ -30,6 +31,7 @@ export function useWorldPlayDevTools({
   currentRoom,
   worldState,
   worldId,
+  userUuid,
   roomStatesRef,
   setRoomNpcs,
   setLocalMapStateCache,
@@ -94,6 +96,7 @@ export function useWorldPlayDevTools({
 
     try {
       await worldApi.updateWorld(worldId, {
+        user_uuid: userUuid,
         bonded_ally_uuid: '',
         time_state: defaultTimeState,
         npc_relationships: {},
@@ -123,6 +126,7 @@ export function useWorldPlayDevTools({
     setLocalMapStateCache,
     setRoomNpcs,
     resetRuntimeState,
+    userUuid,
     worldId,
     worldState,
   ]);
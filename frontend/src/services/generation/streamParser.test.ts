@@ -0,0 +1,59 @@
+/**
+ * Tests for streamParser.ts
+ *
+ * Covers:
+ * - KoboldCPP content and OpenAI delta chunks are yielded
+ * - reasoning_content events go to onReasoning, are never yielded and don't warn
+ */
+
+import { vi } from 'vitest';
+import { streamResponse } from './streamParser';
+
+function sseResponse(events: unknown[]): Response {
+  const body = events.map(event => `data: ${JSON.stringify(event)}\n\n`).join('') + 'data: [DONE]\n\n';
+  const chunks = [new TextEncoder().encode(body)];
+  const reader = {
+    read: async () => (chunks.length ? { done: false, value: chunks.shift() } : { done: true, value: undefined }),
+    releaseLock: () => {},
+  };
+  return { ok: true, status: 200, body: { getReader: () => reader } } as unknown as Response;
+}
+
+async function collect(response: Response, onReasoning?: (text: string) => void): Promise<string[]> {
+  const chunks: string[] = [];
+  for await (const chunk of streamResponse(response, undefined, onReasoning)) {
+    chunks.push(chunk);
+  }
+  return chunks;
+}
+
+describe('streamResponse', () => {
+  it('yields content and delta chunks', async () => {
+    const chunks = await collect(sseResponse([
+      { content: 'Hello' },
+      { choices: [{ delta: { content: ' there' } }] },
+    ]));
+    expect(chunks).toEqual(['Hello', ' there']);
+  });
+
+  it('routes reasoning_content to onReasoning without warnings', async () => {
+    const warn = vi.spyOn(console, 'warn').mockImplementation(() => {});
+    const reasoning: string[] = [];
+
+    const chunks = await collect(sseResponse([
+      { reasoning_content: 'Thinking it over.' },
+      { content: 'Answer' },
+      { reasoning_content: ' Done.' },
+    ]), text => reasoning.push(text));
+
+    expect(chunks).toEqual(['Answer']);
+    expect(reasoning).toEqual(['Thinking it over.', ' Done.']);
+    expect(warn).not.toHaveBeenCalled();
+    warn.mockRestore();
+  });
+
+  it('drops reasoning_content when no callback is given', async () => {
+    const chunks = await collect(sseResponse([{ reasoning_content: 'hidden' }, { content: 'shown' }]));
+    expect(chunks).toEqual(['shown']);
+  });
+});
@@ -7,6 +7,8 @@
  * - OpenAI/OpenRouter: { choices: [{ delta: { content } }] }
  * - Featherless: { raw_featherless_payload: string }
  * - Generic token format: { token: string }
+ * - Reasoning pass-through: { reasoning_content: string } (backend stream_reasoning
+ *   setting), handed to onReasoning and never yielded as reply text
  *
  * Extracted from PromptHandler.streamResponse() (promptHandler.ts:931-1098).
  */
@@ -18,11 +20,13 @@ const DEBUG = false;
  *
  * @param response - The fetch Response to stream from (must be SSE format)
  * @param characterName - Optional character name to strip from the first chunk (ghost suffix removal)
+ * @param onReasoning - Optional callback for reasoning_content events; they are dropped without it
  * @yields Individual text chunks as they arrive
  */
 export async function* streamResponse(
   response: Response,
-  characterName?: string
+  characterName?: string,
+  onReasoning?: (text: string) => void
 ): AsyncGenerator<string, void, unknown> {
   if (!response.ok) {
     throw new Error(`API responded with status ${response.status}`);
@@ -102,6 +106,14 @@ export async function* streamResponse(
               continue;
             }
 
+            // Reasoning pass-through is never part of the reply text
+            if (parsed.reasoning_content !== undefined) {
+              if (onReasoning && parsed.reasoning_content) {
+                onReasoning(parsed.reasoning_content);
+              }
+              continue;
+            }
+
             // Handle generic token format
             if (parsed.token !== undefined) {
               if (DEBUG) console.log(`[streamResponse] Yielding token: "${parsed.token}"`);
@@ -23,6 +23,7 @@ export interface GenerationSettings {
   frequency_penalty?: number;
   reasoning_model?: boolean;
   logit_shaper?: boolean;
+  prefix_stable_prompt?: boolean;
 }
 
 // Single source of truth for generation setting defaults.
@@ -48,7 +49,8 @@ export const DEFAULT_GENERATION_SETTINGS: GenerationSettings = {
   smoothing_factor: 0,
   presence_penalty: 0.10,
   frequency_penalty: 0.05,
-  logit_shaper: false
+  logit_shaper: false,
+  prefix_stable_prompt: false
 };
 
 export enum APIProvider {
@@ -4,6 +4,7 @@
 
 import { WorldState, GridSize, Position } from './worldV2';
 import { RoomNPC } from './room';
+import type { RoomLayoutData } from './localMap';
 import { NPCRelationship, TimeState } from './worldRuntime';
 import { CharacterInventory } from './inventory';
 
@@ -160,6 +161,9 @@ export interface UpdateWorldRequest {
   player_inventory?: CharacterInventory;
   ally_inventory?: CharacterInventory;
   room_states?: Record<string, RoomInstanceState>;
+  current_room_uuid?: string; // Requires user_uuid
+  // When set, runtime fields are saved as this user's progress instead of into the card PNG
+  user_uuid?: string;
 }
 
 /**
@@ -220,6 +224,7 @@ export interface WorldUserProgress {
   room_states?: Record<string, RoomInstanceState>;
 
   // Metadata
+  version?: number; // Incremented on every save; send as base_version when patching
   last_played_at?: string;
   created_at?: string;
   updated_at?: string;
@@ -242,6 +247,22 @@ export interface WorldUserProgressUpdate {
   room_states?: Record<string, RoomInstanceState>;
 }
 
+/**
+ * RFC 6902 JSON Patch operation against world progress
+ * (e.g. path "/npc_relationships/<npc_uuid>/affinity").
+ */
+export interface JsonPatchOperation {
+  op: 'add' | 'remove' | 'replace' | 'move' | 'copy' | 'test';
+  path: string;
+  value?: unknown;
+  from?: string;
+}
+
+export interface WorldUserProgressPatchResult {
+  version: number;
+  changed: string[]; // JSON pointers of the fields/entries written
+}
+
 /**
  * Summary of a user's progress for list endpoints.
  * Used in progress-summary to show save slots.
@@ -255,3 +276,35 @@ export interface WorldUserProgressSummary {
   current_room_uuid?: string;
   last_played_at?: string;
 }
+
+// =============================================================================
+// World Bundle (GET /api/world-cards-v2/{uuid}/bundle, streamed as NDJSON)
+// =============================================================================
+
+/** A placed room resolved from the index; `missing` when the room card is gone. */
+export interface WorldBundleRoom {
+  room_uuid: string;
+  position: Position;
+  missing: boolean;
+  name?: string;
+  description?: string;
+  first_mes?: string;
+  npcs?: RoomNPC[];
+  layout_data?: RoomLayoutData;
+  image_url?: string;
+}
+
+export interface WorldBundleNpc {
+  npc_uuid: string;
+  name: string;
+  personality?: string;
+  image_url: string;
+}
+
+/** Everything world play needs to enter a world, from one request. */
+export interface WorldBundle {
+  version: string;
+  world: WorldCard;
+  rooms: Record<string, WorldBundleRoom>;
+  npcs: Record<string, WorldBundleNpc>;
+}
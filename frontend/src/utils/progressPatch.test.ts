@@ -0,0 +1,26 @@
+import { buildProgressPatch } from './progressPatch';
+
+describe('buildProgressPatch', () => {
+  it('returns no operations for identical snapshots', () => {
+    const snapshot = { player_xp: 10, time_state: { currentDay: 1, messagesInDay: 0, totalMessages: 3, timeOfDay: 0.2 } };
+    expect(buildProgressPatch(snapshot, structuredClone(snapshot))).toEqual([]);
+  });
+
+  it('diffs NPC relationships per entry', () => {
+    const npc = (id: string, affinity: number) => ({
+      npc_uuid: id, affinity, tier: 'stranger', total_interactions: 0, flags: [], sentiment_history: [],
+    }) as never;
+    const previous = { npc_relationships: { a: npc('a', 20), b: npc('b', 20), 'c/d': npc('c/d', 5) } };
+    const next = { npc_relationships: { a: npc('a', 20), b: npc('b', 45) }, player_gold: 3 };
+
+    expect(buildProgressPatch(previous, next)).toEqual([
+      { op: 'remove', path: '/npc_relationships/c~1d' },
+      { op: 'add', path: '/npc_relationships/b', value: npc('b', 45) },
+      { op: 'add', path: '/player_gold', value: 3 },
+    ]);
+  });
+
+  it('skips fields left undefined', () => {
+    expect(buildProgressPatch({ player_xp: 1 }, { player_xp: undefined })).toEqual([]);
+  });
+});
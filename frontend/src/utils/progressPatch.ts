@@ -0,0 +1,55 @@
+// frontend/src/utils/progressPatch.ts
+// Builds RFC 6902 JSON Patch operations between two world progress snapshots
+
+import type { JsonPatchOperation, WorldUserProgressUpdate } from '../types/worldCard';
+
+// Progress maps the backend stores one row per entry; patched per entry
+const ENTITY_FIELDS = new Set<keyof WorldUserProgressUpdate>(['npc_relationships', 'room_states']);
+
+function escapeToken(token: string): string {
+  return token.replace(/~/g, '~0').replace(/\//g, '~1');
+}
+
+function jsonEqual(a: unknown, b: unknown): boolean {
+  return JSON.stringify(a) === JSON.stringify(b);
+}
+
+/**
+ * Operations that turn the `previous` saved progress into `next`.
+ * Fields left undefined in `next` are unchanged (same as a PUT).
+ * NPC relationships and room states are diffed per entry, so one NPC's
+ * affinity change sends (and writes) only that NPC.
+ */
+export function buildProgressPatch(
+  previous: WorldUserProgressUpdate,
+  next: WorldUserProgressUpdate
+): JsonPatchOperation[] {
+  const operations: JsonPatchOperation[] = [];
+
+  for (const field of Object.keys(next) as (keyof WorldUserProgressUpdate)[]) {
+    const value = next[field];
+    if (value === undefined) continue;
+
+    if (ENTITY_FIELDS.has(field)) {
+      const before = (previous[field] ?? {}) as Record<string, unknown>;
+      const after = value as Record<string, unknown>;
+      for (const id of Object.keys(before)) {
+        if (!(id in after)) {
+          operations.push({ op: 'remove', path: `/${field}/${escapeToken(id)}` });
+        }
+      }
+      for (const [id, entry] of Object.entries(after)) {
+        if (!jsonEqual(before[id], entry)) {
+          operations.push({ op: 'add', path: `/${field}/${escapeToken(id)}`, value: entry });
+        }
+      }
+      continue;
+    }
+
+    if (!jsonEqual(previous[field], value)) {
+      operations.push({ op: 'add', path: `/${field}`, value });
+    }
+  }
+
+  return operations;
+}
@@ -0,0 +1,65 @@
+import { bundleRoomNpcs, bundleRoomToGridRoom } from './roomCardAdapter';
+import type { WorldBundle, WorldBundleRoom, WorldRoomPlacement } from '../types/worldCard';
+
+const room: WorldBundleRoom = {
+  room_uuid: 'hall',
+  position: { x: 0, y: 0 },
+  missing: false,
+  name: 'Hall',
+  description: 'A long hall',
+  first_mes: 'You enter the hall.',
+  npcs: [
+    { character_uuid: 'guard', hostile: true, monster_level: 3 },
+    { character_uuid: 'deleted' },
+  ],
+};
+
+const bundle = {
+  version: 'v1',
+  world: {} as WorldBundle['world'],
+  rooms: { hall: room },
+  npcs: {
+    guard: { npc_uuid: 'guard', name: 'Guard', personality: 'stern', image_url: '/api/character-image/guard.png' },
+    ghost: { npc_uuid: 'ghost', name: 'Ghost', image_url: '/api/character-image/ghost.png' },
+  },
+} as WorldBundle;
+
+describe('bundleRoomToGridRoom', () => {
+  it('maps bundle fields like a room card', () => {
+    const gridRoom = bundleRoomToGridRoom(room, { x: 2, y: 3 });
+    expect(gridRoom).toMatchObject({
+      id: 'hall',
+      name: 'Hall',
+      introduction_text: 'You enter the hall.',
+      position: { x: 2, y: 3 },
+    });
+    expect(gridRoom.npcs).toHaveLength(2);
+  });
+
+  it('prefers placement instance NPCs and image', () => {
+    const placement = {
+      room_uuid: 'hall',
+      grid_position: { x: 0, y: 0 },
+      instance_npcs: [{ character_uuid: 'ghost' }],
+      instance_image_path: 'bg/hall.png',
+    } as WorldRoomPlacement;
+    const gridRoom = bundleRoomToGridRoom(room, { x: 0, y: 0 }, placement);
+    expect(gridRoom.npcs.map((npc) => npc.character_uuid)).toEqual(['ghost']);
+    expect(gridRoom.image_path).toBe('bg/hall.png');
+  });
+});
+
+describe('bundleRoomNpcs', () => {
+  it('merges summaries with combat fields and drops unknown NPCs', () => {
+    expect(bundleRoomNpcs(bundle, bundleRoomToGridRoom(room, { x: 0, y: 0 }))).toEqual([
+      {
+        id: 'guard',
+        name: 'Guard',
+        imageUrl: '/api/character-image/guard.png',
+        personality: 'stern',
+        hostile: true,
+        monster_level: 3,
+      },
+    ]);
+  });
+});
@@ -8,7 +8,8 @@
 
 import type { RoomCard } from '../types/room';
 import type { GridRoom } from '../types/worldGrid';
-import type { WorldRoomPlacement } from '../types/worldCard';
+import type { WorldBundle, WorldBundleRoom, WorldRoomPlacement } from '../types/worldCard';
+import type { CombatDisplayNPC } from '../types/worldGrid';
 
 /**
  * Converts a RoomCard to a GridRoom for display in the grid-based UI.
@@ -131,3 +132,47 @@ export function placementToGridRoomStub(placement: WorldRoomPlacement): GridRoom
         image_path: placement.instance_image_path,
     };
 }
+
+/**
+ * Converts a world bundle room entry to a GridRoom.
+ * Same precedence rules as roomCardToGridRoom: instance NPCs and images
+ * from the placement override the room card's defaults.
+ */
+export function bundleRoomToGridRoom(
+    room: WorldBundleRoom,
+    position: { x: number; y: number },
+    placement?: WorldRoomPlacement
+): GridRoom {
+    return {
+        id: room.room_uuid,
+        name: room.name ?? placement?.instance_name ?? 'Unknown Room',
+        description: room.description ?? '',
+        introduction_text: room.first_mes || '',
+        npcs: placement?.instance_npcs ? [...placement.instance_npcs] : [...(room.npcs || [])],
+        events: [],
+        connections: { north: null, south: null, east: null, west: null },
+        position,
+        image_path: placement?.instance_image_path || undefined,
+        layout_data: room.layout_data,
+    };
+}
+
+/**
+ * Display data for a room's NPCs from the bundle's NPC summaries,
+ * merged with the room's combat fields. NPCs whose character card no
+ * longer exists are dropped (same as resolveNpcDisplayData).
+ */
+export function bundleRoomNpcs(bundle: WorldBundle, room: GridRoom): CombatDisplayNPC[] {
+    return room.npcs.flatMap((roomNpc) => {
+        const npc = bundle.npcs[roomNpc.character_uuid];
+        if (!npc) return [];
+        return [{
+            id: npc.npc_uuid,
+            name: npc.name || 'Unknown',
+            imageUrl: npc.image_url,
+            personality: npc.personality,
+            hostile: roomNpc.hostile,
+            monster_level: roomNpc.monster_level,
+        }];
+    });
+}
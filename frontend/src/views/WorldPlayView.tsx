@@ -332,6 +332,7 @@ export function WorldPlayView({ worldId: propWorldId }: WorldPlayViewProps) {
     currentRoom,
     worldState,
     worldId,
+    userUuid: currentUser?.user_uuid,
     roomStatesRef,
     setRoomNpcs,
     setLocalMapStateCache,
@@ -344,7 +345,7 @@ export function WorldPlayView({ worldId: propWorldId }: WorldPlayViewProps) {
     transitionState, isTransitioning, entryDirection,
     handleNavigate, handleLocalMapExitClick,
   } = useRoomTransition({
-    worldCard, worldState, worldId: worldId || undefined,
+    worldCard, worldBundle: worldLoader.result?.worldBundle ?? null, worldState, worldId: worldId || undefined,
     currentRoom, setCurrentRoom, roomNpcs, setRoomNpcs, roomStatesRef,
     messages, setMessages: setWorldPlayMessages, addMessage: appendWorldPlayMessage,
     activeNpcId, activeNpcName, clearConversationTarget, clearBondedAlly,
@@ -6,7 +6,7 @@ import type { CharacterInventory } from '../types/inventory';
 import type { ExitDirection, LocalMapConfig, TilePosition } from '../types/localMap';
 import type { CharacterCard } from '../types/schema';
 import { isValidThinFrame } from '../types/schema';
-import type { WorldCard, RoomInstanceState } from '../types/worldCard';
+import type { WorldBundle, WorldCard, RoomInstanceState } from '../types/worldCard';
 import type { CombatDisplayNPC, GridRoom, GridWorldState } from '../types/worldGrid';
 import type { NPCRelationship, TimeState } from '../types/worldRuntime';
 import type { WorldPlayApiConfig, WorldPlayCurrentUser } from './contracts';
@@ -14,7 +14,7 @@ import { WORLD_PLAY_DEFAULT_PLAYER_TILE } from './config';
 import { applySavedRoomState, findRoomGridPosition, type GridCoordinates } from './roomTransition';
 import type { PlayerProgression } from '../utils/progressionUtils';
 import { resolveNpcDisplayData } from '../utils/worldStateApi';
-import { roomCardToGridRoom } from '../utils/roomCardAdapter';
+import { bundleRoomNpcs, bundleRoomToGridRoom, roomCardToGridRoom } from '../utils/roomCardAdapter';
 import { getSpawnPosition } from '../utils/localMapUtils';
 import { preloadRoomTextures } from '../utils/texturePreloader';
 import { generateThinFrame, mergeThinFrameIntoCard } from '../services/thinFrameService';
@@ -59,6 +59,7 @@ export async function raceWithTimeout<T>(promise: Promise<T>, timeoutMs: number)
 export async function prepareTargetRoom(options: {
   worldState: GridWorldState;
   worldCard: WorldCard;
+  worldBundle?: WorldBundle | null;
   targetRoomStub: GridRoom;
   entryDir: ExitDirection | null;
   localMapConfig: LocalMapConfig;
@@ -67,6 +68,7 @@ export async function prepareTargetRoom(options: {
   const {
     worldState,
     worldCard,
+    worldBundle,
     targetRoomStub,
     entryDir,
     localMapConfig,
@@ -81,27 +83,35 @@ export async function prepareTargetRoom(options: {
   const worldData = worldCard.data.extensions.world_data;
   const placement = worldData.rooms.find((room) => room.room_uuid === targetRoomStub.id);
 
+  // Rooms loaded with the world bundle need no request; otherwise fetch the card
+  const bundleRoom = placement ? worldBundle?.rooms[placement.room_uuid] : undefined;
   let targetRoom = targetRoomStub;
-  if (placement) {
-    try {
-      const roomCard = await roomApi.getRoom(placement.room_uuid);
-      targetRoom = roomCardToGridRoom(roomCard, roomGridPosition, placement);
-    } catch {
-      targetRoom = targetRoomStub;
+  let mergedNpcs: CombatDisplayNPC[];
+  if (worldBundle && bundleRoom && !bundleRoom.missing) {
+    targetRoom = bundleRoomToGridRoom(bundleRoom, roomGridPosition, placement);
+    mergedNpcs = bundleRoomNpcs(worldBundle, targetRoom);
+  } else {
+    if (placement) {
+      try {
+        const roomCard = await roomApi.getRoom(placement.room_uuid);
+        targetRoom = roomCardToGridRoom(roomCard, roomGridPosition, placement);
+      } catch {
+        targetRoom = targetRoomStub;
+      }
     }
-  }
 
-  const resolvedNpcs = await resolveNpcDisplayData(
-    targetRoom.npcs.map((npc) => npc.character_uuid)
-  );
-  const mergedNpcs = resolvedNpcs.map((npc) => {
-    const roomNpc = targetRoom.npcs.find((candidate) => candidate.character_uuid === npc.id);
-    return {
-      ...npc,
-      hostile: roomNpc?.hostile,
-      monster_level: roomNpc?.monster_level,
-    };
-  });
+    const resolvedNpcs = await resolveNpcDisplayData(
+      targetRoom.npcs.map((npc) => npc.character_uuid)
+    );
+    mergedNpcs = resolvedNpcs.map((npc) => {
+      const roomNpc = targetRoom.npcs.find((candidate) => candidate.character_uuid === npc.id);
+      return {
+        ...npc,
+        hostile: roomNpc?.hostile,
+        monster_level: roomNpc?.monster_level,
+      };
+    });
+  }
 
   return {
     room: targetRoom,
@@ -207,6 +217,8 @@ export async function generateMissingThinFrames(options: {
 
 export async function persistRuntimeState(options: {
   worldId: string;
+  userUuid: string | undefined;
+  roomId: string;
   roomGridPosition: GridCoordinates;
   playerProgression: PlayerProgression;
   keepActiveNpc: boolean;
@@ -219,6 +231,8 @@ export async function persistRuntimeState(options: {
 }): Promise<void> {
   const {
     worldId,
+    userUuid,
+    roomId,
     roomGridPosition,
     playerProgression,
     keepActiveNpc,
@@ -230,8 +244,7 @@ export async function persistRuntimeState(options: {
     roomStates,
   } = options;
 
-  await worldApi.updateWorld(worldId, {
-    player_position: roomGridPosition,
+  const runtimeState = {
     player_xp: playerProgression.xp,
     player_level: playerProgression.level,
     player_gold: playerProgression.gold,
@@ -241,7 +254,15 @@ export async function persistRuntimeState(options: {
     player_inventory: playerInventory,
     ally_inventory: (keepActiveNpc ? allyInventory : null) ?? undefined,
     room_states: roomStates,
-  });
+  };
+
+  if (userUuid) {
+    // Per-user progress is a small DB write; the world PNG is left untouched
+    await worldApi.saveProgress(worldId, userUuid, { ...runtimeState, current_room_uuid: roomId });
+    return;
+  }
+
+  await worldApi.updateWorld(worldId, { ...runtimeState, player_position: roomGridPosition });
 }
 
 export async function fetchAdventureContext(worldId: string, userUuid: string): Promise<AdventureContext> {